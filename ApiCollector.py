@@ -0,0 +1,247 @@
+"""
+为自动完成收集标准库和已安装包的API条目。
+
+有源代码的模块用ast静态解析，不导入模块（避免执行第三方代码）；只有内置和扩展模块的标准库
+才导入后用inspect获取成员和签名。条目为QsciAPIs的格式：每行一个"模块.名称(参数)"。
+缓存键由解释器版本和各包的版本决定，任何一个变化都需要重新收集。
+本模块只依赖标准库，作为单独的进程执行：
+
+    python ApiCollector.py <缓存目录>
+
+输出一行JSON：[条目文件路径, 准备好的条目的缓存路径]。
+"""
+import ast
+import builtins
+import hashlib
+import importlib
+import importlib.metadata
+import inspect
+import json
+import os
+import pkgutil
+import site
+import sys
+import sysconfig
+
+API_FORMAT_VERSION = 1
+MAX_SIGNATURE_LENGTH = 120
+MAX_SOURCE_SIZE = 2 * 1024 * 1024  # 超过该大小的源文件不解析
+# 不提供给自动完成的标准库模块
+SKIPPED_MODULES = frozenset(('test', 'idlelib', 'lib2to3', 'turtledemo', 'ensurepip', 'pydoc_data', 'encodings',
+                             'this', 'antigravity', '__main__', '__phello__'))
+# 在导入时才绑定到其他模块的名称
+MODULE_ALIASES = {'os.path': 'ntpath' if os.name == 'nt' else 'posixpath'}
+
+def cacheKey():
+    """
+    :return: 由解释器和已安装包的版本计算的键
+    """
+    parts = [str(API_FORMAT_VERSION), sys.version, sys.executable]
+    packages = set()
+    for distribution in importlib.metadata.distributions():
+        try:
+            packages.add(f"{distribution.metadata['Name']}=={distribution.version}")
+        except Exception:
+            continue
+    parts.extend(sorted(packages))
+    return hashlib.blake2b('\n'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+def formatArguments(arguments, isMethod=False):
+    """
+    :param arguments: ast.arguments
+    :param isMethod: 是否去掉第一个参数(self/cls)
+    """
+    if isMethod:
+        if arguments.posonlyargs:
+            arguments.posonlyargs = arguments.posonlyargs[1:]
+        elif arguments.args:
+            arguments.args = arguments.args[1:]
+    text = ast.unparse(arguments)
+    if len(text) > MAX_SIGNATURE_LENGTH:
+        text = text[:MAX_SIGNATURE_LENGTH - 3] + '...'
+    return f"({text})"
+
+def sourceEntries(module, path, members=True):
+    """
+    解析模块源代码中的公开的函数、类、方法和变量
+    :param members: 是否包含类的方法
+    """
+    try:
+        if os.path.getsize(path) > MAX_SOURCE_SIZE:
+            return [module]
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return [module]
+    entries = [module]
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if not node.name.startswith('_'):
+                entries.append(f"{module}.{node.name}{formatArguments(node.args)}")
+        elif isinstance(node, ast.ClassDef):
+            if node.name.startswith('_'):
+                continue
+            initArguments = '()'
+            methods = []
+            for member in node.body:
+                if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    if member.name == '__init__':
+                        initArguments = formatArguments(member.args, True)
+                    elif members and not member.name.startswith('_'):
+                        isStatic = any(isinstance(d, ast.Name) and d.id == 'staticmethod' for d in member.decorator_list)
+                        methods.append(f"{module}.{node.name}.{member.name}{formatArguments(member.args, not isStatic)}")
+            entries.append(f"{module}.{node.name}{initArguments}")
+            entries.extend(methods)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name) and not target.id.startswith('_'):
+                    entries.append(f"{module}.{target.id}")
+    return entries
+
+def signatureOf(value):
+    try:
+        text = str(inspect.signature(value))
+    except (TypeError, ValueError):
+        return '(...)'
+    if len(text) > MAX_SIGNATURE_LENGTH:
+        text = text[:MAX_SIGNATURE_LENGTH - 4] + '...)'
+    return text
+
+def objectEntries(prefix, value, depth=1):
+    """
+    通过inspect获取对象的公开成员
+    :param depth: 继续展开类成员的层数
+    """
+    entries = []
+    for name in sorted(dir(value)):
+        if name.startswith('_'):
+            continue
+        try:
+            member = getattr(value, name)
+        except Exception:
+            continue
+        if inspect.isclass(member):
+            entries.append(f"{prefix}.{name}{signatureOf(member)}")
+            if depth > 0:
+                entries.extend(objectEntries(f"{prefix}.{name}", member, depth - 1))
+        elif callable(member):
+            entries.append(f"{prefix}.{name}{signatureOf(member)}")
+        elif not inspect.ismodule(member):
+            entries.append(f"{prefix}.{name}")
+    return entries
+
+def builtinEntries():
+    """
+    :return: 内置函数和类的条目（不带模块前缀）
+    """
+    entries = []
+    for name in sorted(dir(builtins)):
+        if name.startswith('_'):
+            continue
+        value = getattr(builtins, name)
+        entries.append(f"{name}{signatureOf(value)}" if callable(value) else name)
+    return entries
+
+def compiledEntries(module):
+    """
+    导入没有源代码的标准库模块，获取其成员
+    """
+    try:
+        value = importlib.import_module(module)
+    except Exception:
+        return [module]
+    return [module] + objectEntries(module, value, 0)
+
+def sitePackages():
+    paths = list(site.getsitepackages()) if hasattr(site, 'getsitepackages') else []
+    userSite = site.getusersitepackages() if hasattr(site, 'getusersitepackages') else None
+    if userSite:
+        paths.append(userSite)
+    return [path for path in paths if os.path.isdir(path)]
+
+def moduleSources():
+    """
+    :return: [(模块名, 源文件路径或None, 是否包含类的方法)]，包含顶层模块和包的直接子模块
+    """
+    stdlib = sysconfig.get_paths()['stdlib']
+    modules = []
+    seen = set()
+
+    def add(name, finder, isPackage):
+        if name in seen or name.split('.')[0] in SKIPPED_MODULES:
+            return
+        seen.add(name)
+        try:
+            spec = finder.find_spec(name.rsplit('.', 1)[-1]) if hasattr(finder, 'find_spec') else None
+        except Exception:
+            spec = None
+        origin = spec.origin if spec is not None else None
+        stub = stubFor(origin)
+        if origin and origin.endswith('.py'):
+            modules.append((name, origin, True))
+        elif stub:
+            # 扩展模块附带的类型存根可以静态解析，不需要导入。存根通常描述C++库的绑定（如PyQt5），
+            # 类的方法数以万计，会使补全列表的匹配明显变慢，只保留模块级的名称
+            modules.append((name, stub, False))
+        elif name.split('.')[0] in sys.builtin_module_names or (origin and stdlibModule(name)):
+            modules.append((name, None, True))
+        if isPackage and '.' not in name and spec is not None and spec.submodule_search_locations:
+            for info in pkgutil.iter_modules(spec.submodule_search_locations, name + '.'):
+                if not info.name.rsplit('.', 1)[-1].startswith('_'):
+                    add(info.name, info.module_finder, False)
+
+    def stubFor(origin):
+        if not origin or origin.endswith('.py'):
+            return None
+        directory, fileName = os.path.split(origin)
+        stub = os.path.join(directory, fileName.split('.')[0] + '.pyi')
+        return stub if os.path.isfile(stub) else None
+
+    def stdlibModule(name):
+        names = getattr(sys, 'stdlib_module_names', None)
+        return name.split('.')[0] in names if names is not None else True
+
+    for name in sorted(sys.builtin_module_names):
+        if not name.startswith('_'):
+            seen.add(name)
+            modules.append((name, None, True))
+    for info in pkgutil.iter_modules([stdlib, os.path.join(stdlib, 'lib-dynload')] + sitePackages()):
+        if not info.name.startswith('_'):
+            add(info.name, info.module_finder, info.ispkg)
+    for alias, target in MODULE_ALIASES.items():
+        # 标准库模块可能被冻结在解释器中，直接使用标准库目录中的源文件
+        source = os.path.join(stdlib, target + '.py')
+        if os.path.isfile(source):
+            modules.append((alias, source, True))
+    return modules
+
+def collect(path):
+    """
+    收集全部条目并写入QsciAPIs可以加载的文件
+    :param path: 输出文件路径
+    :return: 条目数
+    """
+    entries = builtinEntries()
+    for module, source, members in moduleSources():
+        entries.extend(sourceEntries(module, source, members) if source else compiledEntries(module))
+    entries = sorted(set(entries))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(entries))
+        f.write('\n')
+    os.replace(temporary, path)
+    return len(entries)
+
+def main():
+    directory = sys.argv[1]
+    key = cacheKey()
+    rawPath = os.path.join(directory, f"{key}.api")
+    if not os.path.isfile(rawPath):
+        collect(rawPath)
+    print(json.dumps([rawPath, os.path.join(directory, f"{key}.prepared")]))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
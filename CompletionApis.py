@@ -0,0 +1,202 @@
+from PyQt5.Qsci import QsciAPIs
+from PyQt5.QtCore import *
+import json
+import os
+import sqlite3
+import sys
+
+from PythonLexer import PythonLexer
+from SymbolIndex import SymbolIndex
+
+class ApiTaskSignals(QObject):
+    """
+    API任务的信号集合
+    """
+    finished = pyqtSignal(object, object)  # 任务, 结果（失败时为None）
+
+class WorkspaceApiTask(QRunnable):
+    """
+    从工作区的符号索引中读取自动完成的条目
+    """
+
+    def __init__(self, indexPath, root):
+        super().__init__()
+        self.indexPath = indexPath
+        self.root = root
+        self.signals = ApiTaskSignals()
+
+    def run(self):
+        entries = None
+        try:
+            index = SymbolIndex(self.indexPath, self.root)
+            try:
+                entries = sorted(index.apiEntries())
+            finally:
+                index.close()
+        except (sqlite3.Error, OSError):
+            entries = None
+        try:
+            self.signals.finished.emit(self, entries)
+        except RuntimeError:
+            # 程序退出时信号对象可能已经销毁
+            pass
+
+class CompletionApis(QObject):
+    """
+    Python自动完成的API，所有Python编辑器共享：标准库、已安装的包和工作区的符号。
+    条目在单独的进程中收集（ApiCollector.py），QsciAPIs在自己的线程中准备，准备好的结果按解释器和包的版本缓存，
+    下次启动直接加载。准备完成之前编辑器照常打开，只是没有API的补全
+    """
+    apisReady = pyqtSignal()  # 准备好的API已经可以使用
+
+    COLLECTOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ApiCollector.py')
+
+    __instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+        self.collector = None  # 收集条目的QProcess
+        # QsciAPIs属于创建它的词法分析器，不能随某个编辑器一起销毁
+        self.lexer = PythonLexer(self)
+        self.apis = QsciAPIs(self.lexer)
+        self.apis.apiPreparationFinished.connect(self.onPreparationFinished)
+        self.apis.apiPreparationCancelled.connect(self.onPreparationCancelled)
+        self.started = False
+        self.rawPath = None  # 标准库和已安装包的条目文件
+        self.preparedPath = None  # 准备好的条目的缓存文件
+        self.workspaceEntries = []
+        self.preparing = False
+        self.saveWhenPrepared = False  # 本次准备只包含条目文件，完成后写入缓存
+        self.dirty = False  # 准备期间工作区的条目发生了变化
+        self.workspaceTask = None
+
+    @classmethod
+    def instance(cls):
+        """
+        获取全局共享的自动完成API
+        :return: CompletionApis实例
+        """
+        if cls.__instance is None:
+            cls.__instance = CompletionApis(QCoreApplication.instance())
+        return cls.__instance
+
+    @classmethod
+    def existingInstance(cls):
+        """
+        :return: 已经创建的实例，没有打开过Python文件时为None
+        """
+        return cls.__instance
+
+    @staticmethod
+    def cacheDirectory():
+        cache = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+        return os.path.join(cache, 'SYide', 'apis')
+
+    def attach(self, lexer):
+        """
+        让编辑器的词法分析器使用共享的API，第一次调用时在后台开始收集条目
+        :param lexer: PythonLexer
+        """
+        lexer.setAPIs(self.apis)
+        if not self.started:
+            self.started = True
+            # 收集可能需要几秒，在单独的进程中进行，退出时可以直接结束
+            self.collector = QProcess(self)
+            self.collector.finished.connect(self.onCollectorFinished)
+            self.collector.start(sys.executable, [self.COLLECTOR_SCRIPT, self.cacheDirectory()])
+
+    def onCollectorFinished(self, exitCode, exitStatus):
+        output = bytes(self.collector.readAllStandardOutput())
+        self.collector.deleteLater()
+        self.collector = None
+        if exitStatus != QProcess.NormalExit or exitCode != 0:
+            return
+        try:
+            self.rawPath, self.preparedPath = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            return
+        if os.path.isfile(self.preparedPath) and self.apis.loadPrepared(self.preparedPath):
+            self.apisReady.emit()
+            if self.workspaceEntries:
+                self.__prepare()
+        else:
+            self.__prepare(baseOnly=True)
+
+    def updateWorkspace(self, indexPath, root):
+        """
+        工作区的符号索引更新后在后台重新读取工作区的条目
+        :param indexPath: 索引数据库路径
+        :param root: 工作区根目录
+        """
+        # 之前未完成的读取结果在onWorkspaceEntries中丢弃
+        task = WorkspaceApiTask(indexPath, root)
+        task.signals.finished.connect(self.onWorkspaceEntries)
+        self.workspaceTask = task
+        self.threadPool.start(task)
+
+    def onWorkspaceEntries(self, task, entries):
+        if task is not self.workspaceTask:
+            return
+        self.workspaceTask = None
+        if entries is None or entries == self.workspaceEntries:
+            return
+        self.workspaceEntries = entries
+        if self.preparing:
+            self.dirty = True
+        elif self.rawPath is not None:
+            self.__prepare()
+
+    def __prepare(self, baseOnly=False):
+        """
+        重新加载条目并在QsciAPIs的线程中准备，完成之前继续使用之前准备好的结果
+        :param baseOnly: 只包含标准库和已安装包的条目，完成后写入缓存
+        """
+        self.apis.clear()
+        if not self.apis.load(self.rawPath):
+            return
+        if not baseOnly:
+            for entry in self.workspaceEntries:
+                self.apis.add(entry)
+        self.preparing = True
+        self.saveWhenPrepared = baseOnly
+        self.dirty = baseOnly and bool(self.workspaceEntries)
+        self.apis.prepare()
+
+    def onPreparationFinished(self):
+        self.preparing = False
+        if self.saveWhenPrepared:
+            self.saveWhenPrepared = False
+            self.apis.savePrepared(self.preparedPath)
+        self.apisReady.emit()
+        if self.dirty:
+            self.__prepare()
+
+    def onPreparationCancelled(self):
+        self.preparing = False
+        self.saveWhenPrepared = False
+        if self.dirty:
+            self.__prepare()
+
+    def shutdown(self):
+        """
+        结束收集进程并等待正在进行的准备完成，退出程序前调用
+        """
+        self.dirty = False
+        if self.preparing:
+            # 取消或销毁正在准备的QsciAPIs会在准备线程仍在运行时删除它而导致程序中止，
+            # 准备通常在100毫秒内完成，等待它结束
+            loop = QEventLoop()
+            self.apis.apiPreparationFinished.connect(loop.quit)
+            self.apis.apiPreparationCancelled.connect(loop.quit)
+            if self.preparing:
+                loop.exec_(QEventLoop.ExcludeUserInputEvents)
+        if self.collector is not None:
+            # 条目文件写完后才替换，结束进程不会留下不完整的文件
+            self.collector.finished.disconnect(self.onCollectorFinished)
+            self.collector.kill()
+            self.collector.waitForFinished(1000)
+            self.collector = None
+        # 只剩读取工作区条目的任务，很快结束
+        self.threadPool.waitForDone()
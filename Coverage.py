@@ -0,0 +1,68 @@
+from collections import OrderedDict
+import os
+
+from CoverageRunner import contentHash
+
+class CoverageCache:
+    """
+    行覆盖率缓存，以文件内容的哈希为键：文件重新打开时只要内容没有变化，
+    不需要重新运行即可恢复覆盖率标记；内容修改后的文件不再匹配旧的结果
+    """
+    MAX_ENTRIES = 1000
+
+    def __init__(self):
+        self.entries = OrderedDict()  # 内容哈希 -> (执行过的行, 可执行的行)，行号从1开始
+
+    def update(self, result):
+        """
+        加入CoverageRunner写出的结果，同一内容的旧结果被替换
+        :param result: {'files': {文件: {'hash', 'executed', 'executable'}}}
+        :return: [(文件, 执行过的行数, 可执行的行数), ...]
+        """
+        summary = []
+        for filePath, entry in sorted((result.get('files') or {}).items()):
+            executed = frozenset(entry['executed'])
+            executable = frozenset(entry['executable'])
+            self.entries.pop(entry['hash'], None)
+            self.entries[entry['hash']] = (executed, executable)
+            summary.append((filePath, len(executed), len(executable)))
+        while len(self.entries) > self.MAX_ENTRIES:
+            self.entries.popitem(last=False)
+        return summary
+
+    def lookup(self, data):
+        """
+        查找内容对应的覆盖率
+        :param data: 文档字节
+        :return: (执行过的行, 可执行的行)，没有结果时为None
+        """
+        if not self.entries:
+            return None
+        key = contentHash(data)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+
+    def isEmpty(self):
+        return not self.entries
+
+def formatSummary(summary):
+    """
+    格式化覆盖率摘要
+    :param summary: CoverageCache.update的返回值
+    :return: 每个文件一行的文本列表，最后一行为合计
+    """
+    lines = []
+    totalExecuted = totalExecutable = 0
+    for filePath, executed, executable in summary:
+        percent = executed * 100.0 / executable if executable else 100.0
+        lines.append(f"{os.path.basename(filePath)}: {executed}/{executable} lines ({percent:.1f}%) - {filePath}")
+        totalExecuted += executed
+        totalExecutable += executable
+    percent = totalExecuted * 100.0 / totalExecutable if totalExecutable else 100.0
+    lines.append(f"Total: {totalExecuted}/{totalExecutable} lines ({percent:.1f}%)")
+    return lines
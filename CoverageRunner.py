@@ -0,0 +1,177 @@
+"""
+行覆盖率统计，在RunLauncher的子进程中使用：
+
+    python RunLauncher.py <metrics文件> --coverage <结果文件> <script> [args...]
+
+Python 3.12及以上使用sys.monitoring的LINE事件，每个位置第一次执行后即返回DISABLE，
+之后不再产生事件，开销接近直接运行；更早的版本回退到sys.settrace。
+标准库和第三方库中的文件不统计。结果以JSON写入结果文件。
+"""
+import hashlib
+import json
+import os
+import runpy
+import site
+import sys
+import sysconfig
+import threading
+
+def normalizePath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def contentHash(data):
+    """
+    计算文件内容的哈希，换行符统一为\\n，与编辑器中的文档一致
+    :param data: 文件字节
+    """
+    return hashlib.blake2b(data.replace(b'\r\n', b'\n'), digest_size=16).hexdigest()
+
+# 运行器自身、标准库和第三方库不统计
+IGNORED_FILES = {normalizePath(path) for path in (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'RunLauncher.py'), __file__, runpy.__file__)}
+
+def libraryDirectories():
+    """
+    :return: 标准库和第三方库的目录，包括发行版的site目录（如Debian的dist-packages）和用户site目录
+    """
+    paths = [sysconfig.get_paths().get(name) for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')]
+    if hasattr(site, 'getsitepackages'):
+        paths.extend(site.getsitepackages())
+    if hasattr(site, 'getusersitepackages'):
+        paths.append(site.getusersitepackages())
+    return tuple({normalizePath(path) + os.sep for path in paths if path})
+
+IGNORED_DIRECTORIES = libraryDirectories()
+
+def isMeasured(filename, cache={}):
+    measured = cache.get(filename)
+    if measured is None:
+        if filename.startswith('<'):
+            measured = False
+        else:
+            path = normalizePath(filename)
+            measured = path not in IGNORED_FILES and not path.startswith(IGNORED_DIRECTORIES)
+        cache[filename] = measured
+    return measured
+
+class MonitoringCollector:
+    """
+    基于sys.monitoring（PEP 669）的收集器
+    """
+
+    def __init__(self):
+        self.toolId = None
+        self.lines = {}  # 文件 -> 执行过的行号集合
+
+    @staticmethod
+    def isSupported():
+        return hasattr(sys, 'monitoring')
+
+    def start(self):
+        monitoring = sys.monitoring
+        for toolId in (monitoring.COVERAGE_ID, monitoring.OPTIMIZER_ID):
+            if monitoring.get_tool(toolId) is None:
+                self.toolId = toolId
+                break
+        else:
+            raise RuntimeError("No free sys.monitoring tool id")
+        monitoring.use_tool_id(self.toolId, 'syide-coverage')
+        monitoring.register_callback(self.toolId, monitoring.events.LINE, self.onLine)
+        monitoring.set_events(self.toolId, monitoring.events.LINE)
+
+    def stop(self):
+        monitoring = sys.monitoring
+        monitoring.set_events(self.toolId, 0)
+        monitoring.register_callback(self.toolId, monitoring.events.LINE, None)
+        monitoring.free_tool_id(self.toolId)
+
+    def onLine(self, code, line):
+        filename = code.co_filename
+        if isMeasured(filename):
+            lines = self.lines.get(filename)
+            if lines is None:
+                lines = self.lines[filename] = set()
+            lines.add(line)
+        # 每个位置只需要记录一次
+        return sys.monitoring.DISABLE
+
+class TraceCollector:
+    """
+    不支持sys.monitoring时的回退实现，只跟踪需要统计的文件中的帧
+    """
+
+    def __init__(self):
+        self.lines = {}
+
+    def start(self):
+        threading.settrace(self.onCall)
+        sys.settrace(self.onCall)
+
+    def stop(self):
+        sys.settrace(None)
+        threading.settrace(None)
+
+    def onCall(self, frame, event, arg):
+        filename = frame.f_code.co_filename
+        if not isMeasured(filename):
+            return None
+        lines = self.lines.get(filename)
+        if lines is None:
+            lines = self.lines[filename] = set()
+
+        def onLine(frame, event, arg):
+            if event == 'line':
+                lines.add(frame.f_lineno)
+            return onLine
+        return onLine
+
+def executableLines(source, filename):
+    """
+    编译源码，收集所有代码对象的行号表中出现的行
+    """
+    lines = set()
+    codes = [compile(source, filename, 'exec', dont_inherit=True)]
+    while codes:
+        code = codes.pop()
+        for start, end, line in code.co_lines():
+            if line is not None and line > 0:
+                lines.add(line)
+        codes.extend(const for const in code.co_consts if hasattr(const, 'co_lines'))
+    return lines
+
+def buildResult(mode, executed):
+    files = {}
+    for filename, lines in executed.items():
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+            executable = executableLines(data, filename)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        files[os.path.abspath(filename)] = {
+            'hash': contentHash(data),
+            'executed': sorted(lines & executable),
+            'executable': sorted(executable),
+        }
+    return {'mode': mode, 'files': files}
+
+def coverage(run, resultPath):
+    """
+    统计run执行的行，结束时（包括异常和sys.exit）写出结果
+    :param run: 无参数的可调用对象
+    :param resultPath: 结果文件路径
+    """
+    if MonitoringCollector.isSupported():
+        collector, mode = MonitoringCollector(), 'monitoring'
+    else:
+        collector, mode = TraceCollector(), 'settrace'
+    collector.start()
+    try:
+        run()
+    finally:
+        collector.stop()
+        try:
+            with open(resultPath, 'w', encoding='utf-8') as f:
+                json.dump(buildResult(mode, collector.lines), f)
+        except OSError as e:
+            print(f"Cannot write coverage result: {e}", file=sys.stderr)
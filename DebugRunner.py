@@ -0,0 +1,401 @@
+"""
+调试子进程入口，由Debugger.DebugSession启动：
+
+    python DebugRunner.py <port> <script> [args...]
+
+通过本地TCP连接与IDE交换JSON行消息。Python 3.12及以上使用sys.monitoring，
+只有设置了断点的代码对象才会产生LINE事件，其余位置在第一次触发后即被禁用；
+更早的版本回退到基于bdb的settrace实现。
+"""
+import bdb
+import functools
+import json
+import os
+import queue
+import runpy
+import site
+import socket
+import sys
+import sysconfig
+import threading
+
+@functools.lru_cache(maxsize=None)
+def normalizePath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+RUNNER_FILE = normalizePath(__file__)
+
+def libraryDirectories():
+    paths = [sysconfig.get_paths().get(name) for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')]
+    if hasattr(site, 'getsitepackages'):
+        paths.extend(site.getsitepackages())
+    if hasattr(site, 'getusersitepackages'):
+        paths.append(site.getusersitepackages())
+    return tuple({normalizePath(path) + os.sep for path in paths if path})
+
+# 标准库和第三方库中的代码不作为单步的停止位置
+LIBRARY_DIRECTORIES = libraryDirectories()
+
+@functools.lru_cache(maxsize=None)
+def isUserFile(filename):
+    """
+    :return: 是否为用户的代码（单步只停在用户的代码中）
+    """
+    if filename.startswith('<'):
+        return False
+    path = normalizePath(filename)
+    return path != RUNNER_FILE and not path.startswith(LIBRARY_DIRECTORIES)
+
+def inUserCode(frame):
+    """
+    :return: 帧或其调用者中是否有用户的代码，没有时表示脚本已经执行完毕
+    """
+    while frame is not None:
+        if isUserFile(frame.f_code.co_filename):
+            return True
+        frame = frame.f_back
+    return False
+
+class BreakpointTable:
+    """
+    断点表：文件 -> {行号: 已编译的条件}，条件只编译一次
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def update(self, breakpoints):
+        """
+        :param breakpoints: {文件路径: [[行号, 条件], ...]}，行号从1开始
+        """
+        files = {}
+        for path, entries in breakpoints.items():
+            lines = {}
+            for line, condition in entries:
+                code = None
+                if condition:
+                    try:
+                        code = compile(condition, f"<breakpoint {os.path.basename(path)}:{line}>", 'eval')
+                    except SyntaxError:
+                        code = None
+                lines[line] = code
+            files[normalizePath(path)] = lines
+        self.files = files
+
+    def lines(self, filename):
+        return self.files.get(normalizePath(filename))
+
+    def shouldStop(self, filename, line, frame):
+        lines = self.lines(filename)
+        if not lines or line not in lines:
+            return False
+        condition = lines[line]
+        if condition is None:
+            return True
+        try:
+            return bool(eval(condition, frame.f_globals, frame.f_locals))
+        except Exception:
+            # 条件求值出错时停下，便于用户发现问题
+            return True
+
+class DebugChannel:
+    """
+    与IDE的连接：后台线程接收命令，断点更新立即生效，执行控制命令放入队列
+    """
+
+    def __init__(self, port, breakpoints, onBreakpointsChanged):
+        self.sock = socket.create_connection(('127.0.0.1', port))
+        self.file = self.sock.makefile('rwb')
+        self.lock = threading.Lock()
+        self.commands = queue.Queue()
+        self.breakpoints = breakpoints
+        self.onBreakpointsChanged = onBreakpointsChanged
+
+        # 启动前同步接收初始断点
+        message = self.receive()
+        if message and message.get('command') == 'setBreakpoints':
+            self.breakpoints.update(message['breakpoints'])
+
+        self.reader = threading.Thread(target=self.__readLoop, daemon=True)
+        self.reader.start()
+
+    def send(self, message):
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+
+    def receive(self):
+        line = self.file.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def __readLoop(self):
+        while True:
+            try:
+                message = self.receive()
+            except (OSError, ValueError):
+                message = None
+            if message is None:
+                # IDE断开连接，结束调试进程
+                os._exit(1)
+            if message.get('command') == 'setBreakpoints':
+                self.breakpoints.update(message['breakpoints'])
+                self.onBreakpointsChanged()
+            else:
+                self.commands.put(message)
+
+    def waitCommand(self):
+        return self.commands.get()
+
+def frameVariables(frame):
+    """
+    获取帧中的变量，值转换为截断的repr字符串
+    """
+    variables = {}
+    for name, value in frame.f_locals.items():
+        if name.startswith('__') and name.endswith('__'):
+            continue
+        try:
+            text = repr(value)
+        except Exception as e:
+            text = f"<repr failed: {e}>"
+        if len(text) > 500:
+            text = text[:500] + '...'
+        variables[name] = f"{type(value).__name__}: {text}"
+    return variables
+
+def frameDepth(frame):
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+class MonitoringDebugger:
+    """
+    基于sys.monitoring（PEP 669）的调试器
+    """
+    TOOL_ID = 0  # sys.monitoring.DEBUGGER_ID
+
+    def __init__(self, scriptPath, breakpoints):
+        self.scriptPath = normalizePath(scriptPath)
+        self.breakpoints = breakpoints
+        self.channel = None
+        # None表示正常运行；'step'表示停在下一行；('next', 深度)表示停在不深于该深度的下一行
+        self.stepMode = None
+        # 单步只在暂停时所在的线程中生效
+        self.stepThread = None
+        self.monitoring = sys.monitoring
+        self.events = self.monitoring.events
+
+    def onBreakpointsChanged(self):
+        # 重新启用被DISABLE的位置，让新的断点有机会命中
+        self.monitoring.restart_events()
+
+    def onStart(self, code, offset):
+        lines = self.breakpoints.lines(code.co_filename)
+        if lines:
+            self.monitoring.set_local_events(self.TOOL_ID, code, self.events.LINE)
+        # 每个代码对象只检查一次
+        return self.monitoring.DISABLE
+
+    def onLine(self, code, line):
+        # 调试器自身的代码（包括接收命令的线程）不参与调试
+        if normalizePath(code.co_filename) == RUNNER_FILE:
+            return self.monitoring.DISABLE
+
+        frame = sys._getframe(1)
+        # 单步越过的调用中的断点同样需要停下
+        if self.breakpoints.shouldStop(code.co_filename, line, frame):
+            self.pause(frame, line)
+            return None
+
+        if self.stepMode is not None and threading.get_ident() == self.stepThread:
+            if isUserFile(code.co_filename):
+                if self.stepMode == 'step' or frameDepth(frame) <= self.stepMode[1]:
+                    self.pause(frame, line)
+            elif not inUserCode(frame):
+                # 单步离开了脚本（回到runpy中），继续运行到结束
+                self.setStepMode(None)
+            return None
+
+        lines = self.breakpoints.lines(code.co_filename)
+        if (not lines or line not in lines) and self.stepMode is None:
+            # 没有断点的行以后不再触发
+            return self.monitoring.DISABLE
+        return None
+
+    def pause(self, frame, line):
+        self.channel.send({
+            'event': 'stopped',
+            'file': frame.f_code.co_filename,
+            'line': line,
+            'function': frame.f_code.co_name,
+            'variables': frameVariables(frame),
+        })
+        command = self.channel.waitCommand().get('command')
+        if command == 'step':
+            self.setStepMode('step')
+        elif command == 'next':
+            self.setStepMode(('next', frameDepth(frame)))
+        else:
+            self.setStepMode(None)
+
+    def setStepMode(self, mode):
+        wasStepping = self.stepMode is not None
+        self.stepMode = mode
+        self.stepThread = threading.get_ident()
+        if mode is not None and not wasStepping:
+            # 单步时所有行都需要LINE事件
+            self.monitoring.set_events(self.TOOL_ID, self.events.PY_START | self.events.LINE)
+            self.monitoring.restart_events()
+        elif mode is None and wasStepping:
+            self.monitoring.set_events(self.TOOL_ID, self.events.PY_START)
+
+    def run(self, port, argv):
+        self.monitoring.use_tool_id(self.TOOL_ID, "SYide")
+        self.channel = DebugChannel(port, self.breakpoints, self.onBreakpointsChanged)
+        self.monitoring.register_callback(self.TOOL_ID, self.events.PY_START, self.onStart)
+        self.monitoring.register_callback(self.TOOL_ID, self.events.LINE, self.onLine)
+        self.monitoring.set_events(self.TOOL_ID, self.events.PY_START)
+        try:
+            return runScript(argv)
+        finally:
+            self.monitoring.set_events(self.TOOL_ID, 0)
+            self.monitoring.free_tool_id(self.TOOL_ID)
+
+class TraceDebugger(bdb.Bdb):
+    """
+    sys.monitoring不可用时基于bdb的回退实现，条件由BreakpointTable预先编译
+    """
+
+    def __init__(self, scriptPath, breakpoints):
+        super().__init__()
+        self.scriptPath = normalizePath(scriptPath)
+        self.breakpoints = breakpoints
+        self.channel = None
+        self.started = False
+
+    def onBreakpointsChanged(self):
+        # bdb只有在文件有断点时才会跟踪对应的帧，需要同步断点位置
+        self.clear_all_breaks()
+        for path, lines in self.breakpoints.files.items():
+            for line in lines:
+                self.set_break(path, line)
+        if self.channel is None:
+            return
+        # 正在执行的帧在进入时文件还没有断点，没有设置局部跟踪函数，新的断点需要补上
+        reader = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == reader:
+                continue
+            while frame is not None:
+                if frame.f_trace is None and self.breakpoints.lines(frame.f_code.co_filename):
+                    frame.f_trace = self.trace_dispatch
+                frame = frame.f_back
+
+    def set_continue(self):
+        # 与bdb不同，没有断点时也不移除跟踪函数，之后通过命令通道添加的断点才能命中；
+        # 没有断点的文件中的帧只产生call事件
+        self._set_stopinfo(self.botframe, None, -1)
+
+    def stop_here(self, frame):
+        # 单步只停在用户的代码中，不进入标准库和第三方库
+        return super().stop_here(frame) and isUserFile(frame.f_code.co_filename)
+
+    def canonic(self, filename):
+        if filename.startswith('<') and filename.endswith('>'):
+            return filename
+        return normalizePath(filename)
+
+    def break_here(self, frame):
+        if not super().break_here(frame):
+            return False
+        return self.breakpoints.shouldStop(frame.f_code.co_filename, frame.f_lineno, frame)
+
+    def user_call(self, frame, argument):
+        pass
+
+    def user_return(self, frame, value):
+        # 单步离开了脚本（回到runpy中）时继续运行到结束
+        if not inUserCode(frame.f_back):
+            self.set_continue()
+
+    def user_line(self, frame):
+        # 进入脚本后的第一行不停，直接继续运行到断点
+        if not self.started:
+            if self.canonic(frame.f_code.co_filename) != self.scriptPath:
+                return
+            self.started = True
+            self.set_continue()
+            return
+
+        self.channel.send({
+            'event': 'stopped',
+            'file': frame.f_code.co_filename,
+            'line': frame.f_lineno,
+            'function': frame.f_code.co_name,
+            'variables': frameVariables(frame),
+        })
+        command = self.channel.waitCommand().get('command')
+        if command == 'step':
+            self.set_step()
+        elif command == 'next':
+            self.set_next(frame)
+        else:
+            self.set_continue()
+
+    def run(self, port, argv):
+        self.channel = DebugChannel(port, self.breakpoints, self.onBreakpointsChanged)
+        self.onBreakpointsChanged()
+        self.reset()
+        sys.settrace(self.trace_dispatch)
+        try:
+            return runScript(argv)
+        finally:
+            sys.settrace(None)
+            self.quitting = True
+
+def runScript(argv):
+    """
+    以__main__身份运行脚本
+    :param argv: 脚本路径及其参数
+    """
+    scriptPath = argv[0]
+    sys.argv = list(argv)
+    sys.path[0] = os.path.dirname(os.path.abspath(scriptPath))
+    runpy.run_path(scriptPath, run_name='__main__')
+    return 0
+
+def main():
+    port = int(sys.argv[1])
+    argv = sys.argv[2:]
+    breakpoints = BreakpointTable()
+    if hasattr(sys, 'monitoring'):
+        debugger = MonitoringDebugger(argv[0], breakpoints)
+    else:
+        debugger = TraceDebugger(argv[0], breakpoints)
+
+    exitCode = 0
+    try:
+        debugger.run(port, argv)
+    except SystemExit as e:
+        exitCode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        exitCode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    try:
+        debugger.channel.send({'event': 'exited', 'code': exitCode})
+    except Exception:
+        pass
+    os._exit(exitCode)
+
+if __name__ == '__main__':
+    main()
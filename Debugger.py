@@ -0,0 +1,145 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtNetwork import QHostAddress, QTcpServer
+import json
+import os
+import sys
+
+class DebugSession(QObject):
+    """
+    调试会话：在子进程中通过DebugRunner运行脚本，经本地TCP连接收发JSON行消息
+    """
+    started = pyqtSignal(str)  # 脚本路径
+    stopped = pyqtSignal(str, int, str, dict)  # 文件路径, 行号(从1开始), 函数名, 变量
+    resumed = pyqtSignal()
+    output = pyqtSignal(str)  # 程序输出
+    finished = pyqtSignal(int)  # 退出码
+
+    RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DebugRunner.py")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.server = None
+        self.socket = None
+        self.buffer = b''
+        self.breakpoints = {}
+        self.paused = False
+
+    def start(self, scriptPath, breakpoints, interpreter=None):
+        """
+        启动调试
+        :param scriptPath: 脚本路径
+        :param breakpoints: {文件路径: [(行号, 条件), ...]}，行号从1开始
+        :param interpreter: Python解释器，默认与IDE相同
+        """
+        self.breakpoints = breakpoints
+        self.server = QTcpServer(self)
+        self.server.newConnection.connect(self.onNewConnection)
+        if not self.server.listen(QHostAddress.LocalHost, 0):
+            raise RuntimeError(self.server.errorString())
+
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        self.process.setWorkingDirectory(os.path.dirname(scriptPath))
+        self.process.readyReadStandardOutput.connect(self.onProcessOutput)
+        self.process.finished.connect(self.onProcessFinished)
+        self.process.start(interpreter or sys.executable,
+                           ["-u", self.RUNNER, str(self.server.serverPort()), scriptPath])
+        self.started.emit(scriptPath)
+
+    def isRunning(self):
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def setBreakpoints(self, breakpoints):
+        """
+        更新断点，运行中也立即生效
+        :param breakpoints: {文件路径: [(行号, 条件), ...]}
+        """
+        self.breakpoints = breakpoints
+        self.send({'command': 'setBreakpoints', 'breakpoints': breakpoints})
+
+    def continueRun(self):
+        self.__resume('continue')
+
+    def stepInto(self):
+        self.__resume('step')
+
+    def stepOver(self):
+        self.__resume('next')
+
+    def stop(self):
+        """
+        结束调试进程
+        """
+        if self.isRunning():
+            self.process.kill()
+
+    def __resume(self, command):
+        if not self.paused:
+            return
+        self.paused = False
+        self.send({'command': command})
+        self.resumed.emit()
+
+    def send(self, message):
+        if self.socket is not None:
+            self.socket.write((json.dumps(message) + '\n').encode('utf-8'))
+
+    def onNewConnection(self):
+        self.socket = self.server.nextPendingConnection()
+        self.socket.readyRead.connect(self.onSocketReadyRead)
+        # 只接受一个连接
+        self.server.close()
+        self.setBreakpoints(self.breakpoints)
+
+    def onSocketReadyRead(self):
+        self.buffer += self.socket.readAll().data()
+        while b'\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            message = json.loads(line)
+            if message.get('event') == 'stopped':
+                self.paused = True
+                self.stopped.emit(message['file'], message['line'], message['function'], message['variables'])
+
+    def onProcessOutput(self):
+        data = self.process.readAllStandardOutput().data()
+        if data:
+            self.output.emit(data.decode('utf-8', errors='replace'))
+
+    def onProcessFinished(self, exitCode, exitStatus):
+        self.paused = False
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        self.finished.emit(exitCode)
+
+class VariablesWindow(QDockWidget):
+    """
+    调试变量窗口，显示当前暂停位置的局部变量
+    """
+
+    def __init__(self, parent=None):
+        super().__init__("Variables", parent)
+        self.__initUI()
+
+    def __initUI(self):
+        self.variableTree = QTreeWidget()
+        self.variableTree.setColumnCount(2)
+        self.variableTree.setHeaderLabels(["Name", "Value"])
+        self.variableTree.setRootIsDecorated(False)
+        self.setWidget(self.variableTree)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
+
+    def setVariables(self, variables):
+        """
+        显示变量
+        :param variables: {变量名: 值的字符串}
+        """
+        self.variableTree.clear()
+        for name in sorted(variables):
+            QTreeWidgetItem(self.variableTree, [name, variables[name]])
+        self.variableTree.resizeColumnToContents(0)
+
+    def clearVariables(self):
+        self.variableTree.clear()
@@ -0,0 +1,171 @@
+from PyQt5.QtCore import *
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor
+import os
+
+from CoverageRunner import contentHash
+from ProcessPool import ProcessPool
+from PythonChecker import ERROR, check, isPackageFile
+
+class DiagnosticsCache:
+    """
+    诊断结果缓存，以文件内容的哈希为键：切换标签页、恢复休眠的标签页或撤销到之前的内容时不需要重新分析
+    """
+    MAX_ENTRIES = 200
+
+    def __init__(self):
+        self.entries = OrderedDict()  # cacheKey的结果 -> 诊断列表
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, diagnostics):
+        self.entries.pop(key, None)
+        self.entries[key] = diagnostics
+        while len(self.entries) > self.MAX_ENTRIES:
+            self.entries.popitem(last=False)
+
+class DiagnosticsSignals(QObject):
+    """
+    诊断任务的信号集合
+    """
+    finished = pyqtSignal(object, object)  # 任务, 诊断列表（分析失败时为None）
+
+class DiagnosticsTask(QRunnable):
+    """
+    把编辑器内容交给分析进程检查并等待结果
+    """
+
+    def __init__(self, path, generation, key, data, pool):
+        """
+        :param generation: 内容对应的编辑器修改计数
+        :param key: 缓存键
+        :param data: 编辑器内容的UTF-8字节
+        :param pool: ProcessPoolExecutor
+        """
+        super().__init__()
+        self.path = path
+        self.generation = generation
+        self.key = key
+        self.data = data
+        self.pool = pool
+        self.future = None
+        self.cancelled = False
+        self.poolBroken = False  # 分析进程异常退出，进程池不再可用
+        self.signals = DiagnosticsSignals()
+
+    def run(self):
+        diagnostics = None
+        if not self.cancelled:
+            try:
+                self.future = self.pool.submit(check, self.data, self.path)
+                diagnostics = self.future.result()
+            except ProcessPool.ERRORS as e:
+                # 被新的内容取代、进程池已经关闭或分析进程异常退出
+                self.poolBroken = isinstance(e, BrokenExecutor)
+                diagnostics = None
+        self.data = None
+        self.signals.finished.emit(self, diagnostics)
+
+    def cancel(self):
+        self.cancelled = True
+        future = self.future
+        if future is not None:
+            # 尚未开始分析时直接取消，已经开始的结果仍会存入缓存
+            future.cancel()
+
+class Diagnostics(QObject):
+    """
+    Python代码的后台诊断：在单独的进程中检查语法错误、未定义的名称和未使用的导入，
+    结果按内容哈希缓存。同一文件的新请求取代尚未完成的旧请求，旧请求的结果不再发出
+    """
+    diagnosticsReady = pyqtSignal(str, int, object)  # 文件路径, 编辑器修改计数, [(行号, 列号, 结束列号, 级别, 消息)]
+    workerFailed = pyqtSignal(str)  # 分析进程异常退出的消息
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(2)
+        self.processPool = ProcessPool(1)
+        self.cache = DiagnosticsCache()
+        self.pending = {}  # 文件路径 -> 最新的DiagnosticsTask
+        self.closed = False  # 已经调用shutdown，不再接受新的请求
+
+    @staticmethod
+    def cacheKey(path, data):
+        """
+        __init__.py中模块级的导入不报告为未使用，相同内容在包和普通模块中的结果不同
+        :return: (是否为__init__.py, 内容哈希)
+        """
+        return isPackageFile(path), contentHash(data)
+
+    def cached(self, path, data):
+        """
+        :param path: 文件路径
+        :param data: 编辑器内容的UTF-8字节
+        :return: 缓存的诊断结果，没有时为None
+        """
+        return self.cache.lookup(self.cacheKey(path, data))
+
+    def analyze(self, path, generation, data):
+        """
+        请求分析编辑器的内容，结果通过diagnosticsReady发出；内容已分析过时立即发出
+        :param path: 文件路径
+        :param generation: 编辑器的修改计数，用于丢弃过期的结果
+        :param data: 编辑器内容的UTF-8字节
+        """
+        # 关闭前排队的文件加载完成事件可能在shutdown之后才触发分析
+        if self.closed:
+            return
+        path = os.path.abspath(path)
+        key = self.cacheKey(path, data)
+        previous = self.pending.pop(path, None)
+        if previous is not None:
+            previous.cancel()
+        diagnostics = self.cache.lookup(key)
+        if diagnostics is not None:
+            self.diagnosticsReady.emit(path, generation, diagnostics)
+            return
+        task = DiagnosticsTask(path, generation, key, data, self.processPool.get())
+        task.signals.finished.connect(self.onTaskFinished)
+        self.pending[path] = task
+        self.threadPool.start(task)
+
+    def onTaskFinished(self, task, diagnostics):
+        if self.processPool.discardBroken(task):
+            self.workerFailed.emit(f"Diagnostics process exited unexpectedly while checking {task.path}, "
+                                   "it will be restarted for the next check")
+        if diagnostics is not None:
+            self.cache.store(task.key, diagnostics)
+        if self.pending.get(task.path) is not task:
+            return
+        del self.pending[task.path]
+        if diagnostics is not None:
+            self.diagnosticsReady.emit(task.path, task.generation, diagnostics)
+
+    def shutdown(self):
+        """
+        取消未完成的分析并结束分析进程，退出程序前调用
+        """
+        self.closed = True
+        for task in self.pending.values():
+            task.cancel()
+        self.pending.clear()
+        self.processPool.shutdown()
+        self.threadPool.waitForDone()
+
+def formatDiagnostics(path, diagnostics, limit=20):
+    """
+    格式化诊断摘要
+    :return: 第一行为合计，之后每个问题一行，最多limit行
+    """
+    errors = sum(1 for diagnostic in diagnostics if diagnostic[3] == ERROR)
+    lines = [f"{path}: {errors} errors, {len(diagnostics) - errors} warnings"]
+    for line, column, end, severity, message in diagnostics[:limit]:
+        lines.append(f"  {path}:{line}:{column + 1}: {severity}: {message}")
+    if len(diagnostics) > limit:
+        lines.append(f"  ... {len(diagnostics) - limit} more")
+    return lines
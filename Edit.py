@@ -3,19 +3,63 @@ from PyQt5.QtGui import *
 from PyQt5.QtCore import *
 from PyQt5.QtWidgets import *
 import os
+import zlib
+
+from CompletionApis import CompletionApis
+from FileSaver import FileSaver
+from PythonLexer import PythonLexer
+from ScintillaText import rangeBytes
 
 class Edit(QsciScintilla):
     # 定义断点切换信号
     breakpointToggled = pyqtSignal(int, bool)  # 行号, 是否设置断点
     fileSaved = pyqtSignal(str)  # 文件保存信号
     runPythonFile = pyqtSignal(str)  # 运行Python文件信号
+    debugPythonFile = pyqtSignal(str)  # 调试Python文件信号
+    breakpointConditionChanged = pyqtSignal(int, str)  # 行号, 条件
+    profilePythonFile = pyqtSignal(str)  # 性能分析Python文件信号
+    coveragePythonFile = pyqtSignal(str)  # 统计覆盖率运行Python文件信号
+    definitionRequested = pyqtSignal(str)  # 转到定义的名称
+    referencesRequested = pyqtSignal(str)  # 查找引用的名称
+    editPaused = pyqtSignal()  # 停止输入一段时间后发出
+    
+    EDIT_PAUSE = 500  # 毫秒，最后一次修改之后经过该时间视为停止输入
+    
+    # 性能分析热度边距及其标记，颜色由浅到深对应样本数由少到多
+    HEAT_MARGIN = 2
+    HEAT_MARKER = 4
+    HEAT_COLORS = [QColor(255, 236, 179), QColor(255, 204, 128), QColor(255, 152, 0), QColor(244, 81, 30), QColor(198, 40, 40)]
+    
+    # 覆盖率边距及执行过/未执行的行的标记
+    COVERAGE_MARGIN = 3
+    COVERED_MARKER = 9
+    UNCOVERED_MARKER = 10
+    
+    # 诊断边距及错误/警告的标记，问题所在的文本用波浪线指示器标出
+    DIAGNOSTIC_MARGIN = 4
+    ERROR_MARKER = 11
+    WARNING_MARKER = 12
+    ERROR_INDICATOR = 8
+    WARNING_INDICATOR = 9
+    DWELL_TIME = 500  # 毫秒，鼠标停留该时间后显示问题的提示
+    
+    COMPLETION_THRESHOLD = 2  # 输入该数量的字符后显示自动完成列表
+    MAX_CALL_TIPS = 5
     
     def __init__(self):
         super().__init__()
         
         # 存储断点的集合
         self.breakpoints = set()
+        # 断点条件：行号 -> 条件表达式
+        self.breakpointConditions = {}
         self.filePath = None  # 文件路径
+        self.loading = False  # 是否正在后台加载文件内容
+        self.editGeneration = 0  # 文本修改计数，用于判断保存期间是否又有修改
+        self.savingGeneration = None  # 正在保存的内容对应的修改计数
+        self.restoredModified = False  # 从休眠恢复的内容与磁盘上的文件不同，保存前一直视为已修改
+        self.preview = False  # 是否为可复用的预览标签页
+        self.diagnostics = {}  # 行号(从0开始) -> [(列号, 结束列号, 级别, 消息)]
         
         # 初始化编辑器
         self.__initEditor()
@@ -36,14 +80,86 @@ class Edit(QsciScintilla):
         self.setMarkerBackgroundColor(QColor(255, 0, 0, 100), 1)  # 半透明红色
         self.setMarkerForegroundColor(QColor(255, 0, 0), 1)
         
+        # 设置调试时当前执行行标记
+        self.markerDefine(QsciScintilla.SC_MARK_SHORTARROW, 2)
+        self.setMarkerBackgroundColor(QColor(255, 200, 0), 2)
+        self.setMarkerForegroundColor(QColor(200, 120, 0), 2)
+        self.markerDefine(QsciScintilla.SC_MARK_BACKGROUND, 3)
+        self.setMarkerBackgroundColor(QColor(255, 240, 150), 3)
+        
+        # 性能分析热度边距（在断点边距右侧），没有分析结果时宽度为0
+        heatMask = 0
+        for level, color in enumerate(self.HEAT_COLORS):
+            self.markerDefine(QsciScintilla.SC_MARK_FULLRECT, self.HEAT_MARKER + level)
+            self.setMarkerBackgroundColor(color, self.HEAT_MARKER + level)
+            heatMask |= 1 << (self.HEAT_MARKER + level)
+        self.setMarginType(self.HEAT_MARGIN, QsciScintilla.SC_MARGIN_SYMBOL)
+        self.setMarginMarkerMask(self.HEAT_MARGIN, heatMask)
+        self.setMarginWidth(self.HEAT_MARGIN, 0)
+        self.setMarginMarkerMask(1, self.marginMarkerMask(1) & ~heatMask)
+        
+        # 覆盖率边距（在热度边距右侧），没有覆盖率结果时宽度为0
+        self.markerDefine(QsciScintilla.SC_MARK_FULLRECT, self.COVERED_MARKER)
+        self.setMarkerBackgroundColor(QColor(76, 175, 80), self.COVERED_MARKER)
+        self.markerDefine(QsciScintilla.SC_MARK_FULLRECT, self.UNCOVERED_MARKER)
+        self.setMarkerBackgroundColor(QColor(229, 57, 53), self.UNCOVERED_MARKER)
+        coverageMask = (1 << self.COVERED_MARKER) | (1 << self.UNCOVERED_MARKER)
+        self.setMarginType(self.COVERAGE_MARGIN, QsciScintilla.SC_MARGIN_SYMBOL)
+        self.setMarginMarkerMask(self.COVERAGE_MARGIN, coverageMask)
+        self.setMarginWidth(self.COVERAGE_MARGIN, 0)
+        self.setMarginMarkerMask(1, self.marginMarkerMask(1) & ~coverageMask)
+        
+        # 诊断边距（在覆盖率边距右侧）和指示器，没有问题时边距宽度为0
+        self.markerDefine(QsciScintilla.SC_MARK_FULLRECT, self.ERROR_MARKER)
+        self.setMarkerBackgroundColor(QColor(229, 57, 53), self.ERROR_MARKER)
+        self.markerDefine(QsciScintilla.SC_MARK_FULLRECT, self.WARNING_MARKER)
+        self.setMarkerBackgroundColor(QColor(255, 160, 0), self.WARNING_MARKER)
+        diagnosticMask = (1 << self.ERROR_MARKER) | (1 << self.WARNING_MARKER)
+        self.setMarginType(self.DIAGNOSTIC_MARGIN, QsciScintilla.SC_MARGIN_SYMBOL)
+        self.setMarginMarkerMask(self.DIAGNOSTIC_MARGIN, diagnosticMask)
+        self.setMarginWidth(self.DIAGNOSTIC_MARGIN, 0)
+        self.setMarginMarkerMask(1, self.marginMarkerMask(1) & ~diagnosticMask)
+        self.indicatorDefine(QsciScintilla.SquiggleIndicator, self.ERROR_INDICATOR)
+        self.setIndicatorForegroundColor(QColor(229, 57, 53), self.ERROR_INDICATOR)
+        self.indicatorDefine(QsciScintilla.SquiggleIndicator, self.WARNING_INDICATOR)
+        self.setIndicatorForegroundColor(QColor(255, 160, 0), self.WARNING_INDICATOR)
+        self.SendScintilla(QsciScintilla.SCI_SETMOUSEDWELLTIME, self.DWELL_TIME)
+        self.SCN_DWELLSTART.connect(self.onDwellStart)
+        self.SCN_DWELLEND.connect(self.onDwellEnd)
+        
+        # 自动完成，只对Python文件启用（见setFilePath），API由所有编辑器共享
+        self.setAutoCompletionSource(QsciScintilla.AcsNone)
+        self.setAutoCompletionThreshold(self.COMPLETION_THRESHOLD)
+        self.setCallTipsStyle(QsciScintilla.CallTipsContext)
+        self.setCallTipsVisible(self.MAX_CALL_TIPS)
+        
         # 连接信号
         self.marginClicked.connect(self.onMarginClicked)
+        self.textChanged.connect(self.onTextChanged)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.onContextMenu)
         
         # 设置快捷键
         self.shortcutSave = QShortcut(QKeySequence("Ctrl+S"), self)
         self.shortcutSave.activated.connect(self.saveFile)
+        self.shortcutDefinition = QShortcut(QKeySequence("F12"), self)
+        self.shortcutDefinition.activated.connect(self.gotoDefinition)
+        self.shortcutReferences = QShortcut(QKeySequence("Shift+F12"), self)
+        self.shortcutReferences.activated.connect(self.findReferences)
+        
+        # 停止输入后才重新分析内容，不在每次按键时分析
+        self.editPauseTimer = QTimer(self)
+        self.editPauseTimer.setSingleShot(True)
+        self.editPauseTimer.setInterval(self.EDIT_PAUSE)
+        self.editPauseTimer.timeout.connect(self.editPaused)
+        
+    def onTextChanged(self):
+        """
+        文本修改时更新修改计数
+        """
+        self.editGeneration += 1
+        if not self.loading:
+            self.editPauseTimer.start()
         
     def onMarginClicked(self, margin, line, state):
         """
@@ -92,12 +208,39 @@ class Edit(QsciScintilla):
         toggleBreakpointAction.triggered.connect(lambda checked, l=line_copy: self.toggleBreakpoint(l))
         menu.addAction(toggleBreakpointAction)
         
+        if target_line in self.breakpoints:
+            conditionAction = QAction("Edit Breakpoint Condition...", self)
+            conditionAction.triggered.connect(lambda checked, l=line_copy: self.editBreakpointCondition(l))
+            menu.addAction(conditionAction)
+        
         # 如果是Python文件，添加"执行当前文件"选项
         if self.filePath and self.filePath.lower().endswith('.py'):
             menu.addSeparator()
             runPythonAction = QAction("执行当前文件", self)
             runPythonAction.triggered.connect(self.runPythonScript)
             menu.addAction(runPythonAction)
+            
+            debugPythonAction = QAction("调试当前文件", self)
+            debugPythonAction.triggered.connect(self.debugPythonScript)
+            menu.addAction(debugPythonAction)
+            
+            profilePythonAction = QAction("性能分析当前文件", self)
+            profilePythonAction.triggered.connect(self.profilePythonScript)
+            menu.addAction(profilePythonAction)
+            
+            coveragePythonAction = QAction("统计覆盖率运行当前文件", self)
+            coveragePythonAction.triggered.connect(self.coveragePythonScript)
+            menu.addAction(coveragePythonAction)
+            
+            if self.wordAtCursor():
+                menu.addSeparator()
+                definitionAction = QAction("Go to Definition\tF12", self)
+                definitionAction.triggered.connect(self.gotoDefinition)
+                menu.addAction(definitionAction)
+                
+                referencesAction = QAction("Find References\tShift+F12", self)
+                referencesAction.triggered.connect(self.findReferences)
+                menu.addAction(referencesAction)
         
         # 显示菜单
         menu.exec_(self.mapToGlobal(position))
@@ -129,6 +272,7 @@ class Edit(QsciScintilla):
         """
         if line in self.breakpoints:
             self.breakpoints.remove(line)
+            self.breakpointConditions.pop(line, None)
             self.markerDelete(line, 1)
             self.breakpointToggled.emit(line, False)
             
@@ -140,6 +284,158 @@ class Edit(QsciScintilla):
         for line in lines:
             self.removeBreakpoint(line)
             
+    def editBreakpointCondition(self, line):
+        """
+        编辑断点条件
+        :param line: 行号
+        """
+        condition, ok = QInputDialog.getText(self, "Breakpoint Condition",
+                                             f"Condition for line {line + 1} (empty for none):",
+                                             QLineEdit.Normal, self.breakpointConditions.get(line, ""))
+        if ok:
+            self.setBreakpointCondition(line, condition.strip())
+            
+    def setBreakpointCondition(self, line, condition):
+        """
+        设置断点条件，断点不存在时先添加断点
+        :param line: 行号
+        :param condition: 条件表达式，空字符串表示无条件
+        """
+        self.addBreakpoint(line)
+        if condition:
+            self.breakpointConditions[line] = condition
+        else:
+            self.breakpointConditions.pop(line, None)
+        self.breakpointConditionChanged.emit(line, condition)
+        
+    def getBreakpointConditions(self):
+        """
+        获取断点条件
+        :return: 行号 -> 条件表达式
+        """
+        return dict(self.breakpointConditions)
+        
+    def setExecutionLine(self, line):
+        """
+        标记调试时当前执行的行
+        :param line: 行号
+        """
+        self.clearExecutionLine()
+        self.markerAdd(line, 2)
+        self.markerAdd(line, 3)
+        self.ensureLineVisible(line)
+        self.setCursorPosition(line, 0)
+        
+    def clearExecutionLine(self):
+        """
+        清除当前执行行标记
+        """
+        self.markerDeleteAll(2)
+        self.markerDeleteAll(3)
+        
+    def setLineHeat(self, counts):
+        """
+        在热度边距中显示每行的样本数
+        :param counts: {行号(从0开始): 样本数}
+        """
+        self.clearLineHeat()
+        if not counts:
+            return
+        maxCount = max(counts.values())
+        levels = len(self.HEAT_COLORS)
+        for line, count in counts.items():
+            if count <= 0 or line >= self.lines():
+                continue
+            level = min(levels - 1, count * levels // maxCount)
+            self.markerAdd(line, self.HEAT_MARKER + level)
+        self.setMarginWidth(self.HEAT_MARGIN, 8)
+        
+    def clearLineHeat(self):
+        """
+        清除热度边距
+        """
+        for level in range(len(self.HEAT_COLORS)):
+            self.markerDeleteAll(self.HEAT_MARKER + level)
+        self.setMarginWidth(self.HEAT_MARGIN, 0)
+        
+    def setCoverage(self, executed, executable):
+        """
+        在覆盖率边距中标出执行过和未执行的行
+        :param executed: 执行过的行号集合（从1开始）
+        :param executable: 可执行的行号集合（从1开始）
+        """
+        self.clearCoverage()
+        lines = self.lines()
+        for line in executable:
+            if 0 < line <= lines:
+                marker = self.COVERED_MARKER if line in executed else self.UNCOVERED_MARKER
+                self.markerAdd(line - 1, marker)
+        self.setMarginWidth(self.COVERAGE_MARGIN, 4)
+        
+    def clearCoverage(self):
+        """
+        清除覆盖率标记
+        """
+        self.markerDeleteAll(self.COVERED_MARKER)
+        self.markerDeleteAll(self.UNCOVERED_MARKER)
+        self.setMarginWidth(self.COVERAGE_MARGIN, 0)
+        
+    def setDiagnostics(self, diagnostics):
+        """
+        显示诊断结果：问题文本下加波浪线，诊断边距中标出所在行，鼠标停留时显示消息
+        :param diagnostics: [(行号(从1开始), 列号, 结束列号, 级别, 消息)]
+        """
+        self.clearDiagnostics()
+        lines = self.lines()
+        for line, column, end, severity, message in diagnostics:
+            if 0 < line <= lines:
+                self.diagnostics.setdefault(line - 1, []).append((column, end, severity, message))
+        if not self.diagnostics:
+            return
+        for line, entries in self.diagnostics.items():
+            isError = any(severity == 'error' for column, end, severity, message in entries)
+            self.markerAdd(line, self.ERROR_MARKER if isError else self.WARNING_MARKER)
+            length = len(self.text(line).rstrip('\r\n'))
+            for column, end, severity, message in entries:
+                end = min(end, length)
+                if column < end:
+                    indicator = self.ERROR_INDICATOR if severity == 'error' else self.WARNING_INDICATOR
+                    self.fillIndicatorRange(line, column, line, end, indicator)
+        self.setMarginWidth(self.DIAGNOSTIC_MARGIN, 4)
+        
+    def clearDiagnostics(self):
+        """
+        清除诊断结果
+        """
+        self.diagnostics = {}
+        self.markerDeleteAll(self.ERROR_MARKER)
+        self.markerDeleteAll(self.WARNING_MARKER)
+        length = self.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+        for indicator in (self.ERROR_INDICATOR, self.WARNING_INDICATOR):
+            self.SendScintilla(QsciScintilla.SCI_SETINDICATORCURRENT, indicator)
+            self.SendScintilla(QsciScintilla.SCI_INDICATORCLEARRANGE, 0, length)
+        self.setMarginWidth(self.DIAGNOSTIC_MARGIN, 0)
+        
+    def onDwellStart(self, position, x, y):
+        """
+        鼠标停留在问题文本或其所在行的边距上时显示消息
+        """
+        if not self.diagnostics:
+            return
+        if position < 0:
+            # 不在文本上（如边距中）时显示该行的全部问题
+            line = self.lineAt(QPoint(x, y))
+            entries = self.diagnostics.get(line, [])
+        else:
+            line, index = self.lineIndexFromPosition(position)
+            entries = [entry for entry in self.diagnostics.get(line, []) if entry[0] <= index <= entry[1]]
+        if entries:
+            text = '\n'.join(f"{severity}: {message}" for column, end, severity, message in entries)
+            QToolTip.showText(self.viewport().mapToGlobal(QPoint(x, y)), text, self)
+            
+    def onDwellEnd(self, position, x, y):
+        QToolTip.hideText()
+        
     def getBreakpoints(self):
         """
         获取所有断点
@@ -149,7 +445,7 @@ class Edit(QsciScintilla):
         
     def saveFile(self):
         """
-        保存文件
+        保存文件，内容在后台线程中原子写入
         """
         try:
             # 如果没有文件路径，则无法保存
@@ -157,19 +453,39 @@ class Edit(QsciScintilla):
                 self.fileSaved.emit("Error: No file path specified")
                 return False
                 
-            # 获取编辑器中的文本
-            content = self.text()
-            
-            # 以UTF-8格式保存文件
-            with open(self.filePath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 文件尚未加载完成时保存会截断文件
+            if self.loading:
+                self.fileSaved.emit(f"Error: File is still loading: {self.filePath}")
+                return False
                 
-            self.fileSaved.emit(f"File saved: {self.filePath}")
+            # 直接读取文档的UTF-8字节，避免先转换为str再编码
+            content = self.documentBytes()
+            
+            self.savingGeneration = self.editGeneration
+            FileSaver.instance().save(self.filePath, content, self)
             return True
         except Exception as e:
             self.fileSaved.emit(f"Error saving file: {str(e)}")
             return False
             
+    def documentBytes(self):
+        """
+        获取文档内容的字节快照
+        :return: 文档的UTF-8字节
+        """
+        return rangeBytes(self, 0, self.SendScintilla(QsciScintilla.SCI_GETLENGTH))
+        
+    def onSaveFinished(self, ok, message):
+        """
+        后台保存完成时由FileSaver回调
+        :param ok: 是否成功
+        :param message: 保存消息
+        """
+        # 保存期间没有新的修改时才标记为未修改
+        if ok and self.savingGeneration == self.editGeneration:
+            self.setModified(False)
+        self.fileSaved.emit(message)
+        
     def setFilePath(self, path):
         """
         设置文件路径
@@ -177,11 +493,165 @@ class Edit(QsciScintilla):
         """
         self.filePath = path
         
+        # Python文件使用增量词法分析器高亮，预览标签页切换到其他文件时移除
+        if path and path.lower().endswith('.py'):
+            if not isinstance(self.lexer(), PythonLexer):
+                lexer = PythonLexer(self)
+                self.setLexer(lexer)
+                # 只设置API，收集和准备都在后台进行，不延迟标签页的打开
+                CompletionApis.instance().attach(lexer)
+                self.setAutoCompletionSource(QsciScintilla.AcsAll)
+        elif self.lexer() is not None:
+            self.setLexer(None)
+            self.setAutoCompletionSource(QsciScintilla.AcsNone)
+            
+    def setDocumentBytes(self, data):
+        """
+        用UTF-8字节替换整个文档，清空撤销记录和断点
+        :param data: 文档字节
+        """
+        self.breakpoints.clear()
+        self.breakpointConditions.clear()
+        self.markerDeleteAll(1)
+        self.clearLineHeat()
+        self.clearCoverage()
+        self.clearDiagnostics()
+        self.SendScintilla(QsciScintilla.SCI_SETTEXT, 0, data)
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.setModified(False)
+        
+    def beginLoad(self):
+        """
+        开始分块加载文件，加载期间编辑器只读
+        """
+        self.loading = True
+        self.clear()
+        self.setReadOnly(True)
+        
+    def appendChunk(self, text):
+        """
+        追加一块已读取的文本
+        :param text: 文本块
+        """
+        # 只读状态下Scintilla也会拒绝程序写入，追加时临时解除
+        self.setReadOnly(False)
+        self.append(text)
+        self.setReadOnly(True)
+        
+    def endLoad(self):
+        """
+        加载结束，恢复编辑并清空撤销记录
+        """
+        self.loading = False
+        self.setReadOnly(False)
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.setModified(False)
+        
+    def captureState(self):
+        """
+        获取编辑器的紧凑状态，用于休眠标签页
+        :return: 状态字典，文本以zlib压缩
+        """
+        return {
+            'text': zlib.compress(self.documentBytes(), 1),
+            'cursor': self.getCursorPosition(),
+            'firstVisibleLine': self.firstVisibleLine(),
+            'xOffset': self.SendScintilla(QsciScintilla.SCI_GETXOFFSET),
+            'breakpoints': self.getBreakpoints(),
+            'breakpointConditions': self.getBreakpointConditions(),
+            'modified': self.isModified(),
+        }
+        
+    def restoreState(self, state):
+        """
+        从captureState获取的状态恢复编辑器
+        :param state: 状态字典
+        """
+        self.setDocumentBytes(zlib.decompress(state['text']))
+        
+        # 恢复断点时不发出信号，避免重复记录日志
+        self.breakpoints = set(state['breakpoints'])
+        self.breakpointConditions = dict(state['breakpointConditions'])
+        for line in self.breakpoints:
+            self.markerAdd(line, 1)
+            
+        self.setCursorPosition(*state['cursor'])
+        self.setFirstVisibleLine(state['firstVisibleLine'])
+        self.SendScintilla(QsciScintilla.SCI_SETXOFFSET, state['xOffset'])
+        
+        # 恢复的文档位于保存点，修改状态单独记录，不改动文档和撤销记录
+        self.restoredModified = state['modified']
+        
+    def isModified(self):
+        """
+        :return: 文档是否有未保存的修改，包括休眠前的修改
+        """
+        return self.restoredModified or super().isModified()
+        
+    def setModified(self, modified):
+        """
+        设置修改状态，设为未修改时同时清除休眠前的修改状态
+        :param modified: 是否已修改
+        """
+        if not modified:
+            self.restoredModified = False
+        super().setModified(modified)
+            
+    def wordAtCursor(self):
+        """
+        :return: 光标处的标识符，没有时返回空字符串
+        """
+        line, index = self.getCursorPosition()
+        return self.wordAtLineIndex(line, index)
+        
+    def gotoDefinition(self):
+        """
+        转到光标处名称的定义
+        """
+        word = self.wordAtCursor()
+        if word and self.filePath and self.filePath.lower().endswith('.py'):
+            self.definitionRequested.emit(word)
+            
+    def findReferences(self):
+        """
+        查找光标处名称的引用
+        """
+        word = self.wordAtCursor()
+        if word and self.filePath and self.filePath.lower().endswith('.py'):
+            self.referencesRequested.emit(word)
+            
     def runPythonScript(self):
         """
         运行Python脚本
         """
         if self.filePath and os.path.exists(self.filePath):
             self.runPythonFile.emit(self.filePath)
+        else:
+            self.fileSaved.emit("Error: File does not exist")
+            
+    def profilePythonScript(self):
+        """
+        在性能分析器下运行Python脚本
+        """
+        if self.filePath and os.path.exists(self.filePath):
+            self.profilePythonFile.emit(self.filePath)
+        else:
+            self.fileSaved.emit("Error: File does not exist")
+            
+    def coveragePythonScript(self):
+        """
+        统计行覆盖率运行Python脚本
+        """
+        if self.filePath and os.path.exists(self.filePath):
+            self.coveragePythonFile.emit(self.filePath)
+        else:
+            self.fileSaved.emit("Error: File does not exist")
+            
+    def debugPythonScript(self):
+        """
+        调试Python脚本
+        """
+        if self.filePath and os.path.exists(self.filePath):
+            self.debugPythonFile.emit(self.filePath)
         else:
             self.fileSaved.emit("Error: File does not exist")
\ No newline at end of file
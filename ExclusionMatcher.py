@@ -0,0 +1,335 @@
+import json
+import os
+import re
+import threading
+
+def translatePattern(pattern):
+    """
+    将gitignore的通配符模式转换为正则表达式
+    :param pattern: 去掉前导'/'和末尾'/'之后的模式
+    :return: 正则表达式字符串
+    """
+    i = 0
+    n = len(pattern)
+    result = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                atStart = i == 0 or pattern[i - 1] == '/'
+                atEnd = i + 2 == n or pattern[i + 2] == '/'
+                if atStart and atEnd:
+                    if i + 2 == n:
+                        # 末尾的'/**'匹配目录中的所有内容
+                        result.append('.*')
+                    else:
+                        # '**/'匹配零个或多个目录
+                        result.append('(?:.*/)?')
+                        i += 1
+                    i += 2
+                    continue
+            result.append('[^/]*')
+        elif c == '?':
+            result.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end < 0:
+                result.append(re.escape(c))
+            else:
+                content = pattern[i + 1:end]
+                if content.startswith('!'):
+                    content = '^' + content[1:]
+                result.append('[' + content.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return ''.join(result)
+
+class IgnoreRule:
+    """
+    一条gitignore规则
+    """
+    __slots__ = ('negated', 'dirOnly', 'anchored', 'regex')
+
+    def __init__(self, pattern):
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+        self.dirOnly = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # 包含'/'的模式相对于.gitignore所在目录，否则匹配任意层级的名称
+        self.anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        self.regex = re.compile(translatePattern(pattern) + r'\Z', re.DOTALL)
+
+    def matches(self, relative, name, isDir):
+        if self.dirOnly and not isDir:
+            return False
+        return self.regex.match(relative if self.anchored else name) is not None
+
+class IgnoreFile:
+    """
+    一个.gitignore文件中的规则，没有否定规则时合并为少数几个正则表达式
+    """
+
+    def __init__(self, baseDir, lines, mtime=None):
+        """
+        :param baseDir: 规则相对的目录
+        :param lines: 规则行
+        :param mtime: 文件修改时间，用于判断是否需要重新加载
+        """
+        self.baseDir = baseDir
+        self.mtime = mtime
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\r\n')
+            # 末尾的空格被忽略，除非用'\'转义
+            stripped = line.rstrip(' ')
+            if stripped.endswith('\\') and len(stripped) < len(line):
+                stripped += ' '
+            if not stripped or stripped.startswith('#'):
+                continue
+            self.rules.append(IgnoreRule(stripped))
+
+        # 没有否定规则时只需知道是否有任一规则匹配，按(是否相对路径, 是否只匹配目录)合并
+        self.combined = None
+        if not any(rule.negated for rule in self.rules):
+            groups = {}
+            for rule in self.rules:
+                groups.setdefault((rule.anchored, rule.dirOnly), []).append(rule.regex.pattern)
+            self.combined = [(anchored, dirOnly, re.compile('|'.join(f'(?:{p})' for p in patterns), re.DOTALL))
+                             for (anchored, dirOnly), patterns in groups.items()]
+
+    @classmethod
+    def load(cls, baseDir, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(baseDir, f.readlines(), mtime)
+        except OSError:
+            return None
+
+    def match(self, path, name, isDir):
+        """
+        :param path: 位于baseDir之下的路径
+        :return: True表示忽略，False表示被否定规则重新包含，None表示没有规则匹配
+        """
+        relative = path[len(self.baseDir):].lstrip(os.sep)
+        if os.sep != '/':
+            relative = relative.replace(os.sep, '/')
+        if self.combined is not None:
+            for anchored, dirOnly, regex in self.combined:
+                if dirOnly and not isDir:
+                    continue
+                if regex.match(relative if anchored else name):
+                    return True
+            return None
+
+        # 同一文件中后面的规则优先
+        for rule in reversed(self.rules):
+            if rule.matches(relative, name, isDir):
+                return not rule.negated
+        return None
+
+class ExclusionMatcher:
+    """
+    工作区排除规则：合并嵌套的.gitignore（支持否定规则）与.vscode/settings.json中配置的排除目录。
+    目录列出和工作区扫描在创建子节点或进入子目录之前调用，被忽略的目录树不会被遍历。
+    可以在多个工作线程中同时使用。
+    """
+    DEFAULT_EXCLUDED_FOLDERS = ('.git', '.venv', 'node_modules', '__pycache__', '.syide')
+    SETTINGS_FILE = os.path.join('.vscode', 'settings.json')
+    IGNORE_FILE = '.gitignore'
+
+    def __init__(self, root):
+        """
+        :param root: 工作区根目录
+        """
+        self.root = os.path.abspath(root)
+        self.lock = threading.Lock()
+        # 目录路径 -> IgnoreFile，没有.gitignore的目录为None
+        self.ignoreFiles = {}
+        # 目录路径 -> 从根目录到该目录生效的IgnoreFile列表
+        self.chains = {}
+        # 规则每次变化时加一，列出目录的一方据此判断已加载的下级目录是否需要重新过滤
+        self.generation = 0
+        self.excludedNames, self.globalRules = self.__loadSettings()
+
+    def __loadSettings(self):
+        """
+        读取配置的排除目录（formatFiles.excludedFolders）和排除模式（files.exclude）
+        """
+        names = set(self.DEFAULT_EXCLUDED_FOLDERS)
+        patterns = []
+        try:
+            with open(os.path.join(self.root, self.SETTINGS_FILE), 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            settings = {}
+
+        folders = settings.get('formatFiles.excludedFolders')
+        if isinstance(folders, list):
+            names.update(folder for folder in folders if isinstance(folder, str))
+        filesExclude = settings.get('files.exclude')
+        if isinstance(filesExclude, dict):
+            patterns = [pattern for pattern, enabled in filesExclude.items() if enabled is True]
+
+        # .git/info/exclude 与根目录的.gitignore优先级相同，files.exclude作为最外层规则
+        lines = list(patterns)
+        try:
+            with open(os.path.join(self.root, '.git', 'info', 'exclude'), 'r', encoding='utf-8', errors='replace') as f:
+                lines.extend(f.readlines())
+        except OSError:
+            pass
+        return frozenset(names), IgnoreFile(self.root, lines)
+
+    def reload(self):
+        """
+        重新读取配置并清空缓存
+        """
+        excludedNames, globalRules = self.__loadSettings()
+        with self.lock:
+            self.excludedNames, self.globalRules = excludedNames, globalRules
+            self.ignoreFiles.clear()
+            self.chains.clear()
+            self.generation += 1
+
+    def filter(self, dirPath, entries):
+        """
+        过滤目录列表，同时根据列表中是否有.gitignore更新该目录的规则
+        :param dirPath: 目录路径
+        :param entries: [(名称, 路径, 是否目录), ...]
+        :return: 未被排除的条目
+        """
+        self.__updateIgnoreFile(dirPath, any(name == self.IGNORE_FILE for name, path, isDir in entries))
+        chain = self.__chain(dirPath)
+        excludedNames = self.excludedNames
+        return [entry for entry in entries
+                if not (entry[2] and entry[0] in excludedNames) and not self.__matchChain(chain, entry[1], entry[0], entry[2])]
+
+    def isExcluded(self, path, isDir=None):
+        """
+        判断路径是否被排除，任一上级目录被排除时也视为排除
+        :param path: 路径
+        :param isDir: 是否目录，None时自动判断
+        """
+        path = os.path.abspath(path)
+        relative = os.path.relpath(path, self.root)
+        if relative == os.curdir or relative.startswith(os.pardir):
+            return False
+        if isDir is None:
+            isDir = os.path.isdir(path)
+
+        current = self.root
+        parts = relative.split(os.sep)
+        for i, name in enumerate(parts):
+            parent = current
+            current = os.path.join(current, name)
+            componentIsDir = isDir if i == len(parts) - 1 else True
+            if componentIsDir and name in self.excludedNames:
+                return True
+            if self.__matchChain(self.__chain(parent), current, name, componentIsDir):
+                return True
+        return False
+
+    def walk(self, top=None):
+        """
+        遍历工作区，被排除的目录不会被进入
+        :param top: 起始目录，默认为工作区根目录
+        :return: 生成 (目录路径, [(名称, 路径, 是否目录), ...])
+        """
+        stack = [os.path.abspath(top or self.root)]
+        while stack:
+            dirPath = stack.pop()
+            entries = []
+            try:
+                with os.scandir(dirPath) as it:
+                    for entry in it:
+                        try:
+                            isDir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            isDir = False
+                        entries.append((entry.name, entry.path, isDir))
+            except OSError:
+                continue
+            entries = self.filter(dirPath, entries)
+            yield dirPath, entries
+            stack.extend(path for name, path, isDir in reversed(entries) if isDir)
+
+    def walkFiles(self, top=None):
+        """
+        遍历工作区中未被排除的文件
+        :return: 生成文件路径
+        """
+        for dirPath, entries in self.walk(top):
+            for name, path, isDir in entries:
+                if not isDir:
+                    yield path
+
+    def __updateIgnoreFile(self, dirPath, present):
+        path = os.path.join(dirPath, self.IGNORE_FILE)
+        with self.lock:
+            cached = self.ignoreFiles.get(dirPath, False)
+        if not present:
+            if cached is not None:
+                with self.lock:
+                    self.ignoreFiles[dirPath] = None
+                    if cached:
+                        self.chains.clear()
+                        self.generation += 1
+            return
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if cached and cached.mtime == mtime:
+            return
+        ignoreFile = IgnoreFile.load(dirPath, path)
+        with self.lock:
+            self.ignoreFiles[dirPath] = ignoreFile
+            # 规则变化影响所有下级目录
+            self.chains.clear()
+            if cached is not False:
+                self.generation += 1
+
+    def __ignoreFile(self, dirPath):
+        with self.lock:
+            if dirPath in self.ignoreFiles:
+                return self.ignoreFiles[dirPath]
+        ignoreFile = IgnoreFile.load(dirPath, os.path.join(dirPath, self.IGNORE_FILE))
+        with self.lock:
+            self.ignoreFiles.setdefault(dirPath, ignoreFile)
+            return self.ignoreFiles[dirPath]
+
+    def __chain(self, dirPath):
+        with self.lock:
+            chain = self.chains.get(dirPath)
+        if chain is not None:
+            return chain
+
+        relative = os.path.relpath(dirPath, self.root)
+        if relative.startswith(os.pardir):
+            return ()
+        if relative == os.curdir:
+            parentChain = (self.globalRules,)
+        else:
+            parentChain = self.__chain(os.path.dirname(dirPath))
+        ignoreFile = self.__ignoreFile(dirPath)
+        chain = parentChain + (ignoreFile,) if ignoreFile is not None and ignoreFile.rules else parentChain
+        with self.lock:
+            self.chains[dirPath] = chain
+        return chain
+
+    @staticmethod
+    def __matchChain(chain, path, name, isDir):
+        # 下级目录的.gitignore优先于上级
+        for ignoreFile in reversed(chain):
+            result = ignoreFile.match(path, name, isDir)
+            if result is not None:
+                return result
+        return False
@@ -3,11 +3,17 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import os
 
+from FileSystemModel import FileSystemModel
+from FileWatcher import FileWatcher
+from FileOperationQueue import FileOperationJob, FileOperationQueue
+from ExclusionMatcher import ExclusionMatcher
+
 class FileBrowser(QWidget):
     # 定义文件双击信号
     # fileDoubleClicked = pyqtSignal(str)
     
     openFile = pyqtSignal(str)
+    previewFile = pyqtSignal(str)  # 单击文件时在预览标签页中显示
     renameCompleted = pyqtSignal(str)  # 添加重命名完成信号
     
     def __init__(self, parent=None):
@@ -18,14 +24,30 @@ class FileBrowser(QWidget):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         
-        # 创建文件树
-        self.fileTree = QTreeWidget()
+        # 创建文件树，目录内容由模型在后台线程中按需加载
+        self.fileModel = FileSystemModel(self)
+        self.fileModel.loadFailed.connect(self.onDirectoryLoadFailed)
+        self.fileModel.rowsAboutToBeRemoved.connect(self.onRowsAboutToBeRemoved)
+        self.fileModel.directoryRenamed.connect(self.onDirectoryRenamed)
+        self.fileModel.directoryRefreshed.connect(self.onDirectoryRefreshed)
+        
+        # 监视已展开的目录，变化时只刷新对应的目录
+        self.fileWatcher = FileWatcher(self)
+        self.fileWatcher.directoriesChanged.connect(self.onDirectoriesChanged)
+        self.fileWatcher.watchesInvalidated.connect(self.refresh)
+        
+        self.fileTree = QTreeView()
+        self.fileTree.setModel(self.fileModel)
         self.fileTree.setHeaderHidden(True)
+        self.fileTree.setUniformRowHeights(True)
+        self.fileTree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.fileTree.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.fileTree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.fileTree.customContextMenuRequested.connect(self.showContextMenu)
-        self.fileTree.itemExpanded.connect(self.loadDirectory)
-        # self.fileTree.itemDoubleClicked.connect(self.onItemDoubleClicked)
-        self.fileTree.itemClicked.connect(self.onItemClicked)
+        self.fileTree.doubleClicked.connect(self.onItemDoubleClicked)
+        self.fileTree.clicked.connect(self.onItemClicked)
+        self.fileTree.expanded.connect(self.onItemExpanded)
+        self.fileTree.collapsed.connect(self.onItemCollapsed)
         
         # 添加键盘事件处理
         self.fileTree.keyPressEvent = self.treeKeyPressEvent
@@ -33,8 +55,39 @@ class FileBrowser(QWidget):
         # 添加到布局
         layout.addWidget(self.fileTree)
         
+        # 文件操作在后台队列中执行，底部显示进度和取消按钮
+        self.operationQueue = FileOperationQueue(self)
+        self.operationQueue.jobStarted.connect(self.onOperationStarted)
+        self.operationQueue.jobProgress.connect(self.onOperationProgress)
+        self.operationQueue.jobFinished.connect(self.onOperationFinished)
+        self.operationQueue.activeChanged.connect(self.onOperationsActiveChanged)
+        
+        self.operationBar = QWidget()
+        operationLayout = QHBoxLayout(self.operationBar)
+        operationLayout.setContentsMargins(4, 2, 4, 2)
+        self.operationLabel = QLabel()
+        self.operationProgress = QProgressBar()
+        self.operationProgress.setMaximumHeight(14)
+        self.operationProgress.setTextVisible(False)
+        self.cancelOperationButton = QPushButton("取消")
+        self.cancelOperationButton.setFlat(True)
+        self.cancelOperationButton.clicked.connect(self.operationQueue.cancelAll)
+        operationLayout.addWidget(self.operationLabel, 1)
+        operationLayout.addWidget(self.operationProgress, 1)
+        operationLayout.addWidget(self.cancelOperationButton)
+        self.operationBar.setVisible(False)
+        layout.addWidget(self.operationBar)
+        
+        # 复制或剪切的路径，粘贴时使用
+        self.clipboardPaths = []
+        self.clipboardCut = False
+        # 新建完成后等待目录刷新再选中的路径
+        self.pendingSelection = None
+        
         # 设置初始目录为当前工作目录
         self.currentPath = ""
+        # 工作区的排除规则，其他需要扫描工作区的组件共用
+        self.exclusionMatcher = None
         # self.loadRootDirectory()
         
     def treeKeyPressEvent(self, event):
@@ -43,78 +96,106 @@ class FileBrowser(QWidget):
             self.renameSelectedItem()
         elif event.key() == Qt.Key_Delete:
             self.deleteSelectedItem()
+        elif event.matches(QKeySequence.Copy):
+            self.copySelectedItems(cut=False)
+        elif event.matches(QKeySequence.Cut):
+            self.copySelectedItems(cut=True)
+        elif event.matches(QKeySequence.Paste):
+            self.pasteIntoCurrentDirectory()
         else:
             # 调用原始的keyPressEvent处理其他按键
-            QTreeWidget.keyPressEvent(self.fileTree, event)
+            QTreeView.keyPressEvent(self.fileTree, event)
             
+    def selectedPaths(self):
+        """
+        获取选中的路径，已包含在其他选中目录中的项目会被忽略
+        """
+        paths = sorted(self.fileModel.filePath(index) for index in self.fileTree.selectionModel().selectedRows())
+        if not paths:
+            currentIndex = self.fileTree.currentIndex()
+            if currentIndex.isValid():
+                paths = [self.fileModel.filePath(currentIndex)]
+        result = []
+        for path in paths:
+            if result and path.startswith(result[-1].rstrip(os.sep) + os.sep):
+                continue
+            result.append(path)
+        # 不允许操作工作区根目录本身
+        return [path for path in result if path != self.currentPath]
+        
     def deleteSelectedItem(self):
-        """删除选中的项目"""
-        currentItem = self.fileTree.currentItem()
-        if not currentItem:
+        """删除选中的项目，多个项目作为一个后台任务删除"""
+        paths = self.selectedPaths()
+        if not paths:
             return
             
-        path = currentItem.data(0, Qt.UserRole)
-        if not os.path.exists(path):
-            return
-            
-        # 获取项目名称
-        name = currentItem.text(0)
+        if len(paths) == 1:
+            prompt = f"确定要删除 '{os.path.basename(paths[0])}' 吗？\n此操作不可撤销。"
+        else:
+            prompt = f"确定要删除选中的 {len(paths)} 个项目吗？\n此操作不可撤销。"
         
         # 确认删除
         reply = QMessageBox.question(
             self, 
             "确认删除", 
-            f"确定要删除 '{name}' 吗？\n此操作不可撤销。",
+            prompt,
             QMessageBox.Yes | QMessageBox.No, 
             QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            try:
-                # 执行删除
-                if os.path.isfile(path):
-                    os.remove(path)
-                elif os.path.isdir(path):
-                    # 递归删除目录
-                    self.removeDirectory(path)
-                    
-                # 从树中移除项目
-                parent = currentItem.parent()
-                if parent:
-                    parent.removeChild(currentItem)
-                else:
-                    index = self.fileTree.indexOfTopLevelItem(currentItem)
-                    if index >= 0:
-                        self.fileTree.takeTopLevelItem(index)
-                        
-                self.renameCompleted.emit(f"已删除: {name}")
-            except Exception as e:
-                QMessageBox.warning(self, "错误", f"删除失败: {str(e)}")
-                
-    def removeDirectory(self, path):
+            self.operationQueue.submit(FileOperationJob.DELETE, paths)
+            
+    def copySelectedItems(self, cut):
         """
-        递归删除目录
-        :param path: 目录路径
+        记录选中的项目，粘贴时复制或移动
+        :param cut: 是否剪切
         """
-        try:
-            # 使用shutil.rmtree更安全地删除目录
-            import shutil
-            shutil.rmtree(path)
-        except Exception as e:
-            raise Exception(f"无法删除目录 {path}: {str(e)}")
+        paths = self.selectedPaths()
+        if not paths:
+            return
+        self.clipboardPaths = paths
+        self.clipboardCut = cut
+        self.renameCompleted.emit(f"{'已剪切' if cut else '已复制'} {len(paths)} 个项目")
+        
+    def pasteIntoCurrentDirectory(self):
+        """
+        粘贴到当前选中的目录，选中文件时粘贴到文件所在目录
+        """
+        currentIndex = self.fileTree.currentIndex()
+        if not currentIndex.isValid():
+            return
+        path = self.fileModel.filePath(currentIndex)
+        if not self.fileModel.isDir(currentIndex):
+            path = os.path.dirname(path)
+        self.pasteInto(path)
+        
+    def pasteInto(self, directoryPath):
+        """
+        将复制或剪切的项目粘贴到目录
+        :param directoryPath: 目标目录
+        """
+        if not self.clipboardPaths:
+            return
+        kind = FileOperationJob.MOVE if self.clipboardCut else FileOperationJob.COPY
+        self.operationQueue.submit(kind, self.clipboardPaths, directoryPath)
+        if self.clipboardCut:
+            # 剪切的项目只能粘贴一次
+            self.clipboardPaths = []
+            self.clipboardCut = False
             
     def renameSelectedItem(self):
         """重命名选中的项目"""
-        currentItem = self.fileTree.currentItem()
-        if not currentItem:
+        currentIndex = self.fileTree.currentIndex()
+        if not currentIndex.isValid():
             return
             
-        path = currentItem.data(0, Qt.UserRole)
+        path = self.fileModel.filePath(currentIndex)
         if not os.path.exists(path):
             return
             
         # 使用QInputDialog来获取新名称
-        oldName = currentItem.text(0)
+        oldName = self.fileModel.fileName(currentIndex)
         newName, ok = QInputDialog.getText(self, "重命名", "新名称:", QLineEdit.Normal, oldName)
         
         if not ok or not newName:
@@ -138,109 +219,126 @@ class FileBrowser(QWidget):
             QMessageBox.warning(self, "错误", f"文件或文件夹 '{newName}' 已存在")
             return
             
-        # 执行重命名
-        try:
-            os.rename(path, newPath)
-            # 更新项目文本和数据
-            currentItem.setText(0, newName)
-            currentItem.setData(0, Qt.UserRole, newPath)
-            self.renameCompleted.emit(f"已重命名: {oldName} -> {newName}")
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"重命名失败: {str(e)}")
+        # 在后台执行重命名，完成后刷新所在目录
+        self.operationQueue.submit(FileOperationJob.RENAME, [path], newPath)
             
     def loadRootDirectory(self):
         """
         加载根目录
         """
-        self.fileTree.clear()
-        rootItem = QTreeWidgetItem(self.fileTree)
-        rootItem.setText(0, QDir(self.currentPath).dirName() or self.currentPath)
-        rootItem.setData(0, Qt.UserRole, self.currentPath)
-        rootItem.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
-        
-        # 添加一个子项占位符，使项目可以展开
-        placeholder = QTreeWidgetItem(rootItem)
-        placeholder.setText(0, "Loading...")
+        self.fileWatcher.clear()
+        self.exclusionMatcher = ExclusionMatcher(self.currentPath) if self.currentPath else None
+        self.fileModel.setExclusionMatcher(self.exclusionMatcher)
+        self.fileModel.setRootPath(self.currentPath)
         
-    def loadDirectory(self, item):
+    def onDirectoryLoadFailed(self, path, message):
         """
-        加载指定目录的内容
+        处理目录读取失败
         """
-        # 如果不是目录，直接返回
-        path = item.data(0, Qt.UserRole)
-        if not os.path.isdir(path):
-            return
+        QMessageBox.warning(self, "错误", f"无法读取目录: {message}")
             
-        # 清除占位符
-        item.takeChildren()
+    def onItemExpanded(self, index):
+        """
+        目录展开时开始监视，折叠期间可能已发生变化，已加载的目录重新比较一次
+        """
+        path = self.fileModel.filePath(index)
+        self.fileWatcher.watch(path)
+        if self.fileModel.nodeFromIndex(index).loaded:
+            self.fileModel.refreshDirectory(path)
+            
+    def onItemCollapsed(self, index):
+        """
+        目录折叠时停止监视该目录及其子目录
+        """
+        self.fileWatcher.unwatch(self.fileModel.filePath(index))
         
-        try:
-            # 获取目录内容
-            entries = QDir(path).entryInfoList(
-                QDir.AllEntries | QDir.NoDotAndDotDot | QDir.Hidden,
-                QDir.DirsFirst | QDir.Name
-            )
-            
-            for entry in entries:
-                childItem = QTreeWidgetItem(item)
-                childItem.setText(0, entry.fileName())
-                childItem.setData(0, Qt.UserRole, entry.absoluteFilePath())
+    def onRowsAboutToBeRemoved(self, parent, first, last):
+        """
+        节点被移除时停止监视其中的目录
+        """
+        for row in range(first, last + 1):
+            index = self.fileModel.index(row, 0, parent)
+            if self.fileModel.isDir(index):
+                self.fileWatcher.unwatch(self.fileModel.filePath(index))
                 
-                # 设置图标
-                if entry.isDir():
-                    childItem.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
-                    # 添加占位符子项
-                    placeholder = QTreeWidgetItem(childItem)
-                    placeholder.setText(0, "Loading...")
-                else:
-                    childItem.setIcon(0, self.style().standardIcon(QStyle.SP_FileIcon))
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"无法读取目录: {str(e)}")
+    def onDirectoryRenamed(self, oldPath, newPath):
+        """
+        目录重命名后按新路径重新监视其中已展开的目录
+        """
+        if not self.fileWatcher.isWatching(oldPath):
+            return
+        self.fileWatcher.unwatch(oldPath)
+        node = self.fileModel.findNode(newPath)
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            if self.fileTree.isExpanded(self.fileModel.indexFromNode(node)):
+                self.fileWatcher.watch(node.path)
+                stack.extend(child for child in node.children if child.isDir)
+                
+    def onDirectoriesChanged(self, changes):
+        """
+        处理监视器合并后的目录变化
+        :param changes: {目录路径: [(旧名称, 新名称), ...]}
+        """
+        for path, renames in changes.items():
+            self.fileModel.refreshDirectory(path, renames)
             
-    def onItemClicked(self, item, column):
+    def onItemClicked(self, index):
         """
         处理项目点击事件
         """
-        # 获取到文件路径
-        path = item.data(0, Qt.UserRole)
-        if os.path.isfile(path):
-            self.openFile.emit(path)
-        # elif os.path.isdir(path):
-            # self.fileTree.expandItem(item)
-        
-    # def onItemDoubleClicked(self, item, column):
-    #     """
-    #     处理项目双击事件
-    #     """
-    #     path = item.data(0, Qt.UserRole)
-    #     if os.path.isfile(path):
-    #         self.fileDoubleClicked.emit(path)
-    #     elif os.path.isdir(path):
-    #         self.fileTree.expandItem(item)
+        # 节点中已记录类型，无需再访问文件系统
+        if not self.fileModel.isDir(index):
+            self.previewFile.emit(self.fileModel.filePath(index))
+        
+    def onItemDoubleClicked(self, index):
+        """
+        处理项目双击事件，以固定标签页打开文件
+        """
+        if not self.fileModel.isDir(index):
+            self.openFile.emit(self.fileModel.filePath(index))
             
     def showContextMenu(self, position):
         """
         显示右键菜单
         """
-        item = self.fileTree.itemAt(position)
-        if not item:
+        index = self.fileTree.indexAt(position)
+        if not index.isValid():
             return
             
-        path = item.data(0, Qt.UserRole)
+        path = self.fileModel.filePath(index)
+        isDir = self.fileModel.isDir(index)
         menu = QMenu()
         
         # 检查是否为目录，如果是则添加创建文件选项
-        if os.path.isdir(path):
+        if isDir:
             createFileAction = QAction("新建文件", self)
-            createFileAction.triggered.connect(lambda: self.createFile(item, path))
+            createFileAction.triggered.connect(lambda: self.createFile(QPersistentModelIndex(index), path))
             menu.addAction(createFileAction)
             
             createFolderAction = QAction("新建文件夹", self)
-            createFolderAction.triggered.connect(lambda: self.createFolder(item, path))
+            createFolderAction.triggered.connect(lambda: self.createFolder(QPersistentModelIndex(index), path))
             menu.addAction(createFolderAction)
             
             menu.addSeparator()
         
+        copyAction = QAction("复制", self)
+        copyAction.triggered.connect(lambda: self.copySelectedItems(cut=False))
+        menu.addAction(copyAction)
+        
+        cutAction = QAction("剪切", self)
+        cutAction.triggered.connect(lambda: self.copySelectedItems(cut=True))
+        menu.addAction(cutAction)
+        
+        if isDir:
+            pasteAction = QAction("粘贴", self)
+            pasteAction.setEnabled(bool(self.clipboardPaths))
+            pasteAction.triggered.connect(lambda: self.pasteInto(path))
+            menu.addAction(pasteAction)
+            
+        menu.addSeparator()
+        
         # 添加重命名选项到上下文菜单
         renameAction = QAction("重命名", self)
         renameAction.triggered.connect(self.renameSelectedItem)
@@ -253,7 +351,7 @@ class FileBrowser(QWidget):
         
         menu.addSeparator()
         
-        if os.path.isdir(path):
+        if isDir:
             openInTerminalAction = QAction("在终端中打开", self)
             openInTerminalAction.triggered.connect(lambda: self.openInTerminal(path))
             menu.addAction(openInTerminalAction)
@@ -271,10 +369,10 @@ class FileBrowser(QWidget):
         
         menu.exec_(self.fileTree.viewport().mapToGlobal(position))
         
-    def createFile(self, parentItem, directoryPath):
+    def createFile(self, parentIndex, directoryPath):
         """
         在指定目录中创建新文件
-        :param parentItem: 父级树项
+        :param parentIndex: 父级目录索引
         :param directoryPath: 目录路径
         """
         # 获取文件名
@@ -295,25 +393,13 @@ class FileBrowser(QWidget):
             QMessageBox.warning(self, "错误", f"文件 '{fileName}' 已存在")
             return
             
-        try:
-            # 创建文件
-            with open(fullPath, 'w') as f:
-                pass  # 创建空文件
-                
-            # 在树中添加新文件项
-            childItem = QTreeWidgetItem(parentItem)
-            childItem.setText(0, fileName)
-            childItem.setData(0, Qt.UserRole, fullPath)
-            childItem.setIcon(0, self.style().standardIcon(QStyle.SP_FileIcon))
-            
-            self.renameCompleted.emit(f"已创建文件: {fileName}")
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"创建文件失败: {str(e)}")
+        self.fileTree.expand(QModelIndex(parentIndex))
+        self.operationQueue.submit(FileOperationJob.NEW_FILE, [fullPath])
             
-    def createFolder(self, parentItem, directoryPath):
+    def createFolder(self, parentIndex, directoryPath):
         """
         在指定目录中创建新文件夹
-        :param parentItem: 父级树项
+        :param parentIndex: 父级目录索引
         :param directoryPath: 目录路径
         """
         # 获取文件夹名
@@ -334,23 +420,53 @@ class FileBrowser(QWidget):
             QMessageBox.warning(self, "错误", f"文件夹 '{folderName}' 已存在")
             return
             
-        try:
-            # 创建文件夹
-            os.makedirs(fullPath)
-                
-            # 在树中添加新文件夹项
-            childItem = QTreeWidgetItem(parentItem)
-            childItem.setText(0, folderName)
-            childItem.setData(0, Qt.UserRole, fullPath)
-            childItem.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
+        self.fileTree.expand(QModelIndex(parentIndex))
+        self.operationQueue.submit(FileOperationJob.NEW_FOLDER, [fullPath])
             
-            # 添加占位符子项使文件夹可以展开
-            placeholder = QTreeWidgetItem(childItem)
-            placeholder.setText(0, "Loading...")
+    def onOperationStarted(self, job):
+        self.operationLabel.setText(job.description())
+        self.operationProgress.setRange(0, 0)
+        
+    def onOperationProgress(self, job, filesDone, filesTotal, bytesDone, bytesTotal):
+        """
+        显示任务进度，有数据量时按字节计算，否则按文件数计算
+        """
+        if bytesTotal > 0:
+            self.operationProgress.setRange(0, 1000)
+            self.operationProgress.setValue(int(bytesDone * 1000 / bytesTotal))
+        elif filesTotal > 0:
+            self.operationProgress.setRange(0, filesTotal)
+            self.operationProgress.setValue(min(filesDone, filesTotal))
+        self.operationLabel.setText(f"{job.description()} ({filesDone}/{filesTotal})")
+        
+    def onOperationFinished(self, job, ok, message):
+        """
+        任务完成后每个受影响的目录只刷新一次，由模型按差异更新
+        """
+        for path, renames in job.affected.items():
+            self.fileModel.refreshDirectory(path, renames)
+        if job.created and job.kind in (FileOperationJob.NEW_FILE, FileOperationJob.NEW_FOLDER):
+            self.pendingSelection = job.created[0]
+            
+        if ok:
+            self.renameCompleted.emit(f"已完成: {job.description()}")
+        elif job.cancelled:
+            self.renameCompleted.emit(f"已取消: {job.description()}")
+        else:
+            QMessageBox.warning(self, "错误", f"{job.description()} 失败: {message}")
             
-            self.renameCompleted.emit(f"已创建文件夹: {folderName}")
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"创建文件夹失败: {str(e)}")
+    def onOperationsActiveChanged(self, count):
+        self.operationBar.setVisible(count > 0)
+        
+    def onDirectoryRefreshed(self, path):
+        """
+        刷新完成后选中新建的项目
+        """
+        if self.pendingSelection and os.path.dirname(self.pendingSelection) == path:
+            node = self.fileModel.findNode(self.pendingSelection)
+            self.pendingSelection = None
+            if node is not None:
+                self.fileTree.setCurrentIndex(self.fileModel.indexFromNode(node))
             
     def copyPath(self, path):
         """
@@ -385,9 +501,16 @@ class FileBrowser(QWidget):
             
     def refresh(self):
         """
-        刷新当前目录
+        刷新所有已加载的目录，保留展开和选中状态
         """
-        self.loadRootDirectory()
+        if not self.fileModel.rootIndex().isValid():
+            self.loadRootDirectory()
+            return
+        # 重新读取排除配置，所有已加载的目录按新规则过滤
+        if self.exclusionMatcher is not None:
+            self.exclusionMatcher.reload()
+        for path in self.fileModel.loadedDirectories():
+            self.fileModel.refreshDirectory(path)
         
     def changePath(self):
         """
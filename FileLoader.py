@@ -0,0 +1,164 @@
+from PyQt5.QtCore import *
+from PyQt5 import sip
+import codecs
+import io
+import os
+
+class FileLoadSignals(QObject):
+    """
+    文件加载任务的信号集合（QRunnable 本身不能定义信号）
+    """
+    chunkLoaded = pyqtSignal(str, str)  # 文件路径, 文本块
+    progress = pyqtSignal(str, int, int)  # 文件路径, 已读取字节数, 总字节数
+    finished = pyqtSignal(str)  # 文件路径
+    failed = pyqtSignal(str, str)  # 文件路径, 错误信息
+    cancelled = pyqtSignal(str)  # 文件路径
+
+class FileLoadTask(QRunnable):
+    """
+    在工作线程中按固定大小分块读取文件
+    """
+
+    def __init__(self, filePath, chunkSize):
+        super().__init__()
+        self.filePath = filePath
+        self.chunkSize = chunkSize
+        self.signals = FileLoadSignals()
+        self.__cancelled = False
+
+    def cancel(self):
+        """
+        请求取消加载，工作线程会在读取下一块之前退出
+        """
+        self.__cancelled = True
+
+    def run(self):
+        # 增量解码，避免多字节字符在块边界被截断；同时统一换行符，与文本模式读取的结果一致
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+        try:
+            total = os.path.getsize(self.filePath)
+            bytesRead = 0
+            with open(self.filePath, 'rb') as file:
+                while True:
+                    if self.__cancelled:
+                        self.signals.cancelled.emit(self.filePath)
+                        return
+
+                    data = file.read(self.chunkSize)
+                    if not data:
+                        break
+
+                    bytesRead += len(data)
+                    text = decoder.decode(data)
+                    if text:
+                        self.signals.chunkLoaded.emit(self.filePath, text)
+                    self.signals.progress.emit(self.filePath, bytesRead, total)
+
+            text = decoder.decode(b'', final=True)
+            if text:
+                self.signals.chunkLoaded.emit(self.filePath, text)
+            self.signals.finished.emit(self.filePath)
+        except Exception as e:
+            self.signals.failed.emit(self.filePath, str(e))
+
+class FileLoader(QObject):
+    """
+    后台文件加载器，多个文件在线程池中并行读取，读取到的文本块在GUI线程中追加到编辑器
+    """
+    progress = pyqtSignal(str, int)  # 文件路径, 百分比
+    loadFinished = pyqtSignal(str)  # 文件路径
+    loadFailed = pyqtSignal(str, str)  # 文件路径, 错误信息
+    loadCancelled = pyqtSignal(str)  # 文件路径
+    activeChanged = pyqtSignal(int)  # 正在加载的文件数量
+
+    CHUNK_SIZE = 1024 * 1024  # 每次读取1MB
+
+    def __init__(self, parent=None, maxThreads=4):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(maxThreads)
+        # 文件路径 -> (任务, 编辑器)
+        self.tasks = {}
+
+    def load(self, filePath, editor):
+        """
+        开始在后台加载文件到编辑器
+        :param filePath: 文件路径
+        :param editor: 目标编辑器
+        """
+        if filePath in self.tasks:
+            return
+
+        task = FileLoadTask(filePath, self.CHUNK_SIZE)
+        task.signals.chunkLoaded.connect(self.onChunkLoaded)
+        task.signals.progress.connect(self.onProgress)
+        task.signals.finished.connect(self.onFinished)
+        task.signals.failed.connect(self.onFailed)
+        task.signals.cancelled.connect(self.onCancelled)
+
+        self.tasks[filePath] = (task, editor)
+        editor.beginLoad()
+        self.threadPool.start(task)
+        self.activeChanged.emit(len(self.tasks))
+
+    def cancel(self, filePath):
+        """
+        取消指定文件的加载
+        :param filePath: 文件路径
+        """
+        entry = self.tasks.get(filePath)
+        if entry:
+            entry[0].cancel()
+
+    def cancelAll(self):
+        """
+        取消所有正在进行的加载
+        """
+        for task, editor in self.tasks.values():
+            task.cancel()
+
+    def isLoading(self, filePath):
+        """
+        判断文件是否正在加载
+        :param filePath: 文件路径
+        :return: 是否正在加载
+        """
+        return filePath in self.tasks
+
+    def onChunkLoaded(self, filePath, text):
+        entry = self.tasks.get(filePath)
+        if entry and not sip.isdeleted(entry[1]):
+            entry[1].appendChunk(text)
+
+    def onProgress(self, filePath, bytesRead, total):
+        if filePath in self.tasks:
+            percent = int(bytesRead * 100 / total) if total else 100
+            self.progress.emit(filePath, percent)
+
+    def onFinished(self, filePath):
+        editor = self.__takeEditor(filePath)
+        if editor is not None:
+            editor.endLoad()
+            self.loadFinished.emit(filePath)
+
+    def onFailed(self, filePath, message):
+        editor = self.__takeEditor(filePath)
+        if editor is not None:
+            editor.endLoad()
+            self.loadFailed.emit(filePath, message)
+
+    def onCancelled(self, filePath):
+        editor = self.__takeEditor(filePath)
+        if editor is not None:
+            editor.endLoad()
+            self.loadCancelled.emit(filePath)
+
+    def __takeEditor(self, filePath):
+        entry = self.tasks.pop(filePath, None)
+        if entry is None:
+            return None
+        self.activeChanged.emit(len(self.tasks))
+        # 标签页可能在加载期间被关闭并销毁
+        if sip.isdeleted(entry[1]):
+            return None
+        return entry[1]
@@ -0,0 +1,365 @@
+from PyQt5.QtCore import *
+import errno
+import os
+import shutil
+import time
+
+class FileOperationCancelled(Exception):
+    """
+    文件操作被用户取消
+    """
+    pass
+
+class FileOperationSignals(QObject):
+    """
+    文件操作任务的信号集合
+    """
+    started = pyqtSignal(object)  # 任务
+    progress = pyqtSignal(object, int, int, int, int)  # 任务, 已完成文件数, 文件总数, 已完成字节数, 总字节数
+    finished = pyqtSignal(object, bool, str)  # 任务, 是否成功, 错误信息
+
+class FileOperationJob(QRunnable):
+    """
+    在工作线程中执行的文件操作，多个源路径作为一个任务执行
+    """
+    DELETE = 'delete'
+    COPY = 'copy'
+    MOVE = 'move'
+    RENAME = 'rename'
+    NEW_FILE = 'newFile'
+    NEW_FOLDER = 'newFolder'
+
+    CHUNK_SIZE = 1024 * 1024  # 复制时每次读写1MB
+    PROGRESS_INTERVAL = 0.1  # 进度信号的最小间隔（秒）
+
+    def __init__(self, kind, sources, target=None):
+        """
+        :param kind: 操作类型
+        :param sources: 源路径列表；新建操作为要创建的路径
+        :param target: 复制、移动的目标目录，或重命名后的路径
+        """
+        super().__init__()
+        self.setAutoDelete(False)
+        self.kind = kind
+        self.sources = list(sources)
+        self.target = target
+        self.cancelled = False
+        # 操作完成后需要刷新的目录：目录路径 -> [(旧名称, 新名称), ...]
+        self.affected = {}
+        # 新建或复制产生的路径
+        self.created = []
+        self.signals = FileOperationSignals()
+
+        self.filesDone = 0
+        self.filesTotal = 0
+        self.bytesDone = 0
+        self.bytesTotal = 0
+        self.lastProgress = 0.0
+
+    def description(self):
+        """
+        获取用于显示的任务描述
+        """
+        names = ", ".join(os.path.basename(path) for path in self.sources[:3])
+        if len(self.sources) > 3:
+            names += f" 等{len(self.sources)}项"
+        labels = {
+            self.DELETE: "删除",
+            self.COPY: "复制",
+            self.MOVE: "移动",
+            self.RENAME: "重命名",
+            self.NEW_FILE: "新建文件",
+            self.NEW_FOLDER: "新建文件夹",
+        }
+        return f"{labels.get(self.kind, self.kind)} {names}"
+
+    def cancel(self):
+        """
+        请求取消，工作线程在处理下一个文件或数据块之前退出
+        """
+        self.cancelled = True
+
+    def run(self):
+        self.signals.started.emit(self)
+        try:
+            if self.kind == self.DELETE:
+                self.__delete()
+            elif self.kind == self.COPY:
+                self.__transfer(move=False)
+            elif self.kind == self.MOVE:
+                self.__transfer(move=True)
+            elif self.kind == self.RENAME:
+                self.__rename()
+            elif self.kind == self.NEW_FILE:
+                self.__create(isDir=False)
+            elif self.kind == self.NEW_FOLDER:
+                self.__create(isDir=True)
+            else:
+                raise ValueError(f"未知的文件操作: {self.kind}")
+            self.__emitProgress(force=True)
+            self.signals.finished.emit(self, True, "")
+        except FileOperationCancelled:
+            self.signals.finished.emit(self, False, "已取消")
+        except Exception as e:
+            self.signals.finished.emit(self, False, str(e))
+
+    def __checkCancelled(self):
+        if self.cancelled:
+            raise FileOperationCancelled()
+
+    def __emitProgress(self, force=False):
+        now = time.monotonic()
+        if force or now - self.lastProgress >= self.PROGRESS_INTERVAL:
+            self.lastProgress = now
+            self.signals.progress.emit(self, self.filesDone, self.filesTotal, self.bytesDone, self.bytesTotal)
+
+    def __markAffected(self, path, rename=None):
+        renames = self.affected.setdefault(os.path.dirname(path), [])
+        if rename is not None:
+            renames.append(rename)
+
+    def __count(self, paths):
+        """
+        统计文件数和字节数，用于显示进度
+        """
+        for path in paths:
+            stack = [path]
+            while stack:
+                self.__checkCancelled()
+                current = stack.pop()
+                if os.path.isdir(current) and not os.path.islink(current):
+                    self.filesTotal += 1
+                    try:
+                        with os.scandir(current) as it:
+                            for entry in it:
+                                stack.append(entry.path)
+                    except OSError:
+                        pass
+                else:
+                    self.filesTotal += 1
+                    try:
+                        self.bytesTotal += os.lstat(current).st_size
+                    except OSError:
+                        pass
+        self.__emitProgress(force=True)
+
+    def __delete(self):
+        self.__count(self.sources)
+        for path in self.sources:
+            self.__markAffected(path)
+            if os.path.isdir(path) and not os.path.islink(path):
+                # 自底向上删除，每个文件之间检查取消
+                for root, dirs, files in os.walk(path, topdown=False):
+                    for name in files:
+                        self.__removeFile(os.path.join(root, name))
+                    for name in dirs:
+                        dirPath = os.path.join(root, name)
+                        if os.path.islink(dirPath):
+                            self.__removeFile(dirPath)
+                        else:
+                            self.__checkCancelled()
+                            os.rmdir(dirPath)
+                            self.filesDone += 1
+                self.__checkCancelled()
+                os.rmdir(path)
+                self.filesDone += 1
+            else:
+                self.__removeFile(path)
+            self.__emitProgress()
+
+    def __removeFile(self, path):
+        self.__checkCancelled()
+        try:
+            size = os.lstat(path).st_size
+        except OSError:
+            size = 0
+        os.remove(path)
+        self.filesDone += 1
+        self.bytesDone += size
+        self.__emitProgress()
+
+    def __transfer(self, move):
+        targetDir = self.target
+        if move:
+            # 同一文件系统内直接重命名，不需要复制数据
+            remaining = []
+            for path in self.sources:
+                self.__checkCancelled()
+                destination = os.path.join(targetDir, os.path.basename(path))
+                if os.path.dirname(os.path.abspath(path)) == os.path.abspath(targetDir):
+                    continue
+                if os.path.exists(destination):
+                    raise FileExistsError(f"'{os.path.basename(path)}' 已存在于目标文件夹")
+                if os.path.abspath(destination).startswith(os.path.abspath(path) + os.sep):
+                    raise ValueError(f"不能将 '{os.path.basename(path)}' 移动到其子文件夹中")
+                try:
+                    os.rename(path, destination)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    remaining.append(path)
+                    continue
+                self.__markAffected(path)
+                self.__markAffected(destination)
+                self.filesDone += 1
+            if not remaining:
+                return
+            sources = remaining
+        else:
+            sources = self.sources
+
+        # 跨文件系统的移动和复制需要逐块复制
+        self.__count(sources)
+        for path in sources:
+            destination = self.__uniqueDestination(targetDir, os.path.basename(path), move)
+            if os.path.abspath(destination).startswith(os.path.abspath(path) + os.sep):
+                raise ValueError(f"不能将 '{os.path.basename(path)}' 复制到其子文件夹中")
+            self.__markAffected(destination)
+            self.created.append(destination)
+            try:
+                self.__copyTree(path, destination)
+            except FileOperationCancelled:
+                # 删除未复制完成的目标，避免留下不完整的文件
+                self.__discard(destination)
+                raise
+            if move:
+                self.__markAffected(path)
+                self.__discard(path)
+
+    def __uniqueDestination(self, targetDir, name, move):
+        destination = os.path.join(targetDir, name)
+        if not os.path.exists(destination):
+            return destination
+        if move:
+            raise FileExistsError(f"'{name}' 已存在于目标文件夹")
+        # 复制到已有同名项目的文件夹时自动编号
+        base, ext = os.path.splitext(name)
+        index = 1
+        while os.path.exists(destination):
+            destination = os.path.join(targetDir, f"{base} ({index}){ext}")
+            index += 1
+        return destination
+
+    def __copyTree(self, source, destination):
+        if os.path.islink(source):
+            self.__checkCancelled()
+            os.symlink(os.readlink(source), destination)
+            self.filesDone += 1
+            return
+        if os.path.isdir(source):
+            self.__checkCancelled()
+            os.mkdir(destination)
+            self.filesDone += 1
+            with os.scandir(source) as it:
+                entries = list(it)
+            for entry in entries:
+                self.__copyTree(entry.path, os.path.join(destination, entry.name))
+            shutil.copystat(source, destination)
+            return
+
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            while True:
+                self.__checkCancelled()
+                data = src.read(self.CHUNK_SIZE)
+                if not data:
+                    break
+                dst.write(data)
+                self.bytesDone += len(data)
+                self.__emitProgress()
+        shutil.copystat(source, destination)
+        self.filesDone += 1
+        self.__emitProgress()
+
+    def __discard(self, path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+    def __rename(self):
+        source = self.sources[0]
+        if os.path.exists(self.target):
+            raise FileExistsError(f"文件或文件夹 '{os.path.basename(self.target)}' 已存在")
+        os.rename(source, self.target)
+        self.filesTotal = self.filesDone = 1
+        if os.path.dirname(source) == os.path.dirname(self.target):
+            self.__markAffected(source, (os.path.basename(source), os.path.basename(self.target)))
+        else:
+            self.__markAffected(source)
+            self.__markAffected(self.target)
+
+    def __create(self, isDir):
+        path = self.sources[0]
+        if os.path.exists(path):
+            raise FileExistsError(f"'{os.path.basename(path)}' 已存在")
+        if isDir:
+            os.makedirs(path)
+        else:
+            # 'x'模式保证不会覆盖检查之后出现的同名文件
+            with open(path, 'x'):
+                pass
+        self.filesTotal = self.filesDone = 1
+        self.created.append(path)
+        self.__markAffected(path)
+
+class FileOperationQueue(QObject):
+    """
+    文件操作队列：任务按提交顺序在单个工作线程中依次执行，避免互相冲突，GUI线程不会被阻塞
+    """
+    jobStarted = pyqtSignal(object)  # 任务
+    jobProgress = pyqtSignal(object, int, int, int, int)  # 任务, 已完成文件数, 文件总数, 已完成字节数, 总字节数
+    jobFinished = pyqtSignal(object, bool, str)  # 任务, 是否成功, 错误信息
+    activeChanged = pyqtSignal(int)  # 未完成的任务数量
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+        self.jobs = []
+
+    def submit(self, kind, sources, target=None):
+        """
+        提交文件操作
+        :param kind: 操作类型，见FileOperationJob
+        :param sources: 源路径列表
+        :param target: 目标目录或新路径
+        :return: 任务
+        """
+        job = FileOperationJob(kind, sources, target)
+        job.signals.started.connect(self.jobStarted)
+        job.signals.progress.connect(self.jobProgress)
+        job.signals.finished.connect(self.onJobFinished)
+        self.jobs.append(job)
+        self.threadPool.start(job)
+        self.activeChanged.emit(len(self.jobs))
+        return job
+
+    def onJobFinished(self, job, ok, message):
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.jobFinished.emit(job, ok, message)
+        self.activeChanged.emit(len(self.jobs))
+
+    def cancel(self, job):
+        """
+        取消任务，尚未开始的任务直接从队列中移除
+        :param job: 任务
+        """
+        if job not in self.jobs:
+            return
+        job.cancel()
+        if self.threadPool.tryTake(job):
+            self.onJobFinished(job, False, "已取消")
+
+    def cancelAll(self):
+        for job in list(self.jobs):
+            self.cancel(job)
+
+    def isBusy(self):
+        return bool(self.jobs)
+
+    def waitForDone(self, msecs=-1):
+        """
+        等待所有任务完成，退出程序前调用
+        """
+        return self.threadPool.waitForDone(msecs)
@@ -0,0 +1,117 @@
+from PyQt5.QtCore import *
+from collections import OrderedDict
+import os
+
+class PreviewReadSignals(QObject):
+    """
+    预览读取任务的信号集合
+    """
+    finished = pyqtSignal(str, object, object)  # 文件路径, 缓存键, 文档字节
+    failed = pyqtSignal(str, str)  # 文件路径, 错误信息
+
+class PreviewReadTask(QRunnable):
+    """
+    在工作线程中读取预览文件
+    """
+
+    def __init__(self, filePath, key):
+        super().__init__()
+        self.filePath = filePath
+        self.key = key
+        self.signals = PreviewReadSignals()
+
+    def run(self):
+        try:
+            with open(self.filePath, 'rb') as f:
+                data = f.read()
+            # 与文本模式读取一致：校验UTF-8并统一换行符
+            data.decode('utf-8')
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+            self.signals.finished.emit(self.filePath, self.key, data)
+        except Exception as e:
+            self.signals.failed.emit(self.filePath, str(e))
+
+class FilePreviewer(QObject):
+    """
+    预览标签页的文件读取器：请求经过防抖，只读取最后一次点击的文件，读取结果按路径缓存
+    """
+    previewReady = pyqtSignal(str, bytes)  # 文件路径, 文档字节
+    previewFailed = pyqtSignal(str, str)  # 文件路径, 错误信息
+
+    DEBOUNCE_INTERVAL = 120  # 毫秒
+    CACHE_BUDGET = 32 * 1024 * 1024  # 缓存的总字节数上限
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+        # 文件路径 -> ((修改时间, 大小), 文档字节)，按最近使用排列
+        self.cache = OrderedDict()
+        self.cacheSize = 0
+        self.pendingPath = None
+
+        self.debounceTimer = QTimer(self)
+        self.debounceTimer.setSingleShot(True)
+        self.debounceTimer.setInterval(self.DEBOUNCE_INTERVAL)
+        self.debounceTimer.timeout.connect(self.__readPending)
+
+    def request(self, filePath):
+        """
+        请求预览文件，连续的请求只处理最后一次
+        :param filePath: 文件路径
+        """
+        self.pendingPath = filePath
+        self.debounceTimer.start()
+
+    def __readPending(self):
+        filePath = self.pendingPath
+        if not filePath:
+            return
+
+        try:
+            stat = os.stat(filePath)
+        except OSError as e:
+            self.previewFailed.emit(filePath, str(e))
+            return
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self.cache.get(filePath)
+        if entry and entry[0] == key:
+            self.cache.move_to_end(filePath)
+            self.previewReady.emit(filePath, entry[1])
+            return
+
+        task = PreviewReadTask(filePath, key)
+        task.signals.finished.connect(self.onReadFinished)
+        task.signals.failed.connect(self.onReadFailed)
+        self.threadPool.start(task)
+
+    def onReadFinished(self, filePath, key, data):
+        self.__store(filePath, key, data)
+        # 读取期间用户已经点击了其他文件时，只缓存不显示
+        if filePath == self.pendingPath:
+            self.previewReady.emit(filePath, data)
+
+    def onReadFailed(self, filePath, message):
+        if filePath == self.pendingPath:
+            self.previewFailed.emit(filePath, message)
+
+    def __store(self, filePath, key, data):
+        old = self.cache.pop(filePath, None)
+        if old:
+            self.cacheSize -= len(old[1])
+        if len(data) > self.CACHE_BUDGET:
+            return
+
+        self.cache[filePath] = (key, data)
+        self.cacheSize += len(data)
+        while self.cacheSize > self.CACHE_BUDGET:
+            path, (oldKey, oldData) = self.cache.popitem(last=False)
+            self.cacheSize -= len(oldData)
+
+    def cancel(self):
+        """
+        取消尚未处理的预览请求
+        """
+        self.debounceTimer.stop()
+        self.pendingPath = None
@@ -0,0 +1,168 @@
+from PyQt5.QtCore import *
+from PyQt5 import sip
+import hashlib
+import os
+import tempfile
+
+# 进程的umask只能通过设置来读取，在导入时（主线程）读取一次，避免在工作线程中临时修改
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+class FileSaveSignals(QObject):
+    """
+    文件保存任务的信号集合
+    """
+    finished = pyqtSignal(str, bool, str, bytes)  # 文件路径, 是否写入, 消息, 内容哈希
+    failed = pyqtSignal(str, str)  # 文件路径, 错误信息
+
+class FileSaveTask(QRunnable):
+    """
+    在工作线程中写入临时文件，fsync后原子替换目标文件
+    """
+
+    def __init__(self, filePath, data, lastHash):
+        super().__init__()
+        self.filePath = filePath
+        self.data = data
+        self.lastHash = lastHash
+        self.signals = FileSaveSignals()
+
+    def run(self):
+        try:
+            # 内容未变化时跳过写入
+            digest = hashlib.blake2b(self.data, digest_size=16).digest()
+            if digest == self.lastHash and os.path.exists(self.filePath):
+                self.signals.finished.emit(self.filePath, False, f"File unchanged: {self.filePath}", digest)
+                return
+
+            # 与文本模式写入保持一致，按平台换行符输出
+            data = self.data
+            if os.linesep != '\n':
+                data = data.replace(b'\n', os.linesep.encode())
+
+            self.__writeAtomic(data)
+            self.signals.finished.emit(self.filePath, True, f"File saved: {self.filePath}", digest)
+        except Exception as e:
+            self.signals.failed.emit(self.filePath, f"Error saving file: {str(e)}")
+
+    def __writeAtomic(self, data):
+        """
+        写入同目录下的临时文件，再用os.replace替换，中途崩溃不会截断原文件
+        :param data: 要写入的字节
+        """
+        # 通过符号链接保存时写入链接指向的文件，保留链接本身
+        target = os.path.realpath(self.filePath)
+        directory = os.path.dirname(target)
+        fd, tempPath = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 保留原文件的权限，新文件使用与普通创建相同的权限，而不是mkstemp的0600
+            if os.path.exists(target):
+                mode = os.stat(target).st_mode & 0o7777
+            else:
+                mode = 0o666 & ~UMASK
+            os.chmod(tempPath, mode)
+
+            os.replace(tempPath, target)
+        except BaseException:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+            raise
+
+        # 同步目录项，确保重命名本身已落盘
+        if os.name == 'posix':
+            dirFd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dirFd)
+            finally:
+                os.close(dirFd)
+
+class FileSaver(QObject):
+    """
+    后台文件保存器，同一文件的连续保存会被合并，只写入最新的内容
+    """
+    fileWritten = pyqtSignal(str)  # 文件路径，内容没有变化而跳过写入时不发出
+    
+    __instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        # 正在写入的文件路径 -> 编辑器
+        self.running = {}
+        # 等待写入的文件路径 -> (内容, 编辑器)，只保留最新一次
+        self.pending = {}
+        # 文件路径 -> 最近一次写入内容的哈希
+        self.savedHashes = {}
+
+    @classmethod
+    def instance(cls):
+        """
+        获取全局共享的保存器
+        :return: FileSaver实例
+        """
+        if cls.__instance is None:
+            cls.__instance = FileSaver(QCoreApplication.instance())
+        return cls.__instance
+
+    def save(self, filePath, data, editor):
+        """
+        请求保存文件
+        :param filePath: 文件路径
+        :param data: 文档内容（UTF-8字节）
+        :param editor: 发起保存的编辑器，完成后回调其onSaveFinished
+        """
+        if filePath in self.running:
+            self.pending[filePath] = (data, editor)
+            return
+
+        task = FileSaveTask(filePath, data, self.savedHashes.get(filePath))
+        task.signals.finished.connect(self.onFinished)
+        task.signals.failed.connect(self.onFailed)
+        self.running[filePath] = editor
+        self.threadPool.start(task)
+
+    def isSaving(self, filePath):
+        """
+        判断文件是否有保存正在进行或等待中
+        :param filePath: 文件路径
+        :return: 是否正在保存
+        """
+        return filePath in self.running or filePath in self.pending
+
+    def waitForDone(self, msecs=-1):
+        """
+        等待所有保存完成，退出程序前调用
+        :param msecs: 超时时间（毫秒），-1表示一直等待
+        """
+        while self.running or self.pending:
+            if not self.threadPool.waitForDone(msecs):
+                return False
+            # 处理排队中的完成信号，继续写入合并后的内容
+            QCoreApplication.processEvents()
+        return True
+
+    def onFinished(self, filePath, written, message, digest):
+        self.savedHashes[filePath] = digest
+        editor = self.running.pop(filePath, None)
+        if written:
+            self.fileWritten.emit(filePath)
+        # 标签页可能在保存期间被关闭
+        if editor is not None and not sip.isdeleted(editor):
+            editor.onSaveFinished(True, message)
+        self.__startPending(filePath)
+
+    def onFailed(self, filePath, message):
+        editor = self.running.pop(filePath, None)
+        if editor is not None and not sip.isdeleted(editor):
+            editor.onSaveFinished(False, message)
+        self.__startPending(filePath)
+
+    def __startPending(self, filePath):
+        entry = self.pending.pop(filePath, None)
+        if entry:
+            self.save(filePath, entry[0], entry[1])
@@ -0,0 +1,514 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import bisect
+import os
+
+def sortKey(name, isDir):
+    """
+    排序键：目录在前，名称不区分大小写
+    """
+    return (not isDir, name.lower(), name)
+
+class FileNode:
+    """
+    文件树节点，目录类型在列出时就已确定，点击时无需再访问文件系统
+    """
+    __slots__ = ('name', 'path', 'isDir', 'parent', 'children', 'row', 'loaded', 'loading')
+
+    def __init__(self, name, path, isDir, parent=None, row=0):
+        self.name = name
+        self.path = path
+        self.isDir = isDir
+        self.parent = parent
+        self.children = []
+        self.row = row
+        self.loaded = not isDir  # 文件没有子节点，视为已加载
+        self.loading = False
+
+    def key(self):
+        return sortKey(self.name, self.isDir)
+
+class DirectoryListSignals(QObject):
+    """
+    目录列出任务的信号集合
+    """
+    batchReady = pyqtSignal(object, list)  # 任务, [(名称, 路径, 是否目录), ...]
+    listed = pyqtSignal(object, list)  # 任务, 完整的列表（刷新时使用）
+    finished = pyqtSignal(object)  # 任务
+    failed = pyqtSignal(object, str)  # 任务, 错误信息
+
+class DirectoryListTask(QRunnable):
+    """
+    在工作线程中用os.scandir列出目录，过滤被排除的条目，排序后分批发送
+    """
+    BATCH_SIZE = 2000
+
+    def __init__(self, node, refresh=False, matcher=None):
+        super().__init__()
+        self.node = node
+        self.path = node.path
+        self.refresh = refresh
+        self.matcher = matcher
+        self.rulesChanged = False
+        self.cancelled = False
+        self.signals = DirectoryListSignals()
+
+    def run(self):
+        try:
+            entries = []
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if self.cancelled:
+                        return
+                    try:
+                        # scandir在大多数平台上直接给出类型，不需要额外的stat
+                        isDir = entry.is_dir()
+                    except OSError:
+                        isDir = False
+                    entries.append((entry.name, entry.path, isDir))
+
+            # 在创建任何节点之前过滤，被忽略的目录不会出现在树中，也不会被展开
+            if self.matcher is not None:
+                generation = self.matcher.generation
+                entries = self.matcher.filter(self.path, entries)
+                self.rulesChanged = self.matcher.generation != generation
+            entries.sort(key=lambda entry: sortKey(entry[0], entry[2]))
+            if self.refresh:
+                # 刷新时需要完整列表才能与现有节点比较
+                self.signals.listed.emit(self, entries)
+                return
+            for start in range(0, len(entries), self.BATCH_SIZE):
+                if self.cancelled:
+                    return
+                self.signals.batchReady.emit(self, entries[start:start + self.BATCH_SIZE])
+            self.signals.finished.emit(self)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+
+class FileSystemModel(QAbstractItemModel):
+    """
+    异步的文件树模型：展开目录时在工作线程中列出内容，结果分批插入
+    """
+    IsDirRole = Qt.UserRole + 1
+
+    directoryLoaded = pyqtSignal(str)  # 目录路径
+    loadFailed = pyqtSignal(str, str)  # 目录路径, 错误信息
+    directoryRenamed = pyqtSignal(str, str)  # 旧路径, 新路径
+    directoryRefreshed = pyqtSignal(str)  # 目录路径
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(2)
+        # 不可见的根节点，其唯一的子节点为工作区目录
+        self.invisibleRoot = FileNode("", "", True)
+        self.invisibleRoot.loaded = True
+        self.tasks = set()
+        # 排除规则，为None时列出所有条目
+        self.matcher = None
+        # 加载期间收到刷新请求的目录：路径 -> 重命名列表
+        self.refreshAfterLoad = {}
+        # 图标在所有节点之间共享，只获取一次
+        style = QApplication.style()
+        self.dirIcon = style.standardIcon(QStyle.SP_DirIcon)
+        self.fileIcon = style.standardIcon(QStyle.SP_FileIcon)
+
+    def setRootPath(self, path):
+        """
+        设置工作区根目录，取消所有未完成的列出任务
+        :param path: 目录路径
+        """
+        self.beginResetModel()
+        for task in self.tasks:
+            task.cancelled = True
+        self.tasks.clear()
+        self.refreshAfterLoad.clear()
+        self.invisibleRoot.children = []
+        if path:
+            name = QDir(path).dirName() or path
+            self.invisibleRoot.children.append(FileNode(name, path, True, self.invisibleRoot, 0))
+        self.endResetModel()
+
+    def setExclusionMatcher(self, matcher):
+        """
+        设置排除规则，在下一次setRootPath或刷新时生效
+        :param matcher: ExclusionMatcher
+        """
+        self.matcher = matcher
+
+    def rootIndex(self):
+        """
+        获取工作区根目录的索引
+        """
+        if not self.invisibleRoot.children:
+            return QModelIndex()
+        return self.createIndex(0, 0, self.invisibleRoot.children[0])
+
+    def nodeFromIndex(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.invisibleRoot
+
+    def indexFromNode(self, node):
+        if node is None or node is self.invisibleRoot:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def filePath(self, index):
+        return self.nodeFromIndex(index).path
+
+    def fileName(self, index):
+        return self.nodeFromIndex(index).name
+
+    def isDir(self, index):
+        return self.nodeFromIndex(index).isDir
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.nodeFromIndex(parent)
+        if column != 0 or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.indexFromNode(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.nodeFromIndex(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.nodeFromIndex(parent)
+        if not node.isDir:
+            return False
+        # 未加载的目录显示展开箭头
+        return not node.loaded or bool(node.children)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole or role == Qt.EditRole:
+            return node.name
+        if role == Qt.DecorationRole:
+            return self.dirIcon if node.isDir else self.fileIcon
+        if role == Qt.UserRole:
+            return node.path
+        if role == self.IsDirRole:
+            return node.isDir
+        if role == Qt.ToolTipRole:
+            return node.path
+        return None
+
+    def canFetchMore(self, parent):
+        node = self.nodeFromIndex(parent)
+        return node.isDir and not node.loaded and not node.loading
+
+    def fetchMore(self, parent):
+        node = self.nodeFromIndex(parent)
+        if not self.canFetchMore(parent):
+            return
+        node.loading = True
+        task = DirectoryListTask(node, matcher=self.matcher)
+        task.signals.batchReady.connect(self.onBatchReady)
+        task.signals.finished.connect(self.onListFinished)
+        task.signals.failed.connect(self.onListFailed)
+        self.tasks.add(task)
+        self.threadPool.start(task)
+
+    def onBatchReady(self, task, entries):
+        if task not in self.tasks:
+            return
+        node = task.node
+        start = len(node.children)
+        self.beginInsertRows(self.indexFromNode(node), start, start + len(entries) - 1)
+        for offset, (name, path, isDir) in enumerate(entries):
+            node.children.append(FileNode(name, path, isDir, node, start + offset))
+        self.endInsertRows()
+
+    def onListFinished(self, task):
+        if task not in self.tasks:
+            return
+        self.tasks.discard(task)
+        task.node.loading = False
+        task.node.loaded = True
+        if not task.node.children:
+            # 空目录不再显示展开箭头
+            index = self.indexFromNode(task.node)
+            self.dataChanged.emit(index, index)
+        self.directoryLoaded.emit(task.path)
+        
+        # 加载期间收到的刷新请求在加载完成后处理
+        if task.path in self.refreshAfterLoad:
+            self.refreshDirectory(task.path, self.refreshAfterLoad.pop(task.path))
+
+    def onListFailed(self, task, message):
+        if task not in self.tasks:
+            return
+        self.tasks.discard(task)
+        task.node.loading = False
+        task.node.loaded = True
+        self.loadFailed.emit(task.path, message)
+
+    def findNode(self, path):
+        """
+        通过路径查找已加载的节点
+        :param path: 文件路径
+        :return: 节点，不在已加载的树中时返回None
+        """
+        if not self.invisibleRoot.children:
+            return None
+        root = self.invisibleRoot.children[0]
+        relative = os.path.relpath(path, root.path)
+        if relative == os.curdir:
+            return root
+        if relative.startswith(os.pardir):
+            return None
+
+        node = root
+        parts = relative.split(os.sep)
+        for i, name in enumerate(parts):
+            # 中间路径一定是目录，最后一级先按目录再按文件查找
+            candidates = (True,) if i < len(parts) - 1 else (True, False)
+            child = None
+            for isDir in candidates:
+                child = self.__findChild(node, name, isDir)
+                if child is not None:
+                    break
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def __findChild(self, node, name, isDir):
+        key = sortKey(name, isDir)
+        children = node.children
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            if children[middle].key() < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(children) and children[low].name == name and children[low].isDir == isDir:
+            return children[low]
+        return None
+
+    def loadedDirectories(self):
+        """
+        获取所有已加载的目录路径
+        """
+        paths = []
+        stack = list(self.invisibleRoot.children)
+        while stack:
+            node = stack.pop()
+            if node.isDir and node.loaded:
+                paths.append(node.path)
+                stack.extend(child for child in node.children if child.isDir)
+        return paths
+
+    def refreshDirectory(self, path, renames=None):
+        """
+        在后台重新列出已加载的目录，并以最少的行插入、删除和重命名更新模型，
+        展开和选中状态不受影响
+        :param path: 目录路径
+        :param renames: 已知的重命名 [(旧名称, 新名称), ...]
+        """
+        node = self.findNode(path)
+        if node is None or not node.isDir:
+            return
+        if node.loading:
+            self.refreshAfterLoad.setdefault(path, []).extend(renames or [])
+            return
+        if not node.loaded:
+            # 尚未展开过的目录展开时会重新列出
+            return
+
+        node.loading = True
+        task = DirectoryListTask(node, refresh=True, matcher=self.matcher)
+        task.renames = list(renames or [])
+        task.signals.listed.connect(self.onRefreshListed)
+        task.signals.failed.connect(self.onRefreshFailed)
+        self.tasks.add(task)
+        self.threadPool.start(task)
+
+    def onRefreshListed(self, task, entries):
+        if task not in self.tasks:
+            return
+        self.tasks.discard(task)
+        node = task.node
+        node.loading = False
+        self.__applyListing(node, entries, task.renames)
+        self.directoryRefreshed.emit(task.path)
+        if task.rulesChanged:
+            # .gitignore有变化，已加载的下级目录需要重新过滤
+            stack = [child for child in node.children if child.isDir and child.loaded]
+            while stack:
+                child = stack.pop()
+                self.refreshDirectory(child.path)
+                stack.extend(grandchild for grandchild in child.children if grandchild.isDir and grandchild.loaded)
+
+        if task.path in self.refreshAfterLoad:
+            self.refreshDirectory(task.path, self.refreshAfterLoad.pop(task.path))
+
+    def onRefreshFailed(self, task, message):
+        if task not in self.tasks:
+            return
+        self.tasks.discard(task)
+        task.node.loading = False
+        # 目录已被删除时由父目录的刷新移除节点
+        self.refreshAfterLoad.pop(task.path, None)
+
+    def __applyListing(self, node, entries, renames):
+        """
+        将新的目录列表与现有子节点比较，只提交差异
+        """
+        parentIndex = self.indexFromNode(node)
+        listed = {name: isDir for name, path, isDir in entries}
+
+        # 重命名：保留节点（包括已展开的子树），只移动到新的排序位置
+        existing = {child.name: child for child in node.children}
+        for oldName, newName in renames:
+            child = existing.get(oldName)
+            if child is None or oldName in listed or newName not in listed or newName in existing:
+                continue
+            if listed[newName] != child.isDir:
+                continue
+            del existing[oldName]
+            existing[newName] = child
+            self.__moveRenamed(node, parentIndex, child, newName)
+
+        # 删除不再存在或类型改变的节点，按连续区间从后往前删除
+        removeRows = [child.row for child in node.children
+                      if listed.get(child.name) is None or listed[child.name] != child.isDir]
+        for first, last in reversed(self.__ranges(removeRows)):
+            for child in node.children[first:last + 1]:
+                self.__cancelTasksUnder(child)
+            self.beginRemoveRows(parentIndex, first, last)
+            del node.children[first:last + 1]
+            self.__renumber(node, first)
+            self.endRemoveRows()
+
+        # 插入新增的节点，与现有子节点归并，相邻的新节点一次插入
+        present = {child.name for child in node.children}
+        added = [(name, path, isDir) for name, path, isDir in entries if name not in present]
+        row = 0
+        i = 0
+        while i < len(added):
+            key = sortKey(added[i][0], added[i][2])
+            while row < len(node.children) and node.children[row].key() < key:
+                row += 1
+            # 收集插入到同一位置的连续新节点
+            nextKey = node.children[row].key() if row < len(node.children) else None
+            j = i
+            while j < len(added) and (nextKey is None or sortKey(added[j][0], added[j][2]) < nextKey):
+                j += 1
+            self.beginInsertRows(parentIndex, row, row + (j - i) - 1)
+            node.children[row:row] = [FileNode(name, path, isDir, node, row + offset)
+                                      for offset, (name, path, isDir) in enumerate(added[i:j])]
+            self.__renumber(node, row + (j - i))
+            self.endInsertRows()
+            row += j - i
+            i = j
+
+    def __moveRenamed(self, node, parentIndex, child, newName):
+        oldRow = child.row
+        others = [sibling.key() for sibling in node.children if sibling is not child]
+        newRow = bisect.bisect_left(others, sortKey(newName, child.isDir))
+        # beginMoveRows的目标行是移动前的位置
+        destination = newRow + 1 if newRow >= oldRow else newRow
+        if destination != oldRow and destination != oldRow + 1:
+            self.beginMoveRows(parentIndex, oldRow, oldRow, parentIndex, destination)
+            del node.children[oldRow]
+            node.children.insert(newRow, child)
+            self.__renumber(node, min(oldRow, newRow))
+            self.endMoveRows()
+        oldPath = child.path
+        child.name = newName
+        self.__setPath(child, os.path.join(node.path, newName))
+        index = self.indexFromNode(child)
+        self.dataChanged.emit(index, index)
+        if child.isDir:
+            self.directoryRenamed.emit(oldPath, child.path)
+
+    @staticmethod
+    def __ranges(rows):
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        return ranges
+
+    def insertNode(self, parentIndex, name, isDir):
+        """
+        在目录中按排序位置插入新节点
+        :param parentIndex: 父目录索引
+        :param name: 名称
+        :param isDir: 是否目录
+        :return: 新节点的索引，父目录尚未加载时返回无效索引
+        """
+        parent = self.nodeFromIndex(parentIndex)
+        # 未加载的目录展开时会列出新文件
+        if not parent.loaded:
+            return QModelIndex()
+
+        keys = [child.key() for child in parent.children]
+        row = bisect.bisect_left(keys, sortKey(name, isDir))
+        self.beginInsertRows(parentIndex, row, row)
+        node = FileNode(name, os.path.join(parent.path, name), isDir, parent, row)
+        parent.children.insert(row, node)
+        self.__renumber(parent, row + 1)
+        self.endInsertRows()
+        return self.createIndex(row, 0, node)
+
+    def removeNode(self, index):
+        """
+        从树中移除节点
+        :param index: 节点索引
+        """
+        node = self.nodeFromIndex(index)
+        parent = node.parent
+        if parent is None:
+            return
+        self.__cancelTasksUnder(node)
+        self.beginRemoveRows(self.indexFromNode(parent), node.row, node.row)
+        del parent.children[node.row]
+        self.__renumber(parent, node.row)
+        self.endRemoveRows()
+
+    def renameNode(self, index, newName):
+        """
+        重命名节点，同时更新已加载子节点的路径
+        :param index: 节点索引
+        :param newName: 新名称
+        """
+        node = self.nodeFromIndex(index)
+        parent = node.parent
+        if parent is None:
+            return
+        # 移动到新名称的排序位置，保持子节点有序
+        self.__moveRenamed(parent, self.indexFromNode(parent), node, newName)
+
+    def __setPath(self, node, path):
+        node.path = path
+        for child in node.children:
+            self.__setPath(child, os.path.join(path, child.name))
+
+    def __renumber(self, parent, start):
+        for row in range(start, len(parent.children)):
+            parent.children[row].row = row
+
+    def __cancelTasksUnder(self, node):
+        prefix = node.path + os.sep
+        for task in list(self.tasks):
+            if task.path == node.path or task.path.startswith(prefix):
+                task.cancelled = True
+                self.tasks.discard(task)
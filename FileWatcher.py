@@ -0,0 +1,241 @@
+from PyQt5.QtCore import *
+from collections import OrderedDict
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+class InotifyBackend(QObject):
+    """
+    Linux inotify后端，通过QSocketNotifier在GUI线程中读取事件
+    """
+    changed = pyqtSignal(str, object)  # 目录路径, 重命名(旧名称, 新名称)或None
+    overflow = pyqtSignal()
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_CLOSE_WRITE | IN_ONLYDIR
+    # 内容变化会影响目录显示的文件（排除规则），其他文件的写入不报告
+    CONTENT_NAMES = frozenset(['.gitignore'])
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # 监视描述符 -> 目录路径
+        self.descriptors = {}  # 目录路径 -> 监视描述符
+        # 等待配对的IN_MOVED_FROM：cookie -> (目录路径, 名称)
+        self.moves = {}
+        self.notifier = QSocketNotifier(self.fd, QSocketNotifier.Read, self)
+        self.notifier.activated.connect(self.onReadable)
+
+    def addWatch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            return False
+        self.paths[wd] = path
+        self.descriptors[path] = wd
+        return True
+
+    def removeWatch(self, path):
+        wd = self.descriptors.pop(path, None)
+        if wd is not None:
+            self.paths.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def close(self):
+        self.notifier.setEnabled(False)
+        os.close(self.fd)
+
+    def onReadable(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self.__parse(data)
+
+        # 没有配对的移动视为删除
+        for cookie, (path, name) in self.moves.items():
+            self.changed.emit(path, None)
+        self.moves.clear()
+
+    def __parse(self, data):
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                self.overflow.emit()
+                continue
+            if mask & self.IN_IGNORED:
+                path = self.paths.pop(wd, None)
+                if path is not None and self.descriptors.get(path) == wd:
+                    del self.descriptors[path]
+                continue
+
+            path = self.paths.get(wd)
+            if path is None:
+                continue
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                # 目录本身被删除或移动，由父目录的事件处理
+                continue
+
+            if mask & self.IN_CLOSE_WRITE:
+                if name in self.CONTENT_NAMES:
+                    self.changed.emit(path, None)
+            elif mask & self.IN_MOVED_FROM:
+                self.moves[cookie] = (path, name)
+            elif mask & self.IN_MOVED_TO and cookie in self.moves:
+                oldPath, oldName = self.moves.pop(cookie)
+                if oldPath == path:
+                    self.changed.emit(path, (oldName, name))
+                else:
+                    self.changed.emit(oldPath, None)
+                    self.changed.emit(path, None)
+            else:
+                self.changed.emit(path, None)
+
+class PollingBackend(QObject):
+    """
+    轮询后端：定期检查被监视目录的修改时间，每个目录每次只需一次stat
+    """
+    changed = pyqtSignal(str, object)
+    overflow = pyqtSignal()
+
+    INTERVAL = 2000  # 毫秒
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mtimes = {}
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.INTERVAL)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+
+    def addWatch(self, path):
+        try:
+            self.mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        return True
+
+    def removeWatch(self, path):
+        self.mtimes.pop(path, None)
+
+    def close(self):
+        self.timer.stop()
+
+    def poll(self):
+        for path, mtime in list(self.mtimes.items()):
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if current != mtime:
+                self.mtimes[path] = current
+                self.changed.emit(path, None)
+
+class FileWatcher(QObject):
+    """
+    目录监视器：Linux上使用inotify，其他平台轮询。
+    变化在短时间内合并后一次性发出，监视的目录数量有上限，超出时释放最早的监视。
+    """
+    directoriesChanged = pyqtSignal(dict)  # 目录路径 -> [(旧名称, 新名称), ...]
+    watchesInvalidated = pyqtSignal()  # 事件队列溢出，需要全部刷新
+
+    MAX_WATCHES = 4096
+    COALESCE_INTERVAL = 150  # 毫秒
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.backend = self.__createBackend()
+        self.backend.changed.connect(self.onChanged)
+        self.backend.overflow.connect(self.watchesInvalidated)
+        # 被监视的目录，按最近使用排列
+        self.watched = OrderedDict()
+        self.pending = {}
+
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(self.COALESCE_INTERVAL)
+        self.flushTimer.timeout.connect(self.flush)
+
+    def __createBackend(self):
+        if sys.platform.startswith('linux'):
+            try:
+                return InotifyBackend(self)
+            except (OSError, AttributeError):
+                pass
+        return PollingBackend(self)
+
+    def watch(self, path):
+        """
+        监视目录
+        :param path: 目录路径
+        """
+        if path in self.watched:
+            self.watched.move_to_end(path)
+            return
+        while len(self.watched) >= self.MAX_WATCHES:
+            oldest, _ = self.watched.popitem(last=False)
+            self.backend.removeWatch(oldest)
+        if self.backend.addWatch(path):
+            self.watched[path] = None
+
+    def unwatch(self, path):
+        """
+        停止监视目录及其下所有子目录
+        :param path: 目录路径
+        """
+        prefix = path.rstrip(os.sep) + os.sep
+        for watchedPath in list(self.watched):
+            if watchedPath == path or watchedPath.startswith(prefix):
+                del self.watched[watchedPath]
+                self.backend.removeWatch(watchedPath)
+
+    def isWatching(self, path):
+        return path in self.watched
+
+    def clear(self):
+        """
+        停止所有监视
+        """
+        for path in list(self.watched):
+            self.backend.removeWatch(path)
+        self.watched.clear()
+        self.pending.clear()
+        self.flushTimer.stop()
+
+    def onChanged(self, path, rename):
+        renames = self.pending.setdefault(path, [])
+        if rename is not None:
+            renames.append(rename)
+        # 固定延迟而不是每次重新计时，持续变化时也能按时刷新
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    def flush(self):
+        pending, self.pending = self.pending, {}
+        if pending:
+            self.directoriesChanged.emit(pending)
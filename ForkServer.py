@@ -0,0 +1,288 @@
+from PyQt5.QtCore import *
+import json
+import os
+import signal
+import socket
+import subprocess
+
+class ForkedChild(QObject):
+    """
+    fork服务器创建的一次运行，输出通过两条管道非阻塞读取
+    """
+    output = pyqtSignal(bytes, bool)  # 输出, 是否来自标准错误
+    finished = pyqtSignal(int, object)  # 退出码, 资源使用({'userTime', 'systemTime', 'maxRss'})或None
+
+    READ_LIMIT = 64 * 1024  # 每次事件最多读取的字节数
+
+    def __init__(self, requestId, stdoutFd, stderrFd, parent=None):
+        super().__init__(parent)
+        self.requestId = requestId
+        self.pid = None
+        self.pendingSignal = None  # pid尚未回报时请求的信号
+        self.done = False
+        self.readers = {}  # fd -> (QSocketNotifier, 是否为标准错误)
+        for fd, isError in ((stdoutFd, False), (stderrFd, True)):
+            os.set_blocking(fd, False)
+            notifier = QSocketNotifier(fd, QSocketNotifier.Read, self)
+            notifier.activated.connect(self.onReadable)
+            self.readers[fd] = (notifier, isError)
+
+    def isRunning(self):
+        return not self.done
+
+    def onReadable(self, fd):
+        self.__read(fd)
+
+    def __read(self, fd, limit=READ_LIMIT):
+        notifier, isError = self.readers[fd]
+        chunks = []
+        size = 0
+        closed = False
+        while limit is None or size < limit:
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                closed = True
+                break
+            if not data:
+                closed = True
+                break
+            chunks.append(data)
+            size += len(data)
+        if chunks:
+            self.output.emit(b''.join(chunks), isError)
+        if closed:
+            self.__closeReader(fd)
+
+    def __closeReader(self, fd):
+        notifier, isError = self.readers.pop(fd)
+        notifier.setEnabled(False)
+        notifier.deleteLater()
+        os.close(fd)
+
+    def onStarted(self, pid):
+        self.pid = pid
+        if self.pendingSignal is not None:
+            self.sendSignal(self.pendingSignal)
+
+    def onExited(self, exitCode, metrics):
+        """
+        子进程已退出，读出管道中剩余的输出后结束
+        """
+        if self.done:
+            return
+        for fd in list(self.readers):
+            self.__read(fd, None)
+        for fd in list(self.readers):
+            self.__closeReader(fd)
+        self.done = True
+        self.finished.emit(exitCode, metrics)
+
+    def sendSignal(self, signum):
+        """
+        向运行的进程组发送信号
+        """
+        if self.done:
+            return
+        if self.pid is None:
+            self.pendingSignal = signum
+            return
+        try:
+            os.killpg(self.pid, signum)
+        except OSError:
+            pass
+
+    def terminate(self):
+        self.sendSignal(signal.SIGTERM)
+
+    def kill(self):
+        self.sendSignal(signal.SIGKILL)
+
+class ForkServer(QObject):
+    """
+    常驻的fork服务器：预先导入耗时的模块，每次运行fork出子进程，省去解释器启动和导入时间。
+    所用的解释器、预加载模块列表或第三方库目录发生变化后不再可用，由调用方换成新的服务器。
+    """
+    ready = pyqtSignal(dict)  # 预加载失败的模块 -> 错误信息
+    failed = pyqtSignal(str)  # 服务器进程意外退出
+
+    RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ForkServerRunner.py")
+    MAX_MESSAGE = 64 * 1024
+
+    def __init__(self, python, modules, parent=None):
+        """
+        :param python: Python解释器
+        :param modules: 预加载的模块名列表
+        """
+        super().__init__(parent)
+        self.python = python
+        self.modules = tuple(modules)
+        self.process = None
+        self.control = None
+        self.notifier = None
+        self.isReady = False
+        self.pendingRequests = []  # 服务器就绪前的运行请求
+        self.children = {}  # 请求编号 -> ForkedChild
+        self.nextId = 1
+        self.fingerprint = None  # 第三方库目录 -> 修改时间
+
+    @staticmethod
+    def isSupported():
+        return hasattr(os, 'fork') and hasattr(socket, 'send_fds')
+
+    def start(self):
+        """
+        启动服务器进程，预加载在服务器中进行，不阻塞界面
+        """
+        try:
+            self.control, serverSocket = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        except (AttributeError, OSError):
+            # 不支持SOCK_SEQPACKET的平台使用数据报，同样保留消息边界
+            self.control, serverSocket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        env = dict(os.environ)
+        env['PYTHONIOENCODING'] = 'utf-8'
+        try:
+            self.process = subprocess.Popen(
+                [self.python, '-u', self.RUNNER, str(serverSocket.fileno()), ','.join(self.modules)],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                pass_fds=[serverSocket.fileno()], env=env, start_new_session=True)
+        finally:
+            serverSocket.close()
+        self.control.setblocking(False)
+        self.notifier = QSocketNotifier(self.control.fileno(), QSocketNotifier.Read, self)
+        self.notifier.activated.connect(self.onControlReadable)
+
+    def isRunning(self):
+        return self.process is not None and self.process.poll() is None
+
+    def isActive(self):
+        """
+        是否还有正在运行的子进程
+        """
+        return bool(self.children)
+
+    def isCompatible(self, python, modules):
+        """
+        判断服务器能否用于新的运行：解释器和预加载列表相同，第三方库目录没有变化
+        """
+        if not self.isRunning() or python != self.python or tuple(modules) != self.modules:
+            return False
+        return self.fingerprint is None or self.fingerprint == self.__fingerprint(self.fingerprint)
+
+    @staticmethod
+    def __fingerprint(paths):
+        # 安装或卸载库会在目录中增删条目，目录的修改时间随之变化
+        result = {}
+        for path in paths:
+            try:
+                result[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                result[path] = None
+        return result
+
+    def spawn(self, program, args, cwd, env):
+        """
+        请求运行脚本
+        :param program: 脚本路径
+        :param args: 参数列表
+        :param cwd: 工作目录
+        :param env: 额外的环境变量
+        :return: ForkedChild
+        """
+        requestId = self.nextId
+        self.nextId += 1
+        stdoutRead, stdoutWrite = os.pipe()
+        stderrRead, stderrWrite = os.pipe()
+        child = ForkedChild(requestId, stdoutRead, stderrRead, self)
+        self.children[requestId] = child
+        request = {'type': 'run', 'id': requestId, 'program': program, 'args': list(args),
+                   'cwd': cwd, 'env': dict(env)}
+        self.pendingRequests.append((request, [stdoutWrite, stderrWrite]))
+        if self.isReady:
+            self.__sendPending()
+        return child
+
+    def __sendPending(self):
+        while self.pendingRequests:
+            request, fds = self.pendingRequests.pop(0)
+            try:
+                socket.send_fds(self.control, [json.dumps(request).encode('utf-8')], fds)
+            except OSError:
+                self.children.pop(request['id']).onExited(-1, None)
+            finally:
+                # 写端已经传给服务器，本进程中的副本必须关闭，否则读端收不到EOF
+                for fd in fds:
+                    os.close(fd)
+
+    def onControlReadable(self):
+        while True:
+            try:
+                data = self.control.recv(self.MAX_MESSAGE)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b''
+            if not data:
+                self.__serverLost("Fork server exited")
+                return
+            self.__handle(json.loads(data))
+
+    def __handle(self, message):
+        kind = message.get('type')
+        if kind == 'ready':
+            self.isReady = True
+            self.fingerprint = self.__fingerprint(message.get('paths') or [])
+            self.ready.emit(message.get('failed') or {})
+            self.__sendPending()
+        elif kind == 'started':
+            child = self.children.get(message['id'])
+            if child is not None:
+                child.onStarted(message['pid'])
+        elif kind == 'exited':
+            child = self.children.pop(message['id'], None)
+            if child is not None:
+                metrics = {key: message[key] for key in ('userTime', 'systemTime', 'maxRss')}
+                child.onExited(message['exitCode'], metrics)
+
+    def __serverLost(self, reason):
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+        for request, fds in self.pendingRequests:
+            for fd in fds:
+                os.close(fd)
+        self.pendingRequests = []
+        for child in list(self.children.values()):
+            child.onExited(-1, None)
+        self.children = {}
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+        if self.process is not None:
+            self.process.wait()
+        self.failed.emit(reason)
+
+    def shutdown(self):
+        """
+        结束服务器，已经在运行的子进程不受影响，但不再能取得它们的退出状态
+        """
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier = None
+        if self.control is not None:
+            # 服务器收到EOF后退出
+            self.control.close()
+            self.control = None
+        for request, fds in self.pendingRequests:
+            for fd in fds:
+                os.close(fd)
+        self.pendingRequests = []
+        for child in list(self.children.values()):
+            child.onExited(-1, None)
+        self.children = {}
+        if self.process is not None:
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
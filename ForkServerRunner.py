@@ -0,0 +1,147 @@
+"""
+fork服务器进程入口，由ForkServer启动：
+
+    python ForkServerRunner.py <控制套接字fd> <预加载模块,逗号分隔>
+
+启动时导入预加载模块，之后每次运行请求fork出一个子进程运行脚本，子进程的标准输出和
+标准错误是随请求一起通过SCM_RIGHTS传来的管道。子进程退出后用wait4取得资源使用并回报。
+控制套接字上的消息为一条一个JSON对象。
+"""
+import importlib
+import json
+import os
+import select
+import signal
+import site
+import socket
+import sys
+
+from RunLauncher import exitCode, maxRssBytes, runScript
+
+MAX_MESSAGE = 1024 * 1024
+
+def send(control, message):
+    control.send(json.dumps(message).encode('utf-8'))
+
+def sitePackages():
+    """
+    获取第三方库目录，IDE据此判断安装的库是否发生变化
+    """
+    paths = list(site.getsitepackages()) if hasattr(site, 'getsitepackages') else []
+    paths.append(site.getusersitepackages())
+    return [path for path in paths if os.path.isdir(path)]
+
+def preload(modules):
+    failed = {}
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except BaseException as e:
+            failed[name] = f"{type(e).__name__}: {e}"
+    return failed
+
+def startChild(control, wakeupFds, request, fds):
+    """
+    fork出子进程运行脚本
+    :return: 服务器进程中返回子进程的pid，子进程中返回0
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid != 0:
+        for fd in fds:
+            os.close(fd)
+        send(control, {'type': 'started', 'id': request['id'], 'pid': pid})
+        return pid
+
+    # 子进程：断开与服务器的联系，标准输入为空，输出写入IDE传来的管道
+    control.close()
+    for fd in wakeupFds:
+        os.close(fd)
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    os.setpgid(0, 0)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(fds[0], 1)
+    os.dup2(fds[1], 2)
+    for fd in [devnull] + list(fds):
+        os.close(fd)
+    os.chdir(request['cwd'])
+    os.environ.update(request.get('env') or {})
+    return 0
+
+def serve(control):
+    """
+    处理运行请求直到IDE关闭控制套接字
+    :return: 在fork出的子进程中返回(脚本, 参数)，服务器退出时返回None
+    """
+    # SIGCHLD唤醒select，及时回报子进程退出
+    wakeupRead, wakeupWrite = os.pipe()
+    os.set_blocking(wakeupRead, False)
+    os.set_blocking(wakeupWrite, False)
+    signal.set_wakeup_fd(wakeupWrite)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    children = {}  # pid -> 请求编号
+    parent = os.getppid()
+
+    while True:
+        try:
+            readable, _, _ = select.select([control, wakeupRead], [], [], 1.0)
+        except InterruptedError:
+            continue
+        if wakeupRead in readable:
+            try:
+                os.read(wakeupRead, 4096)
+            except BlockingIOError:
+                pass
+
+        # 回收已退出的子进程
+        while children:
+            try:
+                pid, status, rusage = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            requestId = children.pop(pid, None)
+            if requestId is not None:
+                send(control, {'type': 'exited', 'id': requestId, 'exitCode': exitCode(status),
+                               'userTime': rusage.ru_utime, 'systemTime': rusage.ru_stime,
+                               'maxRss': maxRssBytes(rusage)})
+
+        if control in readable:
+            try:
+                data, fds, _, _ = socket.recv_fds(control, MAX_MESSAGE, 2)
+            except OSError:
+                return None
+            if not data:
+                return None
+            request = json.loads(data)
+            if request.get('type') != 'run' or len(fds) != 2:
+                for fd in fds:
+                    os.close(fd)
+                continue
+            pid = startChild(control, (wakeupRead, wakeupWrite), request, fds)
+            if pid == 0:
+                return request['program'], request.get('args') or []
+            children[pid] = request['id']
+
+        if os.getppid() != parent:
+            # IDE已经退出
+            return None
+
+def main():
+    control = socket.socket(fileno=int(sys.argv[1]))
+    modules = [name for name in sys.argv[2].split(',') if name] if len(sys.argv) > 2 else []
+    failed = preload(modules)
+    send(control, {'type': 'ready', 'pid': os.getpid(), 'paths': sitePackages(), 'failed': failed})
+    child = serve(control)
+    if child is None:
+        return
+    # 子进程在最外层运行脚本，退出流程与直接运行相同
+    script, args = child
+    runScript(script, args)
+
+if __name__ == '__main__':
+    main()
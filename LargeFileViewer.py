@@ -0,0 +1,213 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import bisect
+import mmap
+import os
+
+class LineIndexThread(QThread):
+    """
+    后台建立稀疏行索引：按固定字节块统计换行符数量，不记录每一行的偏移
+    """
+    indexed = pyqtSignal(int)  # 已统计的换行符数量
+
+    BLOCK_SIZE = 1024 * 1024  # 每个索引块1MB
+
+    def __init__(self, mm, blockEnds, parent=None):
+        super().__init__(parent)
+        self.mm = mm
+        # blockEnds[b] 表示 [0, (b+1)*BLOCK_SIZE) 范围内的换行符数量，与查看器共享
+        self.blockEnds = blockEnds
+
+    def run(self):
+        size = len(self.mm)
+        count = 0
+        pos = 0
+        blocks = 0
+        while pos < size:
+            if self.isInterruptionRequested():
+                return
+            count += self.mm[pos:pos + self.BLOCK_SIZE].count(b'\n')
+            self.blockEnds.append(count)
+            pos += self.BLOCK_SIZE
+            blocks += 1
+            # 每64MB通知一次，避免信号过多
+            if blocks % 64 == 0:
+                self.indexed.emit(count)
+        self.indexed.emit(count)
+
+class LargeFileViewer(QAbstractScrollArea):
+    """
+    超大文件只读查看器：内存映射文件，只渲染可见区域内的行
+    """
+    indexProgress = pyqtSignal(str, int)  # 文件路径, 索引百分比
+
+    MAX_LINE_BYTES = 4096  # 单行最多显示的字节数
+
+    def __init__(self, filePath, parent=None):
+        super().__init__(parent)
+        self.filePath = filePath
+        self.file = None
+        self.mm = None
+        self.blockEnds = []
+        self.lineCount = 0
+        self.indexComplete = False
+        self.indexThread = None
+        # 最近一次定位的 (行号, 偏移)，用于连续滚动时避免重复扫描
+        self.lastLocated = (0, 0)
+
+        self.__initUI()
+        self.__openFile()
+
+    def __initUI(self):
+        self.setFont(QFont("Consolas", 10))
+        self.viewport().setBackgroundRole(QPalette.Base)
+        self.verticalScrollBar().setSingleStep(1)
+        self.horizontalScrollBar().setSingleStep(self.fontMetrics().horizontalAdvance(' ') * 4)
+        self.horizontalScrollBar().setRange(0, self.fontMetrics().horizontalAdvance(' ') * self.MAX_LINE_BYTES)
+
+    def __openFile(self):
+        """
+        映射文件并启动后台索引
+        """
+        self.file = open(self.filePath, 'rb')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            # 空文件无法映射
+            self.indexComplete = True
+            return
+
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.indexThread = LineIndexThread(self.mm, self.blockEnds, self)
+        self.indexThread.indexed.connect(self.onIndexed)
+        self.indexThread.finished.connect(self.onIndexFinished)
+        self.indexThread.start()
+
+    def closeFile(self):
+        """
+        停止索引并释放映射
+        """
+        if self.indexThread:
+            self.indexThread.requestInterruption()
+            self.indexThread.wait()
+            self.indexThread = None
+        if self.mm:
+            self.mm.close()
+            self.mm = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def onIndexed(self, newlines):
+        """
+        索引进度更新，扩展可滚动范围
+        :param newlines: 已统计的换行符数量
+        """
+        self.lineCount = newlines
+        self.__updateScrollRange()
+        size = len(self.mm) if self.mm else 0
+        if size:
+            scanned = min(len(self.blockEnds) * LineIndexThread.BLOCK_SIZE, size)
+            self.indexProgress.emit(self.filePath, int(scanned * 100 / size))
+        self.viewport().update()
+
+    def onIndexFinished(self):
+        """
+        索引完成，补上最后一行没有换行符的情况
+        """
+        if not self.mm or self.indexThread.isInterruptionRequested():
+            return
+        self.indexComplete = True
+        self.lineCount = self.blockEnds[-1] if self.blockEnds else 0
+        if self.mm[len(self.mm) - 1:] != b'\n':
+            self.lineCount += 1
+        self.__updateScrollRange()
+        self.viewport().update()
+
+    def __updateScrollRange(self):
+        visible = max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+        self.verticalScrollBar().setPageStep(visible)
+        self.verticalScrollBar().setRange(0, max(0, self.lineCount - visible + 1))
+
+    def lineOffset(self, line):
+        """
+        通过稀疏索引计算行的起始偏移
+        :param line: 行号（从0开始）
+        :return: 字节偏移，超出范围时返回None
+        """
+        if not self.mm:
+            return None
+        if line == 0:
+            return 0
+
+        # 从上次定位的位置向后扫描不会超过可见行数
+        lastLine, lastOffset = self.lastLocated
+        if lastLine <= line <= lastLine + 256:
+            pos, need = lastOffset, line - lastLine
+        else:
+            # 第line个换行符所在的索引块
+            block = bisect.bisect_left(self.blockEnds, line)
+            if block >= len(self.blockEnds):
+                return None
+            before = self.blockEnds[block - 1] if block else 0
+            pos, need = block * LineIndexThread.BLOCK_SIZE, line - before
+
+        while need > 0:
+            pos = self.mm.find(b'\n', pos)
+            if pos < 0:
+                return None
+            pos += 1
+            need -= 1
+
+        self.lastLocated = (line, pos)
+        return pos
+
+    def readLines(self, firstLine, count):
+        """
+        读取从firstLine开始的若干行文本
+        :param firstLine: 起始行号
+        :param count: 行数
+        :return: 文本行列表
+        """
+        lines = []
+        pos = self.lineOffset(firstLine)
+        if pos is None:
+            return lines
+
+        size = len(self.mm)
+        while len(lines) < count and pos < size:
+            end = self.mm.find(b'\n', pos)
+            if end < 0:
+                end = size
+            data = self.mm[pos:min(end, pos + self.MAX_LINE_BYTES)]
+            lines.append(data.decode('utf-8', errors='replace').rstrip('\r'))
+            pos = end + 1
+        return lines
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        lineHeight = metrics.lineSpacing()
+        visible = self.viewport().height() // lineHeight + 1
+        firstLine = self.verticalScrollBar().value()
+
+        # 行号区域宽度按当前最大行号计算
+        gutterWidth = metrics.horizontalAdvance(str(max(self.lineCount, 1))) + 12
+        painter.fillRect(0, 0, gutterWidth, self.viewport().height(), self.palette().window())
+
+        xOffset = self.horizontalScrollBar().value()
+        y = metrics.ascent()
+        for i, text in enumerate(self.readLines(firstLine, visible)):
+            painter.setPen(self.palette().color(QPalette.Mid))
+            painter.drawText(4, y, str(firstLine + i + 1))
+            painter.setPen(self.palette().color(QPalette.Text))
+            painter.setClipRect(gutterWidth, 0, self.viewport().width() - gutterWidth, self.viewport().height())
+            painter.drawText(gutterWidth + 4 - xOffset, y, text.expandtabs(4))
+            painter.setClipping(False)
+            y += lineHeight
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.__updateScrollRange()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
@@ -0,0 +1,94 @@
+from collections import deque
+
+class LineRingBuffer:
+    """
+    按行保存的环形缓冲区：只保留最后maxLines行，超出的行从头部丢弃。
+    同时记录上次取走之后新增的文本，视图每帧只需取一次增量。
+    """
+
+    def __init__(self, maxLines=10000, maxLineLength=8192):
+        """
+        :param maxLines: 保留的最大行数
+        :param maxLineLength: 单行的最大长度，超过时强制换行，避免没有换行符的输出无限增长
+        """
+        self.maxLines = maxLines
+        self.maxLineLength = maxLineLength
+        self.lines = deque(maxlen=maxLines)
+        self.partial = ''  # 尚未遇到换行符的最后一行
+        self.pending = []  # 上次取走之后新增的文本片段
+        self.pendingLines = 0  # 上次取走之后新增的完整行数
+        self.overflowed = False  # 新增的行数超过了缓冲区容量，视图需要整体替换
+
+    def append(self, text):
+        """
+        追加文本
+        :param text: 已解码的文本，可以包含多行，也可以是半行
+        """
+        if not text:
+            return
+
+        parts = text.split('\n')
+        if len(self.partial) + len(parts[0]) > self.maxLineLength or any(len(part) > self.maxLineLength for part in parts[1:]):
+            # 过长的行强制换行，视图收到的文本也同样换行
+            parts = self.__wrap(parts)
+            text = '\n'.join(parts)
+        parts[0] = self.partial + parts[0]
+        self.partial = parts.pop()
+
+        self.lines.extend(parts)
+        self.pendingLines += len(parts)
+        if self.overflowed:
+            return
+        if self.pendingLines >= self.maxLines:
+            # 增量已经比整个缓冲区还大，不再保存增量，取走时直接使用缓冲区内容
+            self.overflowed = True
+            self.pending = []
+        else:
+            self.pending.append(text)
+
+    def __wrap(self, parts):
+        wrapped = []
+        for i, part in enumerate(parts):
+            column = len(self.partial) if i == 0 else 0
+            while column + len(part) > self.maxLineLength:
+                cut = self.maxLineLength - column
+                wrapped.append(part[:cut])
+                part = part[cut:]
+                column = 0
+            wrapped.append(part)
+        return wrapped
+
+    def takePending(self):
+        """
+        取走上次之后新增的文本
+        :return: (文本, 是否需要整体替换)；需要整体替换时文本为缓冲区的全部内容
+        """
+        if self.overflowed:
+            text, reset = self.text(), True
+        else:
+            text, reset = ''.join(self.pending), False
+        self.pending = []
+        self.pendingLines = 0
+        self.overflowed = False
+        return text, reset
+
+    def hasPending(self):
+        return self.overflowed or bool(self.pending)
+
+    def text(self):
+        """
+        获取缓冲区的全部内容
+        """
+        if not self.lines:
+            return self.partial
+        return '\n'.join(self.lines) + '\n' + self.partial
+
+    def lineCount(self):
+        return len(self.lines) + (1 if self.partial else 0)
+
+    def clear(self):
+        self.lines.clear()
+        self.partial = ''
+        self.pending = []
+        self.pendingLines = 0
+        self.overflowed = False
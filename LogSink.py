@@ -0,0 +1,60 @@
+from PyQt5.QtCore import *
+from collections import deque
+import threading
+import time
+
+class LogSink(QObject):
+    """
+    线程安全的日志队列：任意线程写入记录，GUI线程定时成批取走。
+    队列为空时写入才会发出通知，高频写入只产生一次跨线程事件。
+    """
+    recordsAvailable = pyqtSignal()  # 队列由空变为非空
+
+    INFO = 'INFO'
+    ERROR = 'ERROR'
+    DEBUG = 'DEBUG'
+
+    MAX_PENDING = 10000  # 未取走的最大记录数，超出时丢弃最早的记录
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.pending = deque(maxlen=self.MAX_PENDING)
+        self.dropped = 0
+
+    def write(self, level, text, channel=None):
+        """
+        写入一条记录
+        :param level: 级别，None表示不带级别的普通文本
+        :param text: 文本
+        :param channel: 输出通道，None表示默认通道
+        """
+        record = (time.time(), level, text, channel)
+        with self.lock:
+            wake = not self.pending
+            if len(self.pending) == self.MAX_PENDING:
+                self.dropped += 1
+            self.pending.append(record)
+        if wake:
+            self.recordsAvailable.emit()
+
+    def take(self):
+        """
+        取走所有未处理的记录
+        :return: ([(时间戳, 级别, 文本, 通道)], 丢弃的记录数)
+        """
+        with self.lock:
+            records = list(self.pending)
+            self.pending.clear()
+            dropped = self.dropped
+            self.dropped = 0
+        return records, dropped
+
+    def hasPending(self):
+        with self.lock:
+            return bool(self.pending)
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.dropped = 0
@@ -0,0 +1,333 @@
+from PyQt5.QtCore import *
+from array import array
+from collections import deque
+import heapq
+import json
+import os
+import re
+import shutil
+import tempfile
+
+class LogFilter:
+    """
+    日志过滤条件：级别集合加上文本模式
+    """
+
+    def __init__(self, levels=None, pattern='', regex=False):
+        """
+        :param levels: 显示的级别集合，None表示全部级别
+        :param pattern: 子串或正则表达式，空字符串表示不过滤文本
+        :param regex: pattern是否为正则表达式
+        :raise re.error: 正则表达式无效
+        """
+        self.levels = set(levels) if levels is not None else None
+        self.pattern = pattern
+        self.expression = None
+        if pattern:
+            # 子串按不区分大小写匹配，与正则使用同一套实现
+            self.expression = re.compile(pattern if regex else re.escape(pattern), re.IGNORECASE)
+
+    def isEmpty(self):
+        return self.levels is None and self.expression is None
+
+    def match(self, level, text):
+        if self.levels is not None and level not in self.levels:
+            return False
+        return self.expression is None or self.expression.search(text) is not None
+
+class LogSegment:
+    """
+    一段连续的日志记录，按列保存；写满后可以转存到磁盘，内存中只保留级别和级别索引
+    """
+
+    def __init__(self, base):
+        """
+        :param base: 第一条记录的全局序号
+        """
+        self.base = base
+        self.timestamps = array('d')
+        self.levels = bytearray()
+        self.texts = []
+        self.levelIndex = {}  # 级别编号 -> 段内偏移数组
+        self.path = None
+
+    def __len__(self):
+        return len(self.levels)
+
+    def append(self, timestamp, code, text):
+        offset = len(self.levels)
+        self.timestamps.append(timestamp)
+        self.texts.append(text)
+        index = self.levelIndex.get(code)
+        if index is None:
+            index = self.levelIndex[code] = array('I')
+        index.append(offset)
+        # 级别最后写入，读取方以len(levels)为准时其余各列都已就绪
+        self.levels.append(code)
+
+    def isSpilled(self):
+        return self.texts is None
+
+    def spill(self, path):
+        """
+        转存到磁盘，释放时间戳和文本
+        :param path: 文件路径
+        """
+        # 整段一次编码，比逐条编码快一个数量级
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([self.timestamps.tolist(), self.texts], f, ensure_ascii=False)
+        self.path = path
+        self.texts = None
+        self.timestamps = None
+
+    def columns(self):
+        """
+        获取时间戳和文本两列，已转存的段从磁盘读取；仍在写入的段以读取前的记录数为准
+        :return: (时间戳序列, 文本序列)
+        :raise OSError: 转存文件已被删除
+        """
+        texts, timestamps = self.texts, self.timestamps
+        if texts is not None and timestamps is not None:
+            return timestamps, texts
+        with open(self.path, 'r', encoding='utf-8') as f:
+            timestamps, texts = json.load(f)
+        return timestamps, texts
+
+    def candidates(self, codes, count):
+        """
+        获取指定级别的段内偏移，按顺序排列
+        :param codes: 级别编号集合，None表示全部
+        :param count: 只考虑前count条
+        """
+        if codes is None:
+            return range(count)
+        indexes = [self.levelIndex[code] for code in codes if code in self.levelIndex]
+        offsets = indexes[0] if len(indexes) == 1 else heapq.merge(*indexes)
+        result = []
+        for offset in offsets:
+            if offset >= count:
+                break
+            result.append(offset)
+        return result
+
+    def remove(self):
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+class LogSearchSignals(QObject):
+    """
+    日志搜索任务的信号集合
+    """
+    finished = pyqtSignal(object, object, int)  # 任务, 匹配记录, 匹配总数
+
+class LogSearchTask(QRunnable):
+    """
+    在工作线程中按级别索引和文本模式搜索日志段，只保留最后limit条匹配
+    """
+
+    def __init__(self, generation, segments, counts, codes, logFilter, limit):
+        super().__init__()
+        self.generation = generation
+        self.segments = segments
+        self.counts = counts
+        self.codes = codes
+        self.logFilter = logFilter
+        self.limit = limit
+        self.endIndex = segments[-1].base + counts[-1] if segments else 0
+        self.cancelled = False
+        self.signals = LogSearchSignals()
+
+    def run(self):
+        matches = deque(maxlen=self.limit)
+        total = 0
+        expression = self.logFilter.expression
+        for segment, count in zip(self.segments, self.counts):
+            if self.cancelled:
+                return
+            offsets = segment.candidates(self.codes, count)
+            if not offsets:
+                # 级别索引中没有匹配，不需要读取已转存的段
+                continue
+            try:
+                timestamps, texts = segment.columns()
+            except OSError:
+                # 转存文件已经被轮换删除
+                continue
+            levels = segment.levels
+            for offset in offsets:
+                text = texts[offset]
+                if expression is None or expression.search(text):
+                    total += 1
+                    matches.append((segment.base + offset, timestamps[offset], levels[offset], text))
+        if not self.cancelled:
+            self.signals.finished.emit(self, list(matches), total)
+
+class LogStore(QObject):
+    """
+    只追加的日志存储：记录按段保存，每段带级别索引；较早的段转存到轮换的磁盘文件，
+    按级别和文本的过滤在后台线程中执行
+    """
+    searchFinished = pyqtSignal(int, object, int, int)  # 查询编号, 匹配记录, 匹配总数, 搜索范围的结束序号
+
+    SEGMENT_SIZE = 2048  # 每段的记录数
+    MEMORY_SEGMENTS = 8  # 保留在内存中的段数
+    MAX_SPILLED_SEGMENTS = 256  # 磁盘上保留的段数，超出时删除最早的段
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+        self.segments = []
+        self.nextIndex = 0
+        # 级别名称与单字节编号的映射，None为不带级别的普通文本
+        self.levelNames = [None]
+        self.levelCodes = {None: 0}
+        self.spillDirectory = None
+        self.spillFailed = False
+        self.generation = 0
+        self.searchTask = None
+
+    def levelCode(self, level):
+        code = self.levelCodes.get(level)
+        if code is None:
+            code = self.levelCodes[level] = len(self.levelNames)
+            self.levelNames.append(level)
+        return code
+
+    def levelName(self, code):
+        return self.levelNames[code]
+
+    def count(self):
+        """
+        获取仍保存着的记录数
+        """
+        return self.nextIndex - self.firstIndex()
+
+    def firstIndex(self):
+        return self.segments[0].base if self.segments else self.nextIndex
+
+    def append(self, timestamp, level, text):
+        """
+        追加一条记录，只能在GUI线程调用
+        :return: 记录的全局序号
+        """
+        if not self.segments or len(self.segments[-1]) >= self.SEGMENT_SIZE:
+            self.segments.append(LogSegment(self.nextIndex))
+            self.__spillOldSegments()
+        self.segments[-1].append(timestamp, self.levelCode(level), text)
+        self.nextIndex += 1
+        return self.nextIndex - 1
+
+    def __spillOldSegments(self):
+        inMemory = [segment for segment in self.segments if not segment.isSpilled()]
+        for segment in inMemory[:-self.MEMORY_SEGMENTS]:
+            if self.spillFailed:
+                # 无法写入磁盘时直接丢弃最早的段
+                self.segments.remove(segment)
+                continue
+            try:
+                if self.spillDirectory is None:
+                    self.spillDirectory = tempfile.mkdtemp(prefix='syide-log-')
+                segment.spill(os.path.join(self.spillDirectory, f"{segment.base:012d}.json"))
+            except OSError:
+                self.spillFailed = True
+                self.segments.remove(segment)
+
+        spilled = [segment for segment in self.segments if segment.isSpilled()]
+        for segment in spilled[:-self.MAX_SPILLED_SEGMENTS]:
+            self.segments.remove(segment)
+            segment.remove()
+
+    def records(self, start=None):
+        """
+        按顺序遍历记录，只遍历内存中的段
+        :param start: 起始全局序号，默认为内存中的第一条
+        :return: 生成器，元素为(序号, 时间戳, 级别, 文本)
+        """
+        for segment in self.segments:
+            if segment.isSpilled():
+                continue
+            end = segment.base + len(segment)
+            if start is not None and end <= start:
+                continue
+            offset = max(0, start - segment.base) if start is not None else 0
+            for i in range(offset, len(segment)):
+                yield segment.base + i, segment.timestamps[i], self.levelNames[segment.levels[i]], segment.texts[i]
+
+    def tail(self, limit, logFilter=None):
+        """
+        获取内存中最后limit条满足条件的记录
+        """
+        result = deque(maxlen=limit)
+        for record in self.records():
+            if logFilter is None or logFilter.match(record[2], record[3]):
+                result.append(record)
+        return list(result)
+
+    def allRecords(self):
+        """
+        遍历全部记录，包括已转存到磁盘的段
+        """
+        for segment in list(self.segments):
+            count = len(segment)
+            try:
+                timestamps, texts = segment.columns()
+            except OSError:
+                continue
+            for i in range(count):
+                yield segment.base + i, timestamps[i], self.levelNames[segment.levels[i]], texts[i]
+
+    def search(self, logFilter, limit):
+        """
+        在后台搜索全部记录，结果通过searchFinished发出，新的搜索会取消尚未完成的搜索
+        :param logFilter: LogFilter
+        :param limit: 最多返回的匹配数，保留最后的匹配
+        :return: 查询编号
+        """
+        self.cancelSearch()
+        self.generation += 1
+        codes = None
+        if logFilter.levels is not None:
+            codes = {self.levelCodes[level] for level in logFilter.levels if level in self.levelCodes}
+        # 段列表和各段当前的记录数作为快照，之后追加的记录由调用方单独处理
+        segments = list(self.segments)
+        counts = [len(segment) for segment in segments]
+        task = LogSearchTask(self.generation, segments, counts, codes, logFilter, limit)
+        task.signals.finished.connect(self.onSearchFinished)
+        self.searchTask = task
+        self.threadPool.start(task)
+        return self.generation
+
+    def onSearchFinished(self, task, matches, total):
+        if task is not self.searchTask:
+            return
+        self.searchTask = None
+        records = [(index, timestamp, self.levelNames[code], text) for index, timestamp, code, text in matches]
+        self.searchFinished.emit(task.generation, records, total, task.endIndex)
+
+    def cancelSearch(self):
+        if self.searchTask:
+            self.searchTask.cancelled = True
+            self.searchTask = None
+
+    def clear(self):
+        """
+        清空所有记录，删除转存文件
+        """
+        self.cancelSearch()
+        for segment in self.segments:
+            segment.remove()
+        self.segments = []
+
+    def close(self):
+        """
+        清空记录并删除转存目录
+        """
+        self.clear()
+        self.threadPool.waitForDone()
+        if self.spillDirectory:
+            shutil.rmtree(self.spillDirectory, ignore_errors=True)
+            self.spillDirectory = None
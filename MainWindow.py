@@ -3,13 +3,36 @@ import os
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+from PyQt5 import sip
 
 from Edit import Edit
+from FileLoader import FileLoader
+from FileSaver import FileSaver
+from LargeFileViewer import LargeFileViewer
+from TabManager import TabManager, HibernatedTab
+from FilePreviewer import FilePreviewer
+from Debugger import DebugSession, VariablesWindow
+from RunManager import RunManager, Run
+from Profiler import ProfileResult, ProfileWindow
+from Coverage import CoverageCache, formatSummary
+from ForkServer import ForkServer
 from FileBrowser import FileBrowser
 from OutputWindow import OutputWindow
 from TerminalWindow import TerminalWindow
+from WorkspaceSearch import WorkspaceSearch
+from SearchWindow import SearchWindow
+from QuickOpen import QuickOpen
+from WorkspaceSymbols import WorkspaceSymbols
+from OutlineWindow import OutlineWindow
+from Diagnostics import Diagnostics, formatDiagnostics
+from CompletionApis import CompletionApis
 
 class MainWindow(QMainWindow):
+    # 超过该大小的文件使用只读的内存映射查看器打开
+    LARGE_FILE_THRESHOLD = 256 * 1024 * 1024
+    # 超过该大小的文件单击时直接以固定标签页打开，不使用预览
+    PREVIEW_MAX_SIZE = 8 * 1024 * 1024
+    
     def __init__(self):
         super().__init__()
         
@@ -17,6 +40,65 @@ class MainWindow(QMainWindow):
         self.edit = None
         self.outputWindow = None
         self.terminalWindow = None
+        self.variablesWindow = None
+        self.profileWindow = None
+        self.searchWindow = None
+        
+        # 文件仍在后台加载时，加载完成后要跳转到的位置：(文件路径, 行号(从0开始), 列号)
+        self.pendingLocation = None
+        
+        # 最近一次性能分析的结果，用于在编辑器中显示热点行
+        self.profileResult = None
+        # 按文件内容缓存的行覆盖率
+        self.coverageCache = CoverageCache()
+        
+        # 调试会话及当前执行行所在的编辑器
+        self.debugSession = None
+        self.executionEditor = None
+        
+        # 后台文件加载器
+        self.fileLoader = FileLoader(self)
+        self.fileLoader.progress.connect(self.onFileLoadProgress)
+        self.fileLoader.loadFinished.connect(self.onFileLoadFinished)
+        self.fileLoader.loadFailed.connect(self.onFileLoadFailed)
+        self.fileLoader.loadCancelled.connect(self.onFileLoadCancelled)
+        self.fileLoader.activeChanged.connect(self.onFileLoadActiveChanged)
+        
+        # 单击文件浏览器时复用的预览标签页
+        self.previewEditor = None
+        self.previewSwapping = False
+        self.previewer = FilePreviewer(self)
+        self.previewer.previewReady.connect(self.showPreview)
+        self.previewer.previewFailed.connect(self.onPreviewFailed)
+        
+        # 脚本运行管理器，每次运行使用独立的进程
+        self.runManager = RunManager(self)
+        self.runManager.runStarted.connect(self.onRunStarted)
+        self.runManager.runFinished.connect(self.onRunFinished)
+        self.runManager.forkServerMessage.connect(lambda message: self.outputWindow and self.outputWindow.appendInfo(message))
+        
+        # 工作区全文搜索，索引随打开的文件夹建立，保存的文件随即更新
+        self.workspaceSearch = WorkspaceSearch(self)
+        FileSaver.instance().fileWritten.connect(self.workspaceSearch.onFileWritten)
+        
+        # 工作区符号索引，打开的Python文件在停止输入时重新解析
+        self.workspaceSymbols = WorkspaceSymbols(self)
+        FileSaver.instance().fileWritten.connect(self.workspaceSymbols.onFileWritten)
+        self.workspaceSymbols.bufferParsed.connect(self.onBufferParsed)
+        self.workspaceSymbols.lookupFinished.connect(self.onSymbolLookupFinished)
+        # 工作区的符号同时作为Python自动完成的条目
+        self.workspaceSymbols.indexUpdated.connect(self.onSymbolIndexUpdated)
+        
+        # Python代码诊断，在单独的进程中分析，结果按内容缓存
+        self.diagnostics = Diagnostics(self)
+        self.diagnostics.diagnosticsReady.connect(self.onDiagnosticsReady)
+        self.diagnostics.workerFailed.connect(self.onAnalysisWorkerFailed)
+        self.workspaceSymbols.workerFailed.connect(self.onAnalysisWorkerFailed)
+        self.diagnosticSummaries = {}  # 文件路径 -> 最近一次输出的诊断摘要
+        
+        # 快速打开文件，路径索引随打开的文件夹在后台建立
+        self.quickOpen = QuickOpen(self)
+        self.quickOpen.fileSelected.connect(self.onQuickOpenSelected)
         
         self.__initMenuBar()
         self.__initUI()
@@ -37,6 +119,11 @@ class MainWindow(QMainWindow):
         fileMenu.addAction(openFolderAction)
         openFolderAction.triggered.connect(self.__onOpenFolder)
         
+        goToFileAction = QAction("Go to File...", self)
+        fileMenu.addAction(goToFileAction)
+        goToFileAction.setShortcut("Ctrl+P")
+        goToFileAction.triggered.connect(lambda: self.quickOpen.popup(self))
+        
         saveAction = QAction("Save", self)
         fileMenu.addAction(saveAction)
         saveAction.setShortcut("Ctrl+S")
@@ -59,6 +146,62 @@ class MainWindow(QMainWindow):
         pasteAction = QAction("Paste", self)
         editMenu.addAction(pasteAction)
         
+        editMenu.addSeparator()
+        findInFilesAction = QAction("Find in Files", self)
+        findInFilesAction.setShortcut("Ctrl+Shift+F")
+        findInFilesAction.triggered.connect(self.onFindInFiles)
+        editMenu.addAction(findInFilesAction)
+        
+        runMenu = self.menuBar().addMenu("Run")
+        runFileAction = QAction("Run Current File", self)
+        runFileAction.setShortcut("Ctrl+F5")
+        runFileAction.triggered.connect(self.onRunCurrentFile)
+        runMenu.addAction(runFileAction)
+        
+        profileFileAction = QAction("Profile Current File", self)
+        profileFileAction.triggered.connect(self.onProfileCurrentFile)
+        runMenu.addAction(profileFileAction)
+        
+        coverageFileAction = QAction("Run with Coverage", self)
+        coverageFileAction.triggered.connect(self.onCoverageCurrentFile)
+        runMenu.addAction(coverageFileAction)
+        
+        clearOverlaysAction = QAction("Clear Profile and Coverage Markers", self)
+        clearOverlaysAction.triggered.connect(self.clearEditorOverlays)
+        runMenu.addAction(clearOverlaysAction)
+        
+        # 预加载的模块在.vscode/settings.json的runner.preloadModules中配置
+        forkServerAction = QAction("Use Fork Server", self)
+        forkServerAction.setCheckable(True)
+        forkServerAction.setEnabled(ForkServer.isSupported())
+        forkServerAction.toggled.connect(self.runManager.setForkServerEnabled)
+        runMenu.addAction(forkServerAction)
+        
+        stopRunsAction = QAction("Stop All Runs", self)
+        stopRunsAction.triggered.connect(self.runManager.stopAll)
+        runMenu.addAction(stopRunsAction)
+        
+        debugMenu = self.menuBar().addMenu("Debug")
+        startDebugAction = QAction("Start / Continue", self)
+        startDebugAction.setShortcut("F5")
+        startDebugAction.triggered.connect(self.onDebugStartOrContinue)
+        debugMenu.addAction(startDebugAction)
+        
+        stepOverAction = QAction("Step Over", self)
+        stepOverAction.setShortcut("F10")
+        stepOverAction.triggered.connect(lambda: self.debugSession and self.debugSession.stepOver())
+        debugMenu.addAction(stepOverAction)
+        
+        stepIntoAction = QAction("Step Into", self)
+        stepIntoAction.setShortcut("F11")
+        stepIntoAction.triggered.connect(lambda: self.debugSession and self.debugSession.stepInto())
+        debugMenu.addAction(stepIntoAction)
+        
+        stopDebugAction = QAction("Stop", self)
+        stopDebugAction.setShortcut("Shift+F5")
+        stopDebugAction.triggered.connect(lambda: self.debugSession and self.debugSession.stop())
+        debugMenu.addAction(stopDebugAction)
+        
         helpMenu = self.menuBar().addMenu("Help")
         aboutAction = QAction("About", self)
         helpMenu.addAction(aboutAction)
@@ -69,6 +212,10 @@ class MainWindow(QMainWindow):
         self.tabWidget.setTabsClosable(True)
         self.tabWidget.tabCloseRequested.connect(self.closeTab)
         
+        # 标签页管理器：路径索引与超出内存预算时的标签页休眠
+        self.tabManager = TabManager(self.tabWidget, self.createEditor, parent=self)
+        self.tabManager.tabRestored.connect(self.onTabRestored)
+        
         # 设置为中心部件
         self.setCentralWidget(self.tabWidget)
         
@@ -78,10 +225,9 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("@SYide")
         self.resize(1000, 750)
         
-    def createTab(self, title, filePath=None):
+    def createEditor(self, filePath=None):
         """
-        创建一个新的标签页
-        :param title: 标签标题
+        创建编辑器并连接信号，休眠的标签页恢复时也通过它重建编辑器
         :param filePath: 文件路径（可选）
         :return: 新创建的编辑器实例
         """
@@ -89,18 +235,33 @@ class MainWindow(QMainWindow):
         editor.breakpointToggled.connect(self.onBreakpointToggled)
         editor.fileSaved.connect(self.onFileSaved)
         editor.runPythonFile.connect(self.onRunPythonFile)
+        editor.debugPythonFile.connect(self.onDebugPythonFile)
+        editor.profilePythonFile.connect(self.onProfilePythonFile)
+        editor.coveragePythonFile.connect(self.onCoveragePythonFile)
+        editor.breakpointConditionChanged.connect(self.onBreakpointConditionChanged)
+        editor.editPaused.connect(self.onEditPaused)
+        editor.definitionRequested.connect(self.onGotoDefinition)
+        editor.referencesRequested.connect(self.onFindReferences)
         
         # 设置文件路径
         if filePath:
             editor.setFilePath(filePath)
             
+        return editor
+        
+    def createTab(self, title, filePath=None):
+        """
+        创建一个新的标签页
+        :param title: 标签标题
+        :param filePath: 文件路径（可选）
+        :return: 新创建的编辑器实例
+        """
+        editor = self.createEditor(filePath)
+        self.tabManager.register(editor)
+        
         tabIndex = self.tabWidget.addTab(editor, title)
         self.tabWidget.setCurrentIndex(tabIndex)
         
-        # 保存文件路径作为属性
-        if filePath:
-            editor.filePath = filePath
-            
         return editor
         
     def closeTab(self, index):
@@ -112,7 +273,25 @@ class MainWindow(QMainWindow):
         if self.tabWidget.count() <= 1:
             return
             
+        # 关闭仍在加载的标签页时取消加载
+        editor = self.tabWidget.widget(index)
+        if getattr(editor, 'loading', False):
+            self.fileLoader.cancel(editor.filePath)
+            
+        # 释放大文件查看器的内存映射
+        if isinstance(editor, LargeFileViewer):
+            editor.closeFile()
+            
+        if editor is self.previewEditor:
+            self.previewEditor = None
+            
+        if isinstance(editor, Edit) and editor.filePath:
+            self.workspaceSymbols.discardBuffer(editor.filePath)
+            
+        self.tabManager.unregister(editor)
         self.tabWidget.removeTab(index)
+        # removeTab不会销毁部件，需要手动释放
+        editor.deleteLater()
         
     def getCurrentEditor(self):
         """
@@ -138,6 +317,141 @@ class MainWindow(QMainWindow):
             else:
                 self.outputWindow.appendInfo(f"Breakpoint removed at line {line+1} in {file_name}")
                 
+        self.syncDebugBreakpoints()
+        
+    def onBreakpointConditionChanged(self, line, condition):
+        """
+        处理断点条件修改
+        :param line: 行号
+        :param condition: 条件表达式
+        """
+        if self.outputWindow:
+            if condition:
+                self.outputWindow.appendInfo(f"Breakpoint condition at line {line+1}: {condition}")
+            else:
+                self.outputWindow.appendInfo(f"Breakpoint condition removed at line {line+1}")
+        self.syncDebugBreakpoints()
+        
+    def collectBreakpoints(self):
+        """
+        收集所有打开文件中的断点，包括休眠的标签页
+        :return: {文件路径: [[行号(从1开始), 条件], ...]}
+        """
+        breakpoints = {}
+        for i in range(self.tabWidget.count()):
+            widget = self.tabWidget.widget(i)
+            if isinstance(widget, Edit):
+                lines = widget.getBreakpoints()
+                conditions = widget.getBreakpointConditions()
+            elif isinstance(widget, HibernatedTab):
+                lines = widget.state['breakpoints']
+                conditions = widget.state['breakpointConditions']
+            else:
+                continue
+            if widget.filePath and lines:
+                breakpoints[widget.filePath] = [[line + 1, conditions.get(line, "")] for line in lines]
+        return breakpoints
+        
+    def syncDebugBreakpoints(self):
+        """
+        调试运行中把断点变化同步给调试进程
+        """
+        if self.debugSession and self.debugSession.isRunning():
+            self.debugSession.setBreakpoints(self.collectBreakpoints())
+            
+    def onDebugStartOrContinue(self):
+        """
+        调试已暂停时继续运行，否则调试当前文件
+        """
+        if self.debugSession and self.debugSession.isRunning():
+            self.debugSession.continueRun()
+            return
+            
+        current_editor = self.getCurrentEditor()
+        if isinstance(current_editor, Edit):
+            current_editor.debugPythonScript()
+            
+    def onDebugPythonFile(self, filePath):
+        """
+        以调试模式运行Python文件
+        :param filePath: Python文件路径
+        """
+        if self.debugSession and self.debugSession.isRunning():
+            self.statusBar().showMessage("A debug session is already running")
+            return
+            
+        self.debugSession = DebugSession(self)
+        self.debugSession.stopped.connect(self.onDebugStopped)
+        self.debugSession.resumed.connect(self.onDebugResumed)
+        self.debugSession.output.connect(self.onDebugOutput)
+        self.debugSession.finished.connect(self.onDebugFinished)
+        try:
+            self.debugSession.start(filePath, self.collectBreakpoints())
+        except Exception as e:
+            if self.outputWindow:
+                self.outputWindow.appendError(f"Failed to debug {filePath}: {str(e)}")
+            return
+            
+        self.statusBar().showMessage(f"Debugging {filePath}")
+        if self.outputWindow:
+            self.outputWindow.appendInfo(f"Debugging: {filePath}")
+            
+    def onDebugStopped(self, filePath, line, function, variables):
+        """
+        调试进程在断点或单步处暂停
+        :param filePath: 文件路径
+        :param line: 行号（从1开始）
+        :param function: 函数名
+        :param variables: 局部变量
+        """
+        self.openFileInTab(filePath)
+        index = self.tabManager.findTab(filePath)
+        editor = self.tabWidget.widget(index) if index >= 0 else None
+        if isinstance(editor, Edit):
+            # 文件可能仍在后台加载，加载完成前无法定位
+            self.clearExecutionLine()
+            editor.setExecutionLine(line - 1)
+            self.executionEditor = editor
+            
+        self.variablesWindow.setVariables(variables)
+        self.variablesWindow.show()
+        self.statusBar().showMessage(f"Paused at {QFileInfo(filePath).fileName()}:{line} in {function}")
+        
+    def onDebugResumed(self):
+        """
+        调试进程继续运行
+        """
+        self.clearExecutionLine()
+        self.variablesWindow.clearVariables()
+        self.statusBar().showMessage("Running...")
+        
+    def onDebugOutput(self, text):
+        """
+        显示被调试程序的输出
+        :param text: 输出文本
+        """
+        if self.outputWindow:
+            self.outputWindow.appendText(text.rstrip('\n'))
+            
+    def onDebugFinished(self, exitCode):
+        """
+        调试进程结束
+        :param exitCode: 退出码
+        """
+        self.clearExecutionLine()
+        self.variablesWindow.clearVariables()
+        self.statusBar().showMessage(f"Debugging finished with exit code {exitCode}")
+        if self.outputWindow:
+            self.outputWindow.appendInfo(f"Debugging finished with exit code {exitCode}")
+            
+    def clearExecutionLine(self):
+        """
+        清除编辑器中的当前执行行标记
+        """
+        if self.executionEditor is not None and not sip.isdeleted(self.executionEditor):
+            self.executionEditor.clearExecutionLine()
+        self.executionEditor = None
+                
     def onFileSaved(self, message):
         """
         处理文件保存事件
@@ -150,73 +464,556 @@ class MainWindow(QMainWindow):
         if self.outputWindow:
             self.outputWindow.appendInfo(message)
             
+    def onRunCurrentFile(self):
+        """
+        运行当前编辑器中的文件
+        """
+        current_editor = self.getCurrentEditor()
+        if isinstance(current_editor, Edit):
+            current_editor.runPythonScript()
+            
     def onRunPythonFile(self, filePath):
         """
-        处理运行Python文件事件
+        处理运行Python文件事件，每次运行使用独立的进程，可以同时运行多个脚本
         :param filePath: Python文件路径
         """
         try:
-            # 确保终端窗口存在
-            if self.terminalWindow:
-                # 切换到终端窗口所在的目录
-                directory = os.path.dirname(filePath)
-                if directory:
-                    os.chdir(directory)
-                    
-                # 在终端中执行Python文件
-                command = f"python \"{filePath}\""
-                self.terminalWindow.executeCommand(command)
-                
-                # 在输出窗口中记录
-                if self.outputWindow:
-                    self.outputWindow.appendInfo(f"Executing: {filePath}")
-            else:
-                # 如果没有终端窗口，使用系统方法执行
-                import subprocess
-                subprocess.Popen(["python", filePath])
-                
-                # 在输出窗口中记录
-                if self.outputWindow:
-                    self.outputWindow.appendInfo(f"Executing: {filePath}")
+            # 工作目录、环境变量和参数来自.vscode/launch.json，没有配置时在文件所在目录运行
+            self.runManager.start(filePath, self.fileBrowser.currentPath or None)
         except Exception as e:
             # 在输出窗口中显示错误
             if self.outputWindow:
                 self.outputWindow.appendError(f"Failed to execute {filePath}: {str(e)}")
                 
+    def onProfileCurrentFile(self):
+        """
+        对当前编辑器中的文件进行性能分析
+        """
+        current_editor = self.getCurrentEditor()
+        if isinstance(current_editor, Edit):
+            current_editor.profilePythonScript()
+            
+    def onProfilePythonFile(self, filePath):
+        """
+        在采样分析器下运行Python文件，结束后显示热点函数和热点行
+        :param filePath: Python文件路径
+        """
+        try:
+            self.runManager.start(filePath, self.fileBrowser.currentPath or None, tool=Run.PROFILE)
+        except Exception as e:
+            if self.outputWindow:
+                self.outputWindow.appendError(f"Failed to profile {filePath}: {str(e)}")
+                
+    def onCoverageCurrentFile(self):
+        """
+        统计覆盖率运行当前编辑器中的文件
+        """
+        current_editor = self.getCurrentEditor()
+        if isinstance(current_editor, Edit):
+            current_editor.coveragePythonScript()
+            
+    def onCoveragePythonFile(self, filePath):
+        """
+        统计行覆盖率运行Python文件，结束后在编辑器中标出执行过和未执行的行
+        :param filePath: Python文件路径
+        """
+        try:
+            self.runManager.start(filePath, self.fileBrowser.currentPath or None, tool=Run.COVERAGE)
+        except Exception as e:
+            if self.outputWindow:
+                self.outputWindow.appendError(f"Failed to run {filePath} with coverage: {str(e)}")
+                
+    def onRunStarted(self, run):
+        """
+        运行开始，输出写入该运行的通道
+        :param run: Run
+        """
+        configuration = run.configuration
+        channel = run.name
+        run.output.connect(lambda text, isError, channel=channel: self.onRunOutput(channel, text, isError))
+        self.outputWindow.showChannel(channel)
+        self.outputWindow.show()
+        self.outputWindow.raise_()
+        command = " ".join([configuration.program] + configuration.args)
+        self.outputWindow.appendInfo(f"Executing: {command} (cwd: {configuration.cwd})", channel)
+        self.outputWindow.appendInfo(f"Executing: {configuration.program}")
+        
+    def onRunOutput(self, channel, text, isError):
+        """
+        运行的输出按行写入通道，标准错误记为错误级别
+        """
+        append = self.outputWindow.appendError if isError else self.outputWindow.appendText
+        for line in text.split('\n'):
+            append(line, channel)
+            
+    def onRunFinished(self, run):
+        """
+        运行结束，记录退出码、耗时和资源使用
+        :param run: Run
+        """
+        message = f"{run.name} finished: {run.summary()}"
+        self.outputWindow.appendInfo(message, run.name)
+        self.outputWindow.appendInfo(message)
+        self.statusBar().showMessage(message)
+        if run.tool == Run.PROFILE:
+            self.showProfileResult(run)
+        elif run.tool == Run.COVERAGE:
+            self.showCoverageResult(run)
+            
+    def showCoverageResult(self, run):
+        """
+        缓存覆盖率结果，输出每个文件的覆盖率并更新所有打开的编辑器
+        :param run: 统计覆盖率的Run
+        """
+        if run.toolResult is None:
+            self.outputWindow.appendError(f"{run.name}: no coverage result", run.name)
+            return
+        summary = self.coverageCache.update(run.toolResult)
+        for line in formatSummary(summary):
+            self.outputWindow.appendInfo(line, run.name)
+        for i in range(self.tabWidget.count()):
+            self.applyEditorOverlays(self.tabWidget.widget(i))
+            
+    def showProfileResult(self, run):
+        """
+        显示分析结果，并在所有打开的编辑器中标出热点行
+        :param run: 分析运行的Run
+        """
+        if run.toolResult is None:
+            self.outputWindow.appendError(f"{run.name}: no profile result", run.name)
+            return
+        self.profileResult = ProfileResult(run.toolResult, run.configuration.program)
+        self.profileWindow.setResult(self.profileResult)
+        self.profileWindow.show()
+        self.profileWindow.raise_()
+        for i in range(self.tabWidget.count()):
+            self.applyEditorOverlays(self.tabWidget.widget(i))
+            
+    def applyEditorOverlays(self, editor):
+        """
+        把分析结果等附加信息显示到编辑器中，文件加载、预览和恢复休眠标签页后调用
+        :param editor: 标签页部件
+        """
+        if not isinstance(editor, Edit) or editor.loading:
+            return
+        if self.profileResult is not None:
+            editor.setLineHeat(self.profileResult.lineCounts(editor.filePath))
+        if not self.coverageCache.isEmpty():
+            coverage = self.coverageCache.lookup(editor.documentBytes())
+            if coverage is not None:
+                editor.setCoverage(*coverage)
+            else:
+                editor.clearCoverage()
+        # 诊断代码，内容分析过时直接使用缓存的结果
+        self.analyzeEditor(editor)
+                
+    def clearEditorOverlays(self):
+        """
+        清除分析结果和覆盖率缓存，以及编辑器中的对应标记
+        """
+        self.profileResult = None
+        self.coverageCache.clear()
+        self.profileWindow.clearResult()
+        for i in range(self.tabWidget.count()):
+            editor = self.tabWidget.widget(i)
+            if isinstance(editor, Edit):
+                editor.clearLineHeat()
+                editor.clearCoverage()
+                
+    def onTabRestored(self, filePath):
+        index = self.tabManager.findTab(filePath)
+        if index >= 0:
+            self.applyEditorOverlays(self.tabWidget.widget(index))
+            
+    def gotoLocation(self, filePath, line, column=0):
+        """
+        打开文件并把光标移到指定位置，文件仍在后台加载时在加载完成后跳转
+        :param filePath: 文件路径
+        :param line: 行号（从1开始）
+        :param column: 列号
+        """
+        self.openFileInTab(filePath)
+        index = self.tabManager.findTab(filePath)
+        editor = self.tabWidget.widget(index) if index >= 0 else None
+        if not isinstance(editor, Edit):
+            return
+        if editor.loading:
+            self.pendingLocation = (filePath, max(line - 1, 0), column)
+            return
+        self.pendingLocation = None
+        editor.setCursorPosition(max(line - 1, 0), column)
+        editor.ensureLineVisible(max(line - 1, 0))
+        editor.setFocus()
+        
+    def onFindInFiles(self):
+        """
+        打开工作区搜索，当前编辑器中选中的单行文本作为搜索文本
+        """
+        text = None
+        editor = self.getCurrentEditor()
+        if isinstance(editor, Edit) and editor.hasSelectedText() and '\n' not in editor.selectedText():
+            text = editor.selectedText()
+        self.searchWindow.focusSearch(text)
+        
+    def parseEditorSymbols(self, editor):
+        """
+        在后台重新解析编辑器中的Python代码，更新大纲和符号查询使用的内容
+        """
+        if isinstance(editor, Edit) and not editor.loading and editor.filePath and editor.filePath.lower().endswith('.py'):
+            self.workspaceSymbols.updateBuffer(editor.filePath, editor.documentBytes())
+            
+    def analyzeEditor(self, editor):
+        """
+        在后台诊断编辑器中的Python代码
+        """
+        if isinstance(editor, Edit) and not editor.loading and editor.filePath and editor.filePath.lower().endswith('.py'):
+            self.diagnostics.analyze(editor.filePath, editor.editGeneration, editor.documentBytes())
+            
+    def onDiagnosticsReady(self, filePath, generation, diagnostics):
+        """
+        显示诊断结果，分析期间内容又被修改时丢弃
+        """
+        index = self.tabManager.findTab(filePath)
+        editor = self.tabWidget.widget(index) if index >= 0 else None
+        if not isinstance(editor, Edit) or editor.editGeneration != generation:
+            return
+        editor.setDiagnostics(diagnostics)
+        # 摘要有变化时才输出，没有问题的文件首次分析时不输出
+        summary = formatDiagnostics(filePath, diagnostics)
+        previous = self.diagnosticSummaries.get(filePath)
+        if summary != previous and (diagnostics or previous is not None):
+            self.diagnosticSummaries[filePath] = summary
+            self.outputWindow.appendInfo(summary[0], "Problems")
+            for line in summary[1:]:
+                self.outputWindow.appendText(line, "Problems")
+                
+    def onAnalysisWorkerFailed(self, message):
+        """
+        诊断或符号解析的进程异常退出，结果可能缺失，下次分析时重新启动进程
+        """
+        self.outputWindow.appendError(message, "Problems")
+        
+    def onEditPaused(self):
+        editor = self.sender()
+        self.parseEditorSymbols(editor)
+        self.analyzeEditor(editor)
+        
+    def onCurrentTabChanged(self, index):
+        """
+        切换标签页时显示对应文件的大纲
+        """
+        editor = self.tabWidget.widget(index)
+        if not (isinstance(editor, Edit) and editor.filePath and editor.filePath.lower().endswith('.py')):
+            self.outlineWindow.clearDefinitions()
+            return
+        definitions = self.workspaceSymbols.bufferDefinitions(editor.filePath)
+        if definitions is not None:
+            self.outlineWindow.setDefinitions(os.path.abspath(editor.filePath), definitions)
+        else:
+            self.outlineWindow.clearDefinitions()
+            self.parseEditorSymbols(editor)
+            
+    def onBufferParsed(self, filePath, definitions):
+        editor = self.getCurrentEditor()
+        if isinstance(editor, Edit) and editor.filePath and os.path.abspath(editor.filePath) == filePath:
+            self.outlineWindow.setDefinitions(filePath, definitions)
+            
+    def onSymbolIndexUpdated(self, stats):
+        CompletionApis.instance().updateWorkspace(self.workspaceSymbols.indexPath, self.workspaceSymbols.root)
+            
+    def onGotoDefinition(self, name):
+        editor = self.sender()
+        self.statusBar().showMessage(f"Looking up definition of '{name}'...")
+        self.workspaceSymbols.findDefinitions(name, editor.filePath)
+        
+    def onFindReferences(self, name):
+        editor = self.sender()
+        self.statusBar().showMessage(f"Finding references to '{name}'...")
+        self.workspaceSymbols.findReferences(name, editor.filePath)
+        
+    def onSymbolLookupFinished(self, kind, name, locations):
+        """
+        唯一（或优先级最高且唯一）的定义直接跳转，其余结果显示在搜索窗口中
+        :param locations: [(路径, 行号, 列号, 优先级, 行文本)]，定义已按优先级排序
+        """
+        if kind == 'definition':
+            if not locations:
+                self.statusBar().showMessage(f"No definition found for '{name}'")
+                return
+            best = [location for location in locations if location[3] == locations[0][3]]
+            if len(best) == 1:
+                path, line, column = best[0][:3]
+                self.statusBar().showMessage(f"Definition of '{name}': {path}:{line}")
+                self.gotoLocation(path, line, column)
+                return
+            title = f"{len(locations)} definitions of '{name}'"
+        else:
+            title = f"{len(locations)} references to '{name}'"
+        self.statusBar().showMessage(title)
+        self.searchWindow.showLocations(title, name, locations)
+        
+    def onQuickOpenSelected(self, filePath, line):
+        """
+        打开快速打开中选择的文件
+        :param line: 行号（从1开始），0表示不跳转
+        """
+        if line > 0:
+            self.gotoLocation(filePath, line)
+        else:
+            self.openFileInTab(filePath)
+        
     def openFileInTab(self, filePath):
         """
         在标签页中打开文件
         :param filePath: 文件路径
         """
+        # 最近打开的文件在快速打开中排在前面
+        self.quickOpen.noteOpened(filePath)
+        
         # 检查文件是否已经在打开的标签页中
-        for i in range(self.tabWidget.count()):
-            editor = self.tabWidget.widget(i)
-            if hasattr(editor, 'filePath') and editor.filePath == filePath:
-                # 文件已打开，直接切换到该标签页
-                self.tabWidget.setCurrentIndex(i)
-                return
-                
+        index = self.tabManager.findTab(filePath)
+        if index >= 0:
+            # 文件已打开，直接切换到该标签页；正在预览的文件转为固定标签页
+            if self.tabWidget.widget(index) is self.previewEditor:
+                self.promotePreview()
+            self.tabWidget.setCurrentIndex(index)
+            return
+            
         # 文件未打开，创建新标签页
         fileName = QFileInfo(filePath).fileName()
+        
+        # 超大文件不加载到编辑器中
+        if QFileInfo(filePath).size() > self.LARGE_FILE_THRESHOLD:
+            self.openLargeFileInTab(fileName, filePath)
+            return
+            
         editor = self.createTab(fileName, filePath)
         
-        # 读取文件内容
+        # 在后台线程中分块读取文件内容
+        self.fileLoader.load(filePath, editor)
+        self.statusBar().showMessage(f"Loading {filePath}...")
+        
+    def previewFileInTab(self, filePath):
+        """
+        在可复用的预览标签页中显示文件
+        :param filePath: 文件路径
+        """
+        # 已经打开的文件直接切换
+        index = self.tabManager.findTab(filePath)
+        if index >= 0:
+            self.previewer.cancel()
+            self.tabWidget.setCurrentIndex(index)
+            return
+            
+        # 大文件不适合整体读取到预览中
+        if QFileInfo(filePath).size() > self.PREVIEW_MAX_SIZE:
+            self.previewer.cancel()
+            self.openFileInTab(filePath)
+            return
+            
+        self.previewer.request(filePath)
+        
+    def showPreview(self, filePath, data):
+        """
+        将读取到的文件内容换入预览标签页
+        :param filePath: 文件路径
+        :param data: 文档字节
+        """
+        # 读取期间文件可能已经以固定标签页打开
+        if self.tabManager.findTab(filePath) >= 0:
+            return
+            
+        fileName = QFileInfo(filePath).fileName()
+        editor = self.previewEditor
+        if editor is None:
+            editor = self.createEditor()
+            editor.preview = True
+            editor.textChanged.connect(self.onPreviewEdited)
+            self.previewEditor = editor
+            self.tabWidget.addTab(editor, fileName)
+        else:
+            self.tabManager.unregister(editor)
+            
+        # 替换文档内容，不重建编辑器
+        self.previewSwapping = True
         try:
-            with open(filePath, "r", encoding="utf-8") as file:
-                editor.setText(file.read())
+            editor.setFilePath(filePath)
+            editor.setDocumentBytes(data)
+        finally:
+            self.previewSwapping = False
+        self.tabManager.register(editor)
+        
+        index = self.tabWidget.indexOf(editor)
+        self.tabWidget.setTabText(index, f"{fileName} (Preview)")
+        self.tabWidget.setTabToolTip(index, filePath)
+        self.tabWidget.setCurrentIndex(index)
+        self.applyEditorOverlays(editor)
+        self.statusBar().showMessage(f"Previewing {filePath}")
+        
+    def onPreviewFailed(self, filePath, message):
+        """
+        处理预览读取失败
+        :param filePath: 文件路径
+        :param message: 错误信息
+        """
+        self.statusBar().showMessage(f"Cannot preview {filePath}: {message}")
+        
+    def onPreviewEdited(self):
+        """
+        预览标签页被编辑时转为固定标签页
+        """
+        if not self.previewSwapping:
+            self.promotePreview()
+            
+    def promotePreview(self):
+        """
+        将预览标签页转为固定标签页
+        """
+        editor = self.previewEditor
+        if editor is None:
+            return
+            
+        editor.preview = False
+        editor.textChanged.disconnect(self.onPreviewEdited)
+        self.previewEditor = None
+        
+        index = self.tabWidget.indexOf(editor)
+        self.tabWidget.setTabText(index, QFileInfo(editor.filePath).fileName())
+        
+    def openLargeFileInTab(self, title, filePath):
+        """
+        在只读查看器中打开超大文件
+        :param title: 标签标题
+        :param filePath: 文件路径
+        """
+        try:
+            viewer = LargeFileViewer(filePath)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Cannot open file: {str(e)}")
+            return
             
-        # 更新状态栏
+        viewer.indexProgress.connect(self.onLargeFileIndexProgress)
+        self.tabManager.register(viewer)
+        tabIndex = self.tabWidget.addTab(viewer, f"{title} [Read Only]")
+        self.tabWidget.setCurrentIndex(tabIndex)
+        self.statusBar().showMessage(f"Opened {filePath} (read only)")
+        
+    def onLargeFileIndexProgress(self, filePath, percent):
+        """
+        处理大文件行索引进度
+        :param filePath: 文件路径
+        :param percent: 索引百分比
+        """
+        if percent < 100:
+            self.statusBar().showMessage(f"Indexing {QFileInfo(filePath).fileName()}... {percent}%")
+        else:
+            self.statusBar().showMessage(f"Indexed {filePath}")
+        
+    def onFileLoadProgress(self, filePath, percent):
+        """
+        处理文件加载进度
+        :param filePath: 文件路径
+        :param percent: 加载百分比
+        """
+        self.statusBar().showMessage(f"Loading {QFileInfo(filePath).fileName()}... {percent}%")
+        
+    def onFileLoadFinished(self, filePath):
+        """
+        处理文件加载完成
+        :param filePath: 文件路径
+        """
         self.statusBar().showMessage(f"Opened {filePath}")
+        index = self.tabManager.findTab(filePath)
+        if index >= 0:
+            self.applyEditorOverlays(self.tabWidget.widget(index))
+            self.parseEditorSymbols(self.tabWidget.widget(index))
+        if self.pendingLocation is not None and self.pendingLocation[0] == filePath:
+            filePath, line, column = self.pendingLocation
+            self.gotoLocation(filePath, line + 1, column)
+        # 文件大小确定后检查内存预算
+        self.tabManager.enforceBudget()
+        
+    def onFileLoadFailed(self, filePath, message):
+        """
+        处理文件加载失败，关闭对应的未完成标签页。标签页中只有失败前读取的部分，保存会截断文件
+        :param filePath: 文件路径
+        :param message: 错误信息
+        """
+        self.__closeLoadingTab(filePath)
+        self.statusBar().showMessage(f"Failed to open {filePath}")
+        if self.outputWindow:
+            self.outputWindow.appendError(f"Cannot open file {filePath}: {message}")
+        QMessageBox.warning(self, "Error", f"Cannot open file: {message}")
+        
+    def onFileLoadCancelled(self, filePath):
+        """
+        处理文件加载取消，关闭对应的未完成标签页
+        :param filePath: 文件路径
+        """
+        self.__closeLoadingTab(filePath)
+        self.statusBar().showMessage(f"Cancelled loading {filePath}")
+        if self.outputWindow:
+            self.outputWindow.appendInfo(f"Cancelled loading {filePath}")
+            
+    def __closeLoadingTab(self, filePath):
+        """
+        关闭没有完整加载的标签页
+        :param filePath: 文件路径
+        """
+        index = self.tabManager.findTab(filePath)
+        if index >= 0:
+            editor = self.tabWidget.widget(index)
+            self.tabManager.unregister(editor)
+            self.tabWidget.removeTab(index)
+            editor.deleteLater()
+            
+    def onFileLoadActiveChanged(self, count):
+        """
+        根据正在加载的文件数量显示或隐藏取消按钮
+        :param count: 正在加载的文件数量
+        """
+        self.cancelLoadButton.setVisible(count > 0)
+        
+
+    def closeEvent(self, event):
+        """
+        退出前等待后台保存完成，避免丢失最后一次保存
+        """
+        self.fileLoader.cancelAll()
+        if self.debugSession:
+            self.debugSession.stop()
+        FileSaver.instance().waitForDone()
+        # 未完成的文件操作在下一个文件处停止
+        self.fileBrowser.operationQueue.cancelAll()
+        self.fileBrowser.operationQueue.waitForDone()
+        self.runManager.killAll()
+        # 结束终端会话和池中空闲的shell
+        self.terminalWindow.stopProcess()
+        self.outputWindow.shutdown()
+        self.workspaceSearch.shutdown()
+        self.quickOpen.shutdown()
+        self.workspaceSymbols.shutdown()
+        self.diagnostics.shutdown()
+        completionApis = CompletionApis.existingInstance()
+        if completionApis is not None:
+            completionApis.shutdown()
+        super().closeEvent(event)
         
     def __initStatusBar(self):
         self.statusBar().showMessage("")
         
+        # 取消文件加载按钮，仅在有文件正在加载时显示
+        self.cancelLoadButton = QPushButton("Cancel Loading")
+        self.cancelLoadButton.setFlat(True)
+        self.cancelLoadButton.clicked.connect(self.fileLoader.cancelAll)
+        self.cancelLoadButton.setVisible(False)
+        self.statusBar().addPermanentWidget(self.cancelLoadButton)
+        
     def __initDocker(self):
         # 文件浏览器
         self.fileBrowser = FileBrowser()
         self.fileBrowser.openFile.connect(self.__onOpenFileDirect)
+        self.fileBrowser.previewFile.connect(self.previewFileInTab)
         self.fileBrowser.renameCompleted.connect(self.onRenameCompleted)
         self.fileBrowser.show()
         
@@ -228,6 +1025,32 @@ class MainWindow(QMainWindow):
         self.outputWindow = OutputWindow()
         self.addDockWidget(Qt.BottomDockWidgetArea, self.outputWindow)
         
+        # 调试变量窗口
+        self.variablesWindow = VariablesWindow()
+        self.addDockWidget(Qt.RightDockWidgetArea, self.variablesWindow)
+        self.variablesWindow.hide()
+        
+        # 性能分析窗口
+        self.profileWindow = ProfileWindow()
+        self.profileWindow.locationActivated.connect(self.gotoLocation)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.profileWindow)
+        self.profileWindow.hide()
+        
+        # 工作区搜索窗口
+        self.searchWindow = SearchWindow(self.workspaceSearch)
+        self.searchWindow.locationActivated.connect(self.gotoLocation)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.searchWindow)
+        self.tabifyDockWidget(self.fileBrowserDock, self.searchWindow)
+        self.searchWindow.hide()
+        
+        # 大纲窗口
+        self.outlineWindow = OutlineWindow()
+        self.outlineWindow.locationActivated.connect(self.gotoLocation)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.outlineWindow)
+        self.tabifyDockWidget(self.fileBrowserDock, self.outlineWindow)
+        self.fileBrowserDock.raise_()
+        self.tabWidget.currentChanged.connect(self.onCurrentTabChanged)
+        
         # 终端窗口
         self.terminalWindow = TerminalWindow()
         self.addDockWidget(Qt.BottomDockWidgetArea, self.terminalWindow)
@@ -248,13 +1071,14 @@ class MainWindow(QMainWindow):
             self.outputWindow.appendText(message)
         
     def __onOpenFile(self):
-        fileName = QFileDialog.getOpenFileName(self, "Open File", "", "All Files (*);;Text Files (*.txt)")
+        fileNames = QFileDialog.getOpenFileNames(self, "Open File", "", "All Files (*);;Text Files (*.txt)")
         
-        if fileName[0]:
-            self.openFileInTab(fileName[0])
+        # 多个文件会在线程池中并行读取
+        for fileName in fileNames[0]:
+            self.openFileInTab(fileName)
             # 在输出窗口中记录日志
             if self.outputWindow:
-                self.outputWindow.appendText(f"Opened file: {fileName[0]}")
+                self.outputWindow.appendText(f"Opened file: {fileName}")
                 
     def __onOpenFileDirect(self, path):
         self.openFileInTab(path)
@@ -268,6 +1092,12 @@ class MainWindow(QMainWindow):
         if folderName:
             self.fileBrowser.setRootPath(folderName)
             self.fileBrowser.loadRootDirectory()
+            # 之后新建的终端会话在打开的文件夹中启动
+            self.terminalWindow.setWorkingDirectory(folderName)
+            # 在后台建立或增量更新搜索索引
+            self.workspaceSearch.setRoot(folderName)
+            self.quickOpen.setRoot(folderName)
+            self.workspaceSymbols.setRoot(folderName)
             self.statusBar().showMessage("Opened " + folderName)
             # 在输出窗口中记录日志
             if self.outputWindow:
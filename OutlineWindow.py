@@ -0,0 +1,66 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import os
+
+class OutlineWindow(QDockWidget):
+    """
+    当前文件的大纲：按嵌套关系列出类、函数和模块级变量，双击跳转到定义
+    """
+    locationActivated = pyqtSignal(str, int, int)  # 文件路径, 行号(从1开始), 列号
+
+    KIND_COLORS = {'class': QColor(156, 39, 176), 'function': QColor(25, 118, 210),
+                   'method': QColor(25, 118, 210), 'variable': QColor(96, 125, 139)}
+
+    def __init__(self, parent=None):
+        super().__init__("Outline", parent)
+        self.filePath = None
+        self.definitions = None
+        self.__initUI()
+
+    def __initUI(self):
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemActivated.connect(self.onItemActivated)
+        self.setWidget(self.tree)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
+
+    def setDefinitions(self, filePath, definitions):
+        """
+        显示文件的定义
+        :param filePath: 文件路径
+        :param definitions: [(名称, 限定名, 类型, 行号, 列号, 结束行号, 嵌套深度)]，按出现顺序
+        """
+        definitions = list(definitions)
+        # 内容没有变化时保留展开状态和滚动位置
+        if filePath == self.filePath and definitions == self.definitions:
+            return
+        self.filePath = filePath
+        self.definitions = definitions
+        self.tree.setUpdatesEnabled(False)
+        self.tree.clear()
+        parents = []  # 各嵌套深度上最近的节点
+        for name, qualname, kind, line, column, endLine, depth in sorted(definitions, key=lambda d: (d[3], d[4])):
+            del parents[depth:]
+            parent = parents[-1] if parents else self.tree.invisibleRootItem()
+            item = QTreeWidgetItem(parent)
+            item.setText(0, name + ('()' if kind in ('function', 'method') else ''))
+            item.setToolTip(0, f"{kind} {qualname} (line {line})")
+            item.setForeground(0, self.KIND_COLORS.get(kind, QColor(Qt.black)))
+            item.setData(0, Qt.UserRole, (line, column))
+            # 深度不连续时用当前节点补齐
+            parents.extend([item] * (depth + 1 - len(parents)))
+        self.tree.expandAll()
+        self.tree.setUpdatesEnabled(True)
+        self.setWindowTitle(f"Outline - {os.path.basename(filePath)}")
+
+    def clearDefinitions(self):
+        self.filePath = None
+        self.definitions = None
+        self.tree.clear()
+        self.setWindowTitle("Outline")
+
+    def onItemActivated(self, item, column):
+        line, index = item.data(0, Qt.UserRole)
+        self.locationActivated.emit(self.filePath, line, index)
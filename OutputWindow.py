@@ -1,48 +1,263 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+import re
+import time
+
+from LogSink import LogSink
+from LogStore import LogFilter, LogStore
 
 class OutputWindow(QDockWidget):
     """
-    输出窗口类，类似于VSCode中的输出窗口，用于显示日志和信息
+    输出窗口类，类似于VSCode中的输出窗口，用于显示日志和信息。
+    日志记录按输出通道保存在各自的LogStore中，视图只显示当前通道最后MAX_LINES条满足过滤条件的记录。
     """
+    DEFAULT_CHANNEL = "Log"
+    
+    MAX_LINES = 10000  # 视图中显示的最大行数
+    FLUSH_INTERVAL = 50  # 日志刷新到视图的间隔（毫秒）
+    FILTER_DELAY = 200  # 过滤条件输入的防抖间隔（毫秒）
+    MAX_CHANNELS = 16  # 通道数上限，超出时删除最早的通道
+    LEVEL_FILTERS = [("All Levels", None), ("Info", {LogSink.INFO}), ("Error", {LogSink.ERROR}), ("Debug", {LogSink.DEBUG})]
     
     def __init__(self, parent=None):
         super().__init__("Output", parent)
+        # 各线程写入的日志先进入队列，由定时器成批写入存储和视图
+        self.logSink = LogSink(self)
+        self.logSink.recordsAvailable.connect(self.scheduleFlush)
+        self.stores = {}  # 通道名称 -> LogStore，按创建顺序排列
+        self.logStore = None  # 当前通道的存储
+        self.logFilter = LogFilter()
+        self.searchGeneration = 0  # 正在进行的搜索编号，0表示没有
         self.__initUI()
+        self.logStore = self.__store(self.DEFAULT_CHANNEL)
         
     def __initUI(self):
         """
         初始化UI界面
         """
+        self.mainWidget = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+        self.mainWidget.setLayout(layout)
+        
+        # 过滤栏：级别、文本或正则表达式
+        filterBar = QHBoxLayout()
+        filterBar.setContentsMargins(2, 2, 2, 0)
+        self.channelCombo = QComboBox()
+        self.channelCombo.setSizeAdjustPolicy(QComboBox.AdjustToContents)
+        self.channelCombo.currentTextChanged.connect(self.onChannelChanged)
+        self.levelCombo = QComboBox()
+        for name, levels in self.LEVEL_FILTERS:
+            self.levelCombo.addItem(name, levels)
+        self.levelCombo.currentIndexChanged.connect(self.applyFilter)
+        self.filterEdit = QLineEdit()
+        self.filterEdit.setPlaceholderText("Filter")
+        self.filterEdit.setClearButtonEnabled(True)
+        self.filterEdit.textChanged.connect(self.scheduleFilter)
+        self.regexCheck = QCheckBox(".*")
+        self.regexCheck.setToolTip("Use Regular Expression")
+        self.regexCheck.toggled.connect(self.applyFilter)
+        self.filterStatus = QLabel()
+        filterBar.addWidget(self.channelCombo)
+        filterBar.addWidget(self.levelCombo)
+        filterBar.addWidget(self.filterEdit, 1)
+        filterBar.addWidget(self.regexCheck)
+        filterBar.addWidget(self.filterStatus)
+        layout.addLayout(filterBar)
+        
         # 创建文本编辑器用于显示输出
-        self.outputText = QTextEdit()
+        self.outputText = QPlainTextEdit()
         self.outputText.setReadOnly(True)
-        self.outputText.setLineWrapMode(QTextEdit.NoWrap)
+        self.outputText.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.outputText.setMaximumBlockCount(self.MAX_LINES)
+        # 日志不需要撤销，撤销栈会随输出无限增长
+        self.outputText.setUndoRedoEnabled(False)
         
         # 设置字体
         font = QFont("Consolas", 10)
         self.outputText.setFont(font)
+        layout.addWidget(self.outputText)
         
         # 设置为中央部件
-        self.setWidget(self.outputText)
+        self.setWidget(self.mainWidget)
         
         # 设置可停靠区域
         self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea)
         
-    def appendText(self, text):
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(self.FLUSH_INTERVAL)
+        self.flushTimer.timeout.connect(self.flush)
+        
+        self.filterTimer = QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(self.FILTER_DELAY)
+        self.filterTimer.timeout.connect(self.applyFilter)
+        
+    def __store(self, channel):
+        """
+        获取通道的存储，不存在时创建
+        """
+        store = self.stores.get(channel)
+        if store is not None:
+            return store
+        store = LogStore(self)
+        store.searchFinished.connect(self.onSearchFinished)
+        self.stores[channel] = store
+        self.channelCombo.addItem(channel)
+        # 删除最早的通道，默认通道和当前通道除外
+        for name in list(self.stores):
+            if len(self.stores) <= self.MAX_CHANNELS:
+                break
+            if name not in (self.DEFAULT_CHANNEL, channel) and self.stores[name] is not self.logStore:
+                self.removeChannel(name)
+        return store
+        
+    def channels(self):
+        return list(self.stores)
+        
+    def showChannel(self, channel):
+        """
+        切换到指定通道，不存在时创建
+        :param channel: 通道名称
+        """
+        self.__store(channel)
+        self.channelCombo.setCurrentText(channel)
+        
+    def removeChannel(self, channel):
+        """
+        删除通道及其记录，默认通道不能删除
+        """
+        if channel == self.DEFAULT_CHANNEL or channel not in self.stores:
+            return
+        if self.stores[channel] is self.logStore:
+            self.showChannel(self.DEFAULT_CHANNEL)
+        self.stores.pop(channel).close()
+        self.channelCombo.removeItem(self.channelCombo.findText(channel))
+        
+    def onChannelChanged(self, channel):
+        store = self.stores.get(channel)
+        if store is None or store is self.logStore:
+            return
+        if self.logStore is not None:
+            self.logStore.cancelSearch()
+        self.logStore = store
+        self.applyFilter()
+        
+    def scheduleFlush(self):
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+            
+    def flush(self):
+        """
+        将队列中的日志写入存储，满足过滤条件的记录一次性写入视图
+        """
+        records, dropped = self.logSink.take()
+        if not records:
+            return
+        if dropped:
+            records.insert(0, (records[0][0], None, f"... {dropped} messages dropped", None))
+        lines = []
+        for timestamp, level, text, channel in records:
+            store = self.__store(channel or self.DEFAULT_CHANNEL)
+            store.append(timestamp, level, text)
+            if store is self.logStore and self.logFilter.match(level, text):
+                lines.append(self.formatRecord((timestamp, level, text)))
+        # 搜索完成时会补上搜索开始之后的记录
+        if lines and not self.searchGeneration:
+            self.__appendLines(lines)
+            
+    def __appendLines(self, lines):
+        scrollBar = self.outputText.verticalScrollBar()
+        # 用户向上滚动查看时不自动滚动到底部
+        atBottom = scrollBar.value() >= scrollBar.maximum()
+        cursor = QTextCursor(self.outputText.document())
+        cursor.movePosition(QTextCursor.End)
+        text = '\n'.join(lines)
+        if not self.outputText.document().isEmpty():
+            text = '\n' + text
+        cursor.insertText(text)
+        if atBottom:
+            scrollBar.setValue(scrollBar.maximum())
+            
+    def __setLines(self, lines):
+        self.outputText.setPlainText('\n'.join(lines))
+        scrollBar = self.outputText.verticalScrollBar()
+        scrollBar.setValue(scrollBar.maximum())
+        
+    def scheduleFilter(self):
+        self.filterTimer.start()
+        
+    def applyFilter(self):
+        """
+        按当前的级别和文本条件重新显示日志；有条件时在后台搜索全部记录，包括已转存到磁盘的部分
+        """
+        self.filterTimer.stop()
+        try:
+            self.logFilter = LogFilter(self.levelCombo.currentData(), self.filterEdit.text(), self.regexCheck.isChecked())
+        except re.error as e:
+            self.filterEdit.setStyleSheet("QLineEdit { color: red; }")
+            self.filterStatus.setText("Invalid pattern")
+            self.filterStatus.setToolTip(str(e))
+            return
+        self.filterEdit.setStyleSheet("")
+        self.filterStatus.setToolTip("")
+        self.flush()
+        
+        if self.logFilter.isEmpty():
+            self.logStore.cancelSearch()
+            self.searchGeneration = 0
+            self.filterStatus.setText("")
+            self.__setLines(self.formatRecord(record[1:]) for record in self.logStore.tail(self.MAX_LINES))
+            return
+        self.filterStatus.setText("Searching...")
+        self.searchGeneration = self.logStore.search(self.logFilter, self.MAX_LINES)
+        
+    def onSearchFinished(self, generation, records, total, endIndex):
+        if self.sender() is not self.logStore or generation != self.searchGeneration:
+            return
+        self.searchGeneration = 0
+        self.flush()
+        lines = [self.formatRecord(record[1:]) for record in records]
+        # 搜索开始之后追加的记录
+        for record in self.logStore.records(endIndex):
+            if self.logFilter.match(record[2], record[3]):
+                total += 1
+                lines.append(self.formatRecord(record[1:]))
+        self.__setLines(lines[-self.MAX_LINES:])
+        self.filterStatus.setText(f"{total} matches")
+        
+    @staticmethod
+    def formatRecord(record):
+        """
+        格式化一条日志记录
+        :param record: (时间戳, 级别, 文本)
+        :return: 一行或多行文本
+        """
+        timestamp, level, text = record
+        prefix = time.strftime('%H:%M:%S', time.localtime(timestamp))
+        if level:
+            return f"{prefix} [{level}] {text}"
+        return f"{prefix} {text}"
+        
+    def appendText(self, text, channel=None):
         """
-        在输出窗口中追加文本
+        在输出窗口中追加文本，可以在任意线程调用
         :param text: 要追加的文本
+        :param channel: 输出通道，None表示默认通道
         """
-        self.outputText.append(text)
-        # 滚动到底部以显示最新内容
-        self.outputText.moveCursor(QTextCursor.End)
+        self.logSink.write(None, text, channel)
         
     def clearText(self):
         """
-        清空输出窗口中的所有文本
+        清空当前通道中的所有文本
         """
+        # 其他通道尚未写入的记录保留
+        self.flush()
+        self.logStore.clear()
+        self.searchGeneration = 0
         self.outputText.clear()
         
     def setText(self, text):
@@ -50,32 +265,47 @@ class OutputWindow(QDockWidget):
         设置输出窗口的文本内容
         :param text: 要设置的文本
         """
-        self.outputText.setText(text)
+        self.clearText()
+        self.appendText(text)
+        self.flush()
+        
+    def getText(self, levels=None):
+        """
+        获取当前通道保存的全部日志文本，包括已转存到磁盘的部分
+        :param levels: 只包含这些级别，None表示全部
+        :return: 日志文本
+        """
+        self.flush()
+        return '\n'.join(self.formatRecord(record[1:]) for record in self.logStore.allRecords()
+                         if levels is None or record[2] in levels)
         
-    def getText(self):
+    def shutdown(self):
         """
-        获取输出窗口中的所有文本
-        :return: 输出窗口中的文本内容
+        删除日志的转存文件
         """
-        return self.outputText.toPlainText()
+        for store in self.stores.values():
+            store.close()
         
-    def appendInfo(self, text):
+    def appendInfo(self, text, channel=None):
         """
         追加信息级别的日志
         :param text: 日志文本
+        :param channel: 输出通道，None表示默认通道
         """
-        self.appendText(f"[INFO] {text}")
+        self.logSink.write(LogSink.INFO, text, channel)
         
-    def appendError(self, text):
+    def appendError(self, text, channel=None):
         """
         追加错误级别的日志
         :param text: 错误文本
+        :param channel: 输出通道，None表示默认通道
         """
-        self.appendText(f"[ERROR] {text}")
+        self.logSink.write(LogSink.ERROR, text, channel)
         
-    def appendDebug(self, text):
+    def appendDebug(self, text, channel=None):
         """
         追加调试级别的日志
         :param text: 调试文本
+        :param channel: 输出通道，None表示默认通道
         """
-        self.appendText(f"[DEBUG] {text}")
\ No newline at end of file
+        self.logSink.write(LogSink.DEBUG, text, channel)
\ No newline at end of file
@@ -0,0 +1,246 @@
+from PyQt5.QtCore import *
+from array import array
+from bisect import bisect_right
+import heapq
+import os
+import re
+import time
+
+from ExclusionMatcher import ExclusionMatcher
+
+class PathIndex:
+    """
+    工作区文件路径的紧凑索引：每个目录的相对路径只保存一次（前缀表），文件只保存名称和所属目录编号。
+    所有相对路径小写后以换行连接成一个字符串，模糊匹配用正则表达式直接在其上执行，
+    offsets记录每个路径在其中的起始位置（最后多一项表示结尾）。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.directories = []  # 目录编号 -> 相对路径（根目录为''）
+        self.names = []  # 文件编号 -> 文件名
+        self.directoryIds = array('I')  # 文件编号 -> 目录编号
+        self.haystack = ''
+        self.offsets = array('Q')
+        self.buildTime = 0
+
+    @classmethod
+    def build(cls, root, isCancelled=lambda: False):
+        """
+        遍历工作区建立索引，被排除的目录不进入
+        :param isCancelled: 返回True时停止遍历
+        :return: PathIndex，取消时返回None
+        """
+        index = cls(root)
+        parts = []
+        for dirPath, entries in ExclusionMatcher(root).walk():
+            if isCancelled():
+                return None
+            relative = os.path.relpath(dirPath, root)
+            relative = '' if relative == os.curdir else relative
+            prefix = (relative.replace(os.sep, '/') + '/').lower() if relative else ''
+            directoryId = None
+            for name, path, isDir in entries:
+                if isDir:
+                    continue
+                if directoryId is None:
+                    directoryId = len(index.directories)
+                    index.directories.append(relative)
+                index.names.append(name)
+                index.directoryIds.append(directoryId)
+                parts.append(prefix + name.lower())
+
+        offsets = index.offsets
+        position = 0
+        for part in parts:
+            offsets.append(position)
+            position += len(part) + 1
+        offsets.append(position)
+        index.haystack = '\n'.join(parts) + '\n'
+        index.buildTime = time.monotonic()
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def relativePath(self, i):
+        directory = self.directories[self.directoryIds[i]]
+        return os.path.join(directory, self.names[i]) if directory else self.names[i]
+
+    def path(self, i):
+        return os.path.join(self.root, self.relativePath(i))
+
+    def directory(self, i):
+        return self.directories[self.directoryIds[i]]
+
+    def name(self, i):
+        return self.names[i]
+
+    def lowerPath(self, i):
+        return self.haystack[self.offsets[i]:self.offsets[i + 1] - 1]
+
+class PathIndexSignals(QObject):
+    """
+    路径索引任务的信号集合
+    """
+    finished = pyqtSignal(object, object)  # 任务, PathIndex（取消时为None）
+
+class PathIndexTask(QRunnable):
+    """
+    在工作线程中遍历工作区建立路径索引
+    """
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        self.cancelled = False
+        self.signals = PathIndexSignals()
+
+    def run(self):
+        index = PathIndex.build(self.root, lambda: self.cancelled)
+        self.signals.finished.emit(self, index)
+
+class FuzzySearch:
+    """
+    文件路径的模糊搜索：查询字符依次出现在路径中即为匹配，文件名中匹配、连续匹配和最近打开的文件排在前面。
+    搜索可以分多次执行，每次不超过给定的时间；上一次的查询是本次查询的子序列时（如追加了字符），
+    只在上一次的匹配结果（以及上一次尚未检查的部分）中继续筛选。
+    """
+    MAX_RESULTS = 50
+    TOP_TIER = 5  # 文件名以查询开头
+    CHECK_INTERVAL = 256  # 每处理这么多路径检查一次时间
+
+    def __init__(self, index, query, recent=(), previous=None):
+        """
+        :param index: PathIndex
+        :param query: 查询文本，空白被忽略
+        :param recent: 最近打开文件的小写相对路径，越靠前越新
+        :param previous: 上一次的FuzzySearch
+        """
+        self.index = index
+        self.query = ''.join(query.lower().split()).replace('\\', '/')
+        # 每个字符之后跳到下一个查询字符的第一次出现，不需要回溯就能找到最靠前的匹配
+        self.regex = re.compile(''.join(re.escape(c) if i == 0 else f'[^\n{re.escape(c)}]*{re.escape(c)}'
+                                        for i, c in enumerate(self.query)))
+        self.recent = {path: len(recent) - rank for rank, path in enumerate(recent)}
+        self.matches = array('I')
+        self.heap = []  # (排序键, 文件编号)的小顶堆，保留得分最高的MAX_RESULTS个
+        self.changed = False
+        if (previous is not None and previous.index is index and previous.query
+                and self.isSubsequence(previous.query, self.query)):
+            # 上一次的查询是本次查询的子序列时，本次的匹配一定在上一次的匹配和上一次尚未检查的部分中
+            self.source, self.scanPosition = previous.remaining()
+        else:
+            self.source, self.scanPosition = array('I'), 0
+        # 先检查source中的文件，再从haystack的scanPosition继续扫描，scanPosition为None表示不需要扫描
+        self.position = 0  # source中的位置
+        self.done = not self.query
+
+    @staticmethod
+    def isSubsequence(short, text):
+        characters = iter(text)
+        return all(c in characters for c in short)
+
+    def remaining(self):
+        """
+        尚未检查的路径不展开为文件编号，由下一次搜索从haystack中的同一位置继续扫描
+        :return: (已经确认的匹配和source中尚未检查的文件编号, haystack中尚未扫描部分的开始位置或None)
+        """
+        if self.done:
+            return self.matches, None
+        return self.matches + self.source[self.position:], self.scanPosition
+
+    def step(self, budget):
+        """
+        继续搜索
+        :param budget: 最多使用的时间（秒）
+        :return: 是否已经搜索完成
+        """
+        if self.done:
+            return True
+        deadline = time.perf_counter() + budget
+        if self.position < len(self.source):
+            self.__scanSource(deadline)
+        if self.position >= len(self.source) and self.scanPosition is not None and time.perf_counter() <= deadline:
+            self.__scanAll(deadline)
+        self.done = self.position >= len(self.source) and self.scanPosition is None
+        return self.done
+
+    def __scanAll(self, deadline):
+        index = self.index
+        haystack, offsets, search = index.haystack, index.offsets, self.regex.search
+        position = self.scanPosition
+        count = 0
+        while True:
+            match = search(haystack, position)
+            if match is None:
+                position = None
+                break
+            i = bisect_right(offsets, match.start()) - 1
+            position = offsets[i + 1]
+            self.__accept(i)
+            count += 1
+            if count % self.CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                break
+        self.scanPosition = position
+
+    def __scanSource(self, deadline):
+        index = self.index
+        haystack, offsets, search = index.haystack, index.offsets, self.regex.search
+        source = self.source
+        position = self.position
+        end = len(source)
+        while position < end:
+            stop = min(position + self.CHECK_INTERVAL, end)
+            for i in source[position:stop]:
+                if search(haystack, offsets[i], offsets[i + 1] - 1) is not None:
+                    self.__accept(i)
+            position = stop
+            if time.perf_counter() > deadline:
+                break
+        self.position = position
+
+    def __accept(self, i):
+        self.matches.append(i)
+        heap = self.heap
+        if len(heap) >= self.MAX_RESULTS:
+            # 结果已满且最低分已在最高层级时，不短于它、也不是最近打开的路径不可能进入结果
+            (tier, recent, negativeLength), last = heap[0]
+            offsets = self.index.offsets
+            if (tier == self.TOP_TIER and offsets[i + 1] - offsets[i] - 1 >= -negativeLength
+                    and (not self.recent or self.index.lowerPath(i) not in self.recent)):
+                return
+        key = (self.__score(i), i)
+        if len(heap) < self.MAX_RESULTS:
+            heapq.heappush(heap, key)
+            self.changed = True
+        elif key > heap[0]:
+            heapq.heapreplace(heap, key)
+            self.changed = True
+
+    def __score(self, i):
+        path = self.index.lowerPath(i)
+        query = self.query
+        name = path[path.rfind('/') + 1:]
+        if name.startswith(query):
+            tier = self.TOP_TIER
+        elif query in name:
+            tier = 4
+        elif self.regex.search(name):
+            tier = 3
+        elif query in path:
+            tier = 2
+        else:
+            tier = 1
+        # 同一层级中最近打开的文件优先，其次是较短的路径
+        return tier, self.recent.get(path, 0), -len(path)
+
+    def takeChanged(self):
+        changed, self.changed = self.changed, False
+        return changed
+
+    def results(self):
+        """
+        :return: 得分从高到低的文件编号
+        """
+        return [i for key, i in sorted(self.heap, reverse=True)]
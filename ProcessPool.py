@@ -0,0 +1,45 @@
+from concurrent.futures import BrokenExecutor, CancelledError, ProcessPoolExecutor
+import multiprocessing
+
+class ProcessPool:
+    """
+    按需创建的进程池。工作进程异常退出（如内存不足被结束）后进程池不再可用，丢弃后在下次使用时重新创建
+    """
+    # 等待进程池任务的结果时可能出现的异常：被取消、进程池已经关闭、工作进程异常退出
+    ERRORS = (CancelledError, BrokenExecutor, RuntimeError)
+
+    def __init__(self, workers):
+        """
+        :param workers: 进程数
+        """
+        self.workers = workers
+        self.executor = None  # 尚未创建或已经丢弃时为None
+
+    def get(self):
+        """
+        :return: ProcessPoolExecutor，没有时创建
+        """
+        if self.executor is None:
+            # 使用spawn启动，不在已有Qt线程的进程中fork
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return self.executor
+
+    def discardBroken(self, task):
+        """
+        任务结束后调用，任务使用的进程池因工作进程异常退出而不再可用时丢弃
+        :param task: 具有pool（使用的ProcessPoolExecutor）和poolBroken属性的任务
+        :return: 是否丢弃了进程池
+        """
+        if task.poolBroken and task.pool is not None and task.pool is self.executor:
+            self.shutdown()
+            return True
+        return False
+
+    def shutdown(self):
+        """
+        结束进程池，不等待正在执行的任务
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
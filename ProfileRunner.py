@@ -0,0 +1,135 @@
+"""
+性能分析，在RunLauncher的子进程中使用：
+
+    python RunLauncher.py <metrics文件> --profile <结果文件> <script> [args...]
+
+支持ITIMER_PROF的平台上按CPU时间定时采样主线程的调用栈，统计每个函数的自身/累计样本数
+和每个文件中各行的样本数；否则回退到cProfile，只有函数级的统计。结果以JSON写入结果文件。
+
+各行的样本数只是近似值：信号处理函数只在解释器检查挂起事件的位置运行（循环的回跳、函数调用和
+函数入口），样本记在这些位置所在的行。循环体中不调用函数的代码的耗时会集中显示在循环的最后一行
+或循环头上，而不是实际耗时的语句上。用f_lasti换算也得到同一条回跳指令，无法在Python中得到更准确的位置。
+"""
+import json
+import os
+import runpy
+import signal
+import sys
+
+def normalizePath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+# 运行器自身和runpy的帧不计入结果
+IGNORED_FILES = {normalizePath(path) for path in (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'RunLauncher.py'), __file__, runpy.__file__)}
+
+class SamplingProfiler:
+    """
+    基于SIGPROF的采样分析器，信号在主线程的字节码之间处理，开销与采样间隔成正比。
+    函数级的统计是准确的，各行的样本数有偏差（见模块说明）
+    """
+
+    def __init__(self, interval=0.001):
+        """
+        :param interval: 采样间隔（秒，CPU时间）
+        """
+        self.interval = interval
+        self.samples = 0
+        self.selfCounts = {}  # (文件, 首行, 函数名) -> 样本数
+        self.totalCounts = {}
+        # (文件, 行号) -> 样本数：每个样本在每个文件中只计最内层的一帧，
+        # 调用其他文件的耗时记在调用所在的行，同一文件中外层的调用行不会全部显示为热点
+        self.lineCounts = {}
+
+    @staticmethod
+    def isSupported():
+        return hasattr(signal, 'setitimer') and hasattr(signal, 'SIGPROF')
+
+    def start(self):
+        signal.signal(signal.SIGPROF, self.onSample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_IGN)
+
+    def onSample(self, signum, frame):
+        self.samples += 1
+        selfCounts, totalCounts, lineCounts = self.selfCounts, self.totalCounts, self.lineCounts
+        functions = set()
+        files = set()
+        first = True
+        while frame is not None:
+            code = frame.f_code
+            function = (code.co_filename, code.co_firstlineno, code.co_name)
+            if first:
+                selfCounts[function] = selfCounts.get(function, 0) + 1
+                first = False
+            if function not in functions:
+                functions.add(function)
+                totalCounts[function] = totalCounts.get(function, 0) + 1
+            if code.co_filename not in files:
+                files.add(code.co_filename)
+                line = (code.co_filename, frame.f_lineno)
+                lineCounts[line] = lineCounts.get(line, 0) + 1
+            frame = frame.f_back
+
+    def result(self):
+        functions = [[filename, line, name, self.selfCounts.get((filename, line, name), 0), total, None]
+                     for (filename, line, name), total in self.totalCounts.items()]
+        files = {}
+        for (filename, line), count in self.lineCounts.items():
+            if line is not None:
+                files.setdefault(filename, []).append([line, count])
+        return {'mode': 'sampling', 'interval': self.interval, 'samples': self.samples,
+                'functions': functions, 'lines': files}
+
+class CProfileProfiler:
+    """
+    不支持定时采样时的回退实现
+    """
+
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def result(self):
+        import pstats
+        stats = pstats.Stats(self.profile).stats
+        functions = [[filename, line, name, tottime, cumtime, ncalls]
+                     for (filename, line, name), (primitive, ncalls, tottime, cumtime, callers) in stats.items()]
+        return {'mode': 'cprofile', 'samples': 0, 'functions': functions, 'lines': {}}
+
+def isIgnored(filename):
+    if filename.startswith('<'):
+        return filename == '<frozen runpy>'
+    return normalizePath(filename) in IGNORED_FILES
+
+def writeResult(path, result):
+    result['functions'] = [entry for entry in result['functions'] if not isIgnored(entry[0])]
+    result['lines'] = {filename: lines for filename, lines in result['lines'].items() if not isIgnored(filename)}
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+    except OSError as e:
+        print(f"Cannot write profile result: {e}", file=sys.stderr)
+
+def profile(run, resultPath):
+    """
+    在分析器下执行run，结束时（包括异常和sys.exit）写出结果
+    :param run: 无参数的可调用对象
+    :param resultPath: 结果文件路径
+    """
+    profiler = SamplingProfiler() if SamplingProfiler.isSupported() else CProfileProfiler()
+    profiler.start()
+    try:
+        run()
+    finally:
+        profiler.stop()
+        writeResult(resultPath, profiler.result())
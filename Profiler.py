@@ -0,0 +1,130 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+import os
+
+def normalizePath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+class ProfileResult(dict):
+    """
+    ProfileRunner写出的分析结果：
+    {'mode': 'sampling'|'cprofile', 'samples': 样本数,
+     'functions': [[文件, 首行, 函数名, 自身, 累计, 调用次数], ...],
+     'lines': {文件: [[行号, 样本数], ...]}}
+    采样模式下自身/累计为样本数，cProfile模式下为秒。
+    """
+
+    def __init__(self, data, filePath=None):
+        super().__init__(data)
+        self.filePath = filePath
+        self.lineIndex = {normalizePath(path): lines for path, lines in self.get('lines', {}).items()
+                          if not path.startswith('<')}
+
+    def isSampling(self):
+        return self.get('mode') == 'sampling'
+
+    def functions(self):
+        return self.get('functions') or []
+
+    def lineCounts(self, filePath):
+        """
+        获取文件中各行的样本数
+        :param filePath: 文件路径
+        :return: {行号(从0开始): 样本数}
+        """
+        if not filePath:
+            return {}
+        lines = self.lineIndex.get(normalizePath(filePath), [])
+        return {line - 1: count for line, count in lines if line > 0}
+
+class ProfileWindow(QDockWidget):
+    """
+    性能分析窗口，按自身耗时列出函数，双击跳转到函数定义
+    """
+    locationActivated = pyqtSignal(str, int)  # 文件路径, 行号(从1开始)
+
+    COLUMNS = ["Function", "Self", "Self %", "Total", "Total %", "Calls", "File", "Line"]
+    MAX_ROWS = 2000  # 只显示自身耗时最多的函数
+    # 采样只能在解释器的检查点取得位置，编辑器中的行热度只是近似值（见ProfileRunner）
+    LINE_HEAT_NOTE = ("Line heat is approximate: a sample is taken where the interpreter next checks for signals "
+                      "(the end of a loop iteration, a call or a function entry), so the time of a loop body "
+                      "shows on the loop's last line or header rather than on the statement that used it. "
+                      "Function times are not affected.")
+
+    def __init__(self, parent=None):
+        super().__init__("Profiler", parent)
+        self.__initUI()
+
+    def __initUI(self):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.summaryLabel = QLabel("No profile")
+        layout.addWidget(self.summaryLabel)
+
+        self.functionTable = QTableWidget(0, len(self.COLUMNS))
+        self.functionTable.setHorizontalHeaderLabels(self.COLUMNS)
+        self.functionTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.functionTable.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.functionTable.verticalHeader().setVisible(False)
+        self.functionTable.horizontalHeader().setStretchLastSection(False)
+        self.functionTable.itemDoubleClicked.connect(self.onItemDoubleClicked)
+        layout.addWidget(self.functionTable)
+
+        self.setWidget(widget)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
+
+    def setResult(self, result):
+        """
+        显示分析结果
+        :param result: ProfileResult
+        """
+        functions = sorted(result.functions(), key=lambda entry: entry[3], reverse=True)[:self.MAX_ROWS]
+        if result.isSampling():
+            unit = "samples"
+            total = result.get('samples') or 0
+            self.summaryLabel.setText(f"{os.path.basename(result.filePath or '')}: {total} samples "
+                                      f"({result.get('interval', 0) * 1000:g} ms CPU interval, line heat is approximate)")
+            self.summaryLabel.setToolTip(self.LINE_HEAT_NOTE)
+        else:
+            unit = "s"
+            total = sum(entry[3] for entry in result.functions())
+            self.summaryLabel.setText(f"{os.path.basename(result.filePath or '')}: {total:.3f} s (cProfile)")
+            self.summaryLabel.setToolTip("")
+        self.functionTable.setHorizontalHeaderLabels(
+            ["Function", f"Self ({unit})", "Self %", f"Total ({unit})", "Total %", "Calls", "File", "Line"])
+
+        # 填充期间关闭排序，避免每插入一项都重新排序
+        self.functionTable.setSortingEnabled(False)
+        self.functionTable.setRowCount(len(functions))
+        for row, (filePath, line, name, selfValue, totalValue, calls) in enumerate(functions):
+            if not result.isSampling():
+                selfValue, totalValue = round(selfValue, 4), round(totalValue, 4)
+            values = [name, selfValue, self.__percent(selfValue, total), totalValue,
+                      self.__percent(totalValue, total), calls if calls is not None else "",
+                      os.path.basename(filePath), line]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                if column == 0:
+                    item.setData(Qt.UserRole, (filePath, line))
+                elif column == 6:
+                    item.setToolTip(filePath)
+                self.functionTable.setItem(row, column, item)
+        self.functionTable.setSortingEnabled(True)
+        self.functionTable.sortItems(1, Qt.DescendingOrder)
+        self.functionTable.resizeColumnsToContents()
+
+    @staticmethod
+    def __percent(value, total):
+        return round(value * 100.0 / total, 1) if total else 0.0
+
+    def clearResult(self):
+        self.functionTable.setRowCount(0)
+        self.summaryLabel.setText("No profile")
+        self.summaryLabel.setToolTip("")
+
+    def onItemDoubleClicked(self, item):
+        filePath, line = self.functionTable.item(item.row(), 0).data(Qt.UserRole)
+        if not filePath.startswith('<') and os.path.isfile(filePath):
+            self.locationActivated.emit(filePath, line)
@@ -0,0 +1,24 @@
+"""
+伪终端子进程入口，由PtyProcess在新会话中启动：
+
+    python PtyLauncher.py <program> [args...]
+
+把标准输入所在的伪终端设为控制终端后exec目标程序。这一步不能放在preexec_fn中：
+IDE进程中已有其他线程，fork出的子进程在exec之前运行Python代码可能死锁。
+"""
+import fcntl
+import os
+import sys
+import termios
+
+def main():
+    # 新会话中把伪终端设为控制终端，shell的作业控制和Ctrl+C才能正常工作
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+    try:
+        os.execvp(sys.argv[1], sys.argv[1:])
+    except OSError as e:
+        print(f"Cannot start {sys.argv[1]}: {e}", file=sys.stderr)
+        os._exit(127)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+from PyQt5.QtCore import *
+import errno
+import os
+import signal
+import struct
+import shutil
+import subprocess
+import sys
+
+try:
+    import fcntl
+    import pty
+    import termios
+except ImportError:  # Windows
+    pty = None
+
+class PtyProcess(QObject):
+    """
+    在伪终端中运行的子进程，主端在GUI线程中通过QSocketNotifier非阻塞读写
+    """
+    dataReceived = pyqtSignal(bytes)  # 子进程输出
+    finished = pyqtSignal(int)  # 退出码
+
+    READ_LIMIT = 64 * 1024  # 每次事件最多读取的字节数，解析时间控制在一帧左右，持续输出时界面不会失去响应
+    REAP_INTERVAL = 500  # 毫秒
+    LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PtyLauncher.py')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.masterFd = -1
+        self.readNotifier = None
+        self.writeNotifier = None
+        self.writeBuffer = b''
+        self.reapTimer = QTimer(self)
+        self.reapTimer.setInterval(self.REAP_INTERVAL)
+        self.reapTimer.timeout.connect(self.__reap)
+
+    @staticmethod
+    def isSupported():
+        return pty is not None
+
+    def start(self, program, arguments=None, workingDirectory=None, rows=24, columns=80, environment=None):
+        """
+        启动子进程
+        :param program: 程序路径
+        :param arguments: 参数列表
+        :param workingDirectory: 工作目录
+        :param rows: 终端行数
+        :param columns: 终端列数
+        :param environment: 额外的环境变量
+        """
+        masterFd, slaveFd = pty.openpty()
+        self.__setWindowSize(slaveFd, rows, columns)
+
+        env = dict(os.environ)
+        env['TERM'] = 'xterm-256color'
+        env.update(environment or {})
+
+        # 程序不存在时与直接启动一样抛出异常，而不是在终端中显示启动器的错误
+        if shutil.which(program, path=env.get('PATH')) is None:
+            os.close(masterFd)
+            os.close(slaveFd)
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", program)
+
+        try:
+            # 控制终端由启动器在exec之前设置，fork出的子进程中不运行Python代码
+            self.process = subprocess.Popen(
+                [sys.executable, '-I', '-S', self.LAUNCHER, program] + list(arguments or []),
+                stdin=slaveFd, stdout=slaveFd, stderr=slaveFd,
+                cwd=workingDirectory or None, env=env,
+                start_new_session=True, close_fds=True)
+        except Exception:
+            os.close(masterFd)
+            raise
+        finally:
+            os.close(slaveFd)
+
+        os.set_blocking(masterFd, False)
+        self.masterFd = masterFd
+        self.readNotifier = QSocketNotifier(masterFd, QSocketNotifier.Read, self)
+        self.readNotifier.activated.connect(self.onReadable)
+        self.writeNotifier = QSocketNotifier(masterFd, QSocketNotifier.Write, self)
+        self.writeNotifier.setEnabled(False)
+        self.writeNotifier.activated.connect(self.onWritable)
+        # 后台作业可能一直持有从端，不能只依赖EIO判断子进程结束
+        self.reapTimer.start()
+
+    def isRunning(self):
+        return self.process is not None and self.process.poll() is None
+
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def write(self, data):
+        """
+        写入子进程的输入，伪终端缓冲区已满时保存剩余部分，可写时继续
+        :param data: 字节
+        """
+        if self.masterFd < 0:
+            return
+        self.writeBuffer += data
+        self.onWritable()
+
+    def onWritable(self):
+        while self.writeBuffer:
+            try:
+                written = os.write(self.masterFd, self.writeBuffer)
+            except BlockingIOError:
+                break
+            except OSError:
+                self.writeBuffer = b''
+                break
+            self.writeBuffer = self.writeBuffer[written:]
+        self.writeNotifier.setEnabled(bool(self.writeBuffer))
+
+    def onReadable(self):
+        chunks = []
+        size = 0
+        closed = False
+        while size < self.READ_LIMIT:
+            try:
+                data = os.read(self.masterFd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # Linux上从端全部关闭后读取主端返回EIO
+                if e.errno != errno.EIO:
+                    raise
+                closed = True
+                break
+            if not data:
+                closed = True
+                break
+            chunks.append(data)
+            size += len(data)
+
+        if chunks:
+            self.dataReceived.emit(b''.join(chunks))
+        if closed:
+            self.__close()
+
+    def resize(self, rows, columns):
+        """
+        设置终端大小，子进程会收到SIGWINCH
+        """
+        if self.masterFd >= 0:
+            self.__setWindowSize(self.masterFd, rows, columns)
+
+    @staticmethod
+    def __setWindowSize(fd, rows, columns):
+        fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, columns, 0, 0))
+
+    def terminate(self):
+        """
+        向整个进程组发送SIGHUP，与关闭终端窗口的效果一致
+        """
+        self.__signal(signal.SIGHUP)
+
+    def kill(self):
+        self.__signal(signal.SIGKILL)
+
+    def waitForFinished(self, msecs=3000):
+        if self.process is None:
+            return True
+        try:
+            self.process.wait(msecs / 1000)
+        except subprocess.TimeoutExpired:
+            return False
+        self.__reap()
+        return True
+
+    def __signal(self, signum):
+        if not self.isRunning():
+            return
+        try:
+            os.killpg(self.process.pid, signum)
+        except OSError:
+            pass
+
+    def __close(self):
+        if self.masterFd < 0:
+            return
+        self.readNotifier.setEnabled(False)
+        self.writeNotifier.setEnabled(False)
+        self.readNotifier.deleteLater()
+        self.writeNotifier.deleteLater()
+        os.close(self.masterFd)
+        self.masterFd = -1
+
+    def __reap(self):
+        if self.process is None or self.process.poll() is None:
+            return
+        self.reapTimer.stop()
+        if self.masterFd >= 0:
+            # 读出子进程退出前的剩余输出
+            self.onReadable()
+        self.__close()
+        exitCode = self.process.returncode
+        self.process = None
+        self.finished.emit(exitCode)
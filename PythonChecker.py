@@ -0,0 +1,332 @@
+"""
+Python代码诊断：语法错误、未定义的名称和未使用的导入。
+
+安装了pyflakes时使用它的检查结果（包含更多类型的问题），否则使用内置的简化检查：
+按作用域收集绑定的名称，不考虑语句顺序，因此只报告在任何位置都没有定义的名称。
+本模块只依赖标准库，在进程池中执行。
+"""
+import ast
+import builtins
+import os
+import re
+
+ERROR = 'error'
+WARNING = 'warning'
+MAX_DIAGNOSTICS = 1000  # 每个文件最多报告的问题数
+
+MODULE_NAMES = frozenset(('__file__', '__name__', '__doc__', '__package__', '__spec__', '__loader__',
+                          '__path__', '__builtins__', '__annotations__', '__dict__', '__cached__', '__class__'))
+CLASS_NAMES = frozenset(('__qualname__', '__module__'))
+IDENTIFIER = re.compile(r'\w+')
+
+try:
+    from pyflakes import checker as pyflakesChecker
+    from pyflakes import messages as pyflakesMessages
+    PYFLAKES_ERRORS = (pyflakesMessages.UndefinedName, pyflakesMessages.UndefinedExport, pyflakesMessages.UndefinedLocal)
+except ImportError:
+    pyflakesChecker = None
+
+def charColumn(lines, line, offset):
+    """
+    把ast的UTF-8字节偏移转换为字符列号
+    :param lines: 按行切分的源代码字节
+    """
+    if 0 < line <= len(lines):
+        text = lines[line - 1]
+        if not text.isascii():
+            return len(text[:offset].decode('utf-8', 'replace'))
+    return offset
+
+def identifierEnd(lines, line, column):
+    """
+    :return: 从列号开始的标识符的结束列号（字符），没有标识符时为列号加一
+    """
+    if 0 < line <= len(lines):
+        match = IDENTIFIER.match(lines[line - 1].decode('utf-8', 'replace'), column)
+        if match is not None and match.end() > column:
+            return match.end()
+    return column + 1
+
+class Scope:
+    """
+    一个作用域中绑定和使用的名称
+    """
+
+    def __init__(self, kind, parent):
+        """
+        :param kind: 'module', 'class', 'function'或'comprehension'
+        """
+        self.kind = kind
+        self.parent = parent
+        self.bindings = set(CLASS_NAMES) if kind == 'class' else set()
+        self.globals = set()
+        self.loads = []  # (名称, 节点)
+        self.imports = []  # (本地名称, 显示的名称, 节点)
+        self.starImport = False
+
+class NameChecker(ast.NodeVisitor):
+    """
+    不依赖pyflakes的未定义名称和未使用导入检查
+    """
+
+    def __init__(self, isPackage=False):
+        """
+        :param isPackage: 是否为__init__.py，其中模块级的导入视为导出，不报告未使用
+        """
+        self.isPackage = isPackage
+        self.module = Scope('module', None)
+        self.scope = self.module
+        self.scopes = [self.module]
+        self.usedNames = set()
+        self.exported = set()  # __all__中的名称
+
+    def __push(self, kind):
+        self.scope = Scope(kind, self.scope)
+        self.scopes.append(self.scope)
+
+    def __pop(self):
+        self.scope = self.scope.parent
+
+    def __bind(self, name):
+        self.scope.bindings.add(name)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.scope.loads.append((node.id, node))
+            self.usedNames.add(node.id)
+        else:
+            self.__bind(node.id)
+
+    def __visitArguments(self, arguments):
+        # 默认值和注解在定义所在的作用域中求值
+        for default in arguments.defaults + [d for d in arguments.kw_defaults if d is not None]:
+            self.visit(default)
+        for argument in self.__argumentList(arguments):
+            if argument.annotation is not None:
+                self.__visitAnnotation(argument.annotation)
+
+    def __visitAnnotation(self, annotation):
+        self.visit(annotation)
+        # 字符串形式的注解中使用的名称也算作使用，但可能是前向引用，不检查是否定义
+        for node in ast.walk(annotation):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                try:
+                    expression = ast.parse(node.value, mode='eval')
+                except (SyntaxError, ValueError):
+                    continue
+                self.usedNames.update(name.id for name in ast.walk(expression) if isinstance(name, ast.Name))
+
+    @staticmethod
+    def __argumentList(arguments):
+        result = arguments.posonlyargs + arguments.args + arguments.kwonlyargs
+        return result + [argument for argument in (arguments.vararg, arguments.kwarg) if argument is not None]
+
+    def visit_FunctionDef(self, node):
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.__visitArguments(node.args)
+        if node.returns is not None:
+            self.__visitAnnotation(node.returns)
+        self.__bind(node.name)
+        self.__push('function')
+        for argument in self.__argumentList(node.args):
+            self.__bind(argument.arg)
+        for statement in node.body:
+            self.visit(statement)
+        self.__pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self.__visitArguments(node.args)
+        self.__push('function')
+        for argument in self.__argumentList(node.args):
+            self.__bind(argument.arg)
+        self.visit(node.body)
+        self.__pop()
+
+    def visit_ClassDef(self, node):
+        for expression in node.decorator_list + node.bases + [keyword.value for keyword in node.keywords]:
+            self.visit(expression)
+        self.__bind(node.name)
+        self.__push('class')
+        for statement in node.body:
+            self.visit(statement)
+        self.__pop()
+
+    def __visitComprehension(self, node, elements):
+        # 第一个迭代对象在外层作用域中求值
+        self.visit(node.generators[0].iter)
+        self.__push('comprehension')
+        for i, generator in enumerate(node.generators):
+            self.visit(generator.target)
+            if i > 0:
+                self.visit(generator.iter)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for element in elements:
+            self.visit(element)
+        self.__pop()
+
+    def visit_ListComp(self, node):
+        self.__visitComprehension(node, [node.elt])
+
+    visit_SetComp = visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self.__visitComprehension(node, [node.key, node.value])
+
+    def visit_NamedExpr(self, node):
+        self.visit(node.value)
+        # 推导式中的赋值表达式绑定在外层作用域
+        scope = self.scope
+        while scope.kind == 'comprehension':
+            scope = scope.parent
+        scope.bindings.add(node.target.id)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split('.')[0]
+            self.__bind(name)
+            display = f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+            self.scope.imports.append((name, display, alias))
+
+    def visit_ImportFrom(self, node):
+        if node.module == '__future__':
+            return
+        module = '.' * node.level + (node.module or '')
+        for alias in node.names:
+            if alias.name == '*':
+                self.scope.starImport = True
+                continue
+            name = alias.asname or alias.name
+            self.__bind(name)
+            display = f"{module}.{alias.name}" + (f" as {alias.asname}" if alias.asname else '')
+            self.scope.imports.append((name, display, alias))
+
+    def visit_Global(self, node):
+        self.scope.globals.update(node.names)
+        self.module.bindings.update(node.names)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.__bind(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.__bind(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.__bind(node.name)
+
+    def visit_MatchMapping(self, node):
+        if node.rest:
+            self.__bind(node.rest)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self.__visitAnnotation(node.annotation)
+        self.visit(node.target)
+        if node.value is not None:
+            self.visit(node.value)
+
+    def visit_Assign(self, node):
+        if self.scope is self.module:
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id == '__all__' and isinstance(node.value, (ast.List, ast.Tuple)):
+                    self.exported.update(element.value for element in node.value.elts
+                                         if isinstance(element, ast.Constant) and isinstance(element.value, str))
+        self.generic_visit(node)
+
+    def __isDefined(self, name, scope):
+        if name in scope.bindings:
+            return True
+        if name in scope.globals:
+            scope = self.module
+        else:
+            # 类作用域中的名称对其中的函数和推导式不可见
+            scope = scope.parent
+            while scope is not None and scope.kind == 'class':
+                scope = scope.parent
+        while scope is not None:
+            if name in scope.bindings:
+                return True
+            scope = scope.parent
+            while scope is not None and scope.kind == 'class':
+                scope = scope.parent
+        return False
+
+    def check(self, tree):
+        """
+        :return: [(节点, 级别, 消息)]
+        """
+        self.visit(tree)
+        known = set(dir(builtins)) | MODULE_NAMES
+        problems = []
+        # 有星号导入时无法确定模块中定义了哪些名称
+        if not any(scope.starImport for scope in self.scopes):
+            for scope in self.scopes:
+                for name, node in scope.loads:
+                    if name not in known and not self.__isDefined(name, scope):
+                        problems.append((node, ERROR, f"undefined name '{name}'"))
+        for scope in self.scopes:
+            if scope is self.module and self.isPackage:
+                continue
+            for name, display, alias in scope.imports:
+                if name not in self.usedNames and name not in self.exported:
+                    problems.append((alias, WARNING, f"'{display}' imported but unused"))
+        return problems
+
+def syntaxDiagnostic(error, lines):
+    line = error.lineno or 1
+    # SyntaxError的offset从1开始，按字符计算
+    column = max((error.offset or 1) - 1, 0)
+    message = error.msg if isinstance(error, SyntaxError) else str(error)
+    return line, column, column + 1, ERROR, f"syntax error: {message}"
+
+def isPackageFile(filename):
+    """
+    :return: 是否为包的__init__.py，检查结果与同样内容的普通模块不同
+    """
+    return os.path.basename(filename.replace('\\', '/')) == '__init__.py'
+
+def check(data, filename='<buffer>'):
+    """
+    检查Python代码
+    :param data: 源代码字节
+    :param filename: 文件名，用于判断是否为__init__.py
+    :return: [(行号, 列号, 结束列号, 级别, 消息)]，按位置排序，行号从1开始，列号按字符计算
+    """
+    lines = data.splitlines()
+    try:
+        source = data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        return [(data.count(b'\n', 0, e.start) + 1, 0, 1, ERROR, "file is not valid UTF-8")]
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError as e:
+        return [syntaxDiagnostic(e, lines)]
+    except ValueError as e:
+        return [(1, 0, 1, ERROR, str(e))]
+
+    diagnostics = []
+    if pyflakesChecker is not None:
+        for message in pyflakesChecker.Checker(tree, filename=filename).messages:
+            column = charColumn(lines, message.lineno, message.col)
+            severity = ERROR if isinstance(message, PYFLAKES_ERRORS) else WARNING
+            diagnostics.append((message.lineno, column, identifierEnd(lines, message.lineno, column), severity,
+                                message.message % message.message_args))
+    else:
+        for node, severity, message in NameChecker(isPackageFile(filename)).check(tree):
+            line = node.lineno
+            column = charColumn(lines, line, node.col_offset)
+            if getattr(node, 'end_lineno', None) == line:
+                end = charColumn(lines, line, node.end_col_offset)
+            else:
+                end = identifierEnd(lines, line, column)
+            diagnostics.append((line, column, max(end, column + 1), severity, message))
+    diagnostics.sort()
+    return diagnostics[:MAX_DIAGNOSTICS]
@@ -0,0 +1,286 @@
+from PyQt5.Qsci import QsciScintilla, QsciLexerCustom
+from PyQt5.QtGui import *
+from PyQt5.QtCore import *
+import builtins
+import keyword
+import re
+
+from ScintillaText import rangeBytes
+
+class PythonLexer(QsciLexerCustom):
+    """
+    增量Python词法分析器
+
+    每行结束时的词法状态保存在Scintilla的行状态中。编辑后只从第一个脏行开始重新分析，
+    当某一行的结束状态与修改前一致且已越过修改区域时，后面的样式仍然有效，直接跳过。
+    """
+
+    # 样式
+    Default = 0
+    Comment = 1
+    Number = 2
+    String = 3
+    TripleString = 4
+    Keyword = 5
+    Builtin = 6
+    ClassName = 7
+    FunctionName = 8
+    Decorator = 9
+    Operator = 10
+
+    # 行结束时的词法状态
+    StateDefault = 0
+    StateTripleSingle = 1  # 位于 ''' 字符串中
+    StateTripleDouble = 2  # 位于 """ 字符串中
+    StateSingleContinued = 3  # 以反斜杠续行的 ' 字符串
+    StateDoubleContinued = 4  # 以反斜杠续行的 " 字符串
+
+    # 单次styleText最多分析的行数，剩余部分留到下一帧
+    MAX_LINES_PER_PASS = 2000
+
+    KEYWORDS = frozenset(word.encode() for word in keyword.kwlist + ['match', 'case', '_'])
+    BUILTINS = frozenset(name.encode() for name in dir(builtins) if not name.startswith('_'))
+
+    TOKEN_PATTERN = re.compile(
+        rb"(?P<comment>#[^\r\n]*)"
+        rb"|(?P<string>[rRbBuUfF]{0,2}(?:'''|\"\"\"|'|\"))"
+        rb"|(?P<decorator>@[A-Za-z_\x80-\xff][\w.\x80-\xff]*)"
+        rb"|(?P<number>(?:0[xXoObB][0-9a-fA-F_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?[jJ]?))"
+        rb"|(?P<name>[A-Za-z_\x80-\xff][\w\x80-\xff]*)"
+        rb"|(?P<operator>[-+*/%=<>!&|^~:.,;()\[\]{}@])"
+    )
+
+    # 各种字符串的结束位置
+    STRING_END = {
+        StateTripleSingle: re.compile(rb"(?:[^'\\]|\\.|'(?!''))*'''", re.S),
+        StateTripleDouble: re.compile(rb'(?:[^"\\]|\\.|"(?!""))*"""', re.S),
+        StateSingleContinued: re.compile(rb"(?:[^'\\\r\n]|\\.)*'", re.S),
+        StateDoubleContinued: re.compile(rb'(?:[^"\\\r\n]|\\.)*"', re.S),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 受修改影响的最后一行，None表示没有未处理的修改
+        self.dirtyTo = None
+        # 该行之前的样式与行状态都有效
+        self.validTo = 0
+        self.continuePending = False
+        self.__initStyles()
+
+    def __initStyles(self):
+        self.setDefaultFont(QFont("Consolas", 10))
+        self.setDefaultColor(QColor("#000000"))
+        self.setDefaultPaper(QColor("#ffffff"))
+        self.setColor(QColor("#008000"), self.Comment)
+        self.setColor(QColor("#098658"), self.Number)
+        self.setColor(QColor("#a31515"), self.String)
+        self.setColor(QColor("#a31515"), self.TripleString)
+        self.setColor(QColor("#0000ff"), self.Keyword)
+        self.setColor(QColor("#795e26"), self.Builtin)
+        self.setColor(QColor("#267f99"), self.ClassName)
+        self.setColor(QColor("#795e26"), self.FunctionName)
+        self.setColor(QColor("#af00db"), self.Decorator)
+        self.setColor(QColor("#000000"), self.Operator)
+
+    def language(self):
+        return "Python"
+
+    def autoCompletionWordSeparators(self):
+        # 自动完成按"."划分上下文，如"os.path."只匹配os.path的成员
+        return ['.']
+
+    def description(self, style):
+        return {
+            self.Default: "Default",
+            self.Comment: "Comment",
+            self.Number: "Number",
+            self.String: "String",
+            self.TripleString: "Triple quoted string",
+            self.Keyword: "Keyword",
+            self.Builtin: "Builtin",
+            self.ClassName: "Class name",
+            self.FunctionName: "Function name",
+            self.Decorator: "Decorator",
+            self.Operator: "Operator",
+        }.get(style, "")
+
+    def setEditor(self, editor):
+        super().setEditor(editor)
+        if editor:
+            editor.SCN_MODIFIED.connect(self.onModified)
+
+    def onModified(self, position, modificationType, text, length, linesAdded, *args):
+        """
+        记录修改区域，并让有效区域和脏区域随行的插入删除而移动
+        """
+        if not modificationType & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+
+        line = self.editor().SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        if linesAdded < 0:
+            # 合并后的行尾来自被删除的行，旧的行状态已不可比较
+            self.editor().SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, 0)
+        if self.validTo > line:
+            self.validTo = max(line + 1, self.validTo + linesAdded)
+        if self.dirtyTo is not None and self.dirtyTo > line:
+            self.dirtyTo = max(line, self.dirtyTo + linesAdded)
+        self.dirtyTo = max(self.dirtyTo if self.dirtyTo is not None else line, line + max(linesAdded, 0))
+
+    def styleText(self, start, end):
+        editor = self.editor()
+        if editor is None:
+            return
+
+        firstLine = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        lastLine = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, max(start, end - 1))
+        lineCount = editor.SendScintilla(QsciScintilla.SCI_GETLINECOUNT)
+
+        state = self.__lineState(firstLine - 1)
+        converged = False
+        budget = self.MAX_LINES_PER_PASS
+        line = firstLine
+        lineStart = self.__lineStart(line, lineCount)
+        self.startStyling(lineStart)
+
+        while line <= lastLine and budget > 0:
+            lineEnd = self.__lineStart(line + 1, lineCount)
+            oldState = self.__lineState(line)
+            state = self.__styleLine(self.__rangeBytes(lineStart, lineEnd - lineStart), state)
+            editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, state + 1)
+            budget -= 1
+            line += 1
+            lineStart = lineEnd
+
+            # 越过修改区域后，行结束状态与之前一致，说明后续已有样式仍然正确，直接跳到有效区域末尾
+            if self.dirtyTo is not None and line > self.dirtyTo:
+                self.dirtyTo = None
+                if oldState == state and line < self.validTo:
+                    converged = True
+                    line = self.validTo
+                    lineStart = self.__lineStart(line, lineCount)
+                    state = self.__lineState(line - 1)
+                    self.startStyling(lineStart)
+
+        self.validTo = max(self.validTo, line) if converged else line
+
+        # 超出本次预算的部分在下一帧继续
+        if line <= lastLine and not self.continuePending:
+            self.continuePending = True
+            QTimer.singleShot(16, self.__continueStyling)
+
+    def __lineStart(self, line, lineCount):
+        """
+        获取行的起始位置，超出最后一行时返回文档长度
+        """
+        if line >= lineCount:
+            return self.editor().SendScintilla(QsciScintilla.SCI_GETLENGTH)
+        return self.editor().SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+
+    def __continueStyling(self):
+        self.continuePending = False
+        editor = self.editor()
+        if editor is not None:
+            editor.viewport().update()
+
+    def __lineState(self, line):
+        """
+        获取行结束时的词法状态（存储值为状态+1，0表示尚未分析）
+        """
+        if line < 0:
+            return self.StateDefault
+        return self.editor().SendScintilla(QsciScintilla.SCI_GETLINESTATE, line) - 1
+
+    def __rangeBytes(self, position, length):
+        """
+        从Scintilla缓冲区读取一段字节
+        """
+        return rangeBytes(self.editor(), position, length)
+
+    def __styleLine(self, data, state):
+        """
+        分析一行并设置样式
+        :param data: 行内容（UTF-8字节，含换行符）
+        :param state: 上一行结束时的状态
+        :return: 本行结束时的状态
+        """
+        if state < 0:
+            state = self.StateDefault
+        pos = 0
+        length = len(data)
+
+        # 先处理从上一行延续下来的字符串
+        if state != self.StateDefault:
+            match = self.STRING_END[state].match(data)
+            style = self.TripleString if state in (self.StateTripleSingle, self.StateTripleDouble) else self.String
+            if not match:
+                self.setStyling(length, style)
+                return self.__continuedState(state, data)
+            pos = match.end()
+            self.setStyling(pos, style)
+            state = self.StateDefault
+
+        previousName = None
+        while pos < length:
+            match = self.TOKEN_PATTERN.search(data, pos)
+            if not match:
+                self.setStyling(length - pos, self.Default)
+                break
+
+            if match.start() > pos:
+                self.setStyling(match.start() - pos, self.Default)
+
+            kind = match.lastgroup
+            token = match.group()
+            pos = match.end()
+
+            if kind == 'string':
+                quote = token.lstrip(b'rRbBuUfF')
+                stringState = {
+                    b"'''": self.StateTripleSingle,
+                    b'"""': self.StateTripleDouble,
+                    b"'": self.StateSingleContinued,
+                    b'"': self.StateDoubleContinued,
+                }[quote]
+                style = self.TripleString if len(quote) == 3 else self.String
+                end = self.STRING_END[stringState].match(data, pos)
+                if not end:
+                    self.setStyling(length - match.start(), style)
+                    return self.__continuedState(stringState, data)
+                self.setStyling(end.end() - match.start(), style)
+                pos = end.end()
+                previousName = None
+                continue
+
+            style = self.Default
+            if kind == 'comment':
+                style = self.Comment
+            elif kind == 'number':
+                style = self.Number
+            elif kind == 'decorator':
+                style = self.Decorator
+            elif kind == 'operator':
+                style = self.Operator
+            elif kind == 'name':
+                if previousName == b'class':
+                    style = self.ClassName
+                elif previousName == b'def':
+                    style = self.FunctionName
+                elif token in self.KEYWORDS:
+                    style = self.Keyword
+                elif token in self.BUILTINS:
+                    style = self.Builtin
+            previousName = token if kind == 'name' else None
+            self.setStyling(len(token), style)
+
+        return state
+
+    def __continuedState(self, state, data):
+        """
+        字符串未在本行结束时，计算下一行的起始状态
+        """
+        if state in (self.StateTripleSingle, self.StateTripleDouble):
+            return state
+        # 普通字符串只有以反斜杠结尾时才延续到下一行
+        if data.rstrip(b'\r\n').endswith(b'\\'):
+            return state
+        return self.StateDefault
@@ -0,0 +1,212 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from collections import OrderedDict
+import os
+import re
+import time
+
+from PathIndex import FuzzySearch, PathIndexTask
+
+class QuickOpen(QFrame):
+    """
+    快速打开文件（Ctrl+P）：在后台建立的路径索引上做模糊搜索，每次按键只搜索一小段时间，
+    剩余部分在之后的事件循环中继续，结果逐步更新。查询末尾的":行号"用于打开后跳转。
+    """
+    fileSelected = pyqtSignal(str, int)  # 文件路径, 行号（从1开始，0表示不跳转）
+
+    STEP_BUDGET = 0.008  # 秒，每次搜索的时间，保证按键后在一帧内显示结果
+    REFRESH_INTERVAL = 30  # 秒，打开时索引早于该时间则在后台重建
+    MAX_RECENT = 50
+    VISIBLE_RESULTS = 20
+    LINE_SUFFIX = re.compile(r':(\d+)$')
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Popup)
+        self.threadPool = QThreadPool(self)
+        self.threadPool.setMaxThreadCount(1)
+        self.root = None
+        self.index = None
+        self.indexTask = None
+        self.recent = OrderedDict()  # 最近打开的文件路径，最新的在最后
+        self.fuzzySearch = None
+        self.__initUI()
+
+    def __initUI(self):
+        self.setFrameShape(QFrame.StyledPanel)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(2)
+        self.queryEdit = QLineEdit()
+        self.queryEdit.setPlaceholderText("Search files by name (append :line to go to a line)")
+        self.queryEdit.textChanged.connect(self.onQueryChanged)
+        self.queryEdit.installEventFilter(self)
+        layout.addWidget(self.queryEdit)
+        self.resultList = QListWidget()
+        self.resultList.setUniformItemSizes(True)
+        self.resultList.itemActivated.connect(self.onItemActivated)
+        layout.addWidget(self.resultList)
+        self.statusLabel = QLabel()
+        layout.addWidget(self.statusLabel)
+
+        # 按键处理之后继续未完成的搜索
+        self.stepTimer = QTimer(self)
+        self.stepTimer.setSingleShot(True)
+        self.stepTimer.setInterval(0)
+        self.stepTimer.timeout.connect(self.continueSearch)
+
+    def setRoot(self, root):
+        """
+        切换工作区并在后台建立路径索引
+        :param root: 工作区根目录
+        """
+        self.root = os.path.abspath(root)
+        self.index = None
+        self.fuzzySearch = None
+        self.rebuildIndex()
+
+    def rebuildIndex(self):
+        if self.root is None:
+            return
+        if self.indexTask is not None:
+            if self.indexTask.root == self.root:
+                return
+            self.indexTask.cancelled = True
+        task = PathIndexTask(self.root)
+        task.signals.finished.connect(self.onIndexFinished)
+        self.indexTask = task
+        self.threadPool.start(task)
+
+    def onIndexFinished(self, task, index):
+        if task is not self.indexTask:
+            return
+        self.indexTask = None
+        if index is None:
+            return
+        self.index = index
+        self.fuzzySearch = None
+        if self.isVisible():
+            self.onQueryChanged(self.queryEdit.text())
+
+    def noteOpened(self, filePath):
+        """
+        记录打开的文件，快速打开中优先显示
+        """
+        filePath = os.path.abspath(filePath)
+        self.recent.pop(filePath, None)
+        self.recent[filePath] = True
+        while len(self.recent) > self.MAX_RECENT:
+            self.recent.popitem(last=False)
+
+    def popup(self, anchor):
+        """
+        在窗口顶部居中显示
+        :param anchor: 所在的窗口
+        """
+        width = min(600, anchor.width() - 40)
+        self.resize(width, 360)
+        topLeft = anchor.mapToGlobal(QPoint((anchor.width() - width) // 2, 40))
+        self.move(topLeft)
+        self.queryEdit.clear()
+        self.onQueryChanged('')
+        self.show()
+        self.queryEdit.setFocus()
+        if self.index is None or time.monotonic() - self.index.buildTime > self.REFRESH_INTERVAL:
+            self.rebuildIndex()
+
+    def __recentRelative(self):
+        """
+        :return: 工作区中最近打开文件的小写相对路径，最新的在前
+        """
+        paths = []
+        for filePath in reversed(self.recent):
+            try:
+                relative = os.path.relpath(filePath, self.root) if self.root else filePath
+            except ValueError:
+                # Windows上与工作区不在同一个驱动器的文件
+                relative = filePath
+            if not relative.startswith(os.pardir):
+                paths.append(relative.replace(os.sep, '/').lower())
+        return paths
+
+    def onQueryChanged(self, text):
+        query = self.LINE_SUFFIX.sub('', text)
+        self.stepTimer.stop()
+        if not query.strip():
+            self.fuzzySearch = None
+            self.__showRecent()
+            return
+        if self.index is None:
+            self.resultList.clear()
+            self.statusLabel.setText("Indexing files..." if self.indexTask is not None else "Open a folder to search files")
+            return
+        previous = self.fuzzySearch
+        if previous is not None and previous.query == ''.join(query.lower().split()):
+            return
+        self.fuzzySearch = FuzzySearch(self.index, query, self.__recentRelative(), previous)
+        self.continueSearch()
+
+    def continueSearch(self):
+        search = self.fuzzySearch
+        if search is None:
+            return
+        done = search.step(self.STEP_BUDGET)
+        if search.takeChanged() or done:
+            self.__showResults(search.results())
+        if done:
+            self.statusLabel.setText(f"{len(search.matches)} of {len(self.index)} files")
+        else:
+            self.statusLabel.setText(f"Searching... {len(search.matches)} matches")
+            self.stepTimer.start()
+
+    def __showResults(self, results):
+        index = self.index
+        self.resultList.setUpdatesEnabled(False)
+        self.resultList.clear()
+        for i in results[:self.VISIBLE_RESULTS]:
+            item = QListWidgetItem(f"{index.name(i)}    {index.directory(i)}")
+            item.setData(Qt.UserRole, index.path(i))
+            item.setToolTip(index.path(i))
+            self.resultList.addItem(item)
+        if self.resultList.count():
+            self.resultList.setCurrentRow(0)
+        self.resultList.setUpdatesEnabled(True)
+
+    def __showRecent(self):
+        self.resultList.clear()
+        for filePath in reversed(self.recent):
+            item = QListWidgetItem(f"{os.path.basename(filePath)}    {os.path.dirname(filePath)}")
+            item.setData(Qt.UserRole, filePath)
+            item.setToolTip(filePath)
+            self.resultList.addItem(item)
+        if self.resultList.count():
+            self.resultList.setCurrentRow(0)
+        self.statusLabel.setText("Recently opened" if self.recent else "")
+
+    def eventFilter(self, watched, event):
+        # 输入框中的上下键和回车操作结果列表
+        if watched is self.queryEdit and event.type() == QEvent.KeyPress:
+            key = event.key()
+            if key in (Qt.Key_Down, Qt.Key_Up, Qt.Key_PageDown, Qt.Key_PageUp):
+                QApplication.sendEvent(self.resultList, event)
+                return True
+            if key in (Qt.Key_Return, Qt.Key_Enter):
+                item = self.resultList.currentItem()
+                if item is not None:
+                    self.onItemActivated(item)
+                return True
+            if key == Qt.Key_Escape:
+                self.hide()
+                return True
+        return super().eventFilter(watched, event)
+
+    def onItemActivated(self, item):
+        match = self.LINE_SUFFIX.search(self.queryEdit.text())
+        line = int(match.group(1)) if match else 0
+        self.hide()
+        self.stepTimer.stop()
+        self.fileSelected.emit(item.data(Qt.UserRole), line)
+
+    def shutdown(self):
+        if self.indexTask is not None:
+            self.indexTask.cancelled = True
+        self.threadPool.waitForDone()
@@ -0,0 +1,105 @@
+"""
+运行子进程入口，由RunManager.Run启动：
+
+    python RunLauncher.py <metrics文件> [--profile|--coverage <结果文件>] <script> [args...]
+
+支持fork的平台上fork出子进程运行脚本，父进程用wait4等待并把CPU时间和峰值内存
+写入metrics文件；不支持fork时直接在本进程中运行，不记录资源使用。
+指定--profile时脚本在ProfileRunner的分析器下运行，指定--coverage时由CoverageRunner统计行覆盖率。
+"""
+import importlib
+import json
+import os
+import runpy
+import signal
+import sys
+
+FORWARDED_SIGNALS = ('SIGTERM', 'SIGINT', 'SIGHUP')
+# 选项 -> (模块, 函数)，函数的参数为运行脚本的可调用对象和结果文件路径
+TOOLS = {
+    '--profile': ('ProfileRunner', 'profile'),
+    '--coverage': ('CoverageRunner', 'coverage'),
+}
+
+def runScript(script, args):
+    """
+    以__main__身份运行脚本，与python script.py的行为一致
+    """
+    sys.argv = [script] + args
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    runpy.run_path(script, run_name='__main__')
+
+def execute(script, args, tool):
+    """
+    运行脚本，指定了工具时在工具中运行
+    :param tool: (选项, 结果文件)或None
+    """
+    if tool is None:
+        runScript(script, args)
+        return
+    moduleName, functionName = TOOLS[tool[0]]
+    function = getattr(importlib.import_module(moduleName), functionName)
+    function(lambda: runScript(script, args), tool[1])
+
+def exitCode(status):
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def maxRssBytes(rusage):
+    # Linux的ru_maxrss单位为KB，macOS为字节
+    if sys.platform == 'darwin':
+        return rusage.ru_maxrss
+    return rusage.ru_maxrss * 1024
+
+def writeMetrics(path, metrics):
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f)
+    except OSError:
+        pass
+
+def main():
+    metricsPath, arguments = sys.argv[1], sys.argv[2:]
+    tool = None
+    if arguments and arguments[0] in TOOLS:
+        tool, arguments = (arguments[0], arguments[1]), arguments[2:]
+    script, args = arguments[0], arguments[1:]
+    if not hasattr(os, 'fork'):
+        execute(script, args, tool)
+        return
+
+    # 自成进程组，IDE可以一次结束脚本及其创建的子进程
+    os.setpgid(0, 0)
+    pid = os.fork()
+    if pid == 0:
+        # 子进程正常退出，atexit和非守护线程的处理与直接运行相同
+        execute(script, args, tool)
+        return
+
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+
+    for name in FORWARDED_SIGNALS:
+        signal.signal(getattr(signal, name), forward)
+
+    while True:
+        try:
+            _, status, rusage = os.wait4(pid, 0)
+            break
+        except InterruptedError:
+            continue
+    writeMetrics(metricsPath, {
+        'exitCode': exitCode(status),
+        'userTime': rusage.ru_utime,
+        'systemTime': rusage.ru_stime,
+        'maxRss': maxRssBytes(rusage),
+    })
+    sys.stdout.flush()
+    os._exit(exitCode(status))
+
+if __name__ == '__main__':
+    main()
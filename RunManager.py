@@ -0,0 +1,462 @@
+from PyQt5.QtCore import *
+import codecs
+import json
+import os
+import re
+import signal
+import sys
+import tempfile
+import time
+
+from ForkServer import ForkServer
+
+def stripJsonComments(text):
+    """
+    去掉JSONC中的注释和结尾多余的逗号，字符串中的内容保持不变
+    :param text: launch.json的内容
+    :return: 标准JSON文本
+    """
+    comments = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.S)
+    trailingCommas = re.compile(r'("(?:\\.|[^"\\])*")|,(?=\s*[}\]])')
+    # 注释去掉之后逗号和括号之间才只剩空白
+    text = comments.sub(lambda m: m.group(1) or '', text)
+    return trailingCommas.sub(lambda m: m.group(1) or '', text)
+
+class RunConfiguration:
+    """
+    一次运行的配置，字段与.vscode/launch.json中python类型的launch配置对应
+    """
+    LAUNCH_FILE = os.path.join('.vscode', 'launch.json')
+    SETTINGS_FILE = os.path.join('.vscode', 'settings.json')
+    LAUNCH_TYPES = ('python', 'debugpy')
+
+    def __init__(self, program, cwd=None, env=None, args=None, python=None, name=None):
+        """
+        :param program: 脚本路径
+        :param cwd: 工作目录，默认为脚本所在目录
+        :param env: 额外的环境变量
+        :param args: 脚本参数
+        :param python: Python解释器，默认与IDE相同
+        :param name: 配置名称
+        """
+        self.program = program
+        self.cwd = cwd or os.path.dirname(program)
+        self.env = dict(env or {})
+        self.args = list(args or [])
+        self.python = python or sys.executable
+        self.name = name
+
+    @classmethod
+    def forFile(cls, filePath, workspaceFolder=None):
+        """
+        获取运行文件时使用的配置：launch.json中program指向该文件的第一个配置，没有时使用默认配置
+        :param filePath: 脚本路径
+        :param workspaceFolder: 工作区目录
+        :raise ValueError: launch.json格式错误
+        """
+        filePath = os.path.abspath(filePath)
+        if workspaceFolder:
+            for entry in cls.readLaunchFile(workspaceFolder):
+                if entry.get('type') not in cls.LAUNCH_TYPES or entry.get('request', 'launch') != 'launch':
+                    continue
+                if 'program' not in entry:
+                    continue
+                variables = cls.variables(filePath, workspaceFolder)
+                program = cls.substitute(entry['program'], variables)
+                program = os.path.normpath(os.path.join(workspaceFolder, program))
+                if os.path.normcase(program) != os.path.normcase(filePath):
+                    continue
+                cwd = cls.substitute(entry.get('cwd', '${workspaceFolder}'), variables)
+                env = {key: cls.substitute(str(value), variables) for key, value in (entry.get('env') or {}).items()}
+                args = [cls.substitute(str(arg), variables) for arg in entry.get('args') or []]
+                python = cls.substitute(entry['python'], variables) if entry.get('python') else None
+                return cls(program, os.path.join(workspaceFolder, cwd), env, args, python, entry.get('name'))
+        return cls(filePath)
+
+    @classmethod
+    def readLaunchFile(cls, workspaceFolder):
+        """
+        读取launch.json中的配置列表
+        :return: 配置字典列表，文件不存在时为空
+        :raise ValueError: 格式错误
+        """
+        path = os.path.join(workspaceFolder, cls.LAUNCH_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            return []
+        try:
+            data = json.loads(stripJsonComments(text))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid {cls.LAUNCH_FILE}: {e}")
+        configurations = data.get('configurations') if isinstance(data, dict) else None
+        return [entry for entry in configurations or [] if isinstance(entry, dict)]
+
+    @classmethod
+    def readSettings(cls, workspaceFolder):
+        """
+        读取.vscode/settings.json，不存在或格式错误时为空
+        """
+        try:
+            with open(os.path.join(workspaceFolder, cls.SETTINGS_FILE), 'r', encoding='utf-8') as f:
+                settings = json.loads(stripJsonComments(f.read()))
+        except (OSError, ValueError):
+            return {}
+        return settings if isinstance(settings, dict) else {}
+
+    @staticmethod
+    def variables(filePath, workspaceFolder):
+        return {
+            'workspaceFolder': workspaceFolder,
+            'workspaceFolderBasename': os.path.basename(workspaceFolder),
+            'file': filePath,
+            'relativeFile': os.path.relpath(filePath, workspaceFolder),
+            'fileDirname': os.path.dirname(filePath),
+            'fileBasename': os.path.basename(filePath),
+            'fileBasenameNoExtension': os.path.splitext(os.path.basename(filePath))[0],
+            'cwd': workspaceFolder,
+            'pathSeparator': os.sep,
+        }
+
+    @staticmethod
+    def substitute(value, variables):
+        """
+        替换${name}和${env:NAME}形式的变量，未知的变量保持原样
+        """
+        def replace(match):
+            name = match.group(1)
+            if name.startswith('env:'):
+                return os.environ.get(name[4:], '')
+            return variables.get(name, match.group(0))
+        return re.sub(r'\$\{([^}]+)\}', replace, value)
+
+class Run(QObject):
+    """
+    一次脚本运行：独立的QProcess，经RunLauncher启动以取得wait4统计的资源使用；
+    也可以由ForkServer从预加载了模块的服务器进程fork出来
+    """
+    output = pyqtSignal(str, bool)  # 完整的若干行文本（不含结尾换行）, 是否来自标准错误
+    finished = pyqtSignal(int)  # 退出码，启动失败时为-1
+
+    LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "RunLauncher.py")
+    KILL_TIMEOUT = 3000  # 毫秒，stop之后超过该时间仍未退出则强制结束
+    PROFILE = 'profile'  # 在分析器下运行，结果见ProfileRunner
+    COVERAGE = 'coverage'  # 统计行覆盖率，结果见CoverageRunner
+
+    def __init__(self, runId, configuration, parent=None, tool=None):
+        """
+        :param runId: 运行编号
+        :param configuration: RunConfiguration
+        :param tool: 运行脚本的工具（PROFILE或COVERAGE），None表示直接运行
+        """
+        super().__init__(parent)
+        self.runId = runId
+        self.configuration = configuration
+        self.tool = tool
+        self.toolResultPath = None
+        self.toolResult = None  # 工具写出的结果
+        title = tool.capitalize() if tool else "Run"
+        self.name = f"{title} #{runId}: {os.path.basename(configuration.program)}"
+        self.process = None
+        self.child = None  # 经fork服务器运行时的ForkedChild
+        self.startTime = None
+        self.wallTime = None
+        self.exitCode = None
+        self.metrics = None  # {'userTime', 'systemTime', 'maxRss'}，平台不支持时为None
+        self.metricsPath = None
+        # 每个通道各自增量解码并按行切分
+        self.decoders = {False: codecs.getincrementaldecoder('utf-8')(errors='replace'),
+                         True: codecs.getincrementaldecoder('utf-8')(errors='replace')}
+        self.partial = {False: '', True: ''}
+        self.killTimer = QTimer(self)
+        self.killTimer.setSingleShot(True)
+        self.killTimer.setInterval(self.KILL_TIMEOUT)
+        self.killTimer.timeout.connect(self.kill)
+
+    def start(self, forkServer=None):
+        """
+        开始运行
+        :param forkServer: 使用的fork服务器，None表示启动新的解释器
+        """
+        if forkServer is not None:
+            self.__startForked(forkServer)
+            return
+        fd, self.metricsPath = tempfile.mkstemp(prefix='syide-run-', suffix='.json')
+        os.close(fd)
+        configuration = self.configuration
+        toolArguments = []
+        if self.tool:
+            fd, self.toolResultPath = tempfile.mkstemp(prefix=f'syide-{self.tool}-', suffix='.json')
+            os.close(fd)
+            toolArguments = [f"--{self.tool}", self.toolResultPath]
+
+        environment = QProcessEnvironment.systemEnvironment()
+        for key, value in configuration.env.items():
+            environment.insert(key, value)
+        environment.insert('PYTHONIOENCODING', 'utf-8')
+
+        self.process = QProcess(self)
+        self.process.setProcessEnvironment(environment)
+        self.process.setWorkingDirectory(configuration.cwd)
+        self.process.readyReadStandardOutput.connect(lambda: self.__read(False))
+        self.process.readyReadStandardError.connect(lambda: self.__read(True))
+        self.process.errorOccurred.connect(self.onProcessError)
+        self.process.finished.connect(self.onProcessFinished)
+        self.startTime = time.monotonic()
+        self.process.start(configuration.python,
+                           ["-u", self.LAUNCHER, self.metricsPath] + toolArguments + [configuration.program] + configuration.args)
+        # 没有交互式输入，读取标准输入时得到EOF而不是一直等待
+        self.process.closeWriteChannel()
+
+    def __startForked(self, forkServer):
+        configuration = self.configuration
+        self.startTime = time.monotonic()
+        self.child = forkServer.spawn(configuration.program, configuration.args, configuration.cwd, configuration.env)
+        self.child.output.connect(self.onForkedOutput)
+        self.child.finished.connect(self.onForkedFinished)
+        
+    def onForkedOutput(self, data, isError):
+        self.__emitLines(self.decoders[isError].decode(data), isError)
+        
+    def onForkedFinished(self, exitCode, metrics):
+        for isError in (False, True):
+            self.__emitLines(self.decoders[isError].decode(b'', True), isError, True)
+        self.metrics = metrics
+        self.__finish(exitCode)
+
+    def isRunning(self):
+        if self.child is not None:
+            return self.child.isRunning()
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def stop(self):
+        """
+        请求脚本退出，超时后强制结束
+        """
+        if not self.isRunning():
+            return
+        if self.child is not None:
+            self.child.terminate()
+        else:
+            self.process.terminate()
+        self.killTimer.start()
+
+    def kill(self):
+        """
+        强制结束脚本及其创建的子进程
+        """
+        if not self.isRunning():
+            return
+        if self.child is not None:
+            self.child.kill()
+            return
+        if hasattr(os, 'killpg'):
+            # RunLauncher自成进程组
+            try:
+                os.killpg(self.process.processId(), signal.SIGKILL)
+                return
+            except OSError:
+                pass
+        self.process.kill()
+
+    def __read(self, isError):
+        data = self.process.readAllStandardError() if isError else self.process.readAllStandardOutput()
+        self.__emitLines(self.decoders[isError].decode(data.data()), isError)
+
+    def __emitLines(self, text, isError, final=False):
+        text = self.partial[isError] + text
+        if final:
+            self.partial[isError] = ''
+        else:
+            # 不完整的最后一行等到换行或结束时再发出
+            cut = text.rfind('\n') + 1
+            text, self.partial[isError] = text[:cut], text[cut:]
+        text = text.replace('\r\n', '\n').rstrip('\n')
+        if text:
+            self.output.emit(text, isError)
+
+    def onProcessError(self, error):
+        if error != QProcess.FailedToStart:
+            return
+        self.output.emit(f"Failed to start {self.configuration.python}: {self.process.errorString()}", True)
+        self.__finish(-1)
+
+    def onProcessFinished(self, exitCode, exitStatus):
+        for isError in (False, True):
+            self.__read(isError)
+            self.__emitLines(self.decoders[isError].decode(b'', True), isError, True)
+        self.metrics = self.__readMetrics()
+        if self.metrics is not None:
+            # 脚本被信号结束时RunLauncher的退出码已换算为128+信号
+            exitCode = self.metrics.pop('exitCode', exitCode)
+        elif exitStatus == QProcess.CrashExit:
+            exitCode = -1
+        self.__finish(exitCode)
+
+    def __readMetrics(self):
+        return self.__readJson(self.metricsPath)
+
+    @staticmethod
+    def __readJson(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            return json.loads(text) if text else None
+        except (OSError, ValueError):
+            return None
+
+    def __finish(self, exitCode):
+        if self.exitCode is not None:
+            return
+        self.killTimer.stop()
+        self.wallTime = time.monotonic() - self.startTime
+        self.exitCode = exitCode
+        if self.toolResultPath:
+            self.toolResult = self.__readJson(self.toolResultPath)
+        for path in (self.metricsPath, self.toolResultPath):
+            if not path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.finished.emit(exitCode)
+
+    def summary(self):
+        """
+        获取运行结果的摘要：退出码、耗时、CPU时间和峰值内存
+        """
+        text = f"exit code {self.exitCode}, wall {self.wallTime:.2f} s"
+        if self.child is not None:
+            text += " (fork server)"
+        if self.metrics:
+            cpu = self.metrics['userTime'] + self.metrics['systemTime']
+            text += (f", CPU {cpu:.2f} s (user {self.metrics['userTime']:.2f} s, sys {self.metrics['systemTime']:.2f} s)"
+                     f", peak RSS {self.metrics['maxRss'] / (1024 * 1024):.1f} MB")
+        return text
+
+class RunManager(QObject):
+    """
+    运行管理器：每次运行使用独立的进程、工作目录和环境变量，可以同时运行多个脚本。
+    启用fork服务器后，运行从预先导入了runner.preloadModules中模块的服务器进程fork出来，
+    解释器、模块列表或第三方库目录变化时自动换成新的服务器。
+    """
+    runStarted = pyqtSignal(object)  # Run
+    runFinished = pyqtSignal(object)  # Run
+    forkServerMessage = pyqtSignal(str)  # fork服务器的状态信息
+
+    PRELOAD_SETTING = 'runner.preloadModules'
+    FORK_SERVER_SETTING = 'runner.forkServer'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.nextId = 1
+        self.runs = []  # 正在运行的Run
+        self.forkServerEnabled = False
+        self.forkServer = None
+        self.retiredServers = []  # 已失效但仍有子进程在运行的服务器
+
+    def setForkServerEnabled(self, enabled):
+        """
+        启用或关闭fork服务器运行模式
+        """
+        self.forkServerEnabled = enabled and ForkServer.isSupported()
+        if not self.forkServerEnabled:
+            self.__retireForkServer()
+
+    def __forkServerFor(self, configuration, workspaceFolder):
+        """
+        获取可用于该配置的fork服务器，需要时启动新的服务器
+        :return: ForkServer，未启用时为None
+        """
+        settings = RunConfiguration.readSettings(workspaceFolder) if workspaceFolder else {}
+        if not (self.forkServerEnabled or settings.get(self.FORK_SERVER_SETTING) is True) or not ForkServer.isSupported():
+            return None
+        modules = settings.get(self.PRELOAD_SETTING)
+        modules = [name for name in modules if isinstance(name, str)] if isinstance(modules, list) else []
+        if self.forkServer is not None and self.forkServer.isCompatible(configuration.python, modules):
+            return self.forkServer
+
+        self.__retireForkServer()
+        server = ForkServer(configuration.python, modules, self)
+        server.ready.connect(self.onForkServerReady)
+        server.failed.connect(self.forkServerMessage)
+        try:
+            server.start()
+        except OSError as e:
+            self.forkServerMessage.emit(f"Failed to start fork server: {str(e)}")
+            return None
+        self.forkServer = server
+        self.forkServerMessage.emit(f"Starting fork server (preload: {', '.join(modules) or 'none'})")
+        return server
+
+    def onForkServerReady(self, failed):
+        for name, error in failed.items():
+            self.forkServerMessage.emit(f"Fork server could not preload {name}: {error}")
+        self.forkServerMessage.emit("Fork server ready")
+
+    def __retireForkServer(self):
+        """
+        当前服务器不再接受新的运行，等其子进程全部结束后关闭
+        """
+        server, self.forkServer = self.forkServer, None
+        if server is not None:
+            self.retiredServers.append(server)
+        self.__closeRetiredServers()
+
+    def __closeRetiredServers(self):
+        for server in list(self.retiredServers):
+            if not server.isActive():
+                self.retiredServers.remove(server)
+                server.shutdown()
+                server.deleteLater()
+
+    def start(self, filePath, workspaceFolder=None, tool=None):
+        """
+        运行脚本
+        :param filePath: 脚本路径
+        :param workspaceFolder: 工作区目录，用于查找.vscode/launch.json和settings.json
+        :param tool: 运行脚本的工具（Run.PROFILE或Run.COVERAGE），使用工具时不经过fork服务器
+        :return: Run
+        :raise ValueError: launch.json格式错误
+        """
+        configuration = RunConfiguration.forFile(filePath, workspaceFolder)
+        forkServer = self.__forkServerFor(configuration, workspaceFolder) if tool is None else None
+        run = Run(self.nextId, configuration, self, tool)
+        self.nextId += 1
+        run.finished.connect(lambda exitCode, run=run: self.onRunFinished(run))
+        self.runs.append(run)
+        self.runStarted.emit(run)
+        run.start(forkServer)
+        return run
+
+    def onRunFinished(self, run):
+        if run in self.runs:
+            self.runs.remove(run)
+        self.runFinished.emit(run)
+        run.deleteLater()
+        self.__closeRetiredServers()
+
+    def activeRuns(self):
+        return list(self.runs)
+
+    def stopAll(self):
+        """
+        请求所有运行退出
+        """
+        for run in list(self.runs):
+            run.stop()
+
+    def killAll(self, msecs=1000):
+        """
+        强制结束所有运行并等待退出，同时关闭fork服务器
+        """
+        for run in list(self.runs):
+            run.kill()
+            if run.process is not None:
+                run.process.waitForFinished(msecs)
+        self.__retireForkServer()
+        for server in self.retiredServers:
+            server.shutdown()
+        self.retiredServers = []
@@ -0,0 +1,23 @@
+from PyQt5.Qsci import QsciScintilla
+from PyQt5 import sip
+import ctypes
+
+# SendScintilla返回C的long，Win64上long只有32位，不能用来返回指针
+SEND_RESULT_HOLDS_POINTER = ctypes.sizeof(ctypes.c_long) >= ctypes.sizeof(ctypes.c_void_p)
+
+def rangeBytes(editor, position, length):
+    """
+    读取编辑器文档中的一段字节
+    :param editor: QsciScintilla
+    :param position: 开始位置（字节）
+    :param length: 字节数
+    :return: UTF-8字节
+    """
+    if length <= 0:
+        return b''
+    if SEND_RESULT_HOLDS_POINTER:
+        # SCI_GETRANGEPOINTER 返回Scintilla内部缓冲区的指针，只复制一次
+        pointer = editor.SendScintilla(QsciScintilla.SCI_GETRANGEPOINTER, position, length)
+        return sip.voidptr(pointer, length).asstring()
+    # 指针会被截断时通过SCI_GETTEXTRANGE复制，返回的QByteArray末尾带有\0
+    return bytes(editor.bytes(position, position + length))[:length]
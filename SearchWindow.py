@@ -0,0 +1,186 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import os
+import re
+
+class SearchWindow(QDockWidget):
+    """
+    工作区搜索窗口：结果按文件分组，随后台搜索分批显示，双击跳转到匹配位置
+    """
+    locationActivated = pyqtSignal(str, int, int)  # 文件路径, 行号(从1开始), 列号
+
+    SEARCH_DELAY = 300  # 输入搜索文本的防抖间隔（毫秒）
+    MIN_SEARCH_LENGTH = 2  # 输入时自动搜索的最短文本，回车时不限制
+
+    def __init__(self, workspaceSearch, parent=None):
+        """
+        :param workspaceSearch: WorkspaceSearch
+        """
+        super().__init__("Search", parent)
+        self.workspaceSearch = workspaceSearch
+        self.workspaceSearch.matchesFound.connect(self.onMatchesFound)
+        self.workspaceSearch.searchFinished.connect(self.onSearchFinished)
+        self.workspaceSearch.indexProgress.connect(self.onIndexProgress)
+        self.workspaceSearch.indexUpdated.connect(self.onIndexUpdated)
+        self.generation = 0  # 正在显示的搜索编号
+        self.fileItems = {}  # 文件路径 -> 结果中的文件节点
+        self.lineCount = 0
+        self.__initUI()
+
+    def __initUI(self):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        searchBar = QHBoxLayout()
+        searchBar.setContentsMargins(2, 2, 2, 0)
+        self.searchEdit = QLineEdit()
+        self.searchEdit.setPlaceholderText("Search in folder")
+        self.searchEdit.setClearButtonEnabled(True)
+        self.searchEdit.textChanged.connect(self.scheduleSearch)
+        self.searchEdit.returnPressed.connect(self.startSearch)
+        self.caseCheck = QCheckBox("Aa")
+        self.caseCheck.setToolTip("Match Case")
+        self.caseCheck.toggled.connect(self.startSearch)
+        self.regexCheck = QCheckBox(".*")
+        self.regexCheck.setToolTip("Use Regular Expression")
+        self.regexCheck.toggled.connect(self.startSearch)
+        searchBar.addWidget(self.searchEdit, 1)
+        searchBar.addWidget(self.caseCheck)
+        searchBar.addWidget(self.regexCheck)
+        layout.addLayout(searchBar)
+
+        self.statusLabel = QLabel()
+        self.statusLabel.setContentsMargins(4, 0, 4, 0)
+        layout.addWidget(self.statusLabel)
+        self.indexLabel = QLabel()
+        self.indexLabel.setContentsMargins(4, 0, 4, 0)
+        self.indexLabel.setVisible(False)
+        layout.addWidget(self.indexLabel)
+
+        self.resultTree = QTreeWidget()
+        self.resultTree.setHeaderHidden(True)
+        self.resultTree.setUniformRowHeights(True)
+        self.resultTree.itemActivated.connect(self.onItemActivated)
+        layout.addWidget(self.resultTree)
+
+        self.setWidget(widget)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
+
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(self.SEARCH_DELAY)
+        self.searchTimer.timeout.connect(self.startSearch)
+
+    def focusSearch(self, text=None):
+        """
+        显示窗口并聚焦搜索框
+        :param text: 预先填入的搜索文本
+        """
+        self.show()
+        self.raise_()
+        if text:
+            self.searchEdit.setText(text)
+        self.searchEdit.setFocus()
+        self.searchEdit.selectAll()
+
+    def scheduleSearch(self):
+        if len(self.searchEdit.text()) >= self.MIN_SEARCH_LENGTH:
+            self.searchTimer.start()
+        else:
+            self.searchTimer.stop()
+
+    def startSearch(self):
+        self.searchTimer.stop()
+        self.workspaceSearch.cancelSearch()
+        self.generation = 0
+        self.resultTree.clear()
+        self.fileItems.clear()
+        self.lineCount = 0
+        text = self.searchEdit.text()
+        if not text:
+            self.statusLabel.clear()
+            return
+        try:
+            self.generation = self.workspaceSearch.search(text, self.caseCheck.isChecked(), self.regexCheck.isChecked())
+        except re.error as e:
+            self.statusLabel.setText(f"Invalid regular expression: {e}")
+            return
+        except ValueError as e:
+            self.statusLabel.setText(str(e))
+            return
+        self.statusLabel.setText("Searching...")
+
+    def onMatchesFound(self, generation, matches):
+        if generation != self.generation:
+            return
+        root = self.workspaceSearch.root
+        self.resultTree.setUpdatesEnabled(False)
+        for path, lines in matches:
+            fileItem = self.fileItems.get(path)
+            if fileItem is None:
+                fileItem = QTreeWidgetItem(self.resultTree)
+                fileItem.setData(0, Qt.UserRole, (path, 1, 0))
+                fileItem.setToolTip(0, path)
+                fileItem.setExpanded(True)
+                self.fileItems[path] = fileItem
+            children = []
+            for lineNumber, text, columns in lines:
+                item = QTreeWidgetItem()
+                item.setText(0, f"{lineNumber}: {text.strip()}")
+                item.setData(0, Qt.UserRole, (path, lineNumber, columns[0][0] if columns else 0))
+                children.append(item)
+            fileItem.addChildren(children)
+            fileItem.setText(0, f"{os.path.relpath(path, root)} ({fileItem.childCount()})")
+            self.lineCount += len(lines)
+        self.resultTree.setUpdatesEnabled(True)
+        self.statusLabel.setText(f"Searching... {self.lineCount} results in {len(self.fileItems)} files")
+
+    def showLocations(self, title, name, locations):
+        """
+        显示符号查询的结果（定义或引用），取代当前的搜索结果
+        :param title: 状态文本
+        :param name: 查询的名称，用于确定匹配的列范围
+        :param locations: [(路径, 行号, 列号, 优先级, 行文本)]
+        """
+        self.searchTimer.stop()
+        self.workspaceSearch.cancelSearch()
+        self.generation = 0
+        self.resultTree.clear()
+        self.fileItems.clear()
+        self.lineCount = 0
+        grouped = {}
+        for path, line, column, rank, text in locations:
+            grouped.setdefault(path, []).append((line, text, [(column, column + len(name))]))
+        self.onMatchesFound(0, list(grouped.items()))
+        self.statusLabel.setText(title)
+        self.show()
+        self.raise_()
+
+    def onSearchFinished(self, generation, stats):
+        if generation != self.generation:
+            return
+        text = (f"{stats['lines']} results in {stats['files']} files "
+                f"({stats['candidates']} candidates, {stats['elapsed'] * 1000:.0f} ms)")
+        if stats['truncated']:
+            text += " - limit reached"
+        if stats.get('error'):
+            text += f" - {stats['error']}"
+        if self.workspaceSearch.isIndexing():
+            text += " - index is being updated, results may be incomplete"
+        self.statusLabel.setText(text)
+
+    def onIndexProgress(self, done, total):
+        self.indexLabel.setText(f"Indexing {done}/{total} files...")
+        self.indexLabel.setVisible(True)
+
+    def onIndexUpdated(self, stats):
+        self.indexLabel.setVisible(False)
+        self.indexLabel.setToolTip(f"{stats['files']} files indexed, {stats['indexed']} updated, "
+                                   f"{stats['removed']} removed in {stats['elapsed']:.2f} s")
+
+    def onItemActivated(self, item, column):
+        path, line, index = item.data(0, Qt.UserRole)
+        self.locationActivated.emit(path, line, index)
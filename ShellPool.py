@@ -0,0 +1,170 @@
+from PyQt5.QtCore import *
+import os
+import time
+
+from PtyProcess import PtyProcess
+
+class PooledShell(QObject):
+    """
+    池中空闲的shell，交出之前缓存其启动输出（提示符等）
+    """
+    MAX_BUFFERED = 256 * 1024  # 空闲期间最多缓存的输出字节数
+
+    def __init__(self, process, workingDirectory, parent=None):
+        super().__init__(parent)
+        self.process = process
+        self.workingDirectory = workingDirectory
+        self.createdAt = time.monotonic()
+        self.chunks = []
+        self.size = 0
+        self.process.dataReceived.connect(self.onData)
+
+    def onData(self, data):
+        # 超出上限时丢弃最早的输出，空闲shell不应产生大量输出
+        self.chunks.append(data)
+        self.size += len(data)
+        while self.size > self.MAX_BUFFERED and len(self.chunks) > 1:
+            self.size -= len(self.chunks.pop(0))
+
+    def detach(self):
+        """
+        断开与池的连接
+        :return: (PtyProcess, 已缓存的输出)
+        """
+        self.process.dataReceived.disconnect(self.onData)
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return self.process, data
+
+class ShellPool(QObject):
+    """
+    预先启动的shell进程池：新建终端时直接交出已完成启动的shell，之后在后台补充。
+    空闲数量有上限，长时间没有被使用的shell会被回收，直到下一次有需求时才重新补充。
+    """
+    REFILL_DELAY = 500  # 毫秒，交出shell后延迟补充，不与正在使用的shell争抢启动资源
+    IDLE_TIMEOUT = 10 * 60  # 秒
+    REAP_INTERVAL = 60 * 1000  # 毫秒
+
+    def __init__(self, parent=None, size=1, maxSize=4):
+        """
+        :param size: 保持的空闲shell数量
+        :param maxSize: 空闲shell数量的上限
+        """
+        super().__init__(parent)
+        self.size = min(size, maxSize)
+        self.maxSize = maxSize
+        self.idle = []
+        self.workingDirectory = os.getcwd()
+        self.program = os.environ.get('SHELL') or '/bin/bash'
+        self.arguments = ['-i']
+        # 回收之后不再自动补充，直到下一次acquire
+        self.demand = True
+
+        self.refillTimer = QTimer(self)
+        self.refillTimer.setSingleShot(True)
+        self.refillTimer.setInterval(self.REFILL_DELAY)
+        self.refillTimer.timeout.connect(self.refill)
+
+        self.reapTimer = QTimer(self)
+        self.reapTimer.setInterval(self.REAP_INTERVAL)
+        self.reapTimer.timeout.connect(self.reapIdle)
+        self.reapTimer.start()
+
+    @staticmethod
+    def isSupported():
+        return PtyProcess.isSupported()
+
+    def setWorkingDirectory(self, path):
+        """
+        设置新shell的工作目录，池中其他目录的shell被丢弃
+        :param path: 目录路径
+        """
+        if path == self.workingDirectory:
+            return
+        self.workingDirectory = path
+        for shell in list(self.idle):
+            if shell.workingDirectory != path:
+                self.__discard(shell)
+        self.refillTimer.start()
+
+    def acquire(self, rows, columns, workingDirectory=None):
+        """
+        获取一个shell，池中有空闲的shell时立即返回，否则新启动一个
+        :param rows: 终端行数
+        :param columns: 终端列数
+        :param workingDirectory: 工作目录，默认为池的工作目录
+        :return: (PtyProcess, 已产生的输出)；进程的父对象为池，调用方应重新设置
+        """
+        workingDirectory = workingDirectory or self.workingDirectory
+        self.demand = True
+        process, data = None, b''
+        for shell in list(self.idle):
+            if not shell.process.isRunning():
+                self.__discard(shell)
+                continue
+            if shell.workingDirectory == workingDirectory:
+                self.idle.remove(shell)
+                process, data = shell.detach()
+                shell.deleteLater()
+                break
+
+        if process is None:
+            process = self.__spawn(workingDirectory, rows, columns)
+        else:
+            # 按实际大小调整，shell会收到SIGWINCH
+            process.resize(rows, columns)
+        self.refillTimer.start()
+        return process, data
+
+    def refill(self):
+        """
+        补充空闲shell到目标数量
+        """
+        if not self.demand:
+            return
+        for shell in list(self.idle):
+            if not shell.process.isRunning():
+                self.__discard(shell)
+        while len(self.idle) < self.size:
+            try:
+                process = self.__spawn(self.workingDirectory, 24, 80)
+            except OSError:
+                return
+            self.idle.append(PooledShell(process, self.workingDirectory, self))
+
+    def reapIdle(self):
+        """
+        回收空闲超时的shell
+        """
+        now = time.monotonic()
+        for shell in list(self.idle):
+            if now - shell.createdAt > self.IDLE_TIMEOUT or not shell.process.isRunning():
+                self.__discard(shell)
+                self.demand = False
+
+    def shutdown(self):
+        """
+        结束所有空闲shell
+        """
+        self.refillTimer.stop()
+        self.reapTimer.stop()
+        self.demand = False
+        for shell in list(self.idle):
+            self.__discard(shell)
+
+    def __spawn(self, workingDirectory, rows, columns):
+        process = PtyProcess(self)
+        process.start(self.program, self.arguments, workingDirectory, rows, columns)
+        return process
+
+    def __discard(self, shell):
+        if shell in self.idle:
+            self.idle.remove(shell)
+        process, data = shell.detach()
+        if process.isRunning():
+            process.finished.connect(process.deleteLater)
+            process.terminate()
+        else:
+            process.deleteLater()
+        shell.deleteLater()
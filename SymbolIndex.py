@@ -0,0 +1,361 @@
+"""
+工作区Python符号索引。
+
+用ast解析.py文件，提取定义（类、函数、方法、模块和类级别的变量）、名称引用和导入，
+保存在工作区下的SQLite数据库中。文件按修改时间和大小判断是否变化，变化的文件再比较内容哈希，
+内容相同时只更新修改时间，不重新解析。本模块只依赖标准库，解析函数在进程池中执行。
+"""
+import ast
+import hashlib
+import os
+import sqlite3
+
+INDEX_VERSION = 1
+MAX_FILE_SIZE = 4 * 1024 * 1024  # 超过该大小的文件不解析
+SKIPPED_REFERENCES = frozenset(('self', 'cls'))  # 数量很多且没有跳转意义的名称不记录引用
+
+def contentHash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def moduleName(root, path):
+    """
+    :return: 文件相对于工作区的模块名，如a/b/__init__.py为a.b
+    """
+    relative = os.path.splitext(os.path.relpath(path, root))[0]
+    parts = relative.split(os.sep)
+    if parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+def resolveModule(module, currentModule, isPackage):
+    """
+    把相对导入解析为绝对模块名
+    :param module: 导入的模块，以点开头表示相对导入
+    :param currentModule: 导入所在文件的模块名
+    :param isPackage: 导入所在文件是否为__init__.py
+    """
+    level = len(module) - len(module.lstrip('.'))
+    if level == 0:
+        return module
+    parts = currentModule.split('.') if currentModule else []
+    # __init__.py中的一个点表示包自身，普通模块中表示所在的包
+    drop = level - 1 if isPackage else level
+    base = parts[:len(parts) - drop] if drop <= len(parts) else []
+    rest = module[level:]
+    return '.'.join(base + ([rest] if rest else []))
+
+class SymbolCollector(ast.NodeVisitor):
+    """
+    从语法树中收集符号，列号按字符计算，与编辑器的列一致
+    """
+
+    def __init__(self, lines):
+        """
+        :param lines: 源文件按行切分的字节
+        """
+        self.lines = lines
+        self.definitions = []  # (名称, 限定名, 类型, 行号, 列号, 结束行号, 嵌套深度)，行号从1开始
+        self.references = []  # (名称, 行号, 列号)
+        self.imports = []  # (本地名称, 模块, 导入的名称)，导入整个模块时名称为''
+        self.scopes = []  # [(限定名, 类型)]
+
+    def column(self, line, offset):
+        """
+        把ast的UTF-8字节偏移转换为字符列号
+        """
+        if 0 < line <= len(self.lines):
+            text = self.lines[line - 1]
+            if not text.isascii():
+                return len(text[:offset].decode('utf-8', 'replace'))
+        return offset
+
+    def __define(self, name, kind, node, nameLine=None, nameOffset=None, keyword=None):
+        line = nameLine or node.lineno
+        if nameOffset is None:
+            nameOffset = node.col_offset
+            if 0 < line <= len(self.lines):
+                # 名称在def/class关键字之后
+                text = self.lines[line - 1]
+                start = text.find(keyword, node.col_offset) + len(keyword)
+                found = text.find(name.encode('utf-8'), start)
+                if found >= 0:
+                    nameOffset = found
+        qualname = '.'.join([scope for scope, scopeKind in self.scopes] + [name])
+        self.definitions.append((name, qualname, kind, line, self.column(line, nameOffset),
+                                 getattr(node, 'end_lineno', None) or line, len(self.scopes)))
+
+    def __scopeKind(self):
+        return self.scopes[-1][1] if self.scopes else 'module'
+
+    def visit_ClassDef(self, node):
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        for base in node.bases + [keyword.value for keyword in node.keywords]:
+            self.visit(base)
+        self.__define(node.name, 'class', node, keyword=b'class')
+        self.scopes.append((node.name, 'class'))
+        for statement in node.body:
+            self.visit(statement)
+        self.scopes.pop()
+
+    def visit_FunctionDef(self, node):
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.visit(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+        self.__define(node.name, 'method' if self.__scopeKind() == 'class' else 'function', node, keyword=b'def')
+        self.scopes.append((node.name, 'function'))
+        for statement in node.body:
+            self.visit(statement)
+        self.scopes.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def __defineTargets(self, target):
+        if isinstance(target, ast.Name):
+            self.__define(target.id, 'variable', target, target.lineno, target.col_offset)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self.__defineTargets(element)
+
+    def visit_Assign(self, node):
+        # 函数内的局部变量不作为定义
+        if self.__scopeKind() != 'function':
+            for target in node.targets:
+                self.__defineTargets(target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        if self.__scopeKind() != 'function':
+            self.__defineTargets(node.target)
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if not isinstance(node.ctx, ast.Store) and node.id not in SKIPPED_REFERENCES:
+            self.references.append((node.id, node.lineno, self.column(node.lineno, node.col_offset)))
+
+    def visit_Attribute(self, node):
+        self.visit(node.value)
+        if not isinstance(node.ctx, ast.Store) and node.end_lineno is not None:
+            # 属性名位于表达式末尾
+            offset = node.end_col_offset - len(node.attr.encode('utf-8'))
+            self.references.append((node.attr, node.end_lineno, self.column(node.end_lineno, offset)))
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.asname:
+                self.imports.append((alias.asname, alias.name, ''))
+            else:
+                # import a.b 在本地绑定的是a
+                first = alias.name.split('.')[0]
+                self.imports.append((first, first, ''))
+
+    def visit_ImportFrom(self, node):
+        module = '.' * node.level + (node.module or '')
+        for alias in node.names:
+            if alias.name != '*':
+                self.imports.append((alias.asname or alias.name, module, alias.name))
+
+def parseSource(data):
+    """
+    解析源代码
+    :param data: 源代码字节
+    :return: (定义, 引用, 导入)，有语法错误时返回None
+    """
+    try:
+        tree = ast.parse(data)
+    except (SyntaxError, ValueError):
+        return None
+    collector = SymbolCollector(data.splitlines())
+    collector.visit(tree)
+    return collector.definitions, collector.references, collector.imports
+
+EMPTY_SYMBOLS = ((), (), ())
+
+def indexBatch(batch):
+    """
+    读取并解析一批文件，在进程池中执行
+    :param batch: [(路径, 已知的内容哈希或None)]
+    :return: [(路径, 修改时间, 大小, 内容哈希, 符号)]，内容未变化时符号为None，
+             文件无法读取时修改时间为None
+    """
+    results = []
+    for path, knownHash in batch:
+        try:
+            stat = os.stat(path)
+            if stat.st_size > MAX_FILE_SIZE:
+                results.append((path, stat.st_mtime_ns, stat.st_size, '', EMPTY_SYMBOLS))
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            results.append((path, None, None, None, None))
+            continue
+        digest = contentHash(data)
+        if digest == knownHash:
+            results.append((path, stat.st_mtime_ns, stat.st_size, digest, None))
+            continue
+        # 有语法错误的文件记录为没有符号，修复后内容变化会重新解析
+        results.append((path, stat.st_mtime_ns, stat.st_size, digest, parseSource(data) or EMPTY_SYMBOLS))
+    return results
+
+class SymbolIndex:
+    """
+    符号索引的数据库，一个连接只能在创建它的线程中使用
+    """
+    QUERY_LIMIT = 2000  # 每次查询返回的最多行数
+
+    def __init__(self, path, root):
+        """
+        :param path: 数据库文件路径
+        :param root: 工作区根目录，与数据库中记录的不同时清空索引
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.root = root
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.__initSchema(root)
+
+    def __initSchema(self, root):
+        connection = self.connection
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        if meta.get('version') != str(INDEX_VERSION) or meta.get('root') != root:
+            for table in ('files', 'definitions', 'refs', 'imports'):
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.execute("DELETE FROM meta")
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [('version', str(INDEX_VERSION)), ('root', root)])
+        connection.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, "
+                           "module TEXT, mtime INTEGER, size INTEGER, hash TEXT)")
+        connection.execute("CREATE TABLE IF NOT EXISTS definitions (fileId INTEGER, name TEXT, qualname TEXT, "
+                           "kind TEXT, line INTEGER, col INTEGER, endLine INTEGER, depth INTEGER)")
+        connection.execute("CREATE TABLE IF NOT EXISTS refs (fileId INTEGER, name TEXT, line INTEGER, col INTEGER)")
+        connection.execute("CREATE TABLE IF NOT EXISTS imports (fileId INTEGER, alias TEXT, module TEXT, name TEXT)")
+        connection.execute("CREATE INDEX IF NOT EXISTS definitionsName ON definitions (name)")
+        connection.execute("CREATE INDEX IF NOT EXISTS definitionsFile ON definitions (fileId)")
+        connection.execute("CREATE INDEX IF NOT EXISTS refsName ON refs (name)")
+        connection.execute("CREATE INDEX IF NOT EXISTS refsFile ON refs (fileId)")
+        connection.execute("CREATE INDEX IF NOT EXISTS importsFile ON imports (fileId)")
+        connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def commit(self):
+        self.connection.commit()
+
+    def knownFiles(self):
+        """
+        :return: {路径: (文件编号, 修改时间, 大小, 内容哈希)}
+        """
+        return {path: (fileId, mtime, size, digest) for fileId, path, mtime, size, digest in
+                self.connection.execute("SELECT id, path, mtime, size, hash FROM files")}
+
+    def fileCount(self):
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def __deleteSymbols(self, fileIds):
+        rows = [(fileId,) for fileId in fileIds]
+        for table in ('definitions', 'refs', 'imports'):
+            self.connection.executemany(f"DELETE FROM {table} WHERE fileId = ?", rows)
+
+    def removeFiles(self, fileIds):
+        self.__deleteSymbols(fileIds)
+        self.connection.executemany("DELETE FROM files WHERE id = ?", [(fileId,) for fileId in fileIds])
+
+    def updateFiles(self, results):
+        """
+        写入indexBatch的结果
+        :return: 重新解析的文件数
+        """
+        connection = self.connection
+        parsed = 0
+        for path, mtime, size, digest, symbols in results:
+            row = connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+            if mtime is None:
+                if row is not None:
+                    self.removeFiles([row[0]])
+                continue
+            if symbols is None and row is not None:
+                # 内容没有变化
+                connection.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?", (mtime, size, row[0]))
+                continue
+            if row is None:
+                fileId = connection.execute("INSERT INTO files (path, module, mtime, size, hash) VALUES (?, ?, ?, ?, ?)",
+                                            (path, moduleName(self.root, path), mtime, size, digest)).lastrowid
+            else:
+                fileId = row[0]
+                self.__deleteSymbols([fileId])
+                connection.execute("UPDATE files SET mtime = ?, size = ?, hash = ? WHERE id = ?", (mtime, size, digest, fileId))
+            definitions, references, imports = symbols or EMPTY_SYMBOLS
+            connection.executemany("INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [(fileId,) + tuple(definition) for definition in definitions])
+            connection.executemany("INSERT INTO refs VALUES (?, ?, ?, ?)",
+                                   [(fileId,) + tuple(reference) for reference in references])
+            connection.executemany("INSERT INTO imports VALUES (?, ?, ?, ?)",
+                                   [(fileId,) + tuple(entry) for entry in imports])
+            parsed += 1
+        return parsed
+
+    def definitions(self, name, excluded=()):
+        """
+        :param excluded: 不查询的文件路径（由未保存的内容代替）
+        :return: [(路径, 模块名, 名称, 限定名, 类型, 行号, 列号, 结束行号, 嵌套深度)]
+        """
+        rows = self.connection.execute(
+            "SELECT files.path, files.module, name, qualname, kind, line, col, endLine, depth FROM definitions "
+            "JOIN files ON files.id = definitions.fileId WHERE name = ? LIMIT ?", (name, self.QUERY_LIMIT))
+        return [row for row in rows if row[0] not in excluded]
+
+    def moduleDefinitions(self, modules):
+        """
+        :param modules: 模块名
+        :return: {模块名: 文件路径}
+        """
+        found = {}
+        for module in modules:
+            row = self.connection.execute("SELECT path FROM files WHERE module = ?", (module,)).fetchone()
+            if row is not None:
+                found[module] = row[0]
+        return found
+
+    def references(self, name, excluded=()):
+        """
+        :return: [(路径, 行号, 列号)]，按路径和位置排序
+        """
+        rows = self.connection.execute(
+            "SELECT files.path, line, col FROM refs JOIN files ON files.id = refs.fileId WHERE name = ? "
+            "ORDER BY files.path, line, col LIMIT ?", (name, self.QUERY_LIMIT))
+        return [row for row in rows if row[0] not in excluded]
+
+    def fileSymbols(self, path):
+        """
+        :return: 文件的(定义, 引用, 导入)，文件不在索引中时返回None
+        """
+        row = self.connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return None
+        fileId = row[0]
+        connection = self.connection
+        return ([tuple(r) for r in connection.execute("SELECT name, qualname, kind, line, col, endLine, depth "
+                                                      "FROM definitions WHERE fileId = ? ORDER BY line", (fileId,))],
+                [tuple(r) for r in connection.execute("SELECT name, line, col FROM refs WHERE fileId = ?", (fileId,))],
+                [tuple(r) for r in connection.execute("SELECT alias, module, name FROM imports WHERE fileId = ?", (fileId,))])
+
+    def apiEntries(self):
+        """
+        :return: 自动完成的条目：模块名，模块级的公开定义（带和不带模块前缀），以及类的公开成员
+        """
+        entries = set()
+        rows = self.connection.execute(
+            "SELECT files.module, qualname, depth FROM definitions JOIN files ON files.id = definitions.fileId "
+            "WHERE depth = 0 OR (depth = 1 AND kind IN ('method', 'variable'))")
+        for module, qualname, depth in rows:
+            if not module or any(part.startswith('_') for part in qualname.split('.')):
+                continue
+            entries.add(module)
+            entries.add(f"{module}.{qualname}")
+            entries.add(qualname)
+        return entries
@@ -0,0 +1,203 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from collections import OrderedDict
+import os
+
+from Edit import Edit
+from FileSaver import FileSaver
+
+class HibernatedTab(QWidget):
+    """
+    休眠标签页的占位部件，只保存编辑器的紧凑状态
+    """
+
+    def __init__(self, filePath, state, parent=None):
+        super().__init__(parent)
+        self.filePath = filePath
+        self.state = state
+
+class TabManager(QObject):
+    """
+    标签页管理器
+
+    维护规范化路径到标签页部件的索引，并在编辑器估算内存超出预算时，
+    按最近最少使用的顺序休眠非活动标签页，激活时再重建编辑器。
+    """
+    tabHibernated = pyqtSignal(str)  # 文件路径
+    tabRestored = pyqtSignal(str)  # 文件路径
+
+    DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+    # 每个文档字节的估算内存（文本、样式、撤销记录、换行布局）
+    BYTES_PER_CHAR = 4
+    # 每个QsciScintilla部件的固定开销估算
+    WIDGET_OVERHEAD = 2 * 1024 * 1024
+
+    def __init__(self, tabWidget, editorFactory, memoryBudget=DEFAULT_MEMORY_BUDGET, parent=None):
+        """
+        :param tabWidget: 管理的QTabWidget
+        :param editorFactory: 创建已连接好信号的编辑器的函数，参数为文件路径
+        :param memoryBudget: 编辑器的内存预算（字节）
+        """
+        super().__init__(parent)
+        self.tabWidget = tabWidget
+        self.editorFactory = editorFactory
+        self.memoryBudget = memoryBudget
+        # 规范化路径 -> 标签页部件
+        self.pathIndex = {}
+        # 活动的编辑器，按最近使用顺序排列（最早使用的在前）
+        self.recentEditors = OrderedDict()
+        self.swapping = False
+
+        self.tabWidget.currentChanged.connect(self.onCurrentChanged)
+
+    @staticmethod
+    def normalizePath(filePath):
+        """
+        规范化文件路径，用于索引查找
+        :param filePath: 文件路径
+        :return: 规范化后的路径
+        """
+        return os.path.normcase(os.path.abspath(filePath))
+
+    def setMemoryBudget(self, memoryBudget):
+        """
+        设置内存预算并立即应用
+        :param memoryBudget: 内存预算（字节）
+        """
+        self.memoryBudget = memoryBudget
+        self.enforceBudget()
+
+    def register(self, widget):
+        """
+        登记新加入的标签页
+        :param widget: 标签页部件
+        """
+        filePath = getattr(widget, 'filePath', None)
+        if filePath:
+            self.pathIndex[self.normalizePath(filePath)] = widget
+        if isinstance(widget, Edit):
+            self.recentEditors[widget] = None
+            self.recentEditors.move_to_end(widget)
+
+    def unregister(self, widget):
+        """
+        移除即将关闭的标签页
+        :param widget: 标签页部件
+        """
+        filePath = getattr(widget, 'filePath', None)
+        if filePath and self.pathIndex.get(self.normalizePath(filePath)) is widget:
+            del self.pathIndex[self.normalizePath(filePath)]
+        self.recentEditors.pop(widget, None)
+
+    def findTab(self, filePath):
+        """
+        通过路径查找已打开的标签页
+        :param filePath: 文件路径
+        :return: 标签页索引，未打开时返回-1
+        """
+        widget = self.pathIndex.get(self.normalizePath(filePath))
+        if widget is None:
+            return -1
+        return self.tabWidget.indexOf(widget)
+
+    def onCurrentChanged(self, index):
+        if self.swapping or index < 0:
+            return
+
+        widget = self.tabWidget.widget(index)
+        if isinstance(widget, HibernatedTab):
+            widget = self.restore(index)
+        if isinstance(widget, Edit):
+            self.recentEditors[widget] = None
+            self.recentEditors.move_to_end(widget)
+        self.enforceBudget()
+
+    def estimateMemory(self, editor):
+        """
+        估算编辑器占用的内存
+        :param editor: 编辑器
+        :return: 估算字节数
+        """
+        return editor.length() * self.BYTES_PER_CHAR + self.WIDGET_OVERHEAD
+
+    def enforceBudget(self):
+        """
+        超出内存预算时休眠最近最少使用的非活动编辑器
+        """
+        total = sum(self.estimateMemory(editor) for editor in self.recentEditors)
+        if total <= self.memoryBudget:
+            return
+
+        current = self.tabWidget.currentWidget()
+        for editor in list(self.recentEditors):
+            if total <= self.memoryBudget:
+                break
+            if editor is current or not self.canHibernate(editor):
+                continue
+            size = self.estimateMemory(editor)
+            if self.hibernate(editor):
+                total -= size
+
+    def canHibernate(self, editor):
+        """
+        预览标签页以及正在加载或保存的编辑器不能休眠
+        :param editor: 编辑器
+        :return: 是否可以休眠
+        """
+        if editor.preview or editor.loading:
+            return False
+        if editor.filePath and FileSaver.instance().isSaving(editor.filePath):
+            return False
+        return True
+
+    def hibernate(self, editor):
+        """
+        销毁编辑器，用占位部件保存其状态
+        :param editor: 编辑器
+        :return: 是否成功休眠
+        """
+        index = self.tabWidget.indexOf(editor)
+        if index < 0:
+            return False
+
+        placeholder = HibernatedTab(editor.filePath, editor.captureState())
+        self.__replaceTab(index, placeholder)
+        self.unregister(editor)
+        self.register(placeholder)
+        editor.deleteLater()
+        self.tabHibernated.emit(editor.filePath or "")
+        return True
+
+    def restore(self, index):
+        """
+        根据占位部件保存的状态重建编辑器
+        :param index: 标签页索引
+        :return: 重建的编辑器
+        """
+        placeholder = self.tabWidget.widget(index)
+        editor = self.editorFactory(placeholder.filePath)
+        self.__replaceTab(index, editor)
+        editor.restoreState(placeholder.state)
+
+        self.unregister(placeholder)
+        self.register(editor)
+        placeholder.deleteLater()
+        self.tabRestored.emit(placeholder.filePath or "")
+        return editor
+
+    def __replaceTab(self, index, widget):
+        """
+        在同一位置替换标签页部件，保留标题和当前选中状态
+        """
+        self.swapping = True
+        try:
+            isCurrent = self.tabWidget.currentIndex() == index
+            title = self.tabWidget.tabText(index)
+            toolTip = self.tabWidget.tabToolTip(index)
+            self.tabWidget.removeTab(index)
+            self.tabWidget.insertTab(index, widget, title)
+            self.tabWidget.setTabToolTip(index, toolTip)
+            if isCurrent:
+                self.tabWidget.setCurrentIndex(index)
+        finally:
+            self.swapping = False
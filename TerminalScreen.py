@@ -0,0 +1,765 @@
+from collections import deque
+import codecs
+import functools
+import re
+import unicodedata
+
+# 单元格属性打包为一个整数：前景色(9位) | 背景色(9位) | 样式标志
+DEFAULT_COLOR = 256
+FG_MASK = 0x1FF
+BG_SHIFT = 9
+BOLD = 1 << 18
+UNDERLINE = 1 << 19
+REVERSE = 1 << 20
+ITALIC = 1 << 21
+DIM = 1 << 22
+DEFAULT_ATTR = DEFAULT_COLOR | (DEFAULT_COLOR << BG_SHIFT)
+
+# 宽字符的第二个单元格
+WIDE_PLACEHOLDER = ''
+# 宽字符放不下时显示的单宽度字符
+WIDE_REPLACEMENT = '?'
+
+# DEC特殊图形字符集（ESC ( 0），用于绘制边框
+DEC_GRAPHICS = str.maketrans({
+    'j': '┘', 'k': '┐', 'l': '┌', 'm': '└', 'n': '┼', 'q': '─', 't': '├',
+    'u': '┤', 'v': '┴', 'w': '┬', 'x': '│', 'a': '▒', 'f': '°', 'g': '±',
+    '~': '·', 'o': '⎺', 's': '⎽', '`': '◆', 'y': '≤', 'z': '≥', '{': 'π', '|': '≠', '}': '£',
+})
+
+TEXT_RE = re.compile(r'[^\x00-\x1f\x7f-\x9f]+')
+ASCII_RE = re.compile(r'[\x20-\x7e]+')
+CSI_FINAL_RE = re.compile(r'[@-~]')
+# 完整的CSI序列：参数字节、中间字节、结束字节
+CSI_RE = re.compile(r'\x1b\[([0-?]*[ -/]*)([@-~])')
+OSC_END_RE = re.compile(r'\x07|\x1b\\')
+
+@functools.lru_cache(maxsize=4096)
+def charWidth(c):
+    """
+    字符占用的单元格数：组合字符为0，东亚宽字符为2
+    """
+    if unicodedata.combining(c):
+        return 0
+    if unicodedata.east_asian_width(c) in ('W', 'F'):
+        return 2
+    return 1
+
+def rgbToIndex(r, g, b):
+    """
+    将24位颜色映射到xterm 256色中最接近的颜色，保持单元格属性紧凑
+    """
+    def level(value):
+        return 0 if value < 48 else (1 if value < 115 else (value - 35) // 40)
+    if r == g == b:
+        if r < 8:
+            return 16
+        if r > 248:
+            return 231
+        return 232 + (r - 8) * 24 // 247
+    return 16 + 36 * level(r) + 6 * level(g) + level(b)
+
+class TerminalScreen:
+    """
+    VT100/xterm终端的屏幕模型：增量解析输出中的控制序列，维护单元格网格和滚动历史。
+    每行保存字符列表和属性列表，记录被修改的行，视图只需重绘这些行。
+    """
+    GROUND, ESCAPE, CSI, OSC, CHARSET = range(5)
+    MAX_SEQUENCE = 4096  # 未结束的控制序列的最大长度，超过时丢弃
+
+    def __init__(self, rows=24, columns=80, scrollbackLines=10000):
+        self.rows = rows
+        self.columns = columns
+        self.scrollback = deque(maxlen=scrollbackLines)
+        self.sgrCache = {}
+        # 回复终端查询（DSR、DA）的回调，参数为字节
+        self.responder = None
+        # 窗口标题变化的回调
+        self.titleChanged = None
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.reset()
+
+    def reset(self):
+        """
+        恢复初始状态（RIS），滚动历史保留
+        """
+        self.chars = [self.__blankChars() for _ in range(self.rows)]
+        self.attrs = [self.__blankAttrs(DEFAULT_ATTR) for _ in range(self.rows)]
+        self.cursorRow = 0
+        self.cursorColumn = 0
+        self.cursorVisible = True
+        self.wrapPending = False
+        self.attr = DEFAULT_ATTR
+        self.scrollTop = 0
+        self.scrollBottom = self.rows - 1
+        self.autoWrap = True
+        self.insertMode = False
+        self.originMode = False
+        self.applicationCursorKeys = False
+        self.bracketedPaste = False
+        self.graphics = False  # G0是否为DEC特殊图形字符集
+        self.savedCursor = None
+        self.alternate = None  # 使用备用屏幕时保存主屏幕的内容
+        self.state = self.GROUND
+        self.sequence = ''
+        self.charsetTarget = ''
+        self.damaged = set(range(self.rows))
+        self.scrolledLines = 0  # 上次取走损坏信息之后进入滚动历史的行数
+
+    def __blankChars(self):
+        return [' '] * self.columns
+
+    def __blankAttrs(self, attr):
+        return [attr] * self.columns
+
+    def eraseAttr(self):
+        # 擦除时使用当前背景色（BCE）
+        return DEFAULT_COLOR | (self.attr & (FG_MASK << BG_SHIFT))
+
+    def isAlternateScreen(self):
+        return self.alternate is not None
+
+    def takeDamage(self):
+        """
+        取走上次之后被修改的行
+        :return: (行号集合, 进入滚动历史的行数)
+        """
+        damaged, scrolled = self.damaged, self.scrolledLines
+        self.damaged = set()
+        self.scrolledLines = 0
+        return damaged, scrolled
+
+    def line(self, index):
+        """
+        按绝对行号获取一行：先是滚动历史，然后是屏幕
+        :return: (字符列表, 属性列表)
+        """
+        if index < len(self.scrollback):
+            return self.scrollback[index]
+        row = index - len(self.scrollback)
+        return self.chars[row], self.attrs[row]
+
+    def lineCount(self):
+        return len(self.scrollback) + self.rows
+
+    def lineText(self, index):
+        chars, attrs = self.line(index)
+        return ''.join(chars).rstrip()
+
+    def clearScrollback(self):
+        self.scrollback.clear()
+        self.damaged.update(range(self.rows))
+
+    def feed(self, data):
+        """
+        解析子进程输出
+        :param data: 字节，多字节字符和控制序列可以被拆分在多次调用中
+        """
+        text = self.decoder.decode(data)
+        i = 0
+        n = len(text)
+        while i < n:
+            state = self.state
+            if state == self.GROUND:
+                match = TEXT_RE.match(text, i)
+                if match:
+                    self.__print(match.group())
+                    i = match.end()
+                    continue
+                c = text[i]
+                if c == '\x1b':
+                    # 完整的CSI序列直接处理，不经过状态转换
+                    match = CSI_RE.match(text, i)
+                    if match:
+                        self.__csi(match.group(1), match.group(2))
+                        i = match.end()
+                        continue
+                elif c == '\r' and text.startswith('\n', i + 1):
+                    self.cursorColumn = 0
+                    self.__lineFeed()
+                    i += 2
+                    continue
+                self.__control(c)
+                i += 1
+            elif state == self.ESCAPE:
+                self.__escape(text[i])
+                i += 1
+            elif state == self.CSI:
+                match = CSI_FINAL_RE.search(text, i)
+                if match is None:
+                    self.__accumulate(text[i:])
+                    break
+                params = self.sequence + text[i:match.start()]
+                self.sequence = ''
+                self.state = self.GROUND
+                self.__csi(params, match.group())
+                i = match.end()
+            elif state == self.OSC:
+                match = OSC_END_RE.search(text, i)
+                if match is None:
+                    self.__accumulate(text[i:])
+                    break
+                content = self.sequence + text[i:match.start()]
+                self.sequence = ''
+                self.state = self.GROUND
+                self.__osc(content)
+                i = match.end()
+            elif state == self.CHARSET:
+                if self.charsetTarget == '(':
+                    self.graphics = text[i] == '0'
+                self.state = self.GROUND
+                i += 1
+
+    def __accumulate(self, text):
+        self.sequence += text
+        if len(self.sequence) > self.MAX_SEQUENCE:
+            self.sequence = ''
+            self.state = self.GROUND
+
+    # ---------- 文本 ----------
+
+    def __print(self, text):
+        if self.graphics:
+            text = text.translate(DEC_GRAPHICS)
+        position = 0
+        length = len(text)
+        while position < length:
+            match = ASCII_RE.match(text, position)
+            if match:
+                self.__printRun(match.group())
+                position = match.end()
+            else:
+                self.__printChar(text[position])
+                position += 1
+
+    def __printRun(self, run):
+        """
+        快速路径：连续的单宽度字符按片段写入
+        """
+        columns = self.columns
+        while run:
+            if self.wrapPending:
+                self.__wrap()
+            row = self.cursorRow
+            column = self.cursorColumn
+            chunk = run[:columns - column]
+            run = run[len(chunk):]
+            count = len(chunk)
+            chars = self.chars[row]
+            attrs = self.attrs[row]
+            if self.insertMode:
+                del chars[columns - count:]
+                del attrs[columns - count:]
+                chars[column:column] = chunk
+                attrs[column:column] = [self.attr] * count
+            else:
+                chars[column:column + count] = chunk
+                attrs[column:column + count] = [self.attr] * count
+            self.damaged.add(row)
+            column += count
+            if column >= columns:
+                self.cursorColumn = columns - 1
+                self.wrapPending = self.autoWrap
+            else:
+                self.cursorColumn = column
+
+    def __printChar(self, c):
+        width = charWidth(c)
+        if width == 0:
+            # 组合字符附加到前一个单元格
+            row, column = self.cursorRow, self.cursorColumn
+            if not self.wrapPending:
+                column -= 1
+            if column >= 0:
+                if self.chars[row][column] == WIDE_PLACEHOLDER and column > 0:
+                    column -= 1
+                self.chars[row][column] += c
+                self.damaged.add(row)
+            return
+
+        if width == 2 and self.columns < 2:
+            # 屏幕只有一列时宽字符放不下，用单宽度的替换字符代替
+            c, width = WIDE_REPLACEMENT, 1
+        if self.wrapPending:
+            self.__wrap()
+        if width == 2 and self.cursorColumn == self.columns - 1:
+            # 行尾放不下宽字符，换到下一行
+            if not self.autoWrap:
+                return
+            self.chars[self.cursorRow][self.cursorColumn] = ' '
+            self.__wrap()
+
+        row, column = self.cursorRow, self.cursorColumn
+        chars = self.chars[row]
+        attrs = self.attrs[row]
+        if self.insertMode:
+            del chars[self.columns - width:]
+            del attrs[self.columns - width:]
+            chars[column:column] = [' '] * width
+            attrs[column:column] = [self.attr] * width
+        chars[column] = c
+        attrs[column] = self.attr
+        if width == 2:
+            chars[column + 1] = WIDE_PLACEHOLDER
+            attrs[column + 1] = self.attr
+        self.damaged.add(row)
+
+        column += width
+        if column >= self.columns:
+            self.cursorColumn = self.columns - 1
+            self.wrapPending = self.autoWrap
+        else:
+            self.cursorColumn = column
+
+    def __wrap(self):
+        self.wrapPending = False
+        self.cursorColumn = 0
+        self.__lineFeed()
+
+    # ---------- 控制字符 ----------
+
+    def __control(self, c):
+        if c == '\x1b':
+            self.state = self.ESCAPE
+        elif c == '\r':
+            self.cursorColumn = 0
+            self.wrapPending = False
+        elif c in '\n\x0b\x0c':
+            self.__lineFeed()
+        elif c == '\x08':
+            if self.cursorColumn > 0:
+                self.cursorColumn -= 1
+            self.wrapPending = False
+        elif c == '\t':
+            self.cursorColumn = min(self.columns - 1, (self.cursorColumn // 8 + 1) * 8)
+            self.wrapPending = False
+        elif c == '\x0e':
+            self.graphics = True
+        elif c == '\x0f':
+            self.graphics = False
+        # BEL及其他控制字符忽略
+
+    def __lineFeed(self):
+        self.wrapPending = False
+        if self.cursorRow == self.scrollBottom:
+            self.scrollUp(1)
+        elif self.cursorRow < self.rows - 1:
+            self.cursorRow += 1
+
+    def __reverseIndex(self):
+        self.wrapPending = False
+        if self.cursorRow == self.scrollTop:
+            self.scrollDown(1)
+        elif self.cursorRow > 0:
+            self.cursorRow -= 1
+
+    def scrollUp(self, count, top=None, bottom=None):
+        """
+        滚动区域向上滚动，主屏幕从第一行滚出的内容进入滚动历史
+        """
+        top = self.scrollTop if top is None else top
+        bottom = self.scrollBottom if bottom is None else bottom
+        count = min(count, bottom - top + 1)
+        eraseAttr = self.eraseAttr()
+        if count == 1 and top == 0 and bottom == self.rows - 1 and len(self.damaged) == self.rows:
+            # 整屏滚动且所有行已标记为损坏，不需要再更新损坏集合
+            chars = self.chars.pop(0)
+            attrs = self.attrs.pop(0)
+            if self.alternate is None:
+                self.scrollback.append((chars, attrs))
+                self.scrolledLines += 1
+            self.chars.append(self.__blankChars())
+            self.attrs.append(self.__blankAttrs(eraseAttr))
+            return
+        for _ in range(count):
+            chars = self.chars.pop(top)
+            attrs = self.attrs.pop(top)
+            if top == 0 and self.alternate is None:
+                self.scrollback.append((chars, attrs))
+                self.scrolledLines += 1
+            self.chars.insert(bottom, self.__blankChars())
+            self.attrs.insert(bottom, self.__blankAttrs(eraseAttr))
+        self.damaged.update(range(top, bottom + 1))
+
+    def scrollDown(self, count, top=None, bottom=None):
+        top = self.scrollTop if top is None else top
+        bottom = self.scrollBottom if bottom is None else bottom
+        count = min(count, bottom - top + 1)
+        eraseAttr = self.eraseAttr()
+        for _ in range(count):
+            del self.chars[bottom]
+            del self.attrs[bottom]
+            self.chars.insert(top, self.__blankChars())
+            self.attrs.insert(top, self.__blankAttrs(eraseAttr))
+        self.damaged.update(range(top, bottom + 1))
+
+    # ---------- ESC序列 ----------
+
+    def __escape(self, c):
+        self.state = self.GROUND
+        if c == '[':
+            self.state = self.CSI
+            self.sequence = ''
+        elif c == ']':
+            self.state = self.OSC
+            self.sequence = ''
+        elif c in '()*+':
+            self.state = self.CHARSET
+            self.charsetTarget = c
+        elif c == '7':
+            self.__saveCursor()
+        elif c == '8':
+            self.__restoreCursor()
+        elif c == 'D':
+            self.__lineFeed()
+        elif c == 'E':
+            self.cursorColumn = 0
+            self.__lineFeed()
+        elif c == 'M':
+            self.__reverseIndex()
+        elif c == 'c':
+            self.reset()
+        elif c == '=':
+            pass  # 应用小键盘模式，不影响显示
+        elif c == '>':
+            pass
+
+    def __saveCursor(self):
+        self.savedCursor = (self.cursorRow, self.cursorColumn, self.attr, self.graphics, self.originMode)
+
+    def __restoreCursor(self):
+        if self.savedCursor is None:
+            self.cursorRow = self.cursorColumn = 0
+            return
+        row, column, self.attr, self.graphics, self.originMode = self.savedCursor
+        self.cursorRow = min(row, self.rows - 1)
+        self.cursorColumn = min(column, self.columns - 1)
+        self.wrapPending = False
+
+    # ---------- CSI序列 ----------
+
+    def __csi(self, params, final):
+        if final == 'm' and not params.startswith('>'):
+            # 颜色设置最常见，结果按(当前属性, 参数)缓存
+            key = (self.attr, params)
+            attr = self.sgrCache.get(key)
+            if attr is None:
+                self.__selectGraphicRendition(params)
+                if len(self.sgrCache) > 4096:
+                    self.sgrCache.clear()
+                self.sgrCache[key] = self.attr
+            else:
+                self.attr = attr
+            return
+
+        private = ''
+        if params and params[0] in '?>=!':
+            private, params = params[0], params[1:]
+        # 去掉中间字节（如DECSCUSR的空格）
+        params = params.rstrip(' !"#$%&\'()*+,-./')
+        values = []
+        for part in params.split(';') if params else []:
+            # 冒号分隔的子参数只取第一个
+            part = part.split(':')[0]
+            values.append(int(part) if part.isdigit() else 0)
+
+        def arg(index, default=1):
+            if index < len(values) and values[index] != 0:
+                return values[index]
+            return default
+
+        if private == '?':
+            if final in 'hl':
+                self.__setPrivateModes(values, final == 'h')
+            return
+        if private:
+            if final == 'c' and private == '>':
+                self.__respond('\x1b[>0;0;0c')
+            return
+
+        self.wrapPending = False
+        if final == 'A':
+            self.cursorRow = max(self.scrollTop if self.cursorRow >= self.scrollTop else 0, self.cursorRow - arg(0))
+        elif final == 'B' or final == 'e':
+            self.cursorRow = min(self.scrollBottom if self.cursorRow <= self.scrollBottom else self.rows - 1, self.cursorRow + arg(0))
+        elif final == 'C' or final == 'a':
+            self.cursorColumn = min(self.columns - 1, self.cursorColumn + arg(0))
+        elif final == 'D':
+            self.cursorColumn = max(0, self.cursorColumn - arg(0))
+        elif final == 'E':
+            self.cursorRow = min(self.rows - 1, self.cursorRow + arg(0))
+            self.cursorColumn = 0
+        elif final == 'F':
+            self.cursorRow = max(0, self.cursorRow - arg(0))
+            self.cursorColumn = 0
+        elif final == 'G' or final == '`':
+            self.cursorColumn = min(self.columns - 1, arg(0) - 1)
+        elif final == 'H' or final == 'f':
+            self.__moveTo(arg(0) - 1, arg(1) - 1)
+        elif final == 'd':
+            self.__moveTo(arg(0) - 1, self.cursorColumn)
+        elif final == 'J':
+            self.__eraseDisplay(values[0] if values else 0)
+        elif final == 'K':
+            self.__eraseLine(values[0] if values else 0)
+        elif final == 'X':
+            self.__eraseCells(self.cursorRow, self.cursorColumn, self.cursorColumn + arg(0))
+        elif final == '@':
+            self.__insertCells(arg(0))
+        elif final == 'P':
+            self.__deleteCells(arg(0))
+        elif final == 'L':
+            if self.scrollTop <= self.cursorRow <= self.scrollBottom:
+                self.scrollDown(arg(0), self.cursorRow, self.scrollBottom)
+                self.cursorColumn = 0
+        elif final == 'M':
+            if self.scrollTop <= self.cursorRow <= self.scrollBottom:
+                self.__deleteLines(arg(0))
+        elif final == 'S':
+            self.scrollUp(arg(0))
+        elif final == 'T':
+            self.scrollDown(arg(0))
+        elif final == 'r':
+            top = arg(0) - 1
+            bottom = arg(1, self.rows) - 1
+            if 0 <= top < bottom < self.rows:
+                self.scrollTop, self.scrollBottom = top, bottom
+                self.__moveTo(0, 0)
+        elif final == 's':
+            self.__saveCursor()
+        elif final == 'u':
+            self.__restoreCursor()
+        elif final == 'h' or final == 'l':
+            if 4 in values:
+                self.insertMode = final == 'h'
+        elif final == 'n':
+            if values and values[0] == 6:
+                self.__respond(f'\x1b[{self.cursorRow + 1};{self.cursorColumn + 1}R')
+            elif values and values[0] == 5:
+                self.__respond('\x1b[0n')
+        elif final == 'c':
+            self.__respond('\x1b[?1;2c')
+        elif final == 'b':
+            # 重复前一个字符
+            column = self.cursorColumn - 1 if not self.wrapPending else self.cursorColumn
+            if column >= 0:
+                self.__print(self.chars[self.cursorRow][column] * arg(0))
+
+    def __moveTo(self, row, column):
+        if self.originMode:
+            row = min(self.scrollBottom, row + self.scrollTop)
+        self.cursorRow = max(0, min(self.rows - 1, row))
+        self.cursorColumn = max(0, min(self.columns - 1, column))
+        self.wrapPending = False
+
+    def __eraseCells(self, row, start, end):
+        start = max(0, start)
+        end = min(self.columns, end)
+        if start >= end:
+            return
+        self.chars[row][start:end] = [' '] * (end - start)
+        self.attrs[row][start:end] = [self.eraseAttr()] * (end - start)
+        self.damaged.add(row)
+
+    def __eraseLine(self, mode):
+        row = self.cursorRow
+        if mode == 0:
+            self.__eraseCells(row, self.cursorColumn, self.columns)
+        elif mode == 1:
+            self.__eraseCells(row, 0, self.cursorColumn + 1)
+        else:
+            self.__eraseCells(row, 0, self.columns)
+
+    def __eraseDisplay(self, mode):
+        if mode == 0:
+            self.__eraseLine(0)
+            rows = range(self.cursorRow + 1, self.rows)
+        elif mode == 1:
+            self.__eraseLine(1)
+            rows = range(0, self.cursorRow)
+        elif mode == 2:
+            rows = range(self.rows)
+        else:
+            self.clearScrollback()
+            return
+        for row in rows:
+            self.__eraseCells(row, 0, self.columns)
+
+    def __insertCells(self, count):
+        row, column = self.cursorRow, self.cursorColumn
+        count = min(count, self.columns - column)
+        chars, attrs = self.chars[row], self.attrs[row]
+        del chars[self.columns - count:]
+        del attrs[self.columns - count:]
+        chars[column:column] = [' '] * count
+        attrs[column:column] = [self.eraseAttr()] * count
+        self.damaged.add(row)
+
+    def __deleteCells(self, count):
+        row, column = self.cursorRow, self.cursorColumn
+        count = min(count, self.columns - column)
+        chars, attrs = self.chars[row], self.attrs[row]
+        del chars[column:column + count]
+        del attrs[column:column + count]
+        chars.extend([' '] * count)
+        attrs.extend([self.eraseAttr()] * count)
+        self.damaged.add(row)
+
+    def __deleteLines(self, count):
+        top = self.cursorRow
+        bottom = self.scrollBottom
+        count = min(count, bottom - top + 1)
+        eraseAttr = self.eraseAttr()
+        for _ in range(count):
+            del self.chars[top]
+            del self.attrs[top]
+            self.chars.insert(bottom, self.__blankChars())
+            self.attrs.insert(bottom, self.__blankAttrs(eraseAttr))
+        self.damaged.update(range(top, bottom + 1))
+        self.cursorColumn = 0
+
+    def __setPrivateModes(self, values, enabled):
+        for mode in values:
+            if mode == 1:
+                self.applicationCursorKeys = enabled
+            elif mode == 6:
+                self.originMode = enabled
+                self.__moveTo(0, 0)
+            elif mode == 7:
+                self.autoWrap = enabled
+            elif mode == 25:
+                self.cursorVisible = enabled
+                self.damaged.add(self.cursorRow)
+            elif mode in (47, 1047, 1049):
+                if mode == 1049 and enabled:
+                    self.__saveCursor()
+                self.__switchScreen(enabled)
+                if mode == 1049 and not enabled:
+                    self.__restoreCursor()
+            elif mode == 2004:
+                self.bracketedPaste = enabled
+
+    def __switchScreen(self, alternate):
+        if alternate == (self.alternate is not None):
+            return
+        if alternate:
+            self.alternate = (self.chars, self.attrs)
+            self.chars = [self.__blankChars() for _ in range(self.rows)]
+            self.attrs = [self.__blankAttrs(DEFAULT_ATTR) for _ in range(self.rows)]
+        else:
+            self.chars, self.attrs = self.alternate
+            self.alternate = None
+        self.damaged.update(range(self.rows))
+
+    def __selectGraphicRendition(self, params):
+        # 冒号形式的颜色（38:2::r:g:b）转换为分号形式
+        values = [int(part) if part.isdigit() else 0 for part in params.replace(':', ';').split(';')] if params else [0]
+        attr = self.attr
+        i = 0
+        while i < len(values):
+            value = values[i]
+            if value == 0:
+                attr = DEFAULT_ATTR
+            elif value == 1:
+                attr |= BOLD
+            elif value == 2:
+                attr |= DIM
+            elif value == 3:
+                attr |= ITALIC
+            elif value == 4:
+                attr |= UNDERLINE
+            elif value == 7:
+                attr |= REVERSE
+            elif value == 22:
+                attr &= ~(BOLD | DIM)
+            elif value == 23:
+                attr &= ~ITALIC
+            elif value == 24:
+                attr &= ~UNDERLINE
+            elif value == 27:
+                attr &= ~REVERSE
+            elif 30 <= value <= 37:
+                attr = (attr & ~FG_MASK) | (value - 30)
+            elif value == 39:
+                attr = (attr & ~FG_MASK) | DEFAULT_COLOR
+            elif 40 <= value <= 47:
+                attr = (attr & ~(FG_MASK << BG_SHIFT)) | ((value - 40) << BG_SHIFT)
+            elif value == 49:
+                attr = (attr & ~(FG_MASK << BG_SHIFT)) | (DEFAULT_COLOR << BG_SHIFT)
+            elif 90 <= value <= 97:
+                attr = (attr & ~FG_MASK) | (value - 90 + 8)
+            elif 100 <= value <= 107:
+                attr = (attr & ~(FG_MASK << BG_SHIFT)) | ((value - 100 + 8) << BG_SHIFT)
+            elif value in (38, 48) and i + 1 < len(values):
+                color = None
+                if values[i + 1] == 5 and i + 2 < len(values):
+                    color = values[i + 2] & 0xFF
+                    i += 2
+                elif values[i + 1] == 2 and i + 4 < len(values):
+                    color = rgbToIndex(values[i + 2] & 0xFF, values[i + 3] & 0xFF, values[i + 4] & 0xFF)
+                    i += 4
+                if color is not None:
+                    if value == 38:
+                        attr = (attr & ~FG_MASK) | color
+                    else:
+                        attr = (attr & ~(FG_MASK << BG_SHIFT)) | (color << BG_SHIFT)
+            i += 1
+        self.attr = attr
+
+    def __osc(self, content):
+        command, _, argument = content.partition(';')
+        if command in ('0', '2') and self.titleChanged is not None:
+            self.titleChanged(argument)
+
+    def __respond(self, text):
+        if self.responder is not None:
+            self.responder(text.encode('ascii'))
+
+    # ---------- 大小 ----------
+
+    def resize(self, rows, columns):
+        """
+        改变屏幕大小，不重排已有内容
+        """
+        rows = max(1, rows)
+        columns = max(1, columns)
+        if rows == self.rows and columns == self.columns:
+            return
+
+        def resizeGrid(chars, attrs, keepBottom):
+            # 行数减少时，若光标会超出屏幕则把顶部的行移入滚动历史，否则丢弃底部的空行
+            while len(chars) > rows:
+                if keepBottom and self.cursorRow >= rows:
+                    rowChars, rowAttrs = chars.pop(0), attrs.pop(0)
+                    self.scrollback.append((rowChars, rowAttrs))
+                    self.cursorRow -= 1
+                else:
+                    chars.pop()
+                    attrs.pop()
+            while len(chars) < rows:
+                chars.append([' '] * columns)
+                attrs.append([DEFAULT_ATTR] * columns)
+            for row in range(rows):
+                if len(chars[row]) > columns:
+                    del chars[row][columns:]
+                    del attrs[row][columns:]
+                elif len(chars[row]) < columns:
+                    chars[row].extend([' '] * (columns - len(chars[row])))
+                    attrs[row].extend([DEFAULT_ATTR] * (columns - len(attrs[row])))
+
+        self.columns = columns
+        if self.alternate is not None:
+            mainChars, mainAttrs = self.alternate
+            cursorRow = self.cursorRow
+            resizeGrid(mainChars, mainAttrs, keepBottom=False)
+            self.cursorRow = cursorRow
+            resizeGrid(self.chars, self.attrs, keepBottom=False)
+        else:
+            resizeGrid(self.chars, self.attrs, keepBottom=True)
+        self.rows = rows
+        self.cursorRow = max(0, min(self.cursorRow, rows - 1))
+        self.cursorColumn = min(self.cursorColumn, columns - 1)
+        self.wrapPending = False
+        self.scrollTop = 0
+        self.scrollBottom = rows - 1
+        self.damaged = set(range(rows))
@@ -0,0 +1,101 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from TerminalView import TerminalView
+
+class TerminalSession(QWidget):
+    """
+    一个终端会话：TerminalView加上从ShellPool取得的伪终端shell
+    """
+    titleChanged = pyqtSignal(str)  # 标题变化
+    finished = pyqtSignal(int)  # shell退出，参数为退出码
+
+    def __init__(self, pool, workingDirectory=None, parent=None):
+        """
+        :param pool: ShellPool
+        :param workingDirectory: 工作目录，默认使用池的工作目录
+        """
+        super().__init__(parent)
+        self.process = None
+        self.__initUI()
+        self.__initProcess(pool, workingDirectory)
+
+    def __initUI(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        self.terminalView = TerminalView()
+        self.terminalView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.terminalView.customContextMenuRequested.connect(self.showContextMenu)
+        self.terminalView.titleChanged.connect(self.titleChanged)
+        layout.addWidget(self.terminalView)
+        self.setFocusProxy(self.terminalView)
+
+    def __initProcess(self, pool, workingDirectory):
+        rows, columns = self.terminalView.terminalSize()
+        try:
+            self.process, data = pool.acquire(rows, columns, workingDirectory)
+        except Exception as e:
+            self.terminalView.feed(f"Error starting terminal process: {str(e)}\r\n".encode('utf-8'))
+            return
+
+        # 池中的进程在空闲期间已经输出了提示符，先显示出来
+        self.process.setParent(self)
+        self.process.dataReceived.connect(self.terminalView.feed)
+        self.process.finished.connect(self.onProcessFinished)
+        self.terminalView.inputReady.connect(self.process.write)
+        self.terminalView.sizeChanged.connect(self.process.resize)
+        if data:
+            self.terminalView.feed(data)
+        if not self.process.isRunning():
+            # 交出之前已经退出，finished信号已经错过
+            self.onProcessFinished(-1)
+
+    def onProcessFinished(self, exitCode):
+        self.terminalView.feed(f"\r\nTerminal process finished with exit code {exitCode}.\r\n".encode('utf-8'))
+        self.finished.emit(exitCode)
+
+    def isRunning(self):
+        return self.process is not None and self.process.isRunning()
+
+    def executeCommand(self, command):
+        """
+        执行命令，与在终端中输入并回车相同，shell负责回显
+        :param command: 命令行
+        :return: 是否已发送
+        """
+        if not self.isRunning():
+            return False
+        self.process.write(f"{command}\r".encode('utf-8'))
+        return True
+
+    def showContextMenu(self, position):
+        menu = QMenu()
+        copyAction = menu.addAction("Copy", self.terminalView.copy)
+        copyAction.setEnabled(bool(self.terminalView.selectedText()))
+        menu.addAction("Paste", self.terminalView.paste)
+        menu.addSeparator()
+        menu.addAction("Clear Terminal", self.clear)
+        menu.exec_(self.terminalView.mapToGlobal(position))
+
+    def clear(self):
+        """
+        清除滚动历史，屏幕由shell响应Ctrl+L重绘
+        """
+        self.terminalView.clearScrollback()
+        if self.isRunning():
+            self.process.write(b'\x0c')
+
+    def stop(self, msecs=3000):
+        """
+        结束shell
+        :param msecs: 等待退出的毫秒数，超时后强制结束
+        """
+        if not self.isRunning():
+            return
+        self.process.terminate()
+        if not self.process.waitForFinished(msecs):
+            self.process.kill()
+            self.process.waitForFinished(msecs)
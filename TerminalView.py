@@ -0,0 +1,441 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from TerminalScreen import (TerminalScreen, DEFAULT_COLOR, FG_MASK, BG_SHIFT, BOLD, UNDERLINE,
+                            REVERSE, ITALIC, DIM, WIDE_PLACEHOLDER)
+
+def buildPalette():
+    """
+    xterm的256色调色板
+    """
+    base = [
+        (0x00, 0x00, 0x00), (0xcd, 0x31, 0x31), (0x0d, 0xbc, 0x79), (0xe5, 0xe5, 0x10),
+        (0x24, 0x72, 0xc8), (0xbc, 0x3f, 0xbc), (0x11, 0xa8, 0xcd), (0xe5, 0xe5, 0xe5),
+        (0x66, 0x66, 0x66), (0xf1, 0x4c, 0x4c), (0x23, 0xd1, 0x8b), (0xf5, 0xf5, 0x43),
+        (0x3b, 0x8e, 0xea), (0xd6, 0x70, 0xd6), (0x29, 0xb8, 0xdb), (0xff, 0xff, 0xff),
+    ]
+    colors = [QColor(*rgb) for rgb in base]
+    levels = [0, 95, 135, 175, 215, 255]
+    for r in levels:
+        for g in levels:
+            for b in levels:
+                colors.append(QColor(r, g, b))
+    for i in range(24):
+        value = 8 + i * 10
+        colors.append(QColor(value, value, value))
+    return colors
+
+class TerminalView(QAbstractScrollArea):
+    """
+    终端视图：绘制TerminalScreen的单元格网格，输出每帧最多刷新一次，且只重绘被修改的行
+    """
+    inputReady = pyqtSignal(bytes)  # 需要写入终端的输入
+    sizeChanged = pyqtSignal(int, int)  # 行数, 列数
+    titleChanged = pyqtSignal(str)  # 窗口标题
+
+    REFRESH_INTERVAL = 16  # 毫秒，约为一帧
+    DEFAULT_FOREGROUND = QColor(0xcc, 0xcc, 0xcc)
+    DEFAULT_BACKGROUND = QColor(0x1e, 0x1e, 0x1e)
+    SELECTION_COLOR = QColor(0x26, 0x4f, 0x78, 160)
+
+    # 光标键和编辑键对应的序列
+    CURSOR_KEYS = {Qt.Key_Up: 'A', Qt.Key_Down: 'B', Qt.Key_Right: 'C', Qt.Key_Left: 'D',
+                   Qt.Key_Home: 'H', Qt.Key_End: 'F'}
+    TILDE_KEYS = {Qt.Key_Insert: 2, Qt.Key_Delete: 3, Qt.Key_PageUp: 5, Qt.Key_PageDown: 6,
+                  Qt.Key_F5: 15, Qt.Key_F6: 17, Qt.Key_F7: 18, Qt.Key_F8: 19,
+                  Qt.Key_F9: 20, Qt.Key_F10: 21, Qt.Key_F11: 23, Qt.Key_F12: 24}
+    FUNCTION_KEYS = {Qt.Key_F1: 'P', Qt.Key_F2: 'Q', Qt.Key_F3: 'R', Qt.Key_F4: 'S'}
+
+    def __init__(self, parent=None, scrollbackLines=10000):
+        super().__init__(parent)
+        self.screen = TerminalScreen(24, 80, scrollbackLines)
+        self.screen.responder = self.inputReady.emit
+        self.screen.titleChanged = self.titleChanged.emit
+        self.colors = buildPalette()
+        # 自动滚动到底部，用户向上滚动查看历史时停止
+        self.following = True
+        self.lastCursor = (0, 0)
+        # 选择区域：(绝对行号, 列)
+        self.selectionAnchor = None
+        self.selectionEnd = None
+
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setSingleShot(True)
+        self.refreshTimer.setInterval(self.REFRESH_INTERVAL)
+        self.refreshTimer.timeout.connect(self.refresh)
+
+        self.__initUI()
+
+    def __initUI(self):
+        font = QFont("Consolas", 10)
+        font.setStyleHint(QFont.Monospace)
+        font.setFixedPitch(True)
+        self.setTerminalFont(font)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setAttribute(Qt.WA_InputMethodEnabled)
+        self.viewport().setAttribute(Qt.WA_OpaquePaintEvent)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().setSingleStep(1)
+
+    def setTerminalFont(self, font):
+        """
+        设置字体，预先生成粗体、斜体、下划线的组合
+        """
+        self.setFont(font)
+        metrics = QFontMetrics(font)
+        self.cellWidth = max(1, metrics.horizontalAdvance('M'))
+        self.cellHeight = max(1, metrics.height())
+        self.ascent = metrics.ascent()
+        self.fonts = {}
+        for bold in (False, True):
+            for italic in (False, True):
+                for underline in (False, True):
+                    variant = QFont(font)
+                    variant.setBold(bold)
+                    variant.setItalic(italic)
+                    variant.setUnderline(underline)
+                    self.fonts[(bold, italic, underline)] = variant
+        self.__updateSize()
+
+    def feed(self, data):
+        """
+        写入终端输出，视图在下一帧刷新
+        :param data: 字节
+        """
+        self.screen.feed(data)
+        if not self.refreshTimer.isActive():
+            self.refreshTimer.start()
+
+    def refresh(self):
+        """
+        根据屏幕模型的损坏信息重绘
+        """
+        damaged, scrolled = self.screen.takeDamage()
+        # 光标移动时原位置和新位置都需要重绘
+        cursor = (self.screen.cursorRow, self.screen.cursorColumn)
+        if cursor != self.lastCursor:
+            damaged.add(self.lastCursor[0])
+            damaged.add(cursor[0])
+            self.lastCursor = cursor
+
+        self.__updateScrollRange()
+        if scrolled or not self.following:
+            if self.following:
+                self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+            self.viewport().update()
+            return
+
+        firstLine = self.verticalScrollBar().value()
+        offset = len(self.screen.scrollback) - firstLine
+        region = QRegion()
+        for row in damaged:
+            if row < self.screen.rows:
+                region += QRect(0, (row + offset) * self.cellHeight, self.viewport().width(), self.cellHeight)
+        if not region.isEmpty():
+            self.viewport().update(region)
+
+    def clearScrollback(self):
+        self.screen.clearScrollback()
+        self.selectionAnchor = self.selectionEnd = None
+        self.__updateScrollRange()
+        self.viewport().update()
+
+    def __updateScrollRange(self):
+        scrollBar = self.verticalScrollBar()
+        scrollBar.setPageStep(self.screen.rows)
+        scrollBar.setRange(0, len(self.screen.scrollback))
+
+    def __updateSize(self):
+        rows = max(1, self.viewport().height() // self.cellHeight)
+        columns = max(1, self.viewport().width() // self.cellWidth)
+        if rows != self.screen.rows or columns != self.screen.columns:
+            self.screen.resize(rows, columns)
+            self.sizeChanged.emit(rows, columns)
+        self.__updateScrollRange()
+        if self.following:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self.viewport().update()
+
+    def terminalSize(self):
+        return self.screen.rows, self.screen.columns
+
+    # ---------- 绘制 ----------
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = event.rect()
+        painter.fillRect(rect, self.DEFAULT_BACKGROUND)
+
+        firstLine = self.verticalScrollBar().value()
+        firstRow = rect.top() // self.cellHeight
+        lastRow = min(rect.bottom() // self.cellHeight, self.screen.rows)
+        lineCount = self.screen.lineCount()
+        selection = self.__selectionRange()
+        cursorLine = len(self.screen.scrollback) + self.screen.cursorRow
+
+        for row in range(firstRow, lastRow + 1):
+            line = firstLine + row
+            if line >= lineCount:
+                break
+            chars, attrs = self.screen.line(line)
+            y = row * self.cellHeight
+            self.__drawLine(painter, y, chars, attrs)
+            if selection is not None:
+                self.__drawSelection(painter, y, line, len(chars), selection)
+            if line == cursorLine and self.screen.cursorVisible:
+                self.__drawCursor(painter, y, chars, attrs)
+
+    def __colors(self, attr):
+        foreground = attr & FG_MASK
+        background = (attr >> BG_SHIFT) & FG_MASK
+        if attr & BOLD and foreground < 8:
+            # 粗体的基本颜色显示为高亮颜色
+            foreground += 8
+        foregroundColor = self.DEFAULT_FOREGROUND if foreground == DEFAULT_COLOR else self.colors[foreground]
+        backgroundColor = None if background == DEFAULT_COLOR else self.colors[background]
+        if attr & REVERSE:
+            foregroundColor, backgroundColor = (backgroundColor or self.DEFAULT_BACKGROUND), foregroundColor
+        if attr & DIM:
+            foregroundColor = foregroundColor.darker(150)
+        return foregroundColor, backgroundColor
+
+    def __drawLine(self, painter, y, chars, attrs):
+        columns = len(chars)
+        start = 0
+        while start < columns:
+            attr = attrs[start]
+            end = start + 1
+            while end < columns and attrs[end] == attr:
+                end += 1
+            foreground, background = self.__colors(attr)
+            x = start * self.cellWidth
+            if background is not None:
+                painter.fillRect(x, y, (end - start) * self.cellWidth, self.cellHeight, background)
+
+            text = ''.join(chars[start:end])
+            if text.strip() or attr & UNDERLINE:
+                painter.setPen(foreground)
+                painter.setFont(self.fonts[(bool(attr & BOLD), bool(attr & ITALIC), bool(attr & UNDERLINE))])
+                if text.isascii():
+                    painter.drawText(x, y + self.ascent, text)
+                else:
+                    # 宽字符和非ASCII字符的字形宽度不一定是单元格宽度的整数倍，逐个对齐到单元格
+                    for column in range(start, end):
+                        c = chars[column]
+                        if c != WIDE_PLACEHOLDER and c != ' ':
+                            painter.drawText(column * self.cellWidth, y + self.ascent, c)
+            start = end
+
+    def __drawCursor(self, painter, y, chars, attrs):
+        column = min(self.screen.cursorColumn, len(chars) - 1)
+        x = column * self.cellWidth
+        width = self.cellWidth * (2 if column + 1 < len(chars) and chars[column + 1] == WIDE_PLACEHOLDER else 1)
+        foreground, background = self.__colors(attrs[column])
+        if self.hasFocus():
+            painter.fillRect(x, y, width, self.cellHeight, foreground)
+            painter.setPen(background or self.DEFAULT_BACKGROUND)
+            painter.setFont(self.fonts[(bool(attrs[column] & BOLD), False, False)])
+            if chars[column].strip():
+                painter.drawText(x, y + self.ascent, chars[column])
+        else:
+            painter.setPen(foreground)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(x, y, width - 1, self.cellHeight - 1)
+
+    def __drawSelection(self, painter, y, line, columns, selection):
+        (startLine, startColumn), (endLine, endColumn) = selection
+        if line < startLine or line > endLine:
+            return
+        first = startColumn if line == startLine else 0
+        last = endColumn if line == endLine else columns
+        if last > first:
+            painter.fillRect(first * self.cellWidth, y, (last - first) * self.cellWidth, self.cellHeight, self.SELECTION_COLOR)
+
+    # ---------- 选择和剪贴板 ----------
+
+    def __selectionRange(self):
+        if self.selectionAnchor is None or self.selectionEnd is None or self.selectionAnchor == self.selectionEnd:
+            return None
+        return tuple(sorted((self.selectionAnchor, self.selectionEnd)))
+
+    def __cellAt(self, position):
+        line = self.verticalScrollBar().value() + max(0, position.y()) // self.cellHeight
+        line = min(line, self.screen.lineCount() - 1)
+        column = max(0, min(self.screen.columns, (position.x() + self.cellWidth // 2) // self.cellWidth))
+        return line, column
+
+    def selectedText(self):
+        selection = self.__selectionRange()
+        if selection is None:
+            return ''
+        (startLine, startColumn), (endLine, endColumn) = selection
+        lines = []
+        for line in range(startLine, endLine + 1):
+            chars, attrs = self.screen.line(line)
+            first = startColumn if line == startLine else 0
+            last = endColumn if line == endLine else len(chars)
+            lines.append(''.join(chars[first:last]).rstrip())
+        return '\n'.join(lines)
+
+    def copy(self):
+        text = self.selectedText()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def paste(self):
+        text = QApplication.clipboard().text()
+        if not text:
+            return
+        text = text.replace('\r\n', '\r').replace('\n', '\r')
+        if self.screen.bracketedPaste:
+            text = '\x1b[200~' + text + '\x1b[201~'
+        self.__sendInput(text)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.selectionAnchor = self.selectionEnd = self.__cellAt(event.pos())
+            self.viewport().update()
+        elif event.button() == Qt.MiddleButton:
+            self.paste()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self.selectionAnchor is not None:
+            self.selectionEnd = self.__cellAt(event.pos())
+            self.viewport().update()
+
+    def mouseDoubleClickEvent(self, event):
+        # 双击选中一个单词
+        line, column = self.__cellAt(event.pos())
+        chars, attrs = self.screen.line(line)
+        column = min(column, len(chars) - 1)
+        if not chars[column].strip():
+            return
+        start = column
+        while start > 0 and chars[start - 1].strip() and chars[start - 1] not in '"\'()[]{}<>|;':
+            start -= 1
+        end = column
+        while end < len(chars) and chars[end].strip() and chars[end] not in '"\'()[]{}<>|;':
+            end += 1
+        self.selectionAnchor, self.selectionEnd = (line, start), (line, end)
+        self.viewport().update()
+
+    # ---------- 键盘输入 ----------
+
+    def __sendInput(self, text):
+        # 输入时回到底部并清除选择
+        if not self.following:
+            self.following = True
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        if self.selectionAnchor is not None:
+            self.selectionAnchor = self.selectionEnd = None
+            self.viewport().update()
+        self.inputReady.emit(text.encode('utf-8'))
+
+    def focusNextPrevChild(self, next):
+        # Tab键交给终端处理
+        return False
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        modifiers = event.modifiers()
+        ctrl = bool(modifiers & Qt.ControlModifier)
+        shift = bool(modifiers & Qt.ShiftModifier)
+        alt = bool(modifiers & Qt.AltModifier)
+
+        # 界面快捷键
+        if ctrl and shift and key == Qt.Key_C:
+            self.copy()
+            return
+        if ctrl and shift and key == Qt.Key_V:
+            self.paste()
+            return
+        if shift and key in (Qt.Key_PageUp, Qt.Key_PageDown):
+            step = self.screen.rows if key == Qt.Key_PageDown else -self.screen.rows
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() + step)
+            return
+
+        sequence = self.__keySequence(event, key, ctrl, shift, alt)
+        if sequence:
+            self.__sendInput(sequence)
+
+    def __keySequence(self, event, key, ctrl, shift, alt):
+        modifier = 1 + (1 if shift else 0) + (2 if alt else 0) + (4 if ctrl else 0)
+        if key in self.CURSOR_KEYS:
+            final = self.CURSOR_KEYS[key]
+            if modifier > 1:
+                return f'\x1b[1;{modifier}{final}'
+            return ('\x1bO' if self.screen.applicationCursorKeys else '\x1b[') + final
+        if key in self.TILDE_KEYS:
+            number = self.TILDE_KEYS[key]
+            return f'\x1b[{number};{modifier}~' if modifier > 1 else f'\x1b[{number}~'
+        if key in self.FUNCTION_KEYS:
+            final = self.FUNCTION_KEYS[key]
+            return f'\x1b[1;{modifier}{final}' if modifier > 1 else '\x1bO' + final
+        if key in (Qt.Key_Return, Qt.Key_Enter):
+            return '\x1b\r' if alt else '\r'
+        if key == Qt.Key_Backspace:
+            return '\x08' if ctrl else ('\x1b\x7f' if alt else '\x7f')
+        if key == Qt.Key_Backtab or (key == Qt.Key_Tab and shift):
+            return '\x1b[Z'
+        if key == Qt.Key_Tab:
+            return '\t'
+        if key == Qt.Key_Escape:
+            return '\x1b'
+
+        if ctrl:
+            if Qt.Key_A <= key <= Qt.Key_Z:
+                return chr(key - Qt.Key_A + 1)
+            controls = {Qt.Key_BracketLeft: '\x1b', Qt.Key_Backslash: '\x1c', Qt.Key_BracketRight: '\x1d',
+                        Qt.Key_Space: '\x00', Qt.Key_At: '\x00', Qt.Key_Slash: '\x1f', Qt.Key_Underscore: '\x1f'}
+            if key in controls:
+                return controls[key]
+
+        text = event.text()
+        if text and alt:
+            return '\x1b' + text
+        return text
+
+    def inputMethodEvent(self, event):
+        # 输入法提交的文本（如中文）
+        if event.commitString():
+            self.__sendInput(event.commitString())
+        event.accept()
+
+    def inputMethodQuery(self, query):
+        if query == Qt.ImCursorRectangle:
+            line = len(self.screen.scrollback) + self.screen.cursorRow - self.verticalScrollBar().value()
+            return QRect(self.screen.cursorColumn * self.cellWidth, line * self.cellHeight, self.cellWidth, self.cellHeight)
+        return super().inputMethodQuery(query)
+
+    # ---------- 滚动和大小 ----------
+
+    def wheelEvent(self, event):
+        if self.screen.isAlternateScreen():
+            # 全屏程序（less、htop等）没有滚动历史，滚轮转换为方向键
+            steps = event.angleDelta().y() // 40
+            if steps:
+                final = 'A' if steps > 0 else 'B'
+                prefix = '\x1bO' if self.screen.applicationCursorKeys else '\x1b['
+                self.inputReady.emit(((prefix + final) * abs(steps)).encode('ascii'))
+            return
+        super().wheelEvent(event)
+
+    def scrollContentsBy(self, dx, dy):
+        scrollBar = self.verticalScrollBar()
+        self.following = scrollBar.value() == scrollBar.maximum()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.__updateSize()
+
+    def focusInEvent(self, event):
+        super().focusInEvent(event)
+        self.viewport().update()
+
+    def focusOutEvent(self, event):
+        super().focusOutEvent(event)
+        self.viewport().update()
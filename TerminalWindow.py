@@ -1,20 +1,37 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+import codecs
 import sys
 import os
 
+from LineRingBuffer import LineRingBuffer
+from PtyProcess import PtyProcess
+from ShellPool import ShellPool
+from TerminalSession import TerminalSession
+
 class TerminalWindow(QDockWidget):
     """
-    终端窗口类，通过进程通信与真正的PowerShell交互
+    终端窗口类，通过进程通信与真正的PowerShell交互。
+    支持伪终端的平台上以标签页形式打开多个终端会话，shell从预先启动的ShellPool中取得，
+    输出由TerminalView按VT100/xterm协议显示；否则通过管道与进程交互，按行显示输出。
     """
+    MAX_LINES = 10000  # 保留的滚动行数
+    FLUSH_INTERVAL = 16  # 输出刷新到视图的最小间隔（毫秒），约为一帧
     
     def __init__(self, parent=None):
         super().__init__("Terminal", parent)
         self.process = None
+        self.usePty = PtyProcess.isSupported()
+        self.shellPool = None
+        self.sessionCount = 0
         self.command_history = []
         self.history_index = 0
         self.current_command_start = 0  # 记录当前命令在文本中的起始位置
+        # 进程输出先进入有界的环形缓冲区，每帧最多刷新一次到视图
+        self.outputBuffer = LineRingBuffer(self.MAX_LINES)
+        # 增量解码，多字节字符被拆分到两次读取中时不会丢失
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         self.__initUI()
         self.__initProcess()
         
@@ -28,9 +45,30 @@ class TerminalWindow(QDockWidget):
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.mainWidget.setLayout(self.layout)
         
+        if self.usePty:
+            self.tabWidget = QTabWidget()
+            self.tabWidget.setTabsClosable(True)
+            self.tabWidget.setMovable(True)
+            self.tabWidget.setDocumentMode(True)
+            self.tabWidget.tabCloseRequested.connect(self.closeSession)
+            newButton = QToolButton()
+            newButton.setText("+")
+            newButton.setToolTip("New Terminal")
+            newButton.setAutoRaise(True)
+            newButton.clicked.connect(self.newSession)
+            self.tabWidget.setCornerWidget(newButton, Qt.TopRightCorner)
+            self.layout.addWidget(self.tabWidget)
+            self.setWidget(self.mainWidget)
+            self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea)
+            return
+        
         # 创建文本显示区域
-        self.terminalText = QTextEdit()
+        self.terminalText = QPlainTextEdit()
         self.terminalText.setFont(QFont("Consolas", 10))
+        self.terminalText.setMaximumBlockCount(self.MAX_LINES)
+        # 终端输出不需要撤销，撤销栈会随输出无限增长
+        self.terminalText.setUndoRedoEnabled(False)
+        self.terminalText.setLineWrapMode(QPlainTextEdit.NoWrap)
         self.terminalText.installEventFilter(self)
         self.terminalText.setContextMenuPolicy(Qt.CustomContextMenu)
         self.terminalText.customContextMenuRequested.connect(self.showContextMenu)
@@ -44,10 +82,20 @@ class TerminalWindow(QDockWidget):
         # 设置可停靠区域
         self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea)
         
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(self.FLUSH_INTERVAL)
+        self.flushTimer.timeout.connect(self.flushOutput)
+        
     def __initProcess(self):
         """
         初始化PowerShell进程
         """
+        if self.usePty:
+            self.shellPool = ShellPool(self)
+            # 第一个会话在事件循环开始后再创建，不阻塞主窗口的初始化
+            QTimer.singleShot(0, self.newSession)
+            return
         try:
             # 创建PowerShell进程
             self.process = QProcess(self)
@@ -65,6 +113,60 @@ class TerminalWindow(QDockWidget):
         except Exception as e:
             self.appendText(f"Error starting terminal process: {str(e)}")
             
+    def newSession(self, workingDirectory=None):
+        """
+        新建终端会话标签页
+        :param workingDirectory: 工作目录，默认为当前打开的文件夹
+        :return: TerminalSession
+        """
+        self.sessionCount += 1
+        session = TerminalSession(self.shellPool, workingDirectory)
+        title = f"Terminal {self.sessionCount}"
+        index = self.tabWidget.addTab(session, title)
+        self.tabWidget.setCurrentIndex(index)
+        session.titleChanged.connect(lambda text, session=session: self.onSessionTitleChanged(session, text))
+        session.setFocus()
+        return session
+
+    def onSessionTitleChanged(self, session, text):
+        index = self.tabWidget.indexOf(session)
+        if index < 0:
+            return
+        self.tabWidget.setTabToolTip(index, text)
+        if text:
+            self.tabWidget.setTabText(index, text if len(text) <= 24 else text[:23] + "…")
+
+    def closeSession(self, index):
+        """
+        关闭标签页并结束其中的shell
+        :param index: 标签页索引
+        """
+        session = self.tabWidget.widget(index)
+        self.tabWidget.removeTab(index)
+        if session is not None:
+            session.stop()
+            session.deleteLater()
+
+    def currentSession(self):
+        """
+        获取当前会话，没有会话时新建一个
+        """
+        session = self.tabWidget.currentWidget()
+        if session is None:
+            session = self.newSession()
+        return session
+
+    def sessions(self):
+        return [self.tabWidget.widget(i) for i in range(self.tabWidget.count())]
+
+    def setWorkingDirectory(self, path):
+        """
+        设置之后新建会话的工作目录，已打开的会话不受影响
+        :param path: 目录路径
+        """
+        if self.shellPool:
+            self.shellPool.setWorkingDirectory(path)
+
     def onProcessStarted(self):
         """
         当进程启动时调用
@@ -84,16 +186,51 @@ class TerminalWindow(QDockWidget):
         """
         # 读取进程输出
         if self.process:
-            output = self.process.readAllStandardOutput().data().decode('utf-8', errors='ignore')
+            output = self.decoder.decode(self.process.readAllStandardOutput().data())
             if output:
-                # 在终端中显示输出
-                self.appendText(output)
+                # 先放入缓冲区，由定时器合并后显示
+                self.outputBuffer.append(output.replace('\r\n', '\n'))
+                if not self.flushTimer.isActive():
+                    self.flushTimer.start()
+            
+    def flushOutput(self):
+        """
+        将缓冲区中新增的输出一次性写入视图
+        """
+        text, reset = self.outputBuffer.takePending()
+        if reset:
+            # 一帧内的输出超过了保留的行数，直接用缓冲区内容替换视图
+            self.terminalText.setPlainText(text)
+            self.__moveToEnd()
+        elif text:
+            self.__insertAtEnd(text)
             
     def appendText(self, text):
         """
         在终端中追加文本
         """
-        self.terminalText.insertPlainText(text)
+        # 先写出尚未显示的进程输出，保持顺序
+        if self.outputBuffer.hasPending():
+            self.flushTimer.stop()
+            self.flushOutput()
+        self.outputBuffer.append(text)
+        self.outputBuffer.takePending()
+        self.__insertAtEnd(text)
+        
+    def __recordInput(self, text):
+        if self.outputBuffer.hasPending():
+            self.flushTimer.stop()
+            self.flushOutput()
+        self.outputBuffer.append(text)
+        self.outputBuffer.takePending()
+        
+    def __insertAtEnd(self, text):
+        cursor = QTextCursor(self.terminalText.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.__moveToEnd()
+        
+    def __moveToEnd(self):
         # 滚动到底部
         self.terminalText.moveCursor(QTextCursor.End)
         # 更新当前命令起始位置
@@ -125,6 +262,15 @@ class TerminalWindow(QDockWidget):
         self.command_history.append(command)
         self.history_index = len(self.command_history)
         
+        if self.usePty:
+            session = self.currentSession()
+            if not session.isRunning():
+                # 当前会话的shell已经退出，在新的会话中执行
+                session = self.newSession()
+            self.tabWidget.setCurrentWidget(session)
+            session.executeCommand(command)
+            return
+        
         # 发送命令到PowerShell进程
         if self.process and self.process.state() == QProcess.Running:
             self.process.write(f"{command}\n".encode())
@@ -150,6 +296,9 @@ class TerminalWindow(QDockWidget):
                 cursor.setPosition(self.current_command_start, QTextCursor.KeepAnchor)
                 command = cursor.selectedText().strip()
                 
+                # 输入的命令已经在视图中，只需记录到缓冲区
+                self.__recordInput(cursor.selectedText())
+                
                 # 添加换行符
                 self.appendText("\n")
                 
@@ -214,13 +363,25 @@ class TerminalWindow(QDockWidget):
         """
         清空终端内容
         """
+        if self.usePty:
+            session = self.tabWidget.currentWidget()
+            if session is not None:
+                session.clear()
+            return
+        self.flushTimer.stop()
+        self.outputBuffer.clear()
         self.terminalText.clear()
         self.updatePrompt()
         
     def stopProcess(self):
         """
-        停止终端进程
+        停止终端进程，包括所有会话和池中空闲的shell
         """
+        if self.usePty:
+            for session in self.sessions():
+                session.stop()
+            self.shellPool.shutdown()
+            return
         if self.process and self.process.state() == QProcess.Running:
             self.process.terminate()
             self.process.waitForFinished(3000)  # 等待3秒
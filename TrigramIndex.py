@@ -0,0 +1,354 @@
+"""
+工作区全文搜索的三元组索引。
+
+每个文件按小写字节提取所有连续三字节（三元组），索引中保存 三元组 -> 包含它的文件编号。
+查询时从搜索文本（或正则表达式中必须出现的字面量）提取三元组，取各自文件集合的交集作为候选，
+再用内存映射逐个文件执行正则表达式确认匹配。
+
+索引保存在SQLite数据库中：files表记录路径、修改时间和大小，postings表的每行是一个三元组
+在一次写入中新增的文件编号数组。文件变化时旧编号标记为失效、分配新编号追加写入，
+失效编号或行数积累过多时合并重写。本模块只依赖标准库，提取和扫描函数在进程池中执行。
+"""
+import array
+import mmap
+import os
+import re
+import sqlite3
+
+try:
+    from re import _parser as regexParser
+except ImportError:
+    import sre_parse as regexParser
+
+INDEX_VERSION = 2
+MAX_FILE_SIZE = 16 * 1024 * 1024  # 超过该大小的文件不索引
+BINARY_PROBE = 8192  # 开头这些字节中有NUL的文件视为二进制文件，不索引
+MAX_QUERY_TRIGRAMS = 32  # 查询最多使用的三元组数
+MAX_LINE_LENGTH = 500  # 结果中保留的行文本长度
+POSTING_TYPE = 'I'
+TRIGRAM = re.compile(b'...', re.DOTALL)
+
+def trigramsOf(data):
+    """
+    提取数据中的所有三元组（按小写）
+    :param data: 字节
+    :return: 三元组集合，每个三元组为3字节的bytes
+    """
+    data = data.lower()
+    # 从三个起始偏移分别按3字节切分，切分在正则引擎中完成，比逐字节切片快
+    trigrams = set(TRIGRAM.findall(data))
+    trigrams.update(TRIGRAM.findall(data, 1))
+    trigrams.update(TRIGRAM.findall(data, 2))
+    return trigrams
+
+def readIndexable(path):
+    """
+    读取需要索引的文件
+    :return: (修改时间, 大小, 内容)，二进制或过大的文件内容为None；文件不存在时返回None
+    """
+    try:
+        stat = os.stat(path)
+        if stat.st_size > MAX_FILE_SIZE:
+            return stat.st_mtime_ns, stat.st_size, None
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b'\0' in data[:BINARY_PROBE]:
+        data = None
+    return stat.st_mtime_ns, stat.st_size, data
+
+def indexBatch(batch):
+    """
+    读取一批文件并提取三元组，在进程池中执行
+    :param batch: [(文件编号, 路径), ...]
+    :return: ([(文件编号, 路径, 修改时间, 大小, 是否已索引), ...], {三元组: 文件编号数组的字节})
+             已不存在的文件不出现在结果中
+    """
+    files = []
+    postings = {}
+    for fileId, path in batch:
+        entry = readIndexable(path)
+        if entry is None:
+            continue
+        mtime, size, data = entry
+        files.append((fileId, path, mtime, size, data is not None))
+        if data is None:
+            continue
+        for trigram in trigramsOf(data):
+            ids = postings.get(trigram)
+            if ids is None:
+                ids = postings[trigram] = array.array(POSTING_TYPE)
+            ids.append(fileId)
+    return files, {trigram: ids.tobytes() for trigram, ids in postings.items()}
+
+def literalRuns(items, runs, current):
+    """
+    收集正则表达式中必须按顺序连续出现的字面量
+    """
+    for op, value in items:
+        if op is regexParser.LITERAL:
+            current.append(chr(value))
+        elif op is regexParser.AT:
+            # 行首、单词边界等零宽断言不打断相邻的字面量
+            continue
+        elif op is regexParser.SUBPATTERN:
+            literalRuns(value[-1], runs, current)
+        else:
+            runs.append(''.join(current))
+            current.clear()
+            if op in (regexParser.MAX_REPEAT, regexParser.MIN_REPEAT) and value[0] >= 1:
+                # 至少出现一次的重复，内容中的字面量必须出现，但与前后不相邻
+                literalRuns(value[2], runs, current)
+                runs.append(''.join(current))
+                current.clear()
+
+def requiredTrigrams(text, isRegex):
+    """
+    提取匹配结果中必然包含的三元组
+    :param text: 搜索文本或正则表达式
+    :param isRegex: 是否正则表达式
+    :return: 三元组集合，无法缩小范围时返回None
+    """
+    if isRegex:
+        runs = []
+        current = []
+        try:
+            literalRuns(regexParser.parse(text), runs, current)
+        except (re.error, OverflowError, RecursionError):
+            return None
+        runs.append(''.join(current))
+    else:
+        runs = [text]
+    trigrams = set()
+    for run in runs:
+        data = run.encode('utf-8')
+        if len(data) >= 3:
+            trigrams |= trigramsOf(data)
+    if not trigrams:
+        return None
+    # 三元组越多候选越少，但读取的倒排表也越多，超过上限时取其中一部分
+    return set(sorted(trigrams)[:MAX_QUERY_TRIGRAMS])
+
+def compilePattern(text, caseSensitive, isRegex):
+    """
+    编译搜索使用的字节正则表达式
+    :raise re.error: 正则表达式无效
+    """
+    pattern = text if isRegex else re.escape(text)
+    flags = re.MULTILINE | (0 if caseSensitive else re.IGNORECASE)
+    return re.compile(pattern.encode('utf-8'), flags)
+
+def scanFiles(paths, pattern, flags, limit):
+    """
+    用内存映射逐个扫描文件，在进程池或工作线程中执行
+    :param paths: 文件路径列表
+    :param pattern: 字节正则表达式
+    :param flags: 正则表达式标志
+    :param limit: 最多返回的匹配行数
+    :return: [(路径, [(行号(从1开始), 行文本, [(开始列, 结束列), ...]), ...]), ...]
+    """
+    regex = re.compile(pattern, flags)
+    results = []
+    for path in paths:
+        if limit <= 0:
+            break
+        lines = scanFile(path, regex, limit)
+        if lines:
+            results.append((path, lines))
+            limit -= len(lines)
+    return results
+
+def scanFile(path, regex, limit):
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return matchLines(data, regex, limit)
+    except (OSError, ValueError):
+        return []
+
+def matchLines(data, regex, limit):
+    lines = []
+    lineNumber = 1
+    position = 0  # 已统计换行数的位置
+    current = None  # (行首, 行尾, 行号, 匹配范围)
+    for match in regex.finditer(data):
+        start, end = match.span()
+        if current is not None and start < current[1]:
+            # 同一行中的后续匹配
+            current[3].append((start, min(end, current[1])))
+            continue
+        if current is not None:
+            lines.append(formatLine(data, current))
+            if len(lines) >= limit:
+                return lines
+        lineNumber += data[position:start].count(b'\n')
+        position = start
+        lineStart = data.rfind(b'\n', 0, start) + 1
+        lineEnd = data.find(b'\n', start)
+        if lineEnd < 0:
+            lineEnd = len(data)
+        current = (lineStart, lineEnd, lineNumber, [(start, min(end, lineEnd))])
+    if current is not None:
+        lines.append(formatLine(data, current))
+    return lines
+
+def formatLine(data, line):
+    lineStart, lineEnd, lineNumber, spans = line
+    raw = data[lineStart:lineEnd].rstrip(b'\r')
+    # 列号按字符计算，与编辑器的列一致
+    columns = [(len(raw[:start - lineStart].decode('utf-8', 'replace')),
+                len(raw[:end - lineStart].decode('utf-8', 'replace'))) for start, end in spans]
+    return lineNumber, raw.decode('utf-8', 'replace')[:MAX_LINE_LENGTH], columns
+
+class TrigramIndex:
+    """
+    三元组索引的数据库，一个连接只能在创建它的线程中使用；
+    同一数据库可以同时有一个写入连接和多个读取连接
+    """
+    COMPACT_FLUSHES = 16  # 自上次合并以来的写入次数超过该值时合并
+    COMPACT_DEAD_RATIO = 0.25  # 失效文件占比超过该值时合并
+    QUERY_CHUNK = 500  # IN查询每次的参数个数
+
+    def __init__(self, path, root):
+        """
+        :param path: 数据库文件路径
+        :param root: 工作区根目录，与数据库中记录的不同时清空索引
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.__initSchema(root)
+
+    def __initSchema(self, root):
+        connection = self.connection
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = dict(connection.execute("SELECT key, value FROM meta"))
+        if meta.get('version') != str(INDEX_VERSION) or meta.get('root') != root:
+            connection.execute("DROP TABLE IF EXISTS files")
+            connection.execute("DROP TABLE IF EXISTS postings")
+            connection.execute("DELETE FROM meta")
+            connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                                   [('version', str(INDEX_VERSION)), ('root', root), ('flushes', '0')])
+        connection.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT, mtime INTEGER, "
+                           "size INTEGER, indexed INTEGER, live INTEGER)")
+        connection.execute("CREATE TABLE IF NOT EXISTS postings (trigram BLOB, ids BLOB)")
+        connection.execute("CREATE INDEX IF NOT EXISTS postingsTrigram ON postings (trigram)")
+        connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def commit(self):
+        self.connection.commit()
+
+    def liveFiles(self):
+        """
+        :return: {路径: (文件编号, 修改时间, 大小)}
+        """
+        return {path: (fileId, mtime, size) for fileId, path, mtime, size in
+                self.connection.execute("SELECT id, path, mtime, size FROM files WHERE live = 1")}
+
+    def nextFileId(self):
+        return (self.connection.execute("SELECT MAX(id) FROM files").fetchone()[0] or 0) + 1
+
+    def fileCount(self):
+        return self.connection.execute("SELECT COUNT(*) FROM files WHERE live = 1 AND indexed = 1").fetchone()[0]
+
+    def addFiles(self, files):
+        """
+        :param files: indexBatch返回的文件列表
+        """
+        self.connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, 1)",
+                                    [(fileId, path, mtime, size, int(indexed)) for fileId, path, mtime, size, indexed in files])
+
+    def removeFiles(self, fileIds):
+        """
+        标记文件编号失效，倒排表中的编号在合并时删除
+        """
+        self.connection.executemany("UPDATE files SET live = 0 WHERE id = ?", [(fileId,) for fileId in fileIds])
+
+    def addPostings(self, postings):
+        """
+        写入一批倒排表
+        :param postings: {三元组: 文件编号数组的字节}
+        """
+        if not postings:
+            return
+        self.connection.executemany("INSERT INTO postings VALUES (?, ?)", postings.items())
+        self.connection.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'flushes'")
+
+    def __postingIds(self, trigram):
+        ids = array.array(POSTING_TYPE)
+        for (blob,) in self.connection.execute("SELECT ids FROM postings WHERE trigram = ?", (trigram,)):
+            ids.frombytes(blob)
+        return ids
+
+    def candidates(self, trigrams):
+        """
+        查找包含所有三元组的文件
+        :param trigrams: 三元组集合，None表示所有已索引的文件
+        :return: 路径列表
+        """
+        if trigrams is None:
+            return [path for (path,) in self.connection.execute(
+                "SELECT path FROM files WHERE live = 1 AND indexed = 1 ORDER BY path")]
+        lists = sorted((self.__postingIds(trigram) for trigram in trigrams), key=len)
+        fileIds = set(lists[0])
+        for ids in lists[1:]:
+            if not fileIds:
+                break
+            fileIds.intersection_update(ids)
+        fileIds = sorted(fileIds)
+        paths = []
+        for i in range(0, len(fileIds), self.QUERY_CHUNK):
+            chunk = fileIds[i:i + self.QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            paths.extend(path for (path,) in self.connection.execute(
+                f"SELECT path FROM files WHERE live = 1 AND id IN ({placeholders})", chunk))
+        paths.sort()
+        return paths
+
+    def needsCompaction(self):
+        connection = self.connection
+        flushes = int(connection.execute("SELECT value FROM meta WHERE key = 'flushes'").fetchone()[0])
+        live, dead = connection.execute(
+            "SELECT COALESCE(SUM(live = 1), 0), COALESCE(SUM(live = 0), 0) FROM files").fetchone()
+        return flushes > self.COMPACT_FLUSHES or dead > max(live, 1) * self.COMPACT_DEAD_RATIO
+
+    def compact(self):
+        """
+        每个三元组合并为一行，去掉失效的文件编号
+        """
+        connection = self.connection
+        dead = {fileId for (fileId,) in connection.execute("SELECT id FROM files WHERE live = 0")}
+        connection.execute("DROP TABLE IF EXISTS postingsCompact")
+        connection.execute("CREATE TABLE postingsCompact (trigram BLOB, ids BLOB)")
+
+        def merged():
+            currentTrigram = None
+            ids = array.array(POSTING_TYPE)
+            for trigram, blob in connection.execute("SELECT trigram, ids FROM postings ORDER BY trigram"):
+                if trigram != currentTrigram:
+                    if ids:
+                        yield currentTrigram, ids.tobytes()
+                    currentTrigram = trigram
+                    ids = array.array(POSTING_TYPE)
+                chunk = array.array(POSTING_TYPE)
+                chunk.frombytes(blob)
+                if dead:
+                    chunk = [fileId for fileId in chunk if fileId not in dead]
+                ids.extend(chunk)
+            if ids:
+                yield currentTrigram, ids.tobytes()
+
+        connection.executemany("INSERT INTO postingsCompact VALUES (?, ?)", merged())
+        connection.execute("DROP TABLE postings")
+        connection.execute("ALTER TABLE postingsCompact RENAME TO postings")
+        connection.execute("CREATE INDEX postingsTrigram ON postings (trigram)")
+        connection.execute("DELETE FROM files WHERE live = 0")
+        connection.execute("UPDATE meta SET value = '0' WHERE key = 'flushes'")
+        connection.commit()
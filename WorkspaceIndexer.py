@@ -0,0 +1,249 @@
+from PyQt5.QtCore import *
+from concurrent.futures import BrokenExecutor, as_completed
+import os
+import time
+
+from ExclusionMatcher import ExclusionMatcher
+from ProcessPool import ProcessPool
+
+class IndexUpdateSignals(QObject):
+    """
+    索引更新任务的信号集合
+    """
+    progress = pyqtSignal(object, int, int)  # 任务, 已处理文件数, 需要处理的文件数
+    finished = pyqtSignal(object, object)  # 任务, 统计（取消或中断时为None）
+
+class IncrementalUpdateTask(QRunnable):
+    """
+    工作区索引的增量更新任务：根据修改时间和大小找出变化的文件，分批在进程池中处理。
+    子类实现openIndex和update
+    """
+    BATCH_SIZE = 32  # 每个进程池任务处理的文件数
+    LOCAL_LIMIT = 16  # 不超过该数量的文件直接在本线程中处理
+
+    def __init__(self, indexPath, root, pool, paths=None):
+        """
+        :param indexPath: 索引数据库路径
+        :param root: 工作区根目录
+        :param pool: ProcessPoolExecutor，只处理少量文件时可以为None
+        :param paths: 需要检查的文件，None表示遍历整个工作区
+        """
+        super().__init__()
+        self.indexPath = indexPath
+        self.root = root
+        self.pool = pool
+        self.paths = paths
+        self.cancelled = False
+        self.interrupted = False  # 被取消、进程池已经关闭或工作进程异常退出，没有处理完全部批次
+        self.poolBroken = False  # 进程池因工作进程异常退出而不再可用
+        self.signals = IndexUpdateSignals()
+
+    def run(self):
+        startTime = time.monotonic()
+        index = self.openIndex()
+        try:
+            stats = self.update(index)
+        finally:
+            index.close()
+        if stats is not None:
+            stats['elapsed'] = time.monotonic() - startTime
+        self.signals.finished.emit(self, stats)
+
+    def openIndex(self):
+        """
+        :return: 索引数据库
+        """
+        raise NotImplementedError
+
+    def update(self, index):
+        """
+        更新索引并提交
+        :return: 统计，取消或中断时为None
+        """
+        raise NotImplementedError
+
+    def accepts(self, path):
+        """
+        :return: 文件是否需要索引
+        """
+        return True
+
+    def changedFiles(self, known):
+        """
+        :param known: {路径: (文件编号, 修改时间, 大小, ...)}，数据库中已有的文件
+        :return: ([(需要重新处理的路径, 已有的记录或None)], 已经删除的文件编号)，取消时为(None, None)
+        """
+        changed = []
+        removed = []
+        if self.paths is None:
+            paths = (path for path in ExclusionMatcher(self.root).walkFiles() if self.accepts(path))
+            seen = set()
+        else:
+            paths = [path for path in self.paths if self.accepts(path)]
+            seen = None
+        for path in paths:
+            if self.cancelled:
+                return None, None
+            try:
+                # 无法用UTF-8表示的文件名不能存入数据库
+                path.encode('utf-8')
+                stat = os.stat(path)
+            except (OSError, UnicodeEncodeError):
+                stat = None
+            entry = known.get(path)
+            if stat is None:
+                if entry is not None:
+                    removed.append(entry[0])
+                continue
+            if seen is not None:
+                seen.add(path)
+            if entry is None or entry[1] != stat.st_mtime_ns or entry[2] != stat.st_size:
+                changed.append((path, entry))
+        if seen is not None:
+            removed.extend(entry[0] for path, entry in known.items() if path not in seen)
+        return changed, removed
+
+    def batchResults(self, function, batches, count):
+        """
+        在进程池中处理各批次，文件较少或没有进程池时在本线程中处理，按完成的顺序返回结果。
+        取消、进程池已经关闭或工作进程异常退出时提前结束并设置interrupted，已返回的结果由调用方提交
+        :param function: 处理一个批次的函数，在工作进程中执行
+        :param batches: 批次列表
+        :param count: 文件总数
+        """
+        futures = []
+        try:
+            if count <= self.LOCAL_LIMIT or self.pool is None:
+                results = (function(batch) for batch in batches)
+            else:
+                futures = [self.pool.submit(function, batch) for batch in batches]
+                results = (future.result() for future in as_completed(futures))
+            for result in results:
+                if self.cancelled:
+                    self.interrupted = True
+                    return
+                yield result
+        except ProcessPool.ERRORS as e:
+            self.interrupted = True
+            self.poolBroken = isinstance(e, BrokenExecutor)
+        finally:
+            for future in futures:
+                future.cancel()
+
+class WorkspaceIndexer(QObject):
+    """
+    工作区索引的基类：打开文件夹时在后台增量更新，保存的文件随即更新。
+    同一时间只运行一个更新任务，期间的请求合并后在它结束时执行。子类实现indexPathFor和createUpdateTask
+    """
+    indexUpdated = pyqtSignal(object)  # 更新任务的统计
+
+    MAX_WORKERS = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threadPool = QThreadPool(self)
+        self.processPool = ProcessPool(min(os.cpu_count() or 1, self.MAX_WORKERS))
+        self.root = None
+        self.indexPath = None
+        self.updateTask = None
+        self.pendingPaths = set()  # 等待更新的文件
+        self.pendingFull = False  # 是否等待全量检查
+        self.lastFullUpdate = 0
+        self.closed = False  # 已经调用shutdown，不再接受新的请求
+
+    def indexPathFor(self, root):
+        """
+        :return: 工作区的索引数据库路径
+        """
+        raise NotImplementedError
+
+    def createUpdateTask(self, paths):
+        """
+        :param paths: 需要检查的文件，None表示遍历整个工作区
+        :return: IncrementalUpdateTask
+        """
+        raise NotImplementedError
+
+    def setRoot(self, root):
+        """
+        切换工作区并在后台更新索引
+        :param root: 工作区根目录
+        """
+        root = os.path.abspath(root)
+        if root != self.root:
+            if self.updateTask is not None:
+                self.updateTask.cancelled = True
+                self.updateTask = None
+            self.root = root
+            self.indexPath = self.indexPathFor(root)
+            self.pendingPaths.clear()
+            self.pendingFull = False
+            self.lastFullUpdate = 0
+        self.refresh()
+
+    def refresh(self, paths=None):
+        """
+        增量更新索引
+        :param paths: 需要检查的文件，None表示遍历整个工作区
+        """
+        if self.root is None or self.closed:
+            return
+        if paths is None:
+            self.pendingFull = True
+        else:
+            self.pendingPaths.update(os.path.abspath(path) for path in paths
+                                     if os.path.abspath(path).startswith(self.root + os.sep))
+        self.__startUpdate()
+
+    def onFileWritten(self, path):
+        """
+        文件保存后只更新该文件
+        """
+        self.refresh([path])
+
+    def isIndexing(self):
+        return self.updateTask is not None
+
+    def updatePool(self, paths):
+        """
+        :return: 更新任务使用的进程池，少量文件在任务的线程中处理，不需要启动进程池
+        """
+        if paths is None or len(paths) > IncrementalUpdateTask.LOCAL_LIMIT:
+            return self.processPool.get()
+        return self.processPool.executor
+
+    def __startUpdate(self):
+        if self.updateTask is not None:
+            return
+        if self.pendingFull:
+            paths = None
+            self.lastFullUpdate = time.monotonic()
+        elif self.pendingPaths:
+            paths = sorted(self.pendingPaths)
+        else:
+            return
+        self.pendingFull = False
+        self.pendingPaths.clear()
+        task = self.createUpdateTask(paths)
+        task.signals.finished.connect(self.onUpdateFinished)
+        self.updateTask = task
+        self.threadPool.start(task)
+
+    def onUpdateFinished(self, task, stats):
+        self.processPool.discardBroken(task)
+        if task is not self.updateTask:
+            return
+        self.updateTask = None
+        if stats is not None:
+            self.indexUpdated.emit(stats)
+        self.__startUpdate()
+
+    def shutdown(self):
+        """
+        取消后台任务并结束进程池，退出程序前调用
+        """
+        self.closed = True
+        if self.updateTask is not None:
+            self.updateTask.cancelled = True
+        self.processPool.shutdown()
+        self.threadPool.waitForDone()
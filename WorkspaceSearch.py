@@ -0,0 +1,237 @@
+from PyQt5.QtCore import *
+from concurrent.futures import BrokenExecutor, as_completed
+import hashlib
+import os
+import time
+
+from ProcessPool import ProcessPool
+from TrigramIndex import TrigramIndex, compilePattern, indexBatch, requiredTrigrams, scanFiles
+from WorkspaceIndexer import IncrementalUpdateTask, WorkspaceIndexer
+
+class IndexUpdateTask(IncrementalUpdateTask):
+    """
+    根据修改时间增量更新索引：变化和新增的文件在进程池中重新提取三元组，删除的文件标记失效
+    """
+    BATCH_SIZE = 64  # 每个进程池任务处理的文件数
+    FLUSH_BYTES = 64 * 1024 * 1024  # 积累的倒排表超过该大小时写入数据库
+
+    def openIndex(self):
+        return TrigramIndex(self.indexPath, self.root)
+
+    @staticmethod
+    def __flush(index, pending):
+        """
+        写入尚未写入的倒排表并提交。已经写入的文件必须和它们的倒排表一起提交，
+        否则下次更新时修改时间一致不会重新读取，这些文件再也搜索不到
+        :param pending: 三元组 -> [文件编号块, ...]
+        """
+        index.addPostings({trigram: b''.join(chunks) for trigram, chunks in pending.items()})
+        index.commit()
+
+    def update(self, index):
+        changed, removed = self.changedFiles(index.liveFiles())
+        if changed is None:
+            return None
+        # 变化的文件使用新的编号重新索引，旧的编号标记失效
+        removed.extend(entry[0] for path, entry in changed if entry is not None)
+        index.removeFiles(removed)
+        nextId = index.nextFileId()
+        batches = []
+        for i in range(0, len(changed), self.BATCH_SIZE):
+            batch = changed[i:i + self.BATCH_SIZE]
+            batches.append([(nextId + j, path) for j, (path, entry) in enumerate(batch)])
+            nextId += len(batch)
+
+        # 各批次的倒排表按三元组合并后写入，数据库中每个三元组每次写入一行
+        pending = {}
+        pendingBytes = 0
+        done = 0
+        indexed = 0
+        for files, postings in self.batchResults(indexBatch, batches, len(changed)):
+            index.addFiles(files)
+            indexed += len(files)
+            for trigram, ids in postings.items():
+                pending.setdefault(trigram, []).append(ids)
+                pendingBytes += len(ids)
+            if pendingBytes > self.FLUSH_BYTES:
+                index.addPostings({trigram: b''.join(chunks) for trigram, chunks in pending.items()})
+                pending.clear()
+                pendingBytes = 0
+            done += self.BATCH_SIZE
+            self.signals.progress.emit(self, min(done, len(changed)), len(changed))
+        self.__flush(index, pending)
+        if self.interrupted:
+            return None
+        if index.needsCompaction():
+            index.compact()
+        return {'indexed': indexed, 'removed': len(removed), 'files': index.fileCount()}
+
+class SearchSignals(QObject):
+    """
+    搜索任务的信号集合
+    """
+    matchesFound = pyqtSignal(object, object)  # 任务, [(路径, [(行号, 行文本, [(开始列, 结束列), ...]), ...]), ...]
+    finished = pyqtSignal(object, object)  # 任务, 统计({'candidates', 'files', 'lines', 'truncated', 'elapsed', 'error'})
+
+class SearchTask(QRunnable):
+    """
+    用索引缩小候选文件，再在进程池中并行扫描确认，每完成一组文件发出一次结果
+    """
+    LOCAL_LIMIT = 32  # 不超过该数量的候选文件直接在本线程中扫描
+    MAX_CHUNK = 256  # 每个进程池任务扫描的最多文件数
+
+    def __init__(self, generation, indexPath, root, pool, workers, text, caseSensitive, isRegex, limit):
+        """
+        :param pool: 进程池
+        :param workers: 进程池的进程数
+        :raise re.error: 正则表达式无效
+        """
+        super().__init__()
+        self.generation = generation
+        self.indexPath = indexPath
+        self.root = root
+        self.pool = pool
+        self.workers = workers
+        self.text = text
+        self.regex = compilePattern(text, caseSensitive, isRegex)
+        self.isRegex = isRegex
+        self.limit = limit
+        self.cancelled = False
+        self.poolBroken = False  # 进程池因工作进程异常退出而不再可用
+        self.signals = SearchSignals()
+
+    def run(self):
+        startTime = time.monotonic()
+        index = TrigramIndex(self.indexPath, self.root)
+        try:
+            candidates = index.candidates(requiredTrigrams(self.text, self.isRegex))
+        finally:
+            index.close()
+
+        remaining = self.limit
+        fileCount = 0
+        pattern, flags = self.regex.pattern, self.regex.flags
+        error = None
+        futures = []
+        try:
+            if len(candidates) <= self.LOCAL_LIMIT or self.pool is None:
+                chunks = [candidates[i:i + self.LOCAL_LIMIT] for i in range(0, len(candidates), self.LOCAL_LIMIT)]
+                results = (scanFiles(chunk, pattern, flags, remaining) for chunk in chunks)
+            else:
+                # 每个进程分到多组文件，先完成的组先显示
+                size = max(8, min(self.MAX_CHUNK, len(candidates) // (self.workers * 4)))
+                futures = [self.pool.submit(scanFiles, candidates[i:i + size], pattern, flags, self.limit)
+                           for i in range(0, len(candidates), size)]
+                results = (future.result() for future in as_completed(futures))
+            for matches in results:
+                if self.cancelled:
+                    break
+                if not matches:
+                    continue
+                # 超过总数限制的部分丢弃
+                kept = []
+                for path, lines in matches:
+                    if remaining <= 0:
+                        break
+                    lines = lines[:remaining]
+                    remaining -= len(lines)
+                    kept.append((path, lines))
+                fileCount += len(kept)
+                self.signals.matchesFound.emit(self, kept)
+                if remaining <= 0:
+                    break
+        except ProcessPool.ERRORS as e:
+            self.poolBroken = isinstance(e, BrokenExecutor)
+            error = f"Search stopped: {type(e).__name__}"
+        finally:
+            for future in futures:
+                future.cancel()
+        if not self.cancelled:
+            self.signals.finished.emit(self, {
+                'candidates': len(candidates), 'files': fileCount, 'lines': self.limit - remaining,
+                'truncated': remaining <= 0, 'elapsed': time.monotonic() - startTime, 'error': error})
+
+class WorkspaceSearch(WorkspaceIndexer):
+    """
+    工作区全文搜索：打开文件夹时建立或增量更新磁盘上的三元组索引，
+    搜索在后台线程中进行，结果分批发出。索引按工作区路径保存在用户缓存目录中。
+    """
+    indexProgress = pyqtSignal(int, int)  # 已处理文件数, 需要处理的文件数
+    matchesFound = pyqtSignal(int, object)  # 查询编号, 匹配结果
+    searchFinished = pyqtSignal(int, object)  # 查询编号, 统计
+
+    MAX_RESULTS = 5000  # 每次搜索最多的匹配行数
+    REFRESH_INTERVAL = 30  # 秒，搜索时距上次全量检查超过该时间则在后台重新检查
+    MAX_WORKERS = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self.searchTask = None
+
+    @staticmethod
+    def indexPathFor(root):
+        cache = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+        digest = hashlib.blake2b(root.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(cache, 'SYide', 'search', f"{digest}.sqlite")
+
+    def setRoot(self, root):
+        """
+        切换工作区并在后台检查索引
+        :param root: 工作区根目录
+        """
+        if os.path.abspath(root) != self.root:
+            self.cancelSearch()
+        super().setRoot(root)
+
+    def createUpdateTask(self, paths):
+        task = IndexUpdateTask(self.indexPath, self.root, self.updatePool(paths), paths)
+        task.signals.progress.connect(self.onUpdateProgress)
+        return task
+
+    def onUpdateProgress(self, task, done, total):
+        if task is self.updateTask:
+            self.indexProgress.emit(done, total)
+
+    def search(self, text, caseSensitive=False, isRegex=False):
+        """
+        开始搜索，之前未完成的搜索被取消
+        :return: 查询编号，结果通过matchesFound和searchFinished发出
+        :raise re.error: 正则表达式无效
+        """
+        self.cancelSearch()
+        if self.root is None:
+            raise ValueError("No folder is open")
+        self.generation += 1
+        task = SearchTask(self.generation, self.indexPath, self.root, self.processPool.get(), self.processPool.workers,
+                          text, caseSensitive, isRegex, self.MAX_RESULTS)
+        task.signals.matchesFound.connect(self.onMatchesFound)
+        task.signals.finished.connect(self.onSearchFinished)
+        self.searchTask = task
+        self.threadPool.start(task)
+        # 外部工具修改的文件只能靠重新遍历发现
+        if time.monotonic() - self.lastFullUpdate > self.REFRESH_INTERVAL:
+            self.refresh()
+        return self.generation
+
+    def cancelSearch(self):
+        if self.searchTask is not None:
+            self.searchTask.cancelled = True
+            self.searchTask = None
+
+    def onMatchesFound(self, task, matches):
+        if task is self.searchTask:
+            self.matchesFound.emit(task.generation, matches)
+
+    def onSearchFinished(self, task, stats):
+        self.processPool.discardBroken(task)
+        if task is self.searchTask:
+            self.searchTask = None
+            self.searchFinished.emit(task.generation, stats)
+
+    def shutdown(self):
+        """
+        取消后台任务并结束进程池，退出程序前调用
+        """
+        self.cancelSearch()
+        super().shutdown()
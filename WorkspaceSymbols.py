@@ -0,0 +1,305 @@
+from PyQt5.QtCore import *
+from concurrent.futures import BrokenExecutor
+import hashlib
+import os
+
+from ProcessPool import ProcessPool
+from SymbolIndex import SymbolIndex, indexBatch, moduleName, parseSource, resolveModule
+from WorkspaceIndexer import IncrementalUpdateTask, WorkspaceIndexer
+
+class SymbolUpdateTask(IncrementalUpdateTask):
+    """
+    根据修改时间和大小找出变化的.py文件，在进程池中比较内容哈希并重新解析
+    """
+
+    def openIndex(self):
+        return SymbolIndex(self.indexPath, self.root)
+
+    def accepts(self, path):
+        return path.endswith('.py')
+
+    def update(self, index):
+        changed, removed = self.changedFiles(index.knownFiles())
+        if changed is None:
+            return None
+        index.removeFiles(removed)
+        # 内容哈希未变的文件只更新修改时间，不重新解析
+        changed = [(path, entry[3] if entry is not None else None) for path, entry in changed]
+        batches = [changed[i:i + self.BATCH_SIZE] for i in range(0, len(changed), self.BATCH_SIZE)]
+        parsed = 0
+        for batch in self.batchResults(indexBatch, batches, len(changed)):
+            parsed += index.updateFiles(batch)
+        # 中断时已经更新的文件也提交，下次更新时只检查剩余的文件
+        index.commit()
+        if self.interrupted:
+            return None
+        return {'parsed': parsed, 'removed': len(removed), 'files': index.fileCount()}
+
+class BufferParseSignals(QObject):
+    """
+    编辑器内容解析任务的信号集合
+    """
+    finished = pyqtSignal(object, object)  # 任务, (定义, 引用, 导入)，有语法错误时为None
+
+class BufferParseTask(QRunnable):
+    """
+    在进程池中解析编辑器中的内容。ast解析期间一直持有GIL，在本进程的线程中解析大文件会使界面停顿
+    """
+
+    def __init__(self, path, data, pool):
+        """
+        :param data: 编辑器内容的UTF-8字节
+        :param pool: ProcessPoolExecutor
+        """
+        super().__init__()
+        self.path = path
+        self.data = data
+        self.pool = pool
+        self.poolBroken = False  # 进程池因工作进程异常退出而不再可用
+        self.signals = BufferParseSignals()
+
+    def run(self):
+        try:
+            symbols = self.pool.submit(parseSource, self.data).result()
+        except ProcessPool.ERRORS as e:
+            self.poolBroken = isinstance(e, BrokenExecutor)
+            symbols = None
+        self.signals.finished.emit(self, symbols)
+
+class LookupSignals(QObject):
+    """
+    符号查询任务的信号集合
+    """
+    finished = pyqtSignal(object, object)  # 任务, [(路径, 行号, 列号, 优先级, 行文本)]
+
+class LookupTask(QRunnable):
+    """
+    查询定义或引用。打开的编辑器中的文件使用编辑器内容的解析结果，其余文件查询数据库。
+    定义按优先级排序：当前文件中的定义，导入所指向模块中的定义，模块级定义，其他定义
+    """
+    DEFINITION = 'definition'
+    REFERENCES = 'references'
+
+    def __init__(self, kind, name, indexPath, root, path, buffers):
+        """
+        :param kind: DEFINITION或REFERENCES
+        :param name: 名称
+        :param indexPath: 索引数据库路径，没有打开工作区时为None
+        :param path: 发起查询的文件
+        :param buffers: {路径: (符号, 内容字节)}，打开的编辑器的解析结果
+        """
+        super().__init__()
+        self.kind = kind
+        self.name = name
+        self.indexPath = indexPath
+        self.root = root
+        self.path = path
+        self.buffers = buffers
+        self.cancelled = False
+        self.signals = LookupSignals()
+
+    def run(self):
+        index = SymbolIndex(self.indexPath, self.root) if self.indexPath else None
+        try:
+            if self.kind == self.DEFINITION:
+                locations = self.__definitions(index)
+            else:
+                locations = self.__references(index)
+        finally:
+            if index is not None:
+                index.close()
+        if not self.cancelled:
+            self.signals.finished.emit(self, self.__withLineText(locations))
+
+    def __moduleOf(self, path):
+        if self.root is None or not path.startswith(self.root + os.sep):
+            return None
+        return moduleName(self.root, path)
+
+    def __allDefinitions(self, index, name):
+        """
+        :return: [(路径, 模块名, 限定名, 行号, 列号, 嵌套深度)]
+        """
+        found = []
+        if index is not None:
+            found.extend((path, module, qualname, line, column, depth) for path, module, _, qualname, kind, line, column, _, depth
+                         in index.definitions(name, self.buffers))
+        for path, (symbols, data) in self.buffers.items():
+            found.extend((path, self.__moduleOf(path), qualname, line, column, depth)
+                         for definitionName, qualname, kind, line, column, _, depth in symbols[0] if definitionName == name)
+        return found
+
+    def __definitions(self, index):
+        name = self.name
+        current = self.buffers.get(self.path)
+        symbols = current[0] if current is not None else (index.fileSymbols(self.path) if index is not None else None)
+        imports = {alias: (module, importedName) for alias, module, importedName in (symbols[2] if symbols else ())}
+        ranked = []
+        target = None
+        if name in imports:
+            module, importedName = imports[name]
+            currentModule = self.__moduleOf(self.path) or ''
+            target = resolveModule(module, currentModule, os.path.basename(self.path) == '__init__.py')
+            if importedName:
+                # from x import y 的y也可能是子模块
+                modules = [target + '.' + importedName]
+            else:
+                modules = [target]
+            if index is not None:
+                for modulePath in index.moduleDefinitions(modules).values():
+                    ranked.append((modulePath, 1, 0, 1))
+            if importedName:
+                name = importedName
+            else:
+                target = None
+        for path, module, qualname, line, column, depth in self.__allDefinitions(index, name):
+            if path == self.path:
+                rank = 0
+            elif target and module and depth == 0 and (module == target or module.endswith('.' + target)):
+                rank = 1
+            elif depth == 0:
+                rank = 2
+            else:
+                rank = 3
+            ranked.append((path, line, column, rank))
+        ranked.sort(key=lambda location: (location[3], location[0], location[1]))
+        return ranked
+
+    def __references(self, index):
+        found = list(index.references(self.name, self.buffers)) if index is not None else []
+        for path, (symbols, data) in self.buffers.items():
+            found.extend((path, line, column) for name, line, column in symbols[1] if name == self.name)
+        found.sort()
+        return [(path, line, column, 0) for path, line, column in found]
+
+    def __withLineText(self, locations):
+        lines = {}
+        result = []
+        for path, line, column, rank in locations:
+            if path not in lines:
+                if path in self.buffers:
+                    data = self.buffers[path][1]
+                else:
+                    try:
+                        with open(path, 'rb') as f:
+                            data = f.read()
+                    except OSError:
+                        data = b''
+                lines[path] = data.splitlines()
+            fileLines = lines[path]
+            text = fileLines[line - 1].decode('utf-8', 'replace') if 0 < line <= len(fileLines) else ''
+            result.append((path, line, column, rank, text))
+        return result
+
+class WorkspaceSymbols(WorkspaceIndexer):
+    """
+    工作区符号索引：打开文件夹时在后台增量更新工作区下的符号数据库，保存的文件随即更新；
+    打开的编辑器在停止输入时重新解析，查询时代替数据库中的内容
+    """
+    bufferParsed = pyqtSignal(str, object)  # 文件路径, 定义列表
+    lookupFinished = pyqtSignal(str, str, object)  # 查询类型, 名称, [(路径, 行号, 列号, 优先级, 行文本)]
+    workerFailed = pyqtSignal(str)  # 解析进程异常退出的消息
+
+    INDEX_DIRECTORY = '.syide'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 更新索引可能持续较长时间，解析和查询使用单独的线程池，不在其后排队
+        self.threadPool.setMaxThreadCount(1)
+        self.queryPool = QThreadPool(self)
+        self.buffers = {}  # 路径 -> (符号, 内容字节)，打开的编辑器最近一次成功解析的结果
+        self.parseTasks = {}  # 路径 -> 正在解析的BufferParseTask
+        self.lookupTask = None
+
+    @classmethod
+    def indexPathFor(cls, root):
+        """
+        索引保存在工作区的.syide目录中，工作区不可写时保存在用户缓存目录中
+        """
+        directory = os.path.join(root, cls.INDEX_DIRECTORY)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            ignoreFile = os.path.join(directory, '.gitignore')
+            if not os.path.exists(ignoreFile):
+                with open(ignoreFile, 'w') as f:
+                    f.write('*\n')
+            return os.path.join(directory, 'symbols.sqlite')
+        except OSError:
+            cache = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+            digest = hashlib.blake2b(root.encode('utf-8'), digest_size=16).hexdigest()
+            return os.path.join(cache, 'SYide', 'symbols', f"{digest}.sqlite")
+
+    def createUpdateTask(self, paths):
+        return SymbolUpdateTask(self.indexPath, self.root, self.updatePool(paths), paths)
+
+    def updateBuffer(self, path, data):
+        """
+        在后台重新解析编辑器的内容，在停止输入时调用
+        :param path: 文件路径
+        :param data: 编辑器内容的UTF-8字节
+        """
+        # 关闭前排队的文件加载完成事件可能在shutdown之后才触发解析
+        if self.closed:
+            return
+        task = BufferParseTask(os.path.abspath(path), data, self.processPool.get())
+        task.signals.finished.connect(self.onBufferParsed)
+        self.parseTasks[task.path] = task
+        self.queryPool.start(task)
+
+    def onBufferParsed(self, task, symbols):
+        if self.processPool.discardBroken(task):
+            self.workerFailed.emit(f"Symbol parser process exited unexpectedly while parsing {task.path}, "
+                                   "it will be restarted for the next parse")
+        if self.parseTasks.get(task.path) is not task:
+            return
+        del self.parseTasks[task.path]
+        # 有语法错误时保留上一次的解析结果
+        if symbols is not None:
+            self.buffers[task.path] = (symbols, task.data)
+        if task.path in self.buffers:
+            self.bufferParsed.emit(task.path, self.buffers[task.path][0][0])
+
+    def bufferDefinitions(self, path):
+        """
+        :return: 编辑器内容中的定义，尚未解析时返回None
+        """
+        entry = self.buffers.get(os.path.abspath(path))
+        return entry[0][0] if entry is not None else None
+
+    def discardBuffer(self, path):
+        """
+        编辑器关闭后查询改用数据库中的内容
+        """
+        path = os.path.abspath(path)
+        self.buffers.pop(path, None)
+        self.parseTasks.pop(path, None)
+
+    def findDefinitions(self, name, path):
+        self.__lookup(LookupTask.DEFINITION, name, path)
+
+    def findReferences(self, name, path):
+        self.__lookup(LookupTask.REFERENCES, name, path)
+
+    def __lookup(self, kind, name, path):
+        if self.closed:
+            return
+        if self.lookupTask is not None:
+            self.lookupTask.cancelled = True
+        task = LookupTask(kind, name, self.indexPath, self.root, os.path.abspath(path), dict(self.buffers))
+        task.signals.finished.connect(self.onLookupFinished)
+        self.lookupTask = task
+        self.queryPool.start(task)
+
+    def onLookupFinished(self, task, locations):
+        if task is self.lookupTask:
+            self.lookupTask = None
+            self.lookupFinished.emit(task.kind, task.name, locations)
+
+    def shutdown(self):
+        """
+        取消后台任务并结束进程池，退出程序前调用
+        """
+        if self.lookupTask is not None:
+            self.lookupTask.cancelled = True
+        super().shutdown()
+        self.queryPool.waitForDone()